@@ -0,0 +1,249 @@
+"""Shared helpers for the standalone benchmark scripts.
+
+Run any benchmark from the repo root with ``PYTHONPATH=src python benchmarks/<name>.py``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import enum
+import importlib
+import pkgutil
+import statistics
+import time
+import typing
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator, Mapping
+from contextlib import asynccontextmanager, contextmanager
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urlencode
+
+from starlette.types import ASGIApp, Message, Scope
+
+if TYPE_CHECKING:
+    from fastapi.dependencies.models import Dependant
+    from fastapi.routing import APIRoute
+
+    from utils.live_server import LiveServer
+
+_SAMPLES: dict[Any, str] = {int: "1", float: "1.0", bool: "true", str: "warmup"}
+
+
+@contextmanager
+def serve(app_path: str, *args: str, env: dict[str, str] | None = None) -> Iterator[LiveServer]:
+    """Serve ``module:app`` with uvicorn in a subprocess on an ephemeral port.
+
+    See ``utils.live_server.LiveServer``: the OS picks the port, and the server is ready
+    once uvicorn logs it. A separate process keeps the server off the benchmark's GIL.
+    ``args`` are extra uvicorn arguments; ``env`` adds environment variables.
+    """
+    # Imported here: ``bench_asgi.py --compare`` imports this module with an older
+    # revision's ``src`` on the path, which may not have ``utils.live_server``.
+    from utils.live_server import LiveServer
+
+    server = LiveServer(app_path, args, env).start(timeout=60)
+    try:
+        yield server
+    finally:
+        server.stop()
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> list[float]:
+    """Call ``fn`` ``repeat`` times and return per-call latencies in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def summarize(label: str, timings: list[float]) -> str:
+    """Format mean/p50/p99 latency (ms) and throughput for a list of timings."""
+    ordered = sorted(timings)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    total = sum(timings)
+    return (
+        f"{label:<40} mean={statistics.fmean(timings) * 1e3:8.3f}ms "
+        f"p50={statistics.median(timings) * 1e3:8.3f}ms p99={p99 * 1e3:8.3f}ms "
+        f"rate={len(timings) / total:10.1f}/s"
+    )
+
+
+def asgi_scope(
+    method: str,
+    path: str,
+    params: Mapping[str, str] | None = None,
+    headers: Mapping[str, str] | None = None,
+) -> Scope:
+    """Build an HTTP scope as uvicorn would for a request from ``127.0.0.1``.
+
+    ``host`` and ``user-agent`` are sent like any client sends them, unless overridden.
+    """
+    merged = {"host": "bench", "user-agent": "bench/1.0"}
+    merged.update((k.lower(), v) for k, v in (headers or {}).items())
+    raw_headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in merged.items()]
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": urlencode(params or {}, doseq=True).encode(),
+        "headers": raw_headers,
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+
+
+async def call_asgi(app: ASGIApp, scope: Scope, body: bytes = b"") -> tuple[int, int]:
+    """Send one request straight to ``app``; return the status and the body size.
+
+    No sockets, threads or client objects: ``receive`` hands over ``body`` and then
+    blocks until the response is complete, like a client that stays connected.
+    """
+    status = sent = 0
+    done = asyncio.Event()
+    request: list[Message] = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive() -> Message:
+        if request:
+            return request.pop()
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Message) -> None:
+        nonlocal status, sent
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            sent += len(message.get("body", b""))
+            if not message.get("more_body", False):
+                done.set()
+
+    try:
+        await app(dict(scope), receive, send)
+    finally:
+        done.set()
+    return status, sent
+
+
+def study_apps(names: Iterable[str] = ()) -> dict[str, Any]:
+    """Return ``{module: app}`` for the ``study_fastapi`` modules that define a FastAPI app.
+
+    ``names`` limits the search to those modules; empty means every module.
+    """
+    from fastapi import FastAPI
+
+    import study_fastapi
+
+    wanted = set(names)
+    found = {}
+    for info in pkgutil.iter_modules(study_fastapi.__path__):
+        if wanted and info.name not in wanted:
+            continue
+        app = getattr(importlib.import_module(f"study_fastapi.{info.name}"), "app", None)
+        if isinstance(app, FastAPI):
+            found[info.name] = app
+    return found
+
+
+def _sample(annotation: Any) -> str:
+    for candidate in (annotation, *typing.get_args(annotation)):
+        if isinstance(candidate, type) and issubclass(candidate, enum.Enum):
+            return str(next(iter(candidate)).value)
+        if candidate in _SAMPLES:
+            return _SAMPLES[candidate]
+    return "1"
+
+
+def _accepts_null(annotation: Any) -> bool:
+    from pydantic import TypeAdapter, ValidationError
+    from pydantic.errors import PydanticSchemaGenerationError
+
+    try:
+        TypeAdapter(annotation).validate_python(None)
+    except (ValidationError, PydanticSchemaGenerationError):
+        return False
+    return True
+
+
+def _dependants(dependant: Dependant) -> Iterator[Dependant]:
+    yield dependant
+    for sub in dependant.dependencies:
+        yield from _dependants(sub)
+
+
+def _synthetic_request(route: APIRoute) -> tuple[Scope, bytes] | None:
+    methods = route.methods or {"GET"}
+    path_values: dict[str, str] = {}
+    params: dict[str, str] = {}
+    headers: dict[str, str] = {}
+    cookies: dict[str, str] = {}
+    has_required_body = accepts_null = False
+    for dependant in _dependants(route.dependant):
+        for param in dependant.path_params:
+            path_values[param.alias] = _sample(param.field_info.annotation)
+        for found, values in (
+            (dependant.query_params, params),
+            (dependant.header_params, headers),
+            (dependant.cookie_params, cookies),
+        ):
+            for param in found:
+                if param.field_info.is_required():
+                    values[param.alias] = _sample(param.field_info.annotation)
+        for param in dependant.body_params:
+            if param.field_info.is_required():
+                has_required_body = True
+                accepts_null |= _accepts_null(param.field_info.annotation)
+    body = b""
+    if "GET" in methods:
+        method = "GET"
+    elif has_required_body and not accepts_null:
+        method, body = sorted(methods)[0], b"null"
+        headers["content-type"] = "application/json"
+    else:
+        return None
+    if cookies:
+        headers["cookie"] = "; ".join(f"{k}={v}" for k, v in cookies.items())
+    return asgi_scope(method, route.path_format.format(**path_values), params, headers), body
+
+
+def synthetic_requests(app: Any) -> list[tuple[str, Scope, bytes]]:
+    """Return ``(route path, scope, body)`` for every route the startup warm-up would call.
+
+    GETs get sample values for their required path, query, header and cookie parameters;
+    other methods are sent a ``null`` body when their required body rejects it (and are
+    left out otherwise), as ``study_fastapi.warmup.synthetic_request`` does. The requests
+    are built here from each ``APIRoute.dependant``, not with that module, so
+    ``bench_asgi.py --compare`` also runs against revisions that predate it.
+    """
+    from fastapi.routing import APIRoute
+
+    requests = []
+    for route in app.routes:
+        if isinstance(route, APIRoute) and (request := _synthetic_request(route)) is not None:
+            scope, body = request
+            requests.append((route.path, scope, body))
+    return requests
+
+
+@asynccontextmanager
+async def asgi_lifespan(app: ASGIApp) -> AsyncIterator[None]:
+    """Run ``app``'s lifespan startup on entry and its shutdown on exit."""
+    inbox: asyncio.Queue[Message] = asyncio.Queue()
+    outbox: asyncio.Queue[Message] = asyncio.Queue()
+    scope = {"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}
+    task = asyncio.create_task(app(scope, inbox.get, outbox.put))
+    await inbox.put({"type": "lifespan.startup"})
+    started = await outbox.get()
+    if started["type"] != "lifespan.startup.complete":
+        raise RuntimeError(f"lifespan startup failed: {started.get('message', '')}")
+    try:
+        yield
+    finally:
+        await inbox.put({"type": "lifespan.shutdown"})
+        await outbox.get()
+        await task
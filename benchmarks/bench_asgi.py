@@ -0,0 +1,205 @@
+"""Per-route CPU time and allocations of every ``study_fastapi`` app, driven in-process.
+
+Each app's ASGI callable is called directly with synthetic scopes and ``receive``/``send``
+functions (``_common.call_asgi``). There is no uvicorn, socket, ``TestClient`` or client
+thread, so only the app's own work is measured. Every route that the startup warm-up
+would call gets the same synthetic request (``_common.synthetic_requests``): GETs with
+sample path/query/header values, and other methods with a ``null`` body, which fails
+validation. Routes that don't answer within a second (streams) are skipped.
+
+For each route the harness reports:
+
+- ``cpu_us``: process CPU time per request over ``--requests`` calls, the best of
+  ``--repeat`` rounds (as ``timeit`` does; sync routes hop to the threadpool, and the
+  spread between rounds is large)
+- ``peak_kib``: the most memory held at once during one request (tracemalloc), above
+  what was held before it
+- ``retained_b``: memory still held per request after a batch (caches, leaks)
+
+Apps run with ``APP_WARM=0`` (the harness warms each route itself) and their lifespan
+started. ``--compare A [B]`` checks out each git revision into a temporary worktree and
+runs this script against it (``B`` defaults to the working tree). It then prints both
+results side by side, with the relative change in CPU time. The harness is always the
+working tree's and imports nothing from the measured ``src`` but the apps, so any revision
+can be compared, including ones from before ``study_fastapi.warmup`` existed.
+
+Usage::
+
+    PYTHONPATH=src python benchmarks/bench_asgi.py [--requests N] [--module NAME ...]
+    PYTHONPATH=src python benchmarks/bench_asgi.py --json results.json
+    PYTHONPATH=src python benchmarks/bench_asgi.py --compare HEAD~5 [HEAD]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from _common import asgi_lifespan, call_asgi, study_apps, synthetic_requests
+
+ROOT = Path(__file__).resolve().parents[1]
+PROBE_TIMEOUT = 1.0
+
+
+@dataclass(frozen=True)
+class RouteResult:
+    """Measurements for one route of one app."""
+
+    module: str
+    method: str
+    path: str
+    status: int
+    cpu_us: float
+    peak_kib: float
+    retained_b: float
+
+    @property
+    def key(self) -> tuple[str, str, str]:
+        """Identify the route across revisions."""
+        return self.module, self.method, self.path
+
+
+async def _measure(
+    app: Any, scope: dict[str, Any], body: bytes, count: int, repeat: int
+) -> tuple[int, float, float, float]:
+    status, _ = await call_asgi(app, scope, body)
+    for _ in range(2):
+        await call_asgi(app, scope, body)
+    rounds = []
+    for _ in range(repeat):
+        start = time.process_time()
+        for _ in range(count):
+            await call_asgi(app, scope, body)
+        rounds.append((time.process_time() - start) * 1e6 / count)
+    cpu_us = min(rounds)
+
+    samples = max(1, count // 10)
+    tracemalloc.start()
+    try:
+        before_batch = tracemalloc.get_traced_memory()[0]
+        peak = 0
+        for _ in range(samples):
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            await call_asgi(app, scope, body)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+        retained = (tracemalloc.get_traced_memory()[0] - before_batch) / samples
+    finally:
+        tracemalloc.stop()
+    return status, cpu_us, peak / 1024, retained
+
+
+async def run(names: list[str], count: int, repeat: int = 5) -> list[RouteResult]:
+    """Measure every route of the selected apps (all apps when ``names`` is empty)."""
+    results = []
+    for module, app in study_apps(names).items():
+        async with asgi_lifespan(app):
+            for path, scope, body in synthetic_requests(app):
+                try:
+                    await asyncio.wait_for(call_asgi(app, scope, body), PROBE_TIMEOUT)
+                except TimeoutError:
+                    print(
+                        f"skipped {module} {scope['method']} {path}: no response", file=sys.stderr
+                    )
+                    continue
+                status, cpu_us, peak_kib, retained = await _measure(app, scope, body, count, repeat)
+                results.append(
+                    RouteResult(module, scope["method"], path, status, cpu_us, peak_kib, retained)
+                )
+    return results
+
+
+def _print(results: list[RouteResult]) -> None:
+    print(f"{'route':<48} {'status':>6} {'cpu_us':>9} {'peak_kib':>9} {'retained_b':>10}")
+    for r in results:
+        route = f"{r.module} {r.method} {r.path}"
+        print(
+            f"{route:<48} {r.status:>6} {r.cpu_us:>9.1f} {r.peak_kib:>9.1f} {r.retained_b:>10.0f}"
+        )
+
+
+def _run_revision(revision: str | None, args: list[str]) -> list[RouteResult]:
+    """Run this script against ``revision`` (``None``: the working tree) in a subprocess."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tree = ROOT
+        if revision is not None:
+            tree = Path(tmp) / "tree"
+            subprocess.run(
+                ["git", "worktree", "add", "--detach", "--quiet", str(tree), revision],
+                cwd=ROOT,
+                check=True,
+            )
+        try:
+            output = Path(tmp) / "results.json"
+            subprocess.run(
+                [sys.executable, __file__, *args, "--json", str(output)],
+                cwd=tree,
+                env={**os.environ, "PYTHONPATH": str(tree / "src")},
+                stdout=subprocess.DEVNULL,
+                check=True,
+            )
+            return [RouteResult(**row) for row in json.loads(output.read_text())]
+        finally:
+            if revision is not None:
+                subprocess.run(["git", "worktree", "remove", "--force", str(tree)], cwd=ROOT)
+
+
+def compare(base: str, head: str | None, args: list[str]) -> None:
+    """Print per-route results of ``base`` and ``head`` side by side."""
+    before = {r.key: r for r in _run_revision(base, args)}
+    after = {r.key: r for r in _run_revision(head, args)}
+    label = head or "working tree"
+    print(f"cpu_us and peak_kib per request: {base} -> {label}")
+    print(f"{'route':<48} {'cpu_us':>19} {'change':>8} {'peak_kib':>17}")
+    for key in sorted(before.keys() | after.keys()):
+        route = " ".join(key)
+        old, new = before.get(key), after.get(key)
+        if old is None or new is None:
+            print(f"{route:<48} {'only in ' + (base if new is None else label):>19}")
+            continue
+        change = (new.cpu_us - old.cpu_us) / old.cpu_us * 100
+        print(
+            f"{route:<48} {old.cpu_us:>8.1f} -> {new.cpu_us:>7.1f} {change:>+7.1f}% "
+            f"{old.peak_kib:>7.1f} -> {new.peak_kib:>6.1f}"
+        )
+
+
+def main() -> None:
+    """Parse the command line; see the module docstring."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="timed calls per round")
+    parser.add_argument("--repeat", type=int, default=5, help="rounds per route (best kept)")
+    parser.add_argument("--module", action="append", default=[], help="app module(s)")
+    parser.add_argument("--json", type=Path, help="also write the results here")
+    parser.add_argument("--compare", nargs="+", metavar="REV", help="base [head] revisions")
+    args = parser.parse_args()
+    if args.compare:
+        if len(args.compare) > 2:
+            parser.error("--compare takes one or two revisions")
+        forwarded = [
+            f"--requests={args.requests}",
+            f"--repeat={args.repeat}",
+            *(f"--module={m}" for m in args.module),
+        ]
+        head = args.compare[1] if len(args.compare) == 2 else None
+        compare(args.compare[0], head, forwarded)
+        return
+    os.environ.setdefault("APP_WARM", "0")
+    results = asyncio.run(run(args.module, args.requests, args.repeat))
+    _print(results)
+    if args.json:
+        args.json.write_text(json.dumps([asdict(r) for r in results], indent=1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark per-worker memory and startup time: in-memory list vs mmap snapshot.
+
+Writes ``rows`` sellers both as a JSON array and as a catalogue snapshot, then starts
+``workers`` processes at once for each mode. Each process loads the catalogue and reads
+every record once (as serving ``/sellers`` would), then reports its startup time and
+memory while all the workers are still alive. Startup excludes imports:
+
+- ``list``: validate the JSON file into a list of models (what a hardcoded or
+  JSON-loaded catalogue costs every worker)
+- ``snapshot``: open a ``SnapshotCatalogue``; its pages are shared via the page cache
+
+``Pss`` charges shared pages proportionally to the processes mapping them, so it shows
+what each worker really adds. Linux only (reads ``/proc/self/smaps_rollup``).
+
+Usage: ``PYTHONPATH=src python benchmarks/bench_catalogue.py [rows] [workers]``
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from pydantic import TypeAdapter
+
+from study_fastapi.a5_pydantic_model import Seller
+from study_fastapi.catalogue import write_snapshot
+
+WORKER = """
+import sys, time
+from pydantic import TypeAdapter
+from study_fastapi.a5_pydantic_model import Seller
+from study_fastapi.catalogue import SnapshotCatalogue
+mode, path = sys.argv[1:3]
+start = time.perf_counter()
+if mode == "list":
+    catalogue = TypeAdapter(list[Seller]).validate_json(open(path, "rb").read())
+else:
+    catalogue = SnapshotCatalogue(path, Seller)
+ready = time.perf_counter() - start
+start = time.perf_counter()
+touched = sum(len(seller.name) for seller in catalogue)
+scan = time.perf_counter() - start
+memory = dict(
+    (line.split(":")[0], int(line.split()[1]) // 1024)
+    for line in open("/proc/self/smaps_rollup") if line.split()[-1] == "kB"
+)
+private = memory["Private_Clean"] + memory["Private_Dirty"]
+print(f"{ready:.3f} {scan:.3f} {memory['Rss']} {memory['Pss']} {private}", flush=True)
+sys.stdin.read()
+"""
+
+
+def _sellers(count: int):
+    for index in range(count):
+        yield Seller(
+            name=f"Seller {index}",
+            country="IN",
+            shipping_port="Chennai" if index % 3 else None,
+            shop_description="Apparels seller with a reasonably long description",
+            aka=f"Seller {index} handwoven factory",
+        )
+
+
+def _run(mode: str, path: Path, workers: int) -> list[list[float]]:
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER, mode, str(path)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(workers)
+    ]
+    results = [[float(v) for v in proc.stdout.readline().split()] for proc in procs]  # type: ignore[union-attr]
+    for proc in procs:
+        proc.communicate("")
+    return results
+
+
+def main(rows: int = 1_000_000, workers: int = 2) -> None:
+    """Print startup and full-scan seconds and RSS/PSS/private MiB per worker and mode."""
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = Path(directory) / "sellers.json"
+        snapshot_path = Path(directory) / "sellers.snap"
+        start = time.perf_counter()
+        json_path.write_bytes(TypeAdapter(list[Seller]).dump_json(list(_sellers(rows))))
+        write_snapshot(snapshot_path, Seller, _sellers(rows))
+        print(
+            f"{rows:,} sellers written in {time.perf_counter() - start:.1f}s: "
+            f"json={json_path.stat().st_size / 2**20:.0f}MiB "
+            f"snapshot={snapshot_path.stat().st_size / 2**20:.0f}MiB"
+        )
+        for mode, path in (("list", json_path), ("snapshot", snapshot_path)):
+            for number, (ready, scan, rss, pss, private) in enumerate(_run(mode, path, workers)):
+                print(
+                    f"{mode:<8} worker {number}: startup={ready:6.3f}s scan={scan:6.3f}s "
+                    f"rss={rss:6.0f}MiB pss={pss:6.0f}MiB private={private:6.0f}MiB"
+                )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,178 @@
+"""Stress a writable catalogue with mixed reads and writes through a saturated threadpool.
+
+Runs ``clients`` concurrent client loops against an in-process app whose sync routes read
+one buyer, list them all or write one. Each loop picks 90% single reads, 9% writes
+(``PUT``) and 1% full listings. With far more clients than Starlette's threadpool has
+threads (40), every thread is busy and requests queue for one. Catalogue variants:
+
+- ``striped``: ``VersionedCatalogue`` as shipped (16 write stripes, lock-free reads)
+- ``one stripe``: the same with a single write stripe
+- ``global lock``: every read and write holds one lock (the naive fix)
+
+Prints requests/s and p50/p99 latency per kind, and checks the catalogue is consistent
+afterwards (every write logged once, in version order). A second round runs the same mix
+on 40 threads calling the catalogue directly, where lock waits are not hidden behind
+request handling.
+
+Usage: ``PYTHONPATH=src python benchmarks/bench_catalogue_stress.py [seconds] [clients]``
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import statistics
+import sys
+import threading
+import time
+from collections.abc import Iterator
+
+import httpx
+from fastapi import FastAPI
+
+from study_fastapi.a5_pydantic_model import Buyer
+from study_fastapi.changefeed import Change, VersionedCatalogue
+
+ROWS = 2_000
+WRITE_TOKEN = "stress"
+
+
+class GlobalLockCatalogue(VersionedCatalogue[Buyer]):
+    """Every read and write under one lock."""
+
+    def __init__(self, *args, **kwargs) -> None:  # type: ignore[no-untyped-def]
+        super().__init__(*args, **kwargs)
+        self._global = threading.RLock()
+
+    def get(self, key: str) -> Buyer | None:  # noqa: D102
+        with self._global:
+            return super().get(key)
+
+    def __iter__(self) -> Iterator[Buyer]:  # noqa: D105
+        with self._global:
+            return iter(list(super().__iter__()))
+
+    def _write(self, key: str, record: Buyer | None) -> Change[Buyer] | None:
+        with self._global:
+            return super()._write(key, record)
+
+
+def _app(catalogue: VersionedCatalogue[Buyer]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/buyers/one/{name}")
+    def one(name: str) -> Buyer | None:
+        return catalogue.get(name)
+
+    @app.get("/buyers", response_model=list[Buyer])
+    def every() -> VersionedCatalogue[Buyer]:
+        return catalogue
+
+    app.include_router(catalogue.router("/buyers", write_token=WRITE_TOKEN))
+    return app
+
+
+async def _client(
+    http: httpx.AsyncClient, deadline: float, seed: int, timings: dict[str, list[float]]
+) -> None:
+    generator = random.Random(seed)
+    while time.perf_counter() < deadline:
+        name = f"b{generator.randrange(ROWS)}"
+        roll = generator.random()
+        start = time.perf_counter()
+        if roll < 0.9:
+            kind = "read"
+            response = await http.get(f"/buyers/one/{name}")
+        elif roll < 0.99:
+            kind = "write"
+            body = {"name": name, "country": "IN", "zipcode": str(seed)}
+            response = await http.put(f"/buyers/{name}", json=body)
+        else:
+            kind = "list"
+            response = await http.get("/buyers")
+        response.raise_for_status()
+        timings[kind].append(time.perf_counter() - start)
+
+
+async def _run(catalogue: VersionedCatalogue[Buyer], seconds: float, clients: int) -> None:
+    timings: dict[str, list[float]] = {"read": [], "write": [], "list": []}
+    transport = httpx.ASGITransport(app=_app(catalogue))
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://stress",
+        headers={"Authorization": f"Bearer {WRITE_TOKEN}"},
+    ) as http:
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(*(_client(http, deadline, n, timings) for n in range(clients)))
+    total = sum(len(samples) for samples in timings.values())
+    summary = [f"{total / seconds:7.0f} req/s"]
+    for kind, samples in timings.items():
+        if len(samples) > 1:
+            cuts = statistics.quantiles(samples, n=100)
+            summary.append(f"{kind} p50={cuts[49] * 1e3:6.1f}ms p99={cuts[98] * 1e3:6.1f}ms")
+    versions = [change.version for change in catalogue._log]
+    consistent = versions == list(range(versions[0], catalogue.version + 1))
+    consistent = consistent and len(catalogue) == len(list(catalogue)) == ROWS
+    summary.append("consistent" if consistent else "INCONSISTENT")
+    print("  ".join(summary))
+
+
+def _direct(catalogue: VersionedCatalogue[Buyer], seconds: float, threads: int = 40) -> None:
+    # The same mix without HTTP: threads call the catalogue directly, so lock waits are not
+    # hidden behind request handling.
+    timings: dict[str, list[float]] = {"read": [], "write": [], "list": []}
+    deadline = time.perf_counter() + seconds
+
+    def worker(seed: int) -> None:
+        generator = random.Random(seed)
+        local: dict[str, list[float]] = {"read": [], "write": [], "list": []}
+        while time.perf_counter() < deadline:
+            name = f"b{generator.randrange(ROWS)}"
+            roll = generator.random()
+            start = time.perf_counter()
+            if roll < 0.9:
+                kind = "read"
+                catalogue.get(name)
+            elif roll < 0.99:
+                kind = "write"
+                catalogue.upsert(Buyer(name=name, country="IN", zipcode=str(seed)))
+            else:
+                kind = "list"
+                sum(1 for _ in catalogue)
+            local[kind].append(time.perf_counter() - start)
+        for kind, samples in local.items():
+            timings[kind].extend(samples)
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    total = sum(len(samples) for samples in timings.values())
+    summary = [f"{total / seconds:9.0f} ops/s"]
+    for kind, samples in timings.items():
+        cuts = statistics.quantiles(samples, n=100)
+        summary.append(f"{kind} p50={cuts[49] * 1e6:6.0f}us p99={cuts[98] * 1e6:7.0f}us")
+    print("  ".join(summary))
+
+
+def main(seconds: float = 5.0, clients: int = 200) -> None:
+    """Print throughput and latency per catalogue variant, over HTTP and direct."""
+    base = [Buyer(name=f"b{i}", country="IN", zipcode=str(i)) for i in range(ROWS)]
+    variants = {
+        "striped": VersionedCatalogue(Buyer, "name", base),
+        "one stripe": VersionedCatalogue(Buyer, "name", base, stripes=1),
+        "global lock": GlobalLockCatalogue(Buyer, "name", base),
+    }
+    print(f"HTTP: {clients} clients for {seconds:.0f}s each, {ROWS:,} buyers")
+    for label, catalogue in variants.items():
+        print(f"{label:<12}", end=" ", flush=True)
+        asyncio.run(_run(catalogue, seconds, clients))
+    print(f"direct: 40 threads for {seconds:.0f}s each")
+    for label, catalogue in variants.items():
+        print(f"{label:<12}", end=" ", flush=True)
+        _direct(catalogue, seconds)
+
+
+if __name__ == "__main__":
+    main(*(float(arg) if i == 0 else int(arg) for i, arg in enumerate(sys.argv[1:])))
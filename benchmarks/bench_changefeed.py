@@ -0,0 +1,62 @@
+"""Benchmark keeping a client in sync: re-fetching ``/sellers`` vs ``/sellers/changes``.
+
+Between two polls, ``writes`` of the ``rows`` sellers are updated. Each poll either
+downloads the whole catalogue (``GET /sellers``) or only the delta since the client's
+last version (``GET /sellers/changes?since=``). Both go through the app in-process, so
+the timings are server plus client CPU per poll; the byte counts are the response bodies.
+
+Usage: ``PYTHONPATH=src python benchmarks/bench_changefeed.py [rows] [writes] [polls]``
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from study_fastapi.a5_pydantic_model import Seller
+from study_fastapi.changefeed import VersionedCatalogue
+
+
+def _seller(index: int, revision: int = 0) -> Seller:
+    return Seller(
+        name=f"Seller {index}",
+        country="IN",
+        shipping_port="Chennai",
+        shop_description=f"Apparels seller, revision {revision}",
+        aka=f"Seller {index} handwoven factory",
+    )
+
+
+def main(rows: int = 10_000, writes: int = 10, polls: int = 20) -> None:
+    """Print bytes and milliseconds per poll for full re-fetches and delta sync."""
+    catalogue = VersionedCatalogue(Seller, "name", [_seller(i) for i in range(rows)])
+    app = FastAPI()
+    app.add_api_route("/sellers", lambda: catalogue, response_model=list[Seller])
+    app.include_router(catalogue.router("/sellers"))
+    client = TestClient(app)
+
+    totals = {"full": [0, 0.0], "delta": [0, 0.0]}
+    version = catalogue.version
+    for poll in range(polls):
+        for index in range(writes):
+            catalogue.upsert(_seller((poll * writes + index) % rows, poll + 1))
+        start = time.perf_counter()
+        full = client.get("/sellers")
+        totals["full"][0] += len(full.content)
+        totals["full"][1] += time.perf_counter() - start
+        start = time.perf_counter()
+        delta = client.get("/sellers/changes", params={"since": version})
+        totals["delta"][0] += len(delta.content)
+        totals["delta"][1] += time.perf_counter() - start
+        version = delta.json()["version"]
+    for label, (size, seconds) in totals.items():
+        print(
+            f"{label:<6} {size / polls / 1e3:10.1f} KB/poll  {seconds / polls * 1e3:8.2f} ms/poll"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
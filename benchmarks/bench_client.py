@@ -0,0 +1,49 @@
+"""Benchmark pooled ``StudyClient`` calls against naive per-call ``httpx`` clients.
+
+Usage: ``PYTHONPATH=src python benchmarks/bench_client.py [requests]``
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+
+import httpx
+from _common import measure, serve, summarize
+
+from study_fastapi.client import AsyncStudyClient, ClientConfig, ServiceURLs, StudyClient
+
+
+def main(requests: int = 500) -> None:
+    """Run the comparison and print one line per strategy."""
+    with serve("study_fastapi.hello_fastapi:app") as server:
+        base_url = server.url
+        config = ClientConfig(urls=ServiceURLs.single(base_url))
+
+        def naive() -> None:
+            with httpx.Client() as client:
+                client.get(f"{base_url}/hi").json()
+
+        print(summarize("naive: new httpx.Client per call", measure(naive, requests)))
+
+        with StudyClient(config) as client:
+            print(summarize("StudyClient (keep-alive pool)", measure(client.greet, requests)))
+
+            start = time.perf_counter()
+            client.fan_out(lambda c, _: c.greet(), range(requests), concurrency=16)
+            elapsed = time.perf_counter() - start
+            print(f"{'StudyClient.fan_out x16 threads':<40} rate={requests / elapsed:10.1f}/s")
+
+        async def run_async() -> float:
+            async with AsyncStudyClient(config) as aclient:
+                start = time.perf_counter()
+                await aclient.fan_out(lambda c, _: c.greet(), range(requests), concurrency=32)
+                return time.perf_counter() - start
+
+        elapsed = asyncio.run(run_async())
+        print(f"{'AsyncStudyClient.fan_out x32 tasks':<40} rate={requests / elapsed:10.1f}/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
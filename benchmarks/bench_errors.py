@@ -0,0 +1,110 @@
+"""Benchmark 422 responses from FastAPI's default handler vs cached error bodies.
+
+Each app is timed twice, with FastAPI's own ``RequestValidationError`` handler put back
+and with the installed ``CachedValidationErrorHandler``. Requests that miss a required
+parameter (``/hello`` without ``name``, ``/hello_header`` and ``/di/secure`` without
+their headers, ``/hi`` without ``user-agent``) are sent straight to the ASGI app, so only
+server-side work is timed. Also reports the handler alone, called with a prepared exception.
+
+Usage: ``PYTHONPATH=src python benchmarks/bench_errors.py [requests]``
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+
+from fastapi import FastAPI
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message
+
+from study_fastapi.errors import CachedValidationErrorHandler
+from study_fastapi.openapi_snapshot import _module_app
+
+CASES = [
+    ("hello_fastapi", "GET", "/hello"),
+    ("hello_fastapi", "POST", "/hello_header"),
+    ("a6_dependency_injection", "GET", "/di/secure"),
+    ("a2_fastapi_header", "GET", "/hi"),
+]
+
+
+def _with_handler(app: FastAPI, handler) -> FastAPI:
+    app.exception_handlers[RequestValidationError] = handler
+    app.middleware_stack = None  # rebuilt with the new handler on the next request
+    return app
+
+
+def _scope(method: str, path: str) -> dict:
+    return {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+
+
+async def _request(app: ASGIApp, scope: dict) -> int:
+    status = 0
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(dict(scope), receive, send)
+    return status
+
+
+async def _rate(app: ASGIApp, scope: dict, requests: int) -> float:
+    assert await _request(app, scope) == 422
+    start = time.perf_counter()
+    for _ in range(requests):
+        await _request(app, scope)
+    return requests / (time.perf_counter() - start)
+
+
+async def _handler_us(handler, requests: int) -> float:
+    request = Request(_scope("GET", "/hello"))
+    error = {"type": "missing", "loc": ("query", "name"), "msg": "Field required", "input": None}
+    exc = RequestValidationError([error])
+    await handler(request, exc)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await handler(request, exc)
+    return (time.perf_counter() - start) * 1e6 / requests
+
+
+async def main(requests: int = 5000) -> None:
+    """Print 422 requests/s per route, and the handler's own cost, default vs cached."""
+    for module, method, path in CASES:
+        app = _module_app(module)
+        scope = _scope(method, path)
+        cached_handler = app.exception_handlers[RequestValidationError]
+        default_app = _with_handler(app, request_validation_exception_handler)
+        default = await _rate(default_app, scope, requests)
+        cached = await _rate(_with_handler(app, cached_handler), scope, requests)
+        print(
+            f"{method:<4} {path:<14} default={default:7.0f} req/s "
+            f"cached={cached:7.0f} req/s ({cached / default:.2f}x)"
+        )
+    default_us = await _handler_us(request_validation_exception_handler, requests)
+    cached_us = await _handler_us(CachedValidationErrorHandler(), requests)
+    print(f"handler only     default={default_us:6.1f}us cached={cached_us:6.1f}us")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:])))
@@ -0,0 +1,66 @@
+"""Benchmark streaming exports against serialising the whole list as a JSON array.
+
+Generates ``rows`` sellers lazily and serialises them: as the JSON array ``/sellers``
+returns (one ``TypeAdapter.dump_json`` over a materialised list), and through the NDJSON,
+CSV and (if ``pyarrow`` is installed) Arrow exporters with and without a two-column
+projection. Reports rows/s and peak traced memory, which stays flat for the exporters.
+
+Usage: ``PYTHONPATH=src python benchmarks/bench_export.py [rows]``
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+
+from pydantic import TypeAdapter
+
+from study_fastapi.a5_pydantic_model import Seller
+from study_fastapi.export import iter_arrow, iter_csv, iter_ndjson, pyarrow_available
+
+ALL = tuple(Seller.model_fields)
+PROJECTED = ("name", "country")
+
+
+def _sellers(count: int) -> Iterator[Seller]:
+    for index in range(count):
+        yield Seller(
+            name=f"Seller {index}",
+            country="IN",
+            shipping_port="Chennai",
+            shop_description="Apparels seller with a reasonably long description",
+            aka=f"Seller {index} handwoven factory",
+        )
+
+
+def _json_array(count: int) -> Iterator[bytes]:
+    yield TypeAdapter(list[Seller]).dump_json(list(_sellers(count)))
+
+
+def _run(label: str, produce: Callable[[int], Iterator[bytes]], rows: int) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = sum(len(chunk) for chunk in produce(rows))
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(
+        f"{label:<18} {rows / elapsed:>10,.0f} rows/s  {size / 1e6:7.1f} MB  "
+        f"peak={peak / 1e6:7.1f} MB"
+    )
+
+
+def main(rows: int = 200_000) -> None:
+    """Print throughput and peak memory per export format."""
+    _run("json array", _json_array, rows)
+    for label, fields in (("", ALL), (" projected", PROJECTED)):
+        _run(f"ndjson{label}", lambda n, f=fields: iter_ndjson(_sellers(n), Seller, f), rows)
+        _run(f"csv{label}", lambda n, f=fields: iter_csv(_sellers(n), f), rows)
+        if pyarrow_available():
+            _run(f"arrow{label}", lambda n, f=fields: iter_arrow(_sellers(n), Seller, f), rows)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
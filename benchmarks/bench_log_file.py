@@ -0,0 +1,89 @@
+"""Benchmark sustained file-logging throughput in MB/s.
+
+Writes ``records`` JSON records to a temporary directory through:
+
+- ``FileHandler``: stdlib, one flush (``write`` syscall) per record
+- ``RotatingFileHandler``: stdlib, additionally checks the size before every record
+- ``CompressingRotatingFileHandler``: buffered writes, rotation and gzip, same thread
+- ``file_sink``: the same handler behind a queue and a background thread
+
+Times include draining and closing, so write-behind cannot hide unfinished work. The
+``caller`` column is the time the logging thread itself spends, which is the cost to
+request latency.
+
+Usage: ``PYTHONPATH=src python benchmarks/bench_log_file.py [records]``
+"""
+
+from __future__ import annotations
+
+import logging
+import logging.handlers
+import os
+import sys
+import tempfile
+import time
+
+from utils.logging_utils import (
+    CompressingRotatingFileHandler,
+    JsonFormatter,
+    close_file_sinks,
+    file_sink,
+)
+
+MAX_BYTES = 20 * 1024 * 1024
+
+
+def _run(label: str, handler: logging.Handler, records: int, path: str) -> None:
+    logger = logging.getLogger(f"bench.file.{label}")
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    start = time.perf_counter()
+    for i in range(records):
+        logger.info("served %s in %.2fms status=%d", "/items/{item_id}", i * 0.001, 200)
+    caller = time.perf_counter() - start
+    if isinstance(handler, logging.handlers.QueueHandler):
+        close_file_sinks()
+    else:
+        handler.close()
+    total = time.perf_counter() - start
+    directory = os.path.dirname(path)
+    written = sum(
+        os.path.getsize(os.path.join(directory, name))
+        for name in os.listdir(directory)
+        if not name.endswith(".gz")
+    )
+    print(
+        f"{label:<34} {written / total / 1e6:7.1f} MB/s  "
+        f"caller={caller / records * 1e6:5.1f}us/record  total={total:5.2f}s"
+    )
+
+
+def main(records: int = 200_000) -> None:
+    """Print throughput for each handler."""
+    formatter = JsonFormatter()
+    with tempfile.TemporaryDirectory() as tmp:
+
+        def target(name: str) -> str:
+            os.makedirs(os.path.join(tmp, name))
+            return os.path.join(tmp, name, "app.log")
+
+        stdlib = logging.FileHandler(path := target("file"))
+        stdlib.setFormatter(formatter)
+        _run("FileHandler", stdlib, records, path)
+        rotating = logging.handlers.RotatingFileHandler(
+            path := target("rotating"), maxBytes=MAX_BYTES, backupCount=5
+        )
+        rotating.setFormatter(formatter)
+        _run("RotatingFileHandler", rotating, records, path)
+        buffered = CompressingRotatingFileHandler(
+            path := target("buffered"), max_bytes=MAX_BYTES, compress=False
+        )
+        buffered.setFormatter(formatter)
+        _run("CompressingRotatingFileHandler", buffered, records, path)
+        sink = file_sink(path := target("sink"), formatter, max_bytes=MAX_BYTES, compress=False)
+        _run("file_sink (write-behind)", sink, records, path)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,55 @@
+"""Benchmark logging throughput with and without sampling and rate limiting.
+
+Logs ``RECORDS`` records of one hot template through a JSON handler writing to
+``os.devnull`` and prints records/second (calls to ``logger.info``, kept or not).
+
+Usage: ``PYTHONPATH=src python benchmarks/bench_log_sampling.py [records]``
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import time
+
+from utils.logging_utils import JsonFormatter, RateLimitFilter, SamplingFilter
+
+
+def _logger(name: str, level: int, *filters: logging.Filter) -> logging.Logger:
+    handler = logging.StreamHandler(open(os.devnull, "w"))
+    handler.setFormatter(JsonFormatter())
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.filters = list(filters)
+    logger.setLevel(level)
+    logger.propagate = False
+    return logger
+
+
+def _rate(logger: logging.Logger, records: int) -> float:
+    info = logger.info
+    start = time.perf_counter()
+    for i in range(records):
+        info("served %s in %.1fms", "/items", i * 0.01)
+    return records / (time.perf_counter() - start)
+
+
+def main(records: int = 200_000) -> None:
+    """Print records/second for each configuration (best of three)."""
+    variants = [
+        ("all records", _logger("bench.all", logging.INFO)),
+        ("sampled 10%", _logger("bench.s10", logging.INFO, SamplingFilter(0.1))),
+        ("sampled 1%", _logger("bench.s1", logging.INFO, SamplingFilter(0.01))),
+        ("rate limited 100/s", _logger("bench.rl", logging.INFO, RateLimitFilter(100))),
+        ("below level (WARNING)", _logger("bench.lvl", logging.WARNING)),
+    ]
+    baseline = None
+    for label, logger in variants:
+        rate = max(_rate(logger, records) for _ in range(3))
+        baseline = baseline or rate
+        print(f"{label:<25} {rate:12,.0f} records/s  x{rate / baseline:6.1f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
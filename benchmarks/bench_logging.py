@@ -0,0 +1,92 @@
+"""Benchmark per-request logging overhead of request context under concurrency.
+
+Each simulated request binds a context, awaits a few times and logs ``LINES`` records
+through a JSON handler writing to ``os.devnull``. Compared variants:
+
+- ``no context``: plain ``logger.info`` with no request fields (the floor)
+- ``ContextVar + filter``: ``request_context`` plus ``RequestContextFilter`` on the handler
+- ``LoggerAdapter per request``: a new adapter per request passing the fields as ``extra``
+
+Usage: ``PYTHONPATH=src python benchmarks/bench_logging.py [requests] [concurrency]``
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sys
+import time
+import uuid
+
+from utils.logging_utils import JsonFormatter, RequestContextFilter, request_context
+
+LINES = 3
+
+
+def _logger(name: str, *filters: logging.Filter) -> logging.Logger:
+    handler = logging.StreamHandler(open(os.devnull, "w"))
+    handler.setFormatter(JsonFormatter())
+    for log_filter in filters:
+        handler.addFilter(log_filter)
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+async def _plain(logger: logging.Logger, route: str) -> None:
+    for i in range(LINES):
+        await asyncio.sleep(0)
+        logger.info("step %d", i)
+
+
+async def _context(logger: logging.Logger, route: str) -> None:
+    with request_context(route=route):
+        for i in range(LINES):
+            await asyncio.sleep(0)
+            logger.info("step %d", i)
+
+
+async def _adapter(logger: logging.Logger, route: str) -> None:
+    start = time.perf_counter()
+    extra = {"request_id": uuid.uuid4().hex, "route": route}
+    adapter = logging.LoggerAdapter(logger, extra)
+    for i in range(LINES):
+        await asyncio.sleep(0)
+        extra["elapsed_ms"] = round((time.perf_counter() - start) * 1e3, 3)
+        adapter.info("step %d", i)
+
+
+async def _run(handler, logger: logging.Logger, requests: int, concurrency: int) -> float:
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with gate:
+            await handler(logger, f"/items/{i % 10}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return time.perf_counter() - start
+
+
+def main(requests: int = 20_000, concurrency: int = 100, rounds: int = 5) -> None:
+    """Print the wall-clock cost per request for each variant (best of ``rounds``)."""
+    variants = [
+        ("no context", _plain, _logger("bench.plain")),
+        ("ContextVar + filter", _context, _logger("bench.ctx", RequestContextFilter())),
+        ("LoggerAdapter per request", _adapter, _logger("bench.adapter")),
+    ]
+    print(f"{requests} requests x {LINES} lines, concurrency {concurrency}")
+    baseline = None
+    for label, handler, logger in variants:
+        asyncio.run(_run(handler, logger, 500, concurrency))  # warm up
+        best = min(asyncio.run(_run(handler, logger, requests, concurrency)) for _ in range(rounds))
+        per_request = best / requests * 1e6
+        baseline = baseline or per_request
+        print(f"{label:<30} {per_request:7.1f} us/request (+{per_request - baseline:5.1f} us)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
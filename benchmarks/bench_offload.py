@@ -0,0 +1,72 @@
+"""Benchmark event-loop stall time while encoding a large payload, with and without offload.
+
+A heartbeat task ticks every millisecond; the longest gap between ticks while an encode
+runs is the time every other request on the loop would have been stalled.
+
+Usage: ``PYTHONPATH=src python benchmarks/bench_offload.py [items]``
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+
+from study_fastapi.encoders import get_fastapi_encoded_string
+from study_fastapi.offload import Offloader
+
+
+async def _stall(encode, payload) -> tuple[float, float]:
+    worst = 0.0
+    done = False
+
+    async def heartbeat() -> None:
+        nonlocal worst
+        last = time.perf_counter()
+        while not done:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            worst = max(worst, now - last)
+            last = now
+
+    beat = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    await encode(payload)
+    elapsed = time.perf_counter() - start
+    done = True
+    await beat
+    return elapsed, worst
+
+
+async def _run(items: int) -> None:
+    payload = [
+        {"id": i, "name": f"seller-{i}", "tags": ["a", "b"], "score": i / 3} for i in range(items)
+    ]
+
+    async def inline(obj):
+        return get_fastapi_encoded_string(obj)
+
+    variants = {"inline on the event loop": inline}
+    offloaders = []
+    for kind in ("process", "thread"):
+        offloader = Offloader(get_fastapi_encoded_string, threshold=1, pool=kind, max_workers=2)
+        await offloader.encode([0])  # start the pool outside the measurement
+        offloaders.append(offloader)
+        variants[f"offloaded ({kind} pool)"] = offloader.encode
+    try:
+        for label, encode in variants.items():
+            elapsed, worst = await _stall(encode, payload)
+            print(f"{label:<30} encode={elapsed * 1e3:8.1f}ms  max loop stall={worst * 1e3:8.1f}ms")
+    finally:
+        for offloader in offloaders:
+            offloader.close()
+
+
+def main(items: int = 200_000) -> None:
+    """Print encode time and worst event-loop stall for each strategy."""
+    asyncio.run(_run(items))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
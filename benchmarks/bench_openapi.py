@@ -0,0 +1,82 @@
+"""Benchmark ``/openapi.json`` generated lazily vs served from the stored snapshot.
+
+For each app, a copy with FastAPI's default docs routes (same API routes, no snapshot) is
+compared with the real app, which serves ``study_fastapi/openapi/<module>.json`` as
+pre-encoded bytes. Requests are sent straight to the ASGI app, accepting gzip, so only
+server-side work is timed. Reports the first request (where the lazy copy builds the
+schema), the steady-state time per request and the bytes sent.
+
+Usage: ``PYTHONPATH=src python benchmarks/bench_openapi.py [requests]``
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Message
+
+from study_fastapi.openapi_snapshot import APP_MODULES, _module_app
+
+SCOPE = {
+    "type": "http",
+    "http_version": "1.1",
+    "method": "GET",
+    "scheme": "http",
+    "path": "/openapi.json",
+    "raw_path": b"/openapi.json",
+    "root_path": "",
+    "query_string": b"",
+    "headers": [(b"host", b"bench"), (b"accept-encoding", b"gzip")],
+    "client": ("127.0.0.1", 1),
+    "server": ("bench", 80),
+}
+
+
+def _lazy_copy(app: FastAPI) -> FastAPI:
+    lazy = FastAPI(title=app.title)
+    docs = {app.openapi_url, app.docs_url, app.redoc_url, app.swagger_ui_oauth2_redirect_url}
+    lazy.router.routes.extend(r for r in app.router.routes if getattr(r, "path", None) not in docs)
+    return lazy
+
+
+async def _get(app: ASGIApp) -> int:
+    sent = 0
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        nonlocal sent
+        sent += len(message.get("body", b""))
+
+    await app(dict(SCOPE), receive, send)
+    return sent
+
+
+async def _time(app: ASGIApp, requests: int) -> tuple[float, float, int]:
+    start = time.perf_counter()
+    size = await _get(app)
+    first = (time.perf_counter() - start) * 1e3
+    start = time.perf_counter()
+    for _ in range(requests):
+        await _get(app)
+    return first, (time.perf_counter() - start) * 1e6 / requests, size
+
+
+async def main(requests: int = 500) -> None:
+    """Print first-request and per-request ``/openapi.json`` cost per app."""
+    for name in APP_MODULES:
+        app = _module_app(name)
+        for label, target in (("lazy", _lazy_copy(app)), ("snapshot", app)):
+            first, per_request, size = await _time(target, requests)
+            print(
+                f"{name:<24} {label:<8} 1st={first:6.2f}ms "
+                f"steady={per_request:6.1f}us sent={size:5d}B"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:])))
@@ -0,0 +1,69 @@
+"""Benchmark sparse fieldsets: payload size and serialisation throughput.
+
+Serialises ``rows`` sellers as JSON in four ways:
+
+- every field, as FastAPI serialises ``/sellers`` without ``?fields=``
+- ``name,country`` through the cached ``Projection`` (pydantic skips the other fields)
+- ``name,country`` the naive way: dump full dicts, drop keys, ``json.dumps``
+- the same naive way, but with pydantic's ``include`` applied per model
+
+Usage: ``PYTHONPATH=src python benchmarks/bench_projection.py [rows] [repeat]``
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import timeit
+from collections.abc import Callable
+
+from pydantic import TypeAdapter
+
+from study_fastapi.a5_pydantic_model import Seller
+from study_fastapi.projection import projection
+
+FIELDS = "name,country"
+
+
+def _sellers(count: int) -> list[Seller]:
+    return [
+        Seller(
+            name=f"Seller {index}",
+            country="IN",
+            shipping_port="Chennai",
+            shop_description="Apparels seller with a reasonably long description",
+            aka=f"Seller {index} handwoven factory",
+        )
+        for index in range(count)
+    ]
+
+
+def _drop_keys(sellers: list[Seller]) -> bytes:
+    keep = FIELDS.split(",")
+    rows = [{key: row[key] for key in keep} for row in (s.model_dump() for s in sellers)]
+    return json.dumps(rows, separators=(",", ":")).encode()
+
+
+def _per_model_include(sellers: list[Seller]) -> bytes:
+    include = set(FIELDS.split(","))
+    return json.dumps([s.model_dump(include=include) for s in sellers]).encode()
+
+
+def main(rows: int = 10_000, repeat: int = 20) -> None:
+    """Print payload size and rows/s per approach."""
+    sellers = _sellers(rows)
+    full = TypeAdapter(list[Seller])
+    cases: list[tuple[str, Callable[[], bytes]]] = [
+        ("all fields", lambda: full.dump_json(sellers)),
+        ("projection", lambda: projection(Seller, FIELDS).dump_json(sellers)),
+        ("dump + drop keys", lambda: _drop_keys(sellers)),
+        ("per-model include", lambda: _per_model_include(sellers)),
+    ]
+    for label, run in cases:
+        size = len(run())
+        seconds = min(timeit.repeat(run, number=1, repeat=repeat))
+        print(f"{label:<18} {size / 1e3:8.1f} KB  {rows / seconds:>12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
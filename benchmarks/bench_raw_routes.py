@@ -0,0 +1,98 @@
+"""Benchmark raw ASGI routes against the same endpoints registered with ``app.get``.
+
+``/hi`` (hello_fastapi's constant greeting) and ``/useragent`` (a2's header echo) are
+registered both ways on two stacks: a bare ``FastAPI()``, which shows the cost of the
+route alone, and ``create_app`` with its always-on middleware, which is what the study
+apps serve. Requests are sent straight to the ASGI app, so only server-side work is
+timed.
+
+Usage: ``PYTHONPATH=src python benchmarks/bench_raw_routes.py [requests]``
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Message
+
+from study_fastapi import a2_fastapi_header, hello_fastapi
+from study_fastapi.app_factory import AppConfig, create_app
+from study_fastapi.raw_routes import raw_route
+
+ENDPOINTS = {
+    "/hi": (hello_fastapi.greet_static, {}),
+    "/useragent": (
+        a2_fastapi_header.get_user_agent,
+        {"render": a2_fastapi_header._raw_user_agent},
+    ),
+}
+
+
+def _scope(path: str) -> dict:
+    return {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"user-agent", b"bench/1.0")],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+
+
+def _app(stack: str, raw: bool) -> FastAPI:
+    app = FastAPI() if stack == "bare" else create_app(AppConfig(warm=False))
+    for path, (endpoint, options) in ENDPOINTS.items():
+        if raw:
+            raw_route(app, path, **options)(endpoint)
+        else:
+            app.get(path)(endpoint)
+    return app
+
+
+async def _request(app: ASGIApp, scope: dict) -> bytes:
+    body = b""
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        nonlocal body
+        body += message.get("body", b"")
+
+    await app(dict(scope), receive, send)
+    return body
+
+
+async def _rate(app: ASGIApp, scope: dict, requests: int) -> tuple[float, bytes]:
+    body = await _request(app, scope)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await _request(app, scope)
+    return requests / (time.perf_counter() - start), body
+
+
+async def main(requests: int = 5000) -> None:
+    """Print requests/s per endpoint and stack, normal route vs raw route."""
+    for stack in ("bare", "create_app"):
+        normal_app, raw_app = _app(stack, raw=False), _app(stack, raw=True)
+        for path in ENDPOINTS:
+            scope = _scope(path)
+            normal, expected = await _rate(normal_app, scope, requests)
+            raw, body = await _rate(raw_app, scope, requests)
+            assert body == expected, (body, expected)
+            print(
+                f"{stack:<10} {path:<10} normal={normal:7.0f} req/s "
+                f"raw={raw:7.0f} req/s ({raw / normal:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:])))
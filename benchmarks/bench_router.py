@@ -0,0 +1,106 @@
+"""Benchmark route matching: Starlette's linear scan vs the radix-tree router.
+
+Apps with 10, 100 and 1000 routes are built from pairs like ``/r7/items`` and
+``/r7/items/{item_id}``. For each size the script times matching the first route, the
+last route (a parameterised one) and a ``404``, with Starlette's in-order scan
+(``starlette_match``, the loop ``Router.app`` runs) and with ``RadixRouter.match``. It
+also times whole requests to the last route through the ASGI app, with and without
+``install_radix_router``.
+
+Usage: ``PYTHONPATH=src python benchmarks/bench_router.py [matches]``
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+
+from fastapi import FastAPI
+from starlette.types import Message
+
+from study_fastapi.radix import RadixRouter, install_radix_router, starlette_match
+
+SIZES = (10, 100, 1000)
+
+
+async def _item(item_id: int) -> int:
+    return item_id
+
+
+async def _items() -> list[int]:
+    return []
+
+
+def _app(size: int) -> FastAPI:
+    app = FastAPI(openapi_url=None, docs_url=None, redoc_url=None)
+    for index in range(size // 2):
+        app.get(f"/r{index}/items")(_items)
+        app.get(f"/r{index}/items/{{item_id}}")(_item)
+    return app
+
+
+def _scope(path: str) -> dict:
+    return {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+
+
+def _us(match, scope: dict, matches: int) -> float:
+    start = time.perf_counter()
+    for _ in range(matches):
+        match(scope)
+    return (time.perf_counter() - start) * 1e6 / matches
+
+
+async def _rate(app: FastAPI, scope: dict, requests: int) -> float:
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        pass
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return requests / (time.perf_counter() - start)
+
+
+async def main(matches: int = 2000) -> None:
+    """Print match latency per route-table size and requests/s to the last route."""
+    for size in SIZES:
+        app = _app(size)
+        radix = RadixRouter(app.router)
+        last = size // 2 - 1
+        cases = {"first": "/r0/items", "last": f"/r{last}/items/42", "404": "/nowhere"}
+        for label, path in cases.items():
+            scope = _scope(path)
+            assert radix.match(scope)[1] is starlette_match(app.router, scope)[1]
+            linear = _us(lambda s: starlette_match(app.router, s), scope, matches)
+            tree = _us(radix.match, scope, matches)
+            print(
+                f"routes={size:<5} {label:<6} linear={linear:8.2f}us "
+                f"radix={tree:6.2f}us ({linear / tree:6.1f}x)"
+            )
+        scope = _scope(cases["last"])
+        linear_rate = await _rate(app, scope, matches)
+        install_radix_router(app)
+        radix_rate = await _rate(app, scope, matches)
+        print(
+            f"routes={size:<5} request to last route: linear={linear_rate:6.0f} req/s "
+            f"radix={radix_rate:6.0f} req/s"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:])))
@@ -0,0 +1,69 @@
+"""Benchmark the seller search index: build time, memory and query latency.
+
+Generates ``rows`` sellers whose descriptions draw words from a Zipf-like vocabulary of
+5,000 terms (so some words are in most documents and most are rare), indexes them and
+times a mix of queries: rare and common terms, multi-term queries and prefixes. Memory is
+what ``tracemalloc`` sees allocated by the index itself.
+
+Usage: ``PYTHONPATH=src python benchmarks/bench_search.py [rows] [repeat]``
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import time
+import timeit
+import tracemalloc
+
+from study_fastapi.a5_pydantic_model import Seller
+from study_fastapi.changefeed import VersionedCatalogue
+from study_fastapi.search import SearchIndex
+
+QUERIES = ["w4999", "w1", "w0", "w10 w20", "w0 w1 w2", "w12", "w4", "w1 w33"]
+
+
+def _sellers(count: int) -> list[Seller]:
+    generator = random.Random(42)
+    vocabulary = [f"w{rank}" for rank in range(5000)]
+    weights = [1 / (rank + 1) for rank in range(5000)]
+    return [
+        Seller(
+            name=f"Seller {index}",
+            country="IN",
+            shipping_port=None,
+            shop_description=" ".join(generator.choices(vocabulary, weights, k=8)),
+            aka=f"Seller {index} " + " ".join(generator.choices(vocabulary, weights, k=3)),
+        )
+        for index in range(count)
+    ]
+
+
+def main(rows: int = 100_000, repeat: int = 20) -> None:
+    """Print index build time and memory, then per-query latency and hit counts."""
+    catalogue = VersionedCatalogue(Seller, "name", _sellers(rows))
+    index = SearchIndex(catalogue, ["shop_description", "aka"])
+    start = time.perf_counter()
+    index.rebuild()
+    built = time.perf_counter() - start
+    tracemalloc.start()  # slows indexing down, so measured on a second build
+    index.rebuild()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(
+        f"{rows:,} sellers indexed in {built:.2f}s: {memory / 2**20:.1f} MiB "
+        f"({memory / rows:.0f} B/seller), {len(index._index.postings):,} terms"
+    )
+    for query in QUERIES:
+        matches = index.search(query, limit=rows)
+        seconds = min(timeit.repeat(lambda q=query: index.search(q), number=1, repeat=repeat))
+        print(f"{query!r:<14} {len(matches):>9,} hits  {seconds * 1e3:9.2f} ms")
+    seller = _sellers(1)[0]
+    start = time.perf_counter()
+    for revision in range(1000):
+        catalogue.upsert(seller.model_copy(update={"aka": f"update {revision}"}))
+    print(f"incremental update: {(time.perf_counter() - start) / 1000 * 1e6:.0f} µs/write")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
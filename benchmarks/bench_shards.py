@@ -0,0 +1,72 @@
+"""Benchmark country-sharded buyer queries by pool kind and worker count.
+
+Spreads ``rows`` buyers over 100 countries and times two queries, both scanning every
+buyer in the shards they name:
+
+- one country (a single shard, scanned on the calling thread)
+- every country, fanned out to ``inline`` (one after another), ``thread`` and
+  ``process`` owners with 1, 2, 4, ... workers up to the number of CPUs
+
+Process owners run in parallel; thread owners only once the GIL allows. Expect the process
+fan-out to approach ``workers``x the inline rate when there are at least that many cores.
+
+Usage: ``PYTHONPATH=src python benchmarks/bench_shards.py [rows] [repeat]``
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+import timeit
+
+from study_fastapi.a5_pydantic_model import Buyer
+from study_fastapi.changefeed import VersionedCatalogue
+from study_fastapi.shards import ShardedCatalogue, ShardPool, ShardQuery
+
+COUNTRIES = [f"{chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(100)]
+# Matches nothing, so every row of every named shard is compared.
+QUERY = ShardQuery.where(zipcode="x")
+
+
+def _buyers(count: int) -> list[Buyer]:
+    return [
+        Buyer(name=f"Buyer {i}", country=COUNTRIES[i % 100], zipcode=f"{i * 7919 % 10**6:06}")
+        for i in range(count)
+    ]
+
+
+def _workers() -> list[int]:
+    cpus = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    return counts if counts[-1] == cpus else [*counts, cpus]
+
+
+def main(rows: int = 1_000_000, repeat: int = 5) -> None:
+    """Print rows scanned per second for each pool and worker count."""
+    catalogue = VersionedCatalogue(Buyer, "name", _buyers(rows))
+    print(f"{rows:,} buyers in {len(COUNTRIES)} countries, {os.cpu_count()} CPUs")
+    cases: list[tuple[ShardPool, int]] = [("inline", 1)]
+    cases += [(pool, workers) for pool in ("thread", "process") for workers in _workers()]
+    for pool, workers in cases:
+        shards = ShardedCatalogue(catalogue, "country", pool=pool, max_workers=workers)
+        start = time.perf_counter()
+        shards.sizes()
+        ready = time.perf_counter() - start
+        if pool == "inline":
+            one = min(
+                timeit.repeat(lambda: shards.keys(COUNTRIES[:1], QUERY), number=1, repeat=repeat)
+            )
+            print(f"one country: {rows / 100 / one:>14,.0f} rows/s")
+        every = min(timeit.repeat(lambda: shards.keys(None, QUERY), number=1, repeat=repeat))
+        print(
+            f"all countries {pool:<7} workers={workers:<3} {rows / every:>14,.0f} rows/s "
+            f"({every * 1e3:7.1f} ms, partitioned in {ready:.1f}s)"
+        )
+        shards.close()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
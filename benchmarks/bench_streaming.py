@@ -0,0 +1,72 @@
+"""Benchmark connection count and server memory per connection for push endpoints.
+
+Compares N concurrent subscribers on ``/sse/hi`` (one shared ticker task) with N concurrent
+``/hi`` requests that each hold a sleeping coroutine for one second.
+
+Usage: ``PYTHONPATH=src python benchmarks/bench_streaming.py [connections]``
+
+WebSockets need ``websockets`` or ``wsproto`` installed in the server; SSE does not, so
+SSE is used for the live measurement. Both endpoints share the same broadcaster.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+
+import httpx
+from _common import LiveServer, serve
+
+
+async def _hold_sse(client: httpx.AsyncClient, ready: asyncio.Event, count: int) -> int:
+    async with client.stream("GET", "/sse/hi", params={"count": count}) as response:
+        received = 0
+        async for line in response.aiter_lines():
+            if line.startswith("data:"):
+                received += 1
+                ready.set()
+        return received
+
+
+async def _measure(server: LiveServer, connections: int) -> None:
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=0)
+    timeout = httpx.Timeout(30.0)
+    async with httpx.AsyncClient(base_url=server.url, limits=limits, timeout=timeout) as client:
+        await client.get("/sse/hi", params={"count": 1})  # warm imports and the code path
+        baseline = server.rss_bytes()
+
+        ready = asyncio.Event()
+        streams = [
+            asyncio.create_task(_hold_sse(client, ready, count=3)) for _ in range(connections)
+        ]
+        await ready.wait()
+        await asyncio.sleep(0.5)
+        sse_rss = server.rss_bytes()
+        received = await asyncio.gather(*streams)
+
+        sleepers = [asyncio.create_task(client.get("/hi")) for _ in range(connections)]
+        await asyncio.sleep(0.5)
+        sleep_rss = server.rss_bytes()
+        await asyncio.gather(*sleepers)
+
+    per = 1 / max(connections, 1)
+    print(f"connections: {connections}, SSE messages received: {sum(received)}")
+    print(f"{'baseline RSS':<34} {baseline / 2**20:8.1f} MiB")
+    print(
+        f"{'SSE subscribers (1 ticker task)':<34} {sse_rss / 2**20:8.1f} MiB "
+        f"(+{(sse_rss - baseline) * per / 1024:6.1f} KiB/conn)"
+    )
+    print(
+        f"{'/hi sleeping coroutines':<34} {sleep_rss / 2**20:8.1f} MiB "
+        f"(+{(sleep_rss - baseline) * per / 1024:6.1f} KiB/conn)"
+    )
+
+
+def main(connections: int = 1000) -> None:
+    """Start the a4 app and print memory per connection for both strategies."""
+    with serve("study_fastapi.a4_fastapi_async:app", "--backlog", "4096") as server:
+        asyncio.run(_measure(server, connections))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,50 @@
+"""Benchmark first-request latency with and without startup route warm-up.
+
+Starts each app in a fresh uvicorn process with ``APP_WARM=0`` and ``APP_WARM=1``, then
+times the first few requests to one route over an already-open connection, so only
+server-side cold costs are measured.
+
+Usage: ``PYTHONPATH=src python benchmarks/bench_warmup.py [rounds]``
+"""
+
+from __future__ import annotations
+
+import statistics
+import sys
+import time
+
+import httpx
+from _common import serve
+
+TARGETS = [
+    ("study_fastapi.a5_pydantic_model:app", "/sellers"),
+    ("study_fastapi.a6_dependency_injection:app", "/di/items?limit=5"),
+    ("study_fastapi.a2_fastapi_header:app", "/useragent/parsed"),
+]
+
+
+def _first_requests(app_path: str, path: str, warm: str, count: int = 3) -> list[float]:
+    with serve(app_path, env={"APP_WARM": warm}) as server:
+        with httpx.Client(base_url=server.url) as client:
+            client.get("/openapi.json")  # open the connection (not a measured route)
+            timings = []
+            for _ in range(count):
+                start = time.perf_counter()
+                client.get(path).raise_for_status()
+                timings.append((time.perf_counter() - start) * 1e3)
+    return timings
+
+
+def main(rounds: int = 3) -> None:
+    """Print the median first/second/third request latency per route, cold vs warmed."""
+    for app_path, path in TARGETS:
+        for warm, label in (("0", "cold"), ("1", "warmed")):
+            runs = [_first_requests(app_path, path, warm) for _ in range(rounds)]
+            first, second, third = (statistics.median(col) for col in zip(*runs))
+            print(
+                f"{path:<20} {label:<7} 1st={first:7.2f}ms 2nd={second:6.2f}ms 3rd={third:6.2f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
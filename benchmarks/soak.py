@@ -0,0 +1,249 @@
+"""Soak test: hammer each app in-process and fail on steady memory growth.
+
+Workers run for days, so memory that grows a few bytes per request adds up. For each
+selected app this script starts its lifespan and sends requests straight to the ASGI
+app (``_common.call_asgi``) from ``--concurrency`` loops for ``--seconds``. The requests
+are the synthetic ones the startup warm-up sends, plus the heavier requests in
+``HEAVY``, such as ``/di/items`` with a large ``limit`` and real payloads for the a3
+encoders.
+
+The first ``--warmup`` seconds fill caches and pools and are not judged. After that,
+every ``--interval`` seconds the clients are joined (no request in flight), and the
+script runs ``gc.collect()`` and samples:
+
+- the memory tracemalloc sees allocated by Python code
+- the process RSS, which also covers C extensions and allocator fragmentation
+
+Steady-state growth is the least-squares slope of the traced memory against the number
+of requests. An app fails when it grows more than ``--max-growth`` bytes per request
+(and more than ``NOISE_FLOOR`` in total), or when its RSS grows by more than
+``--max-rss-growth`` MiB over the steady phase (when given). For each app the report
+lists the allocation sites (file:line) that grew most between the end of the warm-up
+and the end of the run. The exit status is ``1`` if any app failed.
+
+Bounded caches and queues grow until they are full, so they must fill during the
+warm-up. ``SOAK_ENV`` shrinks the ones configured from the environment (set a variable
+to override it), e.g. a3's job queue, which keeps the last 1000 finished jobs for
+polling by default.
+
+Usage::
+
+    PYTHONPATH=src python benchmarks/soak.py [--seconds 60] [--module a6_dependency_injection]
+    PYTHONPATH=src python benchmarks/soak.py --seconds 600 --max-growth 4 --max-rss-growth 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+
+from _common import asgi_lifespan, asgi_scope, call_asgi, study_apps, synthetic_requests
+
+# Requests that exercise real work, beyond the warm-up's synthetic ones.
+_RECORD = {"name": "Shweta", "tags": ["a", "b"], "scores": list(range(50)), "nested": {"x": 1.5}}
+HEAVY: dict[str, list[tuple[str, str, dict[str, str], Any]]] = {
+    "a3_jsonable_encoder": [
+        ("POST", "/encode", {}, _RECORD),
+        ("POST", "/encode", {}, [_RECORD] * 200),
+        ("POST", "/encode/bulk", {}, [_RECORD] * 20),
+    ],
+    "a5_pydantic_model": [
+        ("GET", "/sellers", {"fields": "name,country"}, None),
+        ("GET", "/sellers/search", {"q": "hand"}, None),
+    ],
+    "a6_dependency_injection": [
+        ("GET", "/di/items", {"limit": "10000"}, None),
+        ("GET", "/di/items", {"limit": "20000", "offset": "5"}, None),
+    ],
+}
+
+# Growth below this over the whole steady phase is noise (event loop internals, interned
+# strings), however few requests it is divided by.
+NOISE_FLOOR = 64 * 1024
+
+# Small bounded stores, so they are full before the steady phase starts.
+SOAK_ENV = {"APP_WARM": "0", "JOB_QUEUE_SIZE": "10", "JOB_MAX_RESULTS": "20"}
+
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    tracemalloc.Filter(False, __file__),
+)
+
+
+def rss_bytes() -> int:
+    """Return this process's resident set size (peak RSS where ``/proc`` is missing)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+@dataclass
+class SoakResult:
+    """Samples and verdict for one app."""
+
+    module: str
+    requests: int = 0
+    seconds: float = 0.0
+    statuses: Counter[int] = field(default_factory=Counter)
+    # (requests sent, traced bytes, RSS bytes) after the warm-up
+    samples: list[tuple[int, int, int]] = field(default_factory=list)
+    top_sites: list[tuple[str, int, int]] = field(default_factory=list)  # site, bytes, blocks
+    growth_per_request: float = 0.0
+    rss_growth_mib: float = 0.0
+    failures: list[str] = field(default_factory=list)
+
+
+def _targets(module: str, app: Any) -> list[tuple[dict[str, Any], bytes]]:
+    targets = [(scope, body) for _, scope, body in synthetic_requests(app)]
+    for method, path, params, payload in HEAVY.get(module, []):
+        headers = {} if payload is None else {"content-type": "application/json"}
+        body = b"" if payload is None else json.dumps(payload).encode()
+        targets.append((asgi_scope(method, path, params, headers), body))
+    return targets
+
+
+async def _responsive(module: str, app: Any, targets: list) -> list:
+    # Streams (SSE) never finish a response; leave them out.
+    kept = []
+    for scope, body in targets:
+        try:
+            await asyncio.wait_for(call_asgi(app, scope, body), 1.0)
+        except TimeoutError:
+            print(
+                f"skipped {module} {scope['method']} {scope['path']}: no response",
+                file=sys.stderr,
+            )
+        else:
+            kept.append((scope, body))
+    return kept
+
+
+async def soak(module: str, app: Any, args: argparse.Namespace) -> SoakResult:
+    """Run one app for ``args.seconds`` and judge its memory growth."""
+    result = SoakResult(module)
+    async with asgi_lifespan(app):
+        targets = await _responsive(module, app, _targets(module, app))
+        if not targets:
+            return result
+        positions = list(range(args.concurrency))  # each client's next target
+        baseline: tracemalloc.Snapshot | None = None
+
+        async def client(number: int, until: float) -> None:
+            while time.perf_counter() < until:
+                scope, body = targets[positions[number] % len(targets)]
+                positions[number] += 1
+                status, _ = await call_asgi(app, scope, body)
+                result.statuses[status] += 1
+                result.requests += 1
+
+        start = time.perf_counter()
+        steady_at = start + args.warmup
+        deadline = start + args.seconds
+        tracemalloc.start()
+        try:
+            # Clients are joined before each sample, so no request is in flight.
+            while (now := time.perf_counter()) < deadline:
+                until = min(now + args.interval, deadline)
+                await asyncio.gather(*(client(n, until) for n in range(args.concurrency)))
+                if time.perf_counter() < steady_at:
+                    continue
+                gc.collect()
+                if baseline is None:
+                    baseline = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+                traced, _ = tracemalloc.get_traced_memory()
+                result.samples.append((result.requests, traced, rss_bytes()))
+            final = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+        finally:
+            tracemalloc.stop()
+        result.seconds = time.perf_counter() - start
+    if baseline is not None:
+        for stat in final.compare_to(baseline, "lineno")[: args.top]:
+            frame = stat.traceback[0]
+            result.top_sites.append(
+                (f"{frame.filename}:{frame.lineno}", stat.size_diff, stat.count_diff)
+            )
+    _judge(result, args)
+    return result
+
+
+def _judge(result: SoakResult, args: argparse.Namespace) -> None:
+    if len(result.samples) < 3:
+        result.failures.append("too few steady-state samples; raise --seconds")
+        return
+    requests = [float(n) for n, _, _ in result.samples]
+    traced = [float(t) for _, t, _ in result.samples]
+    if requests[-1] > requests[0]:
+        result.growth_per_request = statistics.linear_regression(requests, traced).slope
+    result.rss_growth_mib = (result.samples[-1][2] - result.samples[0][2]) / 2**20
+    grown = result.samples[-1][1] - result.samples[0][1]
+    if result.growth_per_request > args.max_growth and grown > NOISE_FLOOR:
+        result.failures.append(
+            f"traced memory grows {result.growth_per_request:.1f} B/request "
+            f"(limit {args.max_growth})"
+        )
+    if args.max_rss_growth is not None and result.rss_growth_mib > args.max_rss_growth:
+        result.failures.append(
+            f"RSS grew {result.rss_growth_mib:.1f} MiB (limit {args.max_rss_growth})"
+        )
+
+
+def _report(result: SoakResult) -> None:
+    verdict = "FAIL" if result.failures else "ok"
+    rate = result.requests / result.seconds if result.seconds else 0.0
+    print(
+        f"{result.module}: {verdict} - {result.requests} requests ({rate:.0f}/s), "
+        f"statuses {dict(sorted(result.statuses.items()))}"
+    )
+    if result.samples:
+        first, last = result.samples[0], result.samples[-1]
+        print(
+            f"  traced {first[1] / 2**20:.1f} -> {last[1] / 2**20:.1f} MiB "
+            f"({result.growth_per_request:+.2f} B/request), "
+            f"RSS {first[2] / 2**20:.1f} -> {last[2] / 2**20:.1f} MiB"
+        )
+    for failure in result.failures:
+        print(f"  {failure}")
+    for site, size, count in result.top_sites:
+        if size > 0:
+            print(f"  {size / 1024:+10.1f} KiB {count:+7d} blocks  {site}")
+
+
+def main() -> int:
+    """Soak the selected apps; return the exit status."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", action="append", default=[], help="app module(s)")
+    parser.add_argument("--seconds", type=float, default=60.0, help="run time per app")
+    parser.add_argument("--warmup", type=float, default=10.0, help="seconds not judged")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between samples")
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent client loops")
+    parser.add_argument("--max-growth", type=float, default=8.0, help="bytes per request")
+    parser.add_argument("--max-rss-growth", type=float, help="MiB over the steady phase")
+    parser.add_argument("--top", type=int, default=10, help="growing sites to list")
+    args = parser.parse_args()
+    for name, value in SOAK_ENV.items():
+        os.environ.setdefault(name, value)
+    failed = False
+    for module, app in study_apps(args.module).items():
+        result = asyncio.run(soak(module, app, args))
+        if result.requests:
+            _report(result)
+            failed |= bool(result.failures)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,63 @@
 """Exploration of header parameters in FastAPI."""
 
-from fastapi import FastAPI, Header
+from typing import Annotated
 
-app = FastAPI()
+from fastapi import Depends
+from starlette.types import Scope
 
+from study_fastapi.app_factory import AppConfig, create_app
+from study_fastapi.header_schema import HeaderSchema, UserAgent, parse_user_agent
+from study_fastapi.raw_routes import raw_route
 
-@app.get("/useragent")
-def get_user_agent(user_agent: str = Header()):
+config = AppConfig.from_env(openapi_snapshot="a2_fastapi_header")
+app = create_app(config)
+
+# Compiled once: the header name is normalised here instead of on every request.
+_USER_AGENT = HeaderSchema("user-agent")
+UserAgentHeaders = Annotated[dict[str, str | None], Depends(_USER_AGENT)]
+
+
+def _raw_user_agent(scope: Scope) -> str | None:
+    """Return the User-Agent straight from the ASGI scope; ``None`` when it is missing."""
+    return _USER_AGENT.extract(scope["headers"])["user_agent"]
+
+
+# With APP_RAW_ROUTES=1, requests that carry the header skip FastAPI and are answered by
+# _raw_user_agent; a missing header still goes through the dependency (the usual 422).
+@raw_route(
+    app,
+    "/useragent",
+    render=_raw_user_agent,
+    enabled=config.raw_routes,
+    openapi_extra=_USER_AGENT.openapi_extra(),
+)
+def get_user_agent(headers: UserAgentHeaders):
     """Get the User-Agent header. URL = http://127.0.0.1:8002/useragent .
 
-    FastAPI converts HTTP header keys to lowercase,
-    and converts a hyphen (-) to an underscore (_). So to get User-Agent header,
-    json key is user_agent. Try "curl http://127.0.0.1:8002/useragent" to check default
-    useragent for curl.
+    With a plain ``user_agent: str = Header()`` parameter, FastAPI converts HTTP header keys
+    to lowercase and converts a hyphen (-) to an underscore (_), on every request. The
+    ``HeaderSchema`` dependency declares "user-agent" once and picks it out of the raw
+    header list in a single pass. Try "curl http://127.0.0.1:8002/useragent" to check
+    default useragent for curl.
 
-    @params user_agent: The User-Agent string from the request headers.
+    @params headers: The extracted headers, keyed by python name (user_agent).
     @returns: A JSON response containing the User-Agent string.
     """
-    return user_agent
+    return headers["user_agent"]
+
+
+@app.get("/useragent/parsed", openapi_extra=_USER_AGENT.openapi_extra())
+def get_user_agent_parsed(headers: UserAgentHeaders) -> UserAgent:
+    """Get the User-Agent split into family, version and OS.
+
+    URL = http://127.0.0.1:8002/useragent/parsed . Parsing is LRU-cached per distinct UA.
+
+    @params headers: The extracted headers, keyed by python name (user_agent).
+    @returns: The parsed User-Agent.
+    """
+    user_agent = headers["user_agent"]
+    assert user_agent is not None  # required header, validated by the schema
+    return parse_user_agent(user_agent)
 
 
 @app.get("/hi", description="Method to test where does it search for parameters")
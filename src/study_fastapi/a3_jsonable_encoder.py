@@ -1,29 +1,78 @@
 """Exploration of json encoding of various datatypes by FastAPI."""
 
-import json
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
 
-from fastapi.encoders import jsonable_encoder
+from fastapi import Body, FastAPI
 
+from study_fastapi.app_factory import AppConfig, create_app
+from study_fastapi.encoders import (
+    encode_bulk,
+    get_fastapi_encoded_string,
+    get_fastapi_jsonencoded,  # noqa: F401 - re-exported; the encoders used to live here
+    get_json_dumps,
+)
+from study_fastapi.jobs import Job, JobQueue, submit_or_503
+from study_fastapi.offload import Offloader, OffloadPool
 
-def get_fastapi_jsonencoded(obj):
-    """Get encodable json object."""
-    return jsonable_encoder(obj)
+# Large encodes go to a worker pool so they don't stall the event loop. Both encoders share
+# one small pool; its workers import only ``study_fastapi.encoders``.
+encode_pool = OffloadPool()
+fastapi_offloader = Offloader(get_fastapi_encoded_string, pool=encode_pool)
+json_offloader = Offloader(get_json_dumps, pool=encode_pool)
 
 
-def get_fastapi_encoded_string(obj):
-    """Get json serialized string for object."""
-    return json.dumps(get_fastapi_jsonencoded(obj))
+async def get_fastapi_encoded_string_async(obj):
+    """Get json serialized string for object, off the event loop when it is large."""
+    return await fastapi_offloader.encode(obj)
 
 
-def get_json_dumps(obj):
-    """Get json dump of any python object.
+async def get_json_dumps_async(obj):
+    """Get json dump of a python object, off the event loop when it is large."""
+    return await json_offloader.encode(obj)
 
-    This doesn't support all datatypes though. So FastAPI created a middle layer
-    which converts python object to any json encodeable object.
 
-    Basically it supports only objects with either an iterator method implementation
-    or int, str, float, bool
-    list and dict supported as they implement an iterator method
-    Any complex object without a type iterator will return in a Type Error
+jobs = JobQueue.from_env()
+jobs.register("encode_bulk", encode_bulk)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Run the job workers and shut the encode pool down on exit."""
+    async with jobs.lifespan(app):
+        try:
+            yield
+        finally:
+            encode_pool.close()
+
+
+app = create_app(
+    AppConfig.from_env(
+        lifespan=lifespan,
+        # Spawning a pool worker takes longer than most encodes; start one before traffic.
+        warmers=(encode_pool.warm,),
+        openapi_snapshot="a3_jsonable_encoder",
+    )
+)
+app.include_router(jobs.router())
+
+
+@app.post("/encode/bulk", status_code=202)
+async def submit_bulk_encode(objs: list[Any] = Body()) -> Job:
+    """Encode a large batch off the request path. URL = http://127.0.0.1:8003/encode/bulk .
+
+    Returns 202 with a job id straight away; poll ``GET /jobs/{id}`` for the encoded
+    strings. Answers 503 with ``Retry-After`` when the job queue is full.
+    """
+    return await submit_or_503(jobs, "encode_bulk", objs)
+
+
+@app.post("/encode")
+async def encode(obj: Any = Body()) -> str:
+    """Encode a payload to a JSON string. URL = http://127.0.0.1:8003/encode .
+
+    Payloads above the offload threshold are encoded on a worker pool, so other requests
+    keep being served while a large encode runs.
     """
-    return json.dumps(obj)
+    return await get_fastapi_encoded_string_async(obj)
@@ -2,11 +2,23 @@
 
 import asyncio
 import time
+from collections.abc import AsyncIterator
+from typing import Annotated
 
 import uvicorn
-from fastapi import FastAPI
+from fastapi import Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 
-app = FastAPI()
+from study_fastapi.app_factory import AppConfig, create_app
+from study_fastapi.broadcast import Broadcaster
+
+# /hi sleeps for a second and /sse/hi never ends, so neither is warmed at startup.
+app = create_app(
+    AppConfig.from_env(openapi_snapshot="a4_fastapi_async", warmup_skip=("/hi", "/sse/hi"))
+)
+
+# Seconds between greeting ticks pushed to /ws/hi and /sse/hi subscribers.
+TICK_INTERVAL = 1.0
 
 
 @app.get("/hi")
@@ -18,6 +30,57 @@ async def greet():
     return f"Hello, World! (waited {wait_time:.2f} seconds)"
 
 
+async def greeting_ticks() -> AsyncIterator[str]:
+    """Yield a greeting every ``TICK_INTERVAL`` seconds."""
+    tick = 0
+    while True:
+        await asyncio.sleep(TICK_INTERVAL)
+        tick += 1
+        yield f"Hello, World! (tick {tick})"
+
+
+# One ticker task serves every subscriber instead of one sleeping coroutine per client.
+greetings = Broadcaster(greeting_ticks)
+
+Count = Annotated[int | None, Query(gt=0, description="Stop after this many messages.")]
+
+
+async def _take(messages: AsyncIterator[str], count: int | None) -> AsyncIterator[str]:
+    sent = 0
+    async for message in messages:
+        yield message
+        sent += 1
+        if sent == count:
+            return
+
+
+@app.websocket("/ws/hi")
+async def greet_websocket(websocket: WebSocket, count: Count = None):
+    """Push greeting ticks over a WebSocket. URL = ws://127.0.0.1:8004/ws/hi ."""
+    await websocket.accept()
+    async with greetings.subscribe() as messages:
+        try:
+            async for message in _take(messages, count):
+                await websocket.send_text(message)
+        except WebSocketDisconnect:
+            return
+    await websocket.close()
+
+
+@app.get("/sse/hi", response_class=StreamingResponse)
+async def greet_sse(count: Count = None):
+    """Stream greeting ticks as Server-Sent Events. URL = http://127.0.0.1:8004/sse/hi ."""
+
+    async def events() -> AsyncIterator[str]:
+        async with greetings.subscribe() as messages:
+            async for message in _take(messages, count):
+                yield f"data: {message}\n\n"
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"}
+    )
+
+
 if __name__ == "__main__":
     # Demo of invoking uvicorn internally from python programs
     import uvicorn
@@ -1,9 +1,23 @@
 """Pydantic model exploration."""
 
+import os
+import tempfile
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager
+from pathlib import Path
 from typing import Annotated
 
-from fastapi import FastAPI
-from pydantic import BaseModel, StringConstraints
+from fastapi import FastAPI, Query
+from fastapi.responses import Response, StreamingResponse
+
+from study_fastapi.app_factory import AppConfig, create_app
+from study_fastapi.catalogue import SnapshotCatalogue, load_catalogue
+from study_fastapi.changefeed import VERSION_HEADER, VersionedCatalogue, single_writer
+from study_fastapi.export import DEFAULT_CHUNK_SIZE, ExportFormat, export_response
+from study_fastapi.models import Buyer, Seller
+from study_fastapi.projection import FieldsQuery, projection
+from study_fastapi.search import SearchHit, SearchIndex
+from study_fastapi.shards import ShardedCatalogue
 
 """ Important points about pydantic validation -
 It checks for required fields.
@@ -12,34 +26,9 @@ It serializes data
 """
 
 
-class Buyer(BaseModel):
-    """Data model for enclosing buyer information."""
-
-    name: str
-    country: Annotated[
-        str,
-        StringConstraints(max_length=2, pattern=r"^[A-Z]{2}$"),
-    ]
-    zipcode: str
-
-
-class Seller(BaseModel):
-    """Data model for enclosing seller information."""
-
-    name: str
-
-    # ISO 3166-1 alpha-2 country code
-    country: Annotated[
-        str,
-        StringConstraints(max_length=2, pattern=r"^[A-Z]{2}$"),
-    ]
-
-    shipping_port: str | None
-    shop_description: str
-    aka: str
-
-
-_sellers: list[Seller] = [
+# Built-in records; set CATALOGUE_DIR to serve memory-mapped snapshots (sellers.snap,
+# buyers.snap) shared by all workers and hot-reloaded when replaced.
+_builtin_sellers = [
     Seller(
         name="Share Exports",
         country="CN",
@@ -55,21 +44,186 @@ _sellers: list[Seller] = [
         aka="Tirupati handwoven factory",
     ),
 ]
-_buyers: list[Buyer] = [
+_builtin_buyers = [
     Buyer(name="Shweta", country="IN", zipcode="560035"),
     Buyer(name="Bob", country="US", zipcode="99001"),
 ]
-
-app = FastAPI()
-
-
-@app.get("/sellers")
-def get_sellers() -> list[Seller]:
-    """Get the list of sellers."""
-    return _sellers
-
-
-@app.get("/buyers")
-def get_buyers() -> list[Buyer]:
-    """Get the list of buyers."""
-    return _buyers
+# Writes go to a versioned overlay; clients sync with GET /sellers/changes?since=<version>.
+# Records are keyed by name, so a snapshot repeating a name is rejected on the first write.
+_seller_base = load_catalogue(Seller, "sellers", _builtin_sellers)
+_buyer_base = load_catalogue(Buyer, "buyers", _builtin_buyers)
+_sellers = VersionedCatalogue(Seller, "name", _seller_base)
+_buyers = VersionedCatalogue(Buyer, "name", _buyer_base)
+# PUT/DELETE exist only when CATALOGUE_WRITE_TOKEN is set, and need it as a bearer token.
+# Writes live in this process's memory, so only one worker may serve them: the lock file
+# (CATALOGUE_WRITER_LOCK) stops a second writable worker from starting.
+_write_token = os.getenv("CATALOGUE_WRITE_TOKEN") or None
+_writer_lock = os.getenv("CATALOGUE_WRITER_LOCK") or str(
+    Path(os.getenv("CATALOGUE_DIR") or tempfile.gettempdir())
+    / "study_fastapi-catalogue-writer.lock"
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Hold the single-writer lock while this worker accepts catalogue writes."""
+    if _write_token is None:
+        yield
+        return
+    with single_writer(_writer_lock):
+        yield
+
+
+# Routes reading a whole catalogue; a snapshot can hold millions of records.
+_FULL_SCANS = (
+    "/sellers",
+    "/sellers/export",
+    "/sellers/search",
+    "/buyers",
+    "/buyers/export",
+    "/buyers/query",
+    "/buyers/shards",
+)
+_from_snapshot = any(isinstance(b, SnapshotCatalogue) for b in (_seller_base, _buyer_base))
+
+app = create_app(
+    AppConfig.from_env(
+        # The stored schema documents the read-only app; with writes enabled the live
+        # schema (which has the bearer-protected PUT/DELETE routes) is served instead.
+        openapi_snapshot=None if _write_token else "a5_pydantic_model",
+        lifespan=lifespan,
+        # Streams never finish, PUT/DELETE would change the catalogues, and full scans of
+        # a snapshot would hold up startup.
+        warmup_skip=(
+            "/sellers/changes/stream",
+            "/sellers/{key}",
+            "/buyers/changes/stream",
+            "/buyers/{key}",
+            *(_FULL_SCANS if _from_snapshot else ()),
+        ),
+    )
+)
+
+
+@app.get("/sellers", response_model=list[Seller])
+def get_sellers(response: Response, fields: FieldsQuery = None) -> Iterable[Seller] | Response:
+    """Get the list of sellers, optionally only some fields (``?fields=name,country``).
+
+    The ``X-Catalogue-Version`` header is the version to pass to ``/sellers/changes``.
+    """
+    version = str(_sellers.version)
+    if fields is None:
+        response.headers[VERSION_HEADER] = version
+        return _sellers
+    projected = projection(Seller, fields).response(_sellers)
+    projected.headers[VERSION_HEADER] = version
+    return projected
+
+
+@app.get("/buyers", response_model=list[Buyer])
+def get_buyers(response: Response, fields: FieldsQuery = None) -> Iterable[Buyer] | Response:
+    """Get the list of buyers, optionally only some fields (``?fields=name,country``).
+
+    The ``X-Catalogue-Version`` header is the version to pass to ``/buyers/changes``.
+    """
+    version = str(_buyers.version)
+    if fields is None:
+        response.headers[VERSION_HEADER] = version
+        return _buyers
+    projected = projection(Buyer, fields).response(_buyers)
+    projected.headers[VERSION_HEADER] = version
+    return projected
+
+
+# Built on the first search, then updated as sellers are written.
+_seller_search = SearchIndex(_sellers, ["shop_description", "aka"])
+
+
+@app.get("/sellers/search", response_model=list[SearchHit[Seller]])
+def search_sellers(
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+    prefix: bool = True,
+):
+    """Search sellers' descriptions and aliases. URL = http://127.0.0.1:8005/sellers/search?q=app .
+
+    @params q (str): Words that must all appear, e.g. "handwoven fact".
+    @params limit (int): Most results to return.
+    @params prefix (bool): Whether the last word also matches longer words ("fact" -> "factory").
+    @returns list[SearchHit[Seller]]: Matching sellers, best BM25 score first.
+    """
+    return _seller_search.search(q, limit=limit, prefix=prefix)
+
+
+# Buyers partitioned by country: one-country queries read one shard, others fan out.
+_buyer_shards = ShardedCatalogue(_buyers, "country")
+
+
+@app.get("/buyers/query", response_model=list[Buyer])
+def query_buyers(
+    country: Annotated[list[str] | None, Query()] = None,
+    zipcode: str | None = None,
+    name: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+):
+    """Find buyers by country and prefix. URL = http://127.0.0.1:8005/buyers/query?country=IN .
+
+    @params country (list[str] | None): Countries to search (repeatable); default all.
+    @params zipcode (str | None): Zipcode prefix, e.g. "560".
+    @params name (str | None): Name prefix, case-insensitive.
+    @params limit (int): Most buyers to return.
+    @returns list[Buyer]: Matching buyers, ordered by country.
+    """
+    return _buyer_shards.query(country, limit=limit, zipcode=zipcode, name=name)
+
+
+@app.get("/buyers/shards")
+def buyer_shards() -> dict[str, int]:
+    """Count buyers per country shard. URL = http://127.0.0.1:8005/buyers/shards .
+
+    @returns dict[str, int]: Number of buyers per country.
+    """
+    return _buyer_shards.sizes()
+
+
+ChunkSize = Annotated[int, Query(ge=1, le=100_000, description="Rows per streamed chunk")]
+
+
+@app.get("/sellers/export", response_class=StreamingResponse)
+def export_sellers(
+    format: ExportFormat = ExportFormat.ndjson,
+    fields: FieldsQuery = None,
+    chunk_size: ChunkSize = DEFAULT_CHUNK_SIZE,
+):
+    """Stream sellers as NDJSON, CSV or Arrow. URL = http://127.0.0.1:8005/sellers/export .
+
+    @params format (ExportFormat): ndjson (default), csv, or arrow (requires pyarrow).
+    @params fields (str | None): Comma-separated columns, e.g. "name,country".
+    @params chunk_size (int): Rows serialised per streamed chunk.
+    @returns StreamingResponse: The sellers, one chunk at a time.
+    """
+    return export_response(
+        _sellers, Seller, name="sellers", format=format, fields=fields, chunk_size=chunk_size
+    )
+
+
+@app.get("/buyers/export", response_class=StreamingResponse)
+def export_buyers(
+    format: ExportFormat = ExportFormat.ndjson,
+    fields: FieldsQuery = None,
+    chunk_size: ChunkSize = DEFAULT_CHUNK_SIZE,
+):
+    """Stream buyers as NDJSON, CSV or Arrow. URL = http://127.0.0.1:8005/buyers/export .
+
+    @params format (ExportFormat): ndjson (default), csv, or arrow (requires pyarrow).
+    @params fields (str | None): Comma-separated columns, e.g. "name,country".
+    @params chunk_size (int): Rows serialised per streamed chunk.
+    @returns StreamingResponse: The buyers, one chunk at a time.
+    """
+    return export_response(
+        _buyers, Buyer, name="buyers", format=format, fields=fields, chunk_size=chunk_size
+    )
+
+
+app.include_router(_sellers.router("/sellers", write_token=_write_token))
+app.include_router(_buyers.router("/buyers", write_token=_write_token))
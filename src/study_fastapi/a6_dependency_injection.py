@@ -8,9 +8,11 @@ This module demonstrates:
 
 from typing import Annotated
 
-from fastapi import Depends, FastAPI, Header, Query
+from fastapi import Depends, Header, Query
 
-app = FastAPI()
+from study_fastapi.app_factory import AppConfig, create_app
+
+app = create_app(AppConfig.from_env(openapi_snapshot="a6_dependency_injection"))
 
 
 def get_name(name: Annotated[str | None, Query()] = None) -> str | None:
@@ -1 +1,10 @@
-"""Placeholder module for future MVC app exploration."""
+"""Placeholder module for future MVC app exploration.
+
+The app is built with the shared factory already, so routes added here get the same
+middleware and lifespan handling as the other modules. It is expected to grow to hundreds
+of routes, so requests are matched with the radix-tree router (``study_fastapi.radix``).
+"""
+
+from study_fastapi.app_factory import AppConfig, create_app
+
+app = create_app(AppConfig.from_env(openapi_snapshot="a8_mvcapp", radix_router=True))
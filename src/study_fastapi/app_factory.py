@@ -0,0 +1,251 @@
+"""Shared FastAPI app factory.
+
+Every study module builds its app with ``create_app`` so cross-cutting features are applied
+the same way everywhere. ``AppConfig`` switches them on; ``AppConfig.from_env`` reads the
+defaults from the environment:
+
+- ``APP_TIMING``: ``1`` adds ``Server-Timing`` headers (``TimingMiddleware``)
+- ``APP_GZIP_MIN_SIZE``: gzip responses of at least this many bytes (default: off)
+- ``APP_CACHE_MAX_AGE``: ETags, ``304`` revalidation and ``Cache-Control: max-age`` for GET
+  responses; ``0`` revalidates every time (default: off)
+- ``APP_MAX_CONCURRENCY`` / ``APP_MAX_WAITING``: cap in-flight requests and the queue
+  behind them; excess requests get ``503`` (default: off / 100)
+- ``APP_FAST_JSON``: ``1`` renders responses of routes *without* a response model with
+  ``orjson`` when it is installed
+- ``APP_WARM``: ``0`` skips the ``warmers`` lifespan hooks and route warm-up (default: on)
+- ``APP_RADIX_ROUTER``: ``1`` matches routes with a compiled radix tree instead of trying
+  each route in turn (``study_fastapi.radix``)
+- ``APP_RAW_ROUTES``: ``1`` answers the apps' trivial endpoints from precomputed ASGI
+  messages (``study_fastapi.raw_routes``)
+
+``openapi_snapshot`` names the app's stored OpenAPI schema; ``/openapi.json``, ``/docs`` and
+``/redoc`` are then served from it (``study_fastapi.openapi_snapshot``).
+
+Request context (``RequestContextMiddleware``) and env-gated profiling (``add_profiling``)
+are always installed, and so is ``CachedValidationErrorHandler``, which serves repeated
+``422`` bodies (e.g. a missing parameter) pre-encoded (``study_fastapi.errors``).
+
+Lifespan: ``config.lifespan`` (e.g. a job queue's) is entered first, then every ``warmers``
+hook runs before the app accepts requests. This is where caches are filled and pools are
+pre-opened, so the first real requests don't pay that cold cost. Finally every route is
+exercised once with synthetic inputs (``study_fastapi.warmup``); the report is kept on
+``app.state.warmup``.
+
+Notes
+-----
+FastAPI already serialises routes with a return type or ``response_model`` straight to
+JSON bytes with pydantic's Rust core, and only does so while the app keeps its default
+response class. ``fast_json`` therefore never changes ``default_response_class``; it only
+swaps the response class of routes without a response model.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import importlib.util
+import inspect
+import os
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import AbstractAsyncContextManager, AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import FastAPI
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, request_response
+from starlette.middleware.gzip import GZipMiddleware
+
+from study_fastapi.errors import CachedValidationErrorHandler
+from study_fastapi.middleware import (
+    ConcurrencyLimitMiddleware,
+    ConditionalGetMiddleware,
+    RequestContextMiddleware,
+    TimingMiddleware,
+)
+from study_fastapi.openapi_snapshot import install_snapshot
+from study_fastapi.profiling import add_profiling
+from study_fastapi.radix import install_radix_router
+from study_fastapi.warmup import warm_routes
+
+Lifespan = Callable[[FastAPI], AbstractAsyncContextManager[None]]
+Hook = Callable[[], Awaitable[None] | None]
+
+
+def orjson_available() -> bool:
+    """Return ``True`` when the optional ``orjson`` dependency is importable."""
+    return importlib.util.find_spec("orjson") is not None
+
+
+def _env_flag(name: str, default: str = "0") -> bool:
+    return os.getenv(name, default).lower() in {"1", "true", "yes", "on"}
+
+
+def _env_int(name: str) -> int | None:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+@dataclass(frozen=True)
+class AppConfig:
+    """Features installed by ``create_app``.
+
+    Parameters
+    ----------
+    title
+        OpenAPI title.
+    timing
+        Add ``Server-Timing`` headers.
+    gzip_min_size
+        Gzip responses of at least this many bytes; ``None`` disables compression.
+    cache_max_age
+        Enable ETag revalidation with this ``max-age``; ``None`` disables it.
+    max_concurrency, max_waiting
+        Concurrency limit and the queue allowed behind it; ``None`` disables the limit.
+    fast_json
+        Render routes without a response model with ``orjson`` (when installed).
+    warm
+        Run ``warmers`` and, if ``warm_routes``, the route warm-up at startup.
+    warm_routes
+        Send one synthetic request per route at startup (after the warmers).
+    warmup_skip
+        Route paths left out of the warm-up, e.g. slow or streaming endpoints.
+    lifespan
+        App-specific lifespan entered before the warmers run.
+    warmers
+        Sync or async zero-argument callables run once at startup.
+    openapi_snapshot
+        Name of the stored OpenAPI schema to serve (``openapi/<name>.json``, recorded as
+        ``app.state.openapi_snapshot``); ``None`` generates the schema lazily on the first
+        ``/openapi.json`` request.
+    radix_router
+        Match requests to routes with a ``RadixRouter`` (for large route tables).
+    raw_routes
+        Register the endpoints an app declares with ``raw_route`` as raw ASGI routes; read
+        by the app modules, not by ``create_app``.
+    """
+
+    title: str = "FastAPI"
+    timing: bool = False
+    gzip_min_size: int | None = None
+    cache_max_age: int | None = None
+    max_concurrency: int | None = None
+    max_waiting: int | None = 100
+    fast_json: bool = False
+    warm: bool = True
+    warm_routes: bool = True
+    warmup_skip: tuple[str, ...] = ()
+    lifespan: Lifespan | None = None
+    warmers: tuple[Hook, ...] = ()
+    openapi_snapshot: str | None = None
+    radix_router: bool = False
+    raw_routes: bool = False
+
+    @classmethod
+    def from_env(cls, **overrides: Any) -> AppConfig:
+        """Read ``APP_*`` environment variables; keyword arguments take precedence."""
+        max_waiting = _env_int("APP_MAX_WAITING")  # 0 is valid: reject instead of queueing
+        config = cls(
+            timing=_env_flag("APP_TIMING"),
+            gzip_min_size=_env_int("APP_GZIP_MIN_SIZE"),
+            cache_max_age=_env_int("APP_CACHE_MAX_AGE"),
+            max_concurrency=_env_int("APP_MAX_CONCURRENCY"),
+            max_waiting=100 if max_waiting is None else max_waiting,
+            fast_json=_env_flag("APP_FAST_JSON"),
+            warm=_env_flag("APP_WARM", "1"),
+            radix_router=_env_flag("APP_RADIX_ROUTER"),
+            raw_routes=_env_flag("APP_RAW_ROUTES"),
+        )
+        return dataclasses.replace(config, **overrides)
+
+
+class FastJSONResponse(JSONResponse):
+    """``JSONResponse`` rendered with ``orjson`` (which must be installed)."""
+
+    def render(self, content: Any) -> bytes:  # noqa: D401
+        """Serialise ``content`` with ``orjson``."""
+        import orjson
+
+        return orjson.dumps(content)
+
+
+class FastJSONRoute(APIRoute):
+    """``APIRoute`` using ``FastJSONResponse`` for routes without a response model.
+
+    Routes with a response model keep FastAPI's default path, which already serialises
+    with pydantic; giving them a custom response class would turn that off.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        super().__init__(path, endpoint, **kwargs)
+        if self.response_field is None and isinstance(self.response_class, DefaultPlaceholder):
+            self.response_class = FastJSONResponse
+            self.app = request_response(self.get_route_handler())
+
+
+def _lifespan(config: AppConfig) -> Lifespan:
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        async with AsyncExitStack() as stack:
+            if config.lifespan is not None:
+                await stack.enter_async_context(config.lifespan(app))
+            if config.warm:
+                for warmer in config.warmers:
+                    result = warmer()
+                    if inspect.isawaitable(result):
+                        await result
+                if config.warm_routes:
+                    app.state.warmup = await warm_routes(app, skip=config.warmup_skip)
+            yield
+
+    return lifespan
+
+
+def create_app(config: AppConfig | None = None) -> FastAPI:
+    """Build a ``FastAPI`` app with the middleware and lifespan described by ``config``.
+
+    ``None`` uses ``AppConfig.from_env()``. Middleware is listed innermost first below;
+    request context is outermost so every other layer's log lines carry the request id.
+
+    1. ``ConditionalGetMiddleware`` (ETags are computed on the uncompressed body)
+    2. ``GZipMiddleware``
+    3. ``ConcurrencyLimitMiddleware``
+    4. ``TimingMiddleware`` (includes time spent queued for a concurrency slot)
+    5. ``ProfilingMiddleware``, when enabled by ``PROFILE_*`` variables
+    6. ``RequestContextMiddleware``
+    """
+    config = config or AppConfig.from_env()
+    app = FastAPI(title=config.title, lifespan=_lifespan(config))
+    if config.fast_json and orjson_available():
+        app.router.route_class = FastJSONRoute
+    app.state.openapi_snapshot = config.openapi_snapshot
+    if config.openapi_snapshot is not None:
+        install_snapshot(app, config.openapi_snapshot)
+    app.add_exception_handler(RequestValidationError, CachedValidationErrorHandler())
+    if config.radix_router:
+        install_radix_router(app)
+    if config.cache_max_age is not None:
+        app.add_middleware(ConditionalGetMiddleware, max_age=config.cache_max_age)
+    if config.gzip_min_size is not None:
+        app.add_middleware(GZipMiddleware, minimum_size=config.gzip_min_size)
+    if config.max_concurrency is not None:
+        app.add_middleware(
+            ConcurrencyLimitMiddleware,
+            max_concurrency=config.max_concurrency,
+            max_waiting=config.max_waiting,
+        )
+    if config.timing:
+        app.add_middleware(TimingMiddleware)
+    add_profiling(app)
+    app.add_middleware(RequestContextMiddleware)
+    return app
+
+
+__all__ = [
+    "AppConfig",
+    "FastJSONResponse",
+    "FastJSONRoute",
+    "create_app",
+    "orjson_available",
+]
@@ -0,0 +1,99 @@
+"""Single-producer fan-out of messages to many async subscribers.
+
+``Broadcaster`` runs one producer task per event loop, no matter how many clients are
+subscribed, and wakes every subscriber through one shared ``asyncio.Event`` per message.
+Subscribers keep no queue of their own: each one holds a reference to the current event
+and reads the latest message when it fires. Memory per subscriber is a suspended coroutine,
+and publishing costs O(1) regardless of subscriber count.
+
+Delivery uses latest-value semantics. A subscriber that is still busy sending the previous
+message when the next two are published only sees the newest one. That is the right
+trade-off for ticks and status streams, where stale values have no use.
+
+The producer starts with the first subscriber and is cancelled when the last one leaves.
+If the source raises, the error is logged and every subscriber's iteration ends.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+
+from utils.logging_utils import get_logger
+
+log = get_logger(__name__)
+
+
+class Broadcaster:
+    """Fan out messages from ``source()`` to every active subscriber.
+
+    Parameters
+    ----------
+    source
+        Zero-argument callable returning a fresh async iterator of messages. It is called
+        each time the producer (re)starts.
+    """
+
+    def __init__(self, source: Callable[[], AsyncIterator[str]]) -> None:
+        self._source = source
+        self._task: asyncio.Task[None] | None = None
+        self._event = asyncio.Event()
+        self._message = ""
+        self._seq = 0
+        self._closed = False
+        self.subscribers = 0
+
+    async def _pump(self) -> None:
+        try:
+            async for message in self._source():
+                self._publish(message)
+        except Exception:
+            log.exception("broadcast source failed; closing %d subscribers", self.subscribers)
+        finally:
+            # Wake everyone so they notice the source is exhausted (or cancelled). A pump
+            # cancelled by the last subscriber may finish after a new one has started: the
+            # state then belongs to the new pump.
+            if self._task is asyncio.current_task():
+                self._closed = True
+                self._event.set()
+
+    def _publish(self, message: str) -> None:
+        self._message = message
+        self._seq += 1
+        event, self._event = self._event, asyncio.Event()
+        event.set()
+
+    async def _listen(self) -> AsyncIterator[str]:
+        seen = self._seq
+        while True:
+            if self._seq != seen:
+                seen = self._seq
+                yield self._message
+            elif self._closed:
+                return
+            else:
+                await self._event.wait()
+
+    @asynccontextmanager
+    async def subscribe(self) -> AsyncIterator[AsyncIterator[str]]:
+        """Subscribe for the duration of the ``async with`` block.
+
+        Yields an async iterator over messages published after subscribing.
+        """
+        if self._task is None or self._task.done():
+            # Events bind to the running loop, so start from fresh state for each producer.
+            self._event = asyncio.Event()
+            self._closed = False
+            self._task = asyncio.create_task(self._pump())
+        self.subscribers += 1
+        try:
+            yield self._listen()
+        finally:
+            self.subscribers -= 1
+            if not self.subscribers and self._task is not None:
+                self._task.cancel()
+                self._task = None
+
+
+__all__ = ["Broadcaster"]
@@ -0,0 +1,348 @@
+r"""Read-only catalogues of pydantic models backed by a memory-mapped snapshot file.
+
+A catalogue held as a Python list is rebuilt, and kept as private objects, by every uvicorn
+worker. ``SnapshotCatalogue`` instead maps a compact binary snapshot with ``mmap``. The
+pages live in the OS page cache and are shared by all workers that open the same file. A
+worker only builds model objects for the records it actually serves, so opening even a
+million-record file is instant.
+
+Snapshots are replaced atomically: ``write_snapshot`` writes a temporary file next to the
+target and ``os.replace``-s it in. Each catalogue notices the new file (checking at most
+every ``check_interval`` seconds) and switches to it. Reads already in progress finish on
+the old mapping, so readers never see a half-written file or a mix of two snapshots. A
+replacement that is truncated, corrupt or for another model is logged and ignored, and the
+current snapshot keeps being served.
+
+File layout (little-endian)::
+
+    header   8s magic, u32 version, u32 meta length, u64 record count, u64 offsets position
+    meta     JSON: model name and [field, kind] pairs; kind "s" = str, "j" = JSON
+    records  per field a u32 length in characters (0xFFFFFFFF = None), then the fields'
+             text concatenated as UTF-8
+    offsets  u64 start of each record, plus the end of the last one
+
+Build a snapshot from an NDJSON export (``GET /sellers/export``)::
+
+    PYTHONPATH=src python -m study_fastapi.catalogue \
+        study_fastapi.models:Seller sellers.ndjson catalogue/sellers.snap
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import types
+import typing
+from array import array
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from pathlib import Path
+from typing import IO, Any, TypeVar, overload
+
+from pydantic import BaseModel
+from pydantic_core import to_jsonable_python
+
+from utils.logging_utils import get_logger
+
+log = get_logger(__name__)
+
+M = TypeVar("M", bound=BaseModel)
+
+MAGIC = b"STUDYCAT"
+VERSION = 1
+_HEADER = struct.Struct("<8sIIQQ")
+_SPAN = struct.Struct("<QQ")
+_NONE = 0xFFFFFFFF
+
+
+def _kind(annotation: Any) -> str:
+    if typing.get_origin(annotation) in (typing.Union, types.UnionType):
+        members = set(typing.get_args(annotation))
+    else:
+        members = {annotation}
+    return "s" if members <= {str, type(None)} else "j"
+
+
+def _fields(model: type[BaseModel]) -> list[list[str]]:
+    return [[name, _kind(info.annotation)] for name, info in model.model_fields.items()]
+
+
+def _pad(stream: IO[bytes]) -> None:
+    stream.write(b"\0" * (-stream.tell() % 8))
+
+
+def _encode(row: BaseModel, fields: list[list[str]]) -> bytes:
+    lengths, texts = [], []
+    for name, kind in fields:
+        value = getattr(row, name)
+        if value is None:
+            lengths.append(_NONE)
+            continue
+        text = value if kind == "s" else json.dumps(to_jsonable_python(value))
+        lengths.append(len(text))
+        texts.append(text)
+    return struct.pack(f"<{len(fields)}I", *lengths) + "".join(texts).encode()
+
+
+def write_snapshot(path: str | os.PathLike[str], model: type[M], rows: Iterable[M]) -> int:
+    """Write ``rows`` to a snapshot at ``path``, atomically replacing any existing file.
+
+    Rows are streamed to disk; only their offsets (8 bytes each) are kept in memory.
+    Returns the number of records written.
+    """
+    target = Path(path)
+    fields = _fields(model)
+    meta = json.dumps({"model": model.__name__, "fields": fields}).encode()
+    offsets = array("Q")
+    temporary = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    try:
+        with open(temporary, "wb") as stream:
+            stream.write(_HEADER.pack(MAGIC, VERSION, len(meta), 0, 0))
+            stream.write(meta)
+            _pad(stream)
+            for row in rows:
+                offsets.append(stream.tell())
+                stream.write(_encode(row, fields))
+            offsets.append(stream.tell())
+            _pad(stream)
+            offsets_position = stream.tell()
+            if sys.byteorder == "big":
+                offsets.byteswap()
+            stream.write(offsets.tobytes())
+            stream.seek(0)
+            count = len(offsets) - 1
+            stream.write(_HEADER.pack(MAGIC, VERSION, len(meta), count, offsets_position))
+            stream.flush()
+            os.fsync(stream.fileno())
+        os.replace(temporary, target)
+    finally:
+        temporary.unlink(missing_ok=True)
+    return count
+
+
+class _Mapping:
+    """One opened snapshot file: its mmap, record count and decoding plan."""
+
+    def __init__(self, path: Path, model: type[BaseModel]) -> None:
+        with open(path, "rb") as file:
+            self.identity = os.fstat(file.fileno())
+            if self.identity.st_size < _HEADER.size:
+                raise ValueError(f"{path} is not a version {VERSION} catalogue snapshot")
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            meta = self._check(path, model)
+        except BaseException:
+            self.buffer.close()
+            raise
+        self.names = [name for name, _ in meta["fields"]]
+        self.json_fields = [kind == "j" for _, kind in meta["fields"]]
+        self.lengths = struct.Struct(f"<{len(self.names)}I")
+        # Fields that are all strings need no validation: they were validated when written.
+        self.build = model.model_validate if any(self.json_fields) else _construct(model)
+
+    def _check(self, path: Path, model: type[BaseModel]) -> dict[str, Any]:
+        # Everything a read relies on is checked before the mapping is used, so a truncated
+        # or foreign file is rejected here rather than failing requests later.
+        magic, version, meta_length, self.count, self.offsets = _HEADER.unpack_from(self.buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} catalogue snapshot")
+        records_start = _HEADER.size + meta_length
+        end = self.offsets + 8 * (self.count + 1)
+        if not records_start <= self.offsets <= end <= len(self.buffer):
+            raise ValueError(f"{path} is truncated or corrupt")
+        first = struct.unpack_from("<Q", self.buffer, self.offsets)[0]
+        last = struct.unpack_from("<Q", self.buffer, end - 8)[0]
+        if not records_start <= first <= last <= self.offsets:
+            raise ValueError(f"{path} is truncated or corrupt")
+        meta: dict[str, Any] = json.loads(self.buffer[_HEADER.size : records_start])
+        if meta["fields"] != _fields(model):
+            raise ValueError(f"{path} holds {meta['model']} records, not {model.__name__}")
+        return meta
+
+    def record(self, index: int) -> Any:
+        start, end = _SPAN.unpack_from(self.buffer, self.offsets + 8 * index)
+        raw = self.buffer[start:end]
+        # One decode per record; the stored lengths are in characters, so fields are
+        # plain ``str`` slices.
+        text = raw[self.lengths.size :].decode()
+        values: dict[str, Any] = {}
+        position = 0
+        for name, is_json, length in zip(
+            self.names, self.json_fields, self.lengths.unpack_from(raw), strict=True
+        ):
+            if length == _NONE:
+                values[name] = None
+                continue
+            value = text[position : position + length]
+            position += length
+            values[name] = json.loads(value) if is_json else value
+        return self.build(values)
+
+
+def _construct(model: type[M]) -> Callable[[dict[str, Any]], M]:
+    if model.__private_attributes__:
+        return lambda values: model.model_construct(**values)
+    new, set_attribute = object.__new__, object.__setattr__
+
+    def build(values: dict[str, Any]) -> M:
+        # ``model_construct`` without its per-call default and alias handling: every field
+        # is present in the snapshot and was validated when it was written.
+        instance = new(model)
+        set_attribute(instance, "__dict__", values)
+        set_attribute(instance, "__pydantic_fields_set__", set(values))
+        set_attribute(instance, "__pydantic_extra__", None)
+        set_attribute(instance, "__pydantic_private__", None)
+        return instance
+
+    return build
+
+
+class SnapshotCatalogue(Sequence[M]):
+    """A read-only ``Sequence`` of ``model`` records stored in a snapshot file.
+
+    Records are decoded when accessed; nothing is cached, so memory stays flat. Iteration
+    reads a single snapshot from start to end, even if the file is replaced meanwhile.
+
+    Parameters
+    ----------
+    path
+        Snapshot file written by ``write_snapshot``.
+    model
+        Record model; its fields must match the file's.
+    check_interval
+        Seconds between checks for a replaced file; ``None`` never reloads automatically.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        model: type[M],
+        *,
+        check_interval: float | None = 1.0,
+    ) -> None:
+        self.path = Path(path)
+        self.model = model
+        self.check_interval = check_interval
+        self._mapping = _Mapping(self.path, model)
+        self._rejected: tuple[int, int, int] | None = None
+        self._generation = 0
+        self._checked = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reload(self) -> bool:
+        """Switch to the file now at ``path`` if it was replaced; return whether it was.
+
+        A replacement that cannot be opened or fails the checks is logged (once per file)
+        and ignored: the catalogue keeps serving the snapshot it has.
+        """
+        with self._lock:
+            self._checked = time.monotonic()
+            try:
+                current = os.stat(self.path)
+            except FileNotFoundError:
+                return False
+            identity = (current.st_ino, current.st_mtime_ns, current.st_size)
+            previous = self._mapping.identity
+            if identity == (previous.st_ino, previous.st_mtime_ns, previous.st_size):
+                return False
+            if identity == self._rejected:
+                return False
+            try:
+                mapping = _Mapping(self.path, self.model)
+            except (OSError, ValueError, KeyError, struct.error) as exc:
+                self._rejected = identity
+                log.error("not reloading %s, keeping the current snapshot: %s", self.path, exc)
+                return False
+            # In-flight readers keep the old mapping alive until they finish with it.
+            self._mapping = mapping
+            self._generation += 1
+        log.info("reloaded %s: %d records", self.path, mapping.count)
+        return True
+
+    @property
+    def generation(self) -> int:
+        """Return how many times the snapshot has been reloaded (after checking for a new one)."""
+        self._current()
+        return self._generation
+
+    def _current(self) -> _Mapping:
+        interval = self.check_interval
+        if interval is not None and time.monotonic() - self._checked >= interval:
+            self.reload()
+        return self._mapping
+
+    def __len__(self) -> int:
+        """Return the number of records in the current snapshot."""
+        return self._current().count
+
+    @overload
+    def __getitem__(self, index: int) -> M: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[M]: ...
+
+    def __getitem__(self, index: int | slice) -> M | list[M]:
+        """Decode the record(s) at ``index`` from the current snapshot."""
+        mapping = self._current()
+        if isinstance(index, slice):
+            return [mapping.record(i) for i in range(*index.indices(mapping.count))]
+        position = index + mapping.count if index < 0 else index
+        if not 0 <= position < mapping.count:
+            raise IndexError("catalogue index out of range")
+        return mapping.record(position)
+
+    def __iter__(self) -> Iterator[M]:
+        """Decode every record of the snapshot current when iteration starts."""
+        mapping = self._current()
+        for index in range(mapping.count):
+            yield mapping.record(index)
+
+
+def load_catalogue(
+    model: type[M], name: str, default: Sequence[M], *, directory: str | None = None
+) -> Sequence[M]:
+    """Return the snapshot ``<directory>/<name>.snap`` if it exists, else ``default``.
+
+    ``directory`` defaults to the ``CATALOGUE_DIR`` environment variable; when neither is
+    set the built-in ``default`` records are used.
+    """
+    directory = directory or os.getenv("CATALOGUE_DIR")
+    if directory:
+        path = Path(directory) / f"{name}.snap"
+        if path.exists():
+            return SnapshotCatalogue(path, model)
+        log.warning("no %s snapshot at %s; using built-in records", name, path)
+    return default
+
+
+def _import_model(spec: str) -> type[BaseModel]:
+    module, _, attribute = spec.partition(":")
+    return getattr(importlib.import_module(module), attribute)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Build a snapshot from an NDJSON file of records; returns the exit code."""
+    parser = argparse.ArgumentParser(description="Build a catalogue snapshot from NDJSON.")
+    parser.add_argument("model", help="model to validate records with, e.g. package.module:Model")
+    parser.add_argument("source", type=Path, help="NDJSON file, one record per line")
+    parser.add_argument("target", type=Path, help="snapshot file to (atomically) replace")
+    args = parser.parse_args(argv)
+    model = _import_model(args.model)
+    with open(args.source, "rb") as lines:
+        rows = (model.model_validate_json(line) for line in lines if line.strip())
+        count = write_snapshot(args.target, model, rows)
+    print(f"wrote {count} records to {args.target}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
+
+
+__all__ = ["SnapshotCatalogue", "load_catalogue", "write_snapshot"]
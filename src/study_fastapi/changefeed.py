@@ -0,0 +1,470 @@
+"""Writable catalogues with a versioned change log, delta sync and long-poll/SSE.
+
+Polling a full collection costs the same bandwidth and CPU whether anything changed or not.
+``VersionedCatalogue`` numbers every write with a monotonically increasing version and keeps
+the most recent ``history`` changes. A client that has seen version ``v`` asks for
+``GET <prefix>/changes?since=v`` and receives only what changed after that. When nothing
+changed, that is an empty list; with ``wait=<seconds>`` the request is held open until
+something does (long-poll). ``GET <prefix>/changes/stream`` pushes the same deltas as
+Server-Sent Events, resuming from ``Last-Event-ID``.
+
+Sync protocol:
+
+1. ``GET <collection>`` returns every record; its ``X-Catalogue-Version`` header is the
+   version to continue from.
+2. ``GET <prefix>/changes?since=<version>`` returns a ``ChangeSet``. Apply its changes
+   (``insert``/``update`` replace the record under ``key``; ``delete`` removes it) and
+   continue from ``ChangeSet.version``. Several writes to one key inside the window are
+   collapsed into the one change that takes the client to the current state.
+3. If ``reset`` is true the log no longer reaches back to ``since`` (or the underlying
+   snapshot was replaced): fetch the full collection again.
+
+The catalogue is an overlay on a read-only base sequence, such as a memory-mapped
+``SnapshotCatalogue``. Reads that hit no written key still come from the base, and the
+base is indexed by key only once the first write arrives.
+
+Deployment: the overlay, the version counter and the change log live in one process's
+memory. Writes are lost on restart, and a version from one process means nothing to
+another. ``router`` therefore adds the write routes only when given a ``write_token``, and
+they require ``Authorization: Bearer <token>``. A process serving writes should hold
+``single_writer`` for its lifetime, so a second worker that would accept writes refuses to
+start. Run writable catalogues with a single worker, and let read-only workers serve the
+snapshot.
+"""
+
+import asyncio
+import hmac
+import itertools
+import os
+import threading
+from collections import deque
+from collections.abc import AsyncIterator, Callable, Collection, Iterator, Sequence
+from contextlib import contextmanager
+from enum import StrEnum
+from typing import Annotated, Any, Generic, TypeVar
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from pydantic import BaseModel
+
+from utils.logging_utils import get_logger
+
+log = get_logger(__name__)
+
+M = TypeVar("M", bound=BaseModel)
+
+VERSION_HEADER = "X-Catalogue-Version"
+
+
+class ChangeOp(StrEnum):
+    """Kind of write recorded in the change log."""
+
+    INSERT = "insert"
+    UPDATE = "update"
+    DELETE = "delete"
+
+
+class Change(BaseModel, Generic[M]):
+    """One write: the record now stored under ``key``, or ``None`` for a delete."""
+
+    version: int
+    op: ChangeOp
+    key: str
+    record: M | None = None
+
+
+class ChangeSet(BaseModel, Generic[M]):
+    """Changes after ``since``, up to and including ``version``."""
+
+    since: int
+    version: int
+    reset: bool = False
+    changes: list[Change[M]] = []
+
+
+class _Stripe(Generic[M]):
+    """A share of the overlay: ``key -> (write sequence, record or None)`` and its lock."""
+
+    __slots__ = ("lock", "overlay")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.overlay: dict[str, tuple[int, M | None]] = {}
+
+
+class VersionedCatalogue(Collection[M]):
+    """A keyed collection of ``model`` records whose writes are versioned and logged.
+
+    Safe to read and write from many threads (sync routes run in a threadpool). Readers
+    never wait for a lock. Writes are striped by key: a writer locks only its key's stripe
+    while it checks and replaces the record, so writers of different stripes only meet for
+    the few instructions that number the change and append it to the log.
+
+    Parameters
+    ----------
+    model
+        Record model.
+    key
+        Name of the field that identifies a record, e.g. ``"name"``. It must be unique in
+        ``base``: indexing a base where two records share a key (on the first write or
+        keyed read) raises ``ValueError`` rather than let writes pick one of them.
+    base
+        Initial records, read lazily; writes are kept in an overlay on top of them.
+    history
+        Number of most recent changes kept for ``changes_since``. Clients further behind
+        are told to ``reset``.
+    stripes
+        Number of independently locked shares of the overlay.
+    """
+
+    def __init__(
+        self,
+        model: type[M],
+        key: str,
+        base: Sequence[M] = (),
+        *,
+        history: int = 10_000,
+        stripes: int = 16,
+    ) -> None:
+        self.model = model
+        self.key = key
+        self._change = Change[model]  # type: ignore[valid-type]
+        self._change_set = ChangeSet[model]  # type: ignore[valid-type]
+        self._base = base
+        self._base_generation = getattr(base, "generation", 0)
+        self._base_index: dict[str, int] | None = None
+        self._index_lock = threading.Lock()
+        self._stripes: list[_Stripe[M]] = [_Stripe() for _ in range(stripes)]
+        self._sequence = itertools.count(1)  # orders inserts for iteration
+        self._log: deque[Change[M]] = deque(maxlen=history)
+        self._floor = 0  # changes at or below this version are no longer in the log
+        self.version = 0
+        # Held only to number a change and append it to the log (and for waiters).
+        self._lock = threading.Lock()
+        self._waiters: set[asyncio.Future[None]] = set()
+        self._listeners: list[Callable[[str | None], None]] = []
+
+    # -- reads ---------------------------------------------------------------------------
+
+    def _sync_base(self) -> None:
+        generation = getattr(self._base, "generation", 0)
+        if generation == self._base_generation:
+            return
+        with self._lock:
+            if generation == self._base_generation:
+                return  # another thread got here first
+            # A replaced snapshot is a bulk change the log cannot describe.
+            self._base_generation = generation
+            self._base_index = None
+            self.version += 1
+            self._floor = self.version
+            log.info("catalogue base replaced; clients before v%d resync", self.version)
+        self._notify(None)
+
+    def _index(self) -> dict[str, int]:
+        index = self._base_index
+        if index is None:
+            with self._index_lock:
+                if self._base_index is None:
+                    self._base_index = _index_by(self._base, self.key)
+                index = self._base_index
+        return index
+
+    def _stripe(self, key: str) -> _Stripe[M]:
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    def _overlay(self) -> dict[str, tuple[int, M | None]]:
+        # Each stripe is copied atomically; a write racing with this copy is either fully
+        # in it or not at all.
+        merged: dict[str, tuple[int, M | None]] = {}
+        for stripe in self._stripes:
+            merged.update(stripe.overlay.copy())
+        return merged
+
+    def get(self, key: str) -> M | None:
+        """Return the record stored under ``key``, or ``None``."""
+        self._sync_base()
+        entry = self._stripe(key).overlay.get(key)
+        if entry is not None:
+            return entry[1]
+        position = self._index().get(key)
+        return None if position is None else self._base[position]
+
+    def __contains__(self, key: object) -> bool:
+        """Return whether a record is stored under ``key``."""
+        return isinstance(key, str) and self.get(key) is not None
+
+    def __len__(self) -> int:
+        """Return the number of records."""
+        self._sync_base()
+        overlay = self._overlay()
+        if not overlay:
+            return len(self._base)
+        index = self._index()
+        added = sum(entry[1] is not None for key, entry in overlay.items() if key not in index)
+        removed = sum(entry[1] is None for key, entry in overlay.items() if key in index)
+        return len(self._base) + added - removed
+
+    def __iter__(self) -> Iterator[M]:
+        """Yield base records (replaced or deleted by writes), then inserted records."""
+        self._sync_base()
+        overlay = self._overlay()
+        if not overlay:
+            yield from self._base
+            return
+        key = self.key
+        for row in self._base:
+            name = getattr(row, key)
+            if name in overlay:
+                record = overlay.pop(name)[1]
+                if record is not None:
+                    yield record
+            else:
+                yield row
+        for _, record in sorted(overlay.values(), key=lambda entry: entry[0]):
+            if record is not None:
+                yield record
+
+    # -- writes --------------------------------------------------------------------------
+
+    def _write(self, key: str, record: M | None) -> Change[M] | None:
+        self._sync_base()
+        index = self._index()
+        # Built before taking the stripe lock: under the GIL, a thread preempted while it
+        # holds a lock makes every waiter queue behind all other threads, so the locked
+        # section is kept to a few dict operations.
+        change = self._change(version=0, op=ChangeOp.DELETE, key=key, record=record)
+        stripe = self._stripe(key)
+        with stripe.lock:
+            entry = stripe.overlay.get(key)
+            exists = entry[1] is not None if entry is not None else key in index
+            if record is None and not exists:
+                return None
+            if record is not None:
+                change.op = ChangeOp.UPDATE if exists else ChangeOp.INSERT
+            # Visible to readers before its version is: a client that reads version v and
+            # then the records may see later writes again, but never misses one.
+            stripe.overlay[key] = (next(self._sequence), record)
+            with self._lock:
+                self.version += 1
+                change.version = self.version
+                if len(self._log) == self._log.maxlen:
+                    self._floor = self._log[0].version
+                self._log.append(change)
+        self._notify(key)
+        return change
+
+    def upsert(self, record: M) -> Change[M]:
+        """Insert ``record``, or replace the record with the same key."""
+        change = self._write(getattr(record, self.key), record)
+        assert change is not None
+        return change
+
+    def delete(self, key: str) -> Change[M] | None:
+        """Delete the record under ``key``; returns ``None`` if there was none."""
+        return self._write(key, None)
+
+    # -- change feed ---------------------------------------------------------------------
+
+    def changes_since(self, since: int) -> ChangeSet[M]:
+        """Return the collapsed changes after version ``since``."""
+        self._sync_base()
+        with self._lock:
+            version, floor, log_ = self.version, self._floor, list(self._log)
+        change_set = self._change_set
+        if since < floor or since > version:
+            return change_set(since=since, version=version, reset=True)
+        latest: dict[str, Change[M]] = {}
+        first_op: dict[str, ChangeOp] = {}
+        for change in log_:
+            if change.version > since:
+                first_op.setdefault(change.key, change.op)
+                latest.pop(change.key, None)  # keep keys ordered by their last write
+                latest[change.key] = change
+        changes = []
+        for key, change in latest.items():
+            if first_op[key] is ChangeOp.INSERT:
+                if change.op is ChangeOp.DELETE:
+                    continue  # created and removed within the window: the client never knew
+                change = change.model_copy(update={"op": ChangeOp.INSERT})
+            changes.append(change)
+        return change_set(since=since, version=version, changes=changes)
+
+    def subscribe(self, listener: Callable[[str | None], None]) -> None:
+        """Call ``listener(key)`` after each write, or ``listener(None)`` when the base changes.
+
+        Listeners run on the writing thread, outside the catalogue's locks; read the current
+        record with ``get(key)`` rather than relying on the order of calls.
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, key: str | None) -> None:
+        for listener in self._listeners:
+            listener(key)
+        if not self._waiters:
+            return  # ``wait`` re-checks the version after registering, so none is missed
+        # Writes may come from threadpool workers; wake waiters on their own loops.
+        with self._lock:
+            waiters, self._waiters = self._waiters, set()
+        for waiter in waiters:
+            waiter.get_loop().call_soon_threadsafe(_wake, waiter)
+
+    async def wait(self, since: int, timeout: float) -> ChangeSet[M]:
+        """Return changes after ``since``, waiting up to ``timeout`` seconds for one."""
+        self._sync_base()
+        if timeout > 0 and self.version <= since:
+            waiter = asyncio.get_running_loop().create_future()
+            with self._lock:
+                ready = self.version > since
+                if not ready:
+                    self._waiters.add(waiter)
+            if not ready:
+                try:
+                    await asyncio.wait_for(waiter, timeout)
+                except TimeoutError:
+                    pass
+                finally:
+                    with self._lock:
+                        self._waiters.discard(waiter)
+        return self.changes_since(since)
+
+    async def stream(
+        self, since: int, *, heartbeat: float = 15.0, count: int | None = None
+    ) -> AsyncIterator[str]:
+        """Yield Server-Sent Events with the change sets after ``since``.
+
+        Each event's ``id`` is the version to resume from. A comment line is sent every
+        ``heartbeat`` seconds without changes to keep proxies from closing the connection.
+        Stops after ``count`` events, if given.
+        """
+        sent = 0
+        while count is None or sent < count:
+            change_set = await self.wait(since, heartbeat)
+            if not change_set.changes and not change_set.reset:
+                yield ": keep-alive\n\n"
+                continue
+            since = change_set.version
+            sent += 1
+            yield f"id: {since}\nevent: changes\ndata: {change_set.model_dump_json()}\n\n"
+
+    # -- routes --------------------------------------------------------------------------
+
+    def router(self, prefix: str, *, write_token: str | None = None) -> APIRouter:
+        """Return change-feed routes under ``prefix`` (e.g. ``/sellers``).
+
+        ``PUT`` and ``DELETE <prefix>/{key}`` are added only when ``write_token`` is given,
+        and answer ``401`` unless sent ``Authorization: Bearer <write_token>``.
+        """
+        model, noun = self.model, prefix.strip("/")
+        router = APIRouter(prefix=prefix, tags=[noun])
+
+        @router.get("/changes", response_model=ChangeSet[model])  # type: ignore[valid-type]
+        async def changes(
+            since: Annotated[int, Query(ge=0)] = 0,
+            wait: Annotated[float, Query(ge=0, le=30, description="Long-poll seconds")] = 0,
+        ) -> Any:
+            """Return changes after version ``since``; ``wait`` holds the request until one."""
+            return await self.wait(since, wait)
+
+        @router.get("/changes/stream", response_class=StreamingResponse)
+        async def stream_changes(
+            since: Annotated[int | None, Query(ge=0)] = None,
+            last_event_id: Annotated[int | None, Header()] = None,
+            count: Annotated[int | None, Query(ge=1)] = None,
+        ) -> StreamingResponse:
+            """Stream change sets as Server-Sent Events, resuming from ``Last-Event-ID``."""
+            start = since if since is not None else last_event_id
+            return StreamingResponse(
+                self.stream(self.version if start is None else start, count=count),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", VERSION_HEADER: str(self.version)},
+            )
+
+        if write_token is None:
+            return router
+        bearer = HTTPBearer(auto_error=False)
+
+        def authorize(
+            credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(bearer)],
+        ) -> None:
+            given = credentials.credentials if credentials is not None else ""
+            if not hmac.compare_digest(given.encode(), write_token.encode()):
+                raise HTTPException(
+                    status_code=401,
+                    detail="Invalid or missing write token",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+
+        writes = APIRouter(dependencies=[Depends(authorize)])
+
+        @writes.put("/{key}", response_model=Change[model])  # type: ignore[valid-type]
+        def put(key: str, record: model) -> Any:  # type: ignore[valid-type]
+            """Insert or replace the record stored under ``key``."""
+            if getattr(record, self.key) != key:
+                raise HTTPException(status_code=422, detail=f"{self.key} must match the path")
+            return self.upsert(record)
+
+        @writes.delete("/{key}", response_model=Change[model])  # type: ignore[valid-type]
+        def delete(key: str) -> Any:
+            """Delete the record stored under ``key``."""
+            change = self.delete(key)
+            if change is None:
+                raise HTTPException(status_code=404, detail=f"No {noun} {key!r}")
+            return change
+
+        router.include_router(writes)
+        return router
+
+
+@contextmanager
+def single_writer(path: str | os.PathLike[str]) -> Iterator[None]:
+    """Hold an exclusive lock on ``path`` while this process serves catalogue writes.
+
+    Every process that would accept writes must use the same ``path``. The lock is released
+    when the process exits, even if it crashes.
+
+    Raises
+    ------
+    RuntimeError
+        If another process holds the lock.
+    """
+    import fcntl  # POSIX only; imported here so read-only apps still run elsewhere
+
+    with open(path, "a") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise RuntimeError(
+                f"another process holds {path}: catalogue writes live in one process's "
+                "memory, so only a single worker may accept them"
+            ) from None
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _index_by(records: Sequence[M], key: str) -> dict[str, int]:
+    index: dict[str, int] = {}
+    for position, record in enumerate(records):
+        value = getattr(record, key)
+        first = index.setdefault(value, position)
+        if first != position:
+            raise ValueError(f"base records {first} and {position} share the {key} {value!r}")
+    return index
+
+
+def _wake(waiter: asyncio.Future[None]) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+__all__ = [
+    "Change",
+    "ChangeOp",
+    "ChangeSet",
+    "VERSION_HEADER",
+    "VersionedCatalogue",
+    "single_writer",
+]
@@ -0,0 +1,412 @@
+"""Typed HTTP client for the study_fastapi services.
+
+Callers used to create a fresh ``httpx.Client`` per call (or per test module), which pays a
+TCP handshake for every request. ``StudyClient`` and ``AsyncStudyClient`` keep a single
+connection pool per client instance and share it across every service:
+
+- ``hello``: :mod:`study_fastapi.hello_fastapi` greetings
+- ``header``: :mod:`study_fastapi.a2_fastapi_header` header echo
+- ``models``: :mod:`study_fastapi.a5_pydantic_model` sellers/buyers
+- ``di``: :mod:`study_fastapi.a6_dependency_injection` dependency-injection routes
+
+Features
+--------
+- HTTP/1.1 keep-alive with configurable pool limits (``ClientConfig``)
+- Optional HTTP/2 when the ``h2`` package is installed
+- Retries with full-jitter exponential backoff on connect errors, and for idempotent
+  methods on transport errors and 429/502/503/504 responses
+- ``fan_out`` helpers that run many calls concurrently over the shared pool
+
+Examples
+--------
+>>> with StudyClient() as client:  # doctest: +SKIP
+...     client.greet()
+'Hello, World!'
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import random
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, NamedTuple, TypeVar
+from urllib.parse import quote
+
+import httpx
+from pydantic import TypeAdapter
+
+from study_fastapi.models import Buyer, Seller
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+_SELLERS: TypeAdapter[list[Seller]] = TypeAdapter(list[Seller])
+_BUYERS: TypeAdapter[list[Buyer]] = TypeAdapter(list[Buyer])
+
+
+def http2_available() -> bool:
+    """Return ``True`` when the optional ``h2`` dependency is importable."""
+    return importlib.util.find_spec("h2") is not None
+
+
+@dataclass(frozen=True)
+class ServiceURLs:
+    """Base URLs of the individual study_fastapi apps.
+
+    ``hello`` and ``header`` default to the ports in their module's ``__main__`` block;
+    a5 and a6 have none, so ``models`` and ``di`` assume ``uvicorn --port 8005`` / ``8006``.
+    """
+
+    hello: str = "http://127.0.0.1:8000"
+    header: str = "http://127.0.0.1:8002"
+    models: str = "http://127.0.0.1:8005"
+    di: str = "http://127.0.0.1:8006"
+
+    @classmethod
+    def single(cls, base_url: str) -> ServiceURLs:
+        """Point every service at the same base URL (e.g. behind one gateway)."""
+        return cls(hello=base_url, header=base_url, models=base_url, di=base_url)
+
+
+@dataclass(frozen=True)
+class ClientConfig:
+    """Connection pool, timeout and retry settings shared by both client flavours.
+
+    Parameters
+    ----------
+    urls
+        Base URL per service.
+    timeout
+        Per-request timeout in seconds.
+    max_connections, max_keepalive_connections, keepalive_expiry
+        Pool limits, passed to ``httpx.Limits``.
+    retries
+        Maximum number of retries after the first attempt.
+    backoff_base, backoff_max
+        Full-jitter backoff: attempt ``n`` sleeps ``uniform(0, min(max, base * 2**n))``.
+    http2
+        Negotiate HTTP/2 when possible. Silently ignored if ``h2`` is not installed.
+    """
+
+    urls: ServiceURLs = field(default_factory=ServiceURLs)
+    timeout: float = 5.0
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    retries: int = 2
+    backoff_base: float = 0.05
+    backoff_max: float = 1.0
+    http2: bool = False
+
+    def limits(self) -> httpx.Limits:
+        """Return the ``httpx.Limits`` for this configuration."""
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def use_http2(self) -> bool:
+        """Return whether HTTP/2 should actually be enabled."""
+        return self.http2 and http2_available()
+
+
+def backoff_delay(
+    attempt: int, base: float, cap: float, rand: Callable[[], float] = random.random
+) -> float:
+    """Return the full-jitter backoff delay for a zero-based retry ``attempt``."""
+    return rand() * min(cap, base * (2**attempt))
+
+
+class _Call(NamedTuple):
+    """Description of one endpoint call, executed by either client flavour."""
+
+    service: str
+    method: str
+    path: str
+    params: dict[str, Any] | None = None
+    headers: dict[str, str] | None = None
+    json: Any = None
+    parse: Callable[[httpx.Response], Any] = httpx.Response.json
+
+
+def _should_retry(method: str, exc: Exception | None, response: httpx.Response | None) -> bool:
+    if isinstance(exc, httpx.ConnectError):
+        # The request never reached the server, so retrying is always safe.
+        return True
+    if method not in IDEMPOTENT_METHODS:
+        return False
+    if exc is not None:
+        return isinstance(exc, httpx.TransportError)
+    return response is not None and response.status_code in RETRY_STATUSES
+
+
+def _parse_sellers(response: httpx.Response) -> list[Seller]:
+    return _SELLERS.validate_json(response.content)
+
+
+def _parse_buyers(response: httpx.Response) -> list[Buyer]:
+    return _BUYERS.validate_json(response.content)
+
+
+def _ua_headers(user_agent: str | None) -> dict[str, str] | None:
+    return {"User-Agent": user_agent} if user_agent is not None else None
+
+
+class _BaseClient:
+    def __init__(self, config: ClientConfig | None) -> None:
+        self.config = config or ClientConfig()
+
+    def _url(self, call: _Call) -> str:
+        return getattr(self.config.urls, call.service) + call.path
+
+    def _delay(self, attempt: int) -> float:
+        return backoff_delay(attempt, self.config.backoff_base, self.config.backoff_max)
+
+
+class StudyClient(_BaseClient):
+    """Synchronous client backed by one pooled ``httpx.Client``.
+
+    The client is thread-safe; ``fan_out`` uses a thread pool over the same connections.
+    """
+
+    def __init__(
+        self,
+        config: ClientConfig | None = None,
+        *,
+        transport: httpx.BaseTransport | None = None,
+    ) -> None:
+        super().__init__(config)
+        self._http = httpx.Client(
+            timeout=self.config.timeout,
+            limits=self.config.limits(),
+            http2=self.config.use_http2(),
+            transport=transport,
+        )
+
+    def __enter__(self) -> StudyClient:
+        """Return the client itself."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Close the pool on exit."""
+        self.close()
+
+    def close(self) -> None:
+        """Close every pooled connection."""
+        self._http.close()
+
+    def _execute(self, call: _Call) -> Any:
+        url = self._url(call)
+        attempt = 0
+        while True:
+            exc: Exception | None = None
+            response: httpx.Response | None = None
+            try:
+                response = self._http.request(
+                    call.method, url, params=call.params, headers=call.headers, json=call.json
+                )
+            except httpx.TransportError as err:
+                exc = err
+            if attempt < self.config.retries and _should_retry(call.method, exc, response):
+                time.sleep(self._delay(attempt))
+                attempt += 1
+                continue
+            if exc is not None:
+                raise exc
+            assert response is not None
+            response.raise_for_status()
+            return call.parse(response)
+
+    def fan_out(
+        self, fn: Callable[[StudyClient, T], R], items: Iterable[T], concurrency: int = 10
+    ) -> list[R]:
+        """Run ``fn(client, item)`` for every item concurrently, preserving order."""
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return list(pool.map(lambda item: fn(self, item), items))
+
+    # hello_fastapi
+    def greet(self) -> str:
+        """``GET /hi`` on the hello service."""
+        return self._execute(_Call("hello", "GET", "/hi"))
+
+    def greet_name(self, name: str) -> str:
+        """``GET /hi_name/{name}`` on the hello service."""
+        return self._execute(_Call("hello", "GET", f"/hi_name/{quote(name, safe='')}"))
+
+    def hello(self, name: str) -> str:
+        """``GET /hello?name=`` on the hello service."""
+        return self._execute(_Call("hello", "GET", "/hello", params={"name": name}))
+
+    def hello_body(self, name: str) -> str:
+        """``POST /hello`` with a JSON body on the hello service."""
+        return self._execute(_Call("hello", "POST", "/hello", json={"name": name}))
+
+    def hello_header(self, name: str) -> str:
+        """``POST /hello_header`` with a ``name`` header on the hello service."""
+        return self._execute(_Call("hello", "POST", "/hello_header", headers={"name": name}))
+
+    # a2_fastapi_header
+    def user_agent(self, user_agent: str | None = None) -> str:
+        """``GET /useragent``; echoes the (optionally overridden) User-Agent."""
+        return self._execute(_Call("header", "GET", "/useragent", headers=_ua_headers(user_agent)))
+
+    # a5_pydantic_model
+    def sellers(self) -> list[Seller]:
+        """``GET /sellers`` parsed into ``Seller`` models."""
+        return self._execute(_Call("models", "GET", "/sellers", parse=_parse_sellers))
+
+    def buyers(self) -> list[Buyer]:
+        """``GET /buyers`` parsed into ``Buyer`` models."""
+        return self._execute(_Call("models", "GET", "/buyers", parse=_parse_buyers))
+
+    # a6_dependency_injection
+    def di_hello(self, name: str | None = None) -> str:
+        """``GET /di/hello``."""
+        params = {"name": name} if name is not None else None
+        return self._execute(_Call("di", "GET", "/di/hello", params=params))
+
+    def di_secure(self, token: str) -> dict[str, bool]:
+        """``GET /di/secure`` with an ``X-Token`` header."""
+        return self._execute(_Call("di", "GET", "/di/secure", headers={"X-Token": token}))
+
+    def di_items(self, limit: int = 10, offset: int = 0) -> dict[str, Any]:
+        """``GET /di/items`` with pagination."""
+        params = {"limit": limit, "offset": offset}
+        return self._execute(_Call("di", "GET", "/di/items", params=params))
+
+
+class AsyncStudyClient(_BaseClient):
+    """Asynchronous client backed by one pooled ``httpx.AsyncClient``."""
+
+    def __init__(
+        self,
+        config: ClientConfig | None = None,
+        *,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        super().__init__(config)
+        self._http = httpx.AsyncClient(
+            timeout=self.config.timeout,
+            limits=self.config.limits(),
+            http2=self.config.use_http2(),
+            transport=transport,
+        )
+
+    async def __aenter__(self) -> AsyncStudyClient:
+        """Return the client itself."""
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        """Close the pool on exit."""
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close every pooled connection."""
+        await self._http.aclose()
+
+    async def _execute(self, call: _Call) -> Any:
+        url = self._url(call)
+        attempt = 0
+        while True:
+            exc: Exception | None = None
+            response: httpx.Response | None = None
+            try:
+                response = await self._http.request(
+                    call.method, url, params=call.params, headers=call.headers, json=call.json
+                )
+            except httpx.TransportError as err:
+                exc = err
+            if attempt < self.config.retries and _should_retry(call.method, exc, response):
+                await asyncio.sleep(self._delay(attempt))
+                attempt += 1
+                continue
+            if exc is not None:
+                raise exc
+            assert response is not None
+            response.raise_for_status()
+            return call.parse(response)
+
+    async def fan_out(
+        self,
+        fn: Callable[[AsyncStudyClient, T], Awaitable[R]],
+        items: Iterable[T],
+        concurrency: int = 10,
+    ) -> list[R]:
+        """Await ``fn(client, item)`` for every item, at most ``concurrency`` at a time."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _one(item: T) -> R:
+            async with semaphore:
+                return await fn(self, item)
+
+        return list(await asyncio.gather(*(_one(item) for item in items)))
+
+    # hello_fastapi
+    async def greet(self) -> str:
+        """``GET /hi`` on the hello service."""
+        return await self._execute(_Call("hello", "GET", "/hi"))
+
+    async def greet_name(self, name: str) -> str:
+        """``GET /hi_name/{name}`` on the hello service."""
+        return await self._execute(_Call("hello", "GET", f"/hi_name/{quote(name, safe='')}"))
+
+    async def hello(self, name: str) -> str:
+        """``GET /hello?name=`` on the hello service."""
+        return await self._execute(_Call("hello", "GET", "/hello", params={"name": name}))
+
+    async def hello_body(self, name: str) -> str:
+        """``POST /hello`` with a JSON body on the hello service."""
+        return await self._execute(_Call("hello", "POST", "/hello", json={"name": name}))
+
+    async def hello_header(self, name: str) -> str:
+        """``POST /hello_header`` with a ``name`` header on the hello service."""
+        return await self._execute(_Call("hello", "POST", "/hello_header", headers={"name": name}))
+
+    # a2_fastapi_header
+    async def user_agent(self, user_agent: str | None = None) -> str:
+        """``GET /useragent``; echoes the (optionally overridden) User-Agent."""
+        return await self._execute(
+            _Call("header", "GET", "/useragent", headers=_ua_headers(user_agent))
+        )
+
+    # a5_pydantic_model
+    async def sellers(self) -> list[Seller]:
+        """``GET /sellers`` parsed into ``Seller`` models."""
+        return await self._execute(_Call("models", "GET", "/sellers", parse=_parse_sellers))
+
+    async def buyers(self) -> list[Buyer]:
+        """``GET /buyers`` parsed into ``Buyer`` models."""
+        return await self._execute(_Call("models", "GET", "/buyers", parse=_parse_buyers))
+
+    # a6_dependency_injection
+    async def di_hello(self, name: str | None = None) -> str:
+        """``GET /di/hello``."""
+        params = {"name": name} if name is not None else None
+        return await self._execute(_Call("di", "GET", "/di/hello", params=params))
+
+    async def di_secure(self, token: str) -> dict[str, bool]:
+        """``GET /di/secure`` with an ``X-Token`` header."""
+        return await self._execute(_Call("di", "GET", "/di/secure", headers={"X-Token": token}))
+
+    async def di_items(self, limit: int = 10, offset: int = 0) -> dict[str, Any]:
+        """``GET /di/items`` with pagination."""
+        params = {"limit": limit, "offset": offset}
+        return await self._execute(_Call("di", "GET", "/di/items", params=params))
+
+
+__all__ = [
+    "AsyncStudyClient",
+    "ClientConfig",
+    "ServiceURLs",
+    "StudyClient",
+    "backoff_delay",
+    "http2_available",
+]
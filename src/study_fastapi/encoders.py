@@ -0,0 +1,45 @@
+"""JSON encoders used by the a3 app, its job queue and its offload pool workers.
+
+Pool workers import the encoder's module to unpickle it, so this module must stay free of
+import-time side effects (no app, queue or pool is created here).
+"""
+
+import json
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+
+
+def get_fastapi_jsonencoded(obj):
+    """Get encodable json object."""
+    return jsonable_encoder(obj)
+
+
+def get_fastapi_encoded_string(obj):
+    """Get json serialized string for object."""
+    return json.dumps(get_fastapi_jsonencoded(obj))
+
+
+def get_json_dumps(obj):
+    """Get json dump of any python object.
+
+    This doesn't support all datatypes though. So FastAPI created a middle layer
+    which converts python object to any json encodeable object.
+
+    Basically it supports only objects with either an iterator method implementation
+    or int, str, float, bool
+    list and dict supported as they implement an iterator method
+    Any complex object without a type iterator will return in a Type Error
+    """
+    return json.dumps(obj)
+
+
+def encode_bulk(objs: list[Any]) -> list[str]:
+    """Encode every object in ``objs`` to a JSON string.
+
+    Module-level so it can also run on a process-pool job worker.
+    """
+    return [get_fastapi_encoded_string(obj) for obj in objs]
+
+
+__all__ = ["encode_bulk", "get_fastapi_encoded_string", "get_fastapi_jsonencoded", "get_json_dumps"]
@@ -0,0 +1,78 @@
+"""Validation-error responses served from a cache of pre-encoded bodies.
+
+FastAPI answers a ``RequestValidationError`` by passing every error through
+``jsonable_encoder`` and then ``json.dumps``, on every request. Yet the commonest errors,
+such as a required query parameter, header or body field that is missing, depend only on
+where they happened: ``{"type": "missing", "loc": ["query", "name"], "msg": "Field
+required", "input": null}`` is the same for every broken client.
+
+``CachedValidationErrorHandler`` keys each error list by the ``(type, loc, msg)`` of its
+errors and serves the encoded body from an LRU cache. Errors that echo what the client
+sent (an ``input`` other than ``None``, or a ``ctx``) are not cached: their body would
+differ per request, and caching them would let clients fill the cache. Those go through
+FastAPI's own handler. The bytes produced are identical either way.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Any
+
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from starlette.requests import Request
+from starlette.responses import Response
+
+ErrorKey = tuple[tuple[str, tuple[str | int, ...], str], ...]
+
+
+def error_key(errors: Sequence[Any]) -> ErrorKey | None:
+    """Return the cache key of ``errors``, or ``None`` if their body depends on the input."""
+    key = []
+    for error in errors:
+        if error.get("input") is not None or "ctx" in error or len(error) > 4:
+            return None
+        key.append((error["type"], tuple(error["loc"]), error["msg"]))
+    return tuple(key)
+
+
+class CachedValidationErrorHandler:
+    """``RequestValidationError`` handler that reuses encoded bodies for constant errors.
+
+    Parameters
+    ----------
+    maxsize
+        Most distinct error bodies kept; the least recently used is dropped first.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self._bodies: OrderedDict[ErrorKey, bytes] = OrderedDict()
+        self.hits = self.misses = 0
+
+    async def __call__(self, request: Request, exc: Exception) -> Response:
+        """Return the 422 response for ``exc``."""
+        assert isinstance(exc, RequestValidationError)
+        errors = exc.errors()
+        key = error_key(errors)
+        if key is None:
+            return await request_validation_exception_handler(request, exc)
+        body = self._bodies.get(key)
+        if body is None:
+            self.misses += 1
+            # Rendered exactly as FastAPI renders it, once.
+            response = await request_validation_exception_handler(request, exc)
+            assert isinstance(response, JSONResponse)
+            body = bytes(response.body)
+            self._bodies[key] = body
+            if len(self._bodies) > self.maxsize:
+                self._bodies.popitem(last=False)
+        else:
+            self.hits += 1
+            self._bodies.move_to_end(key)
+        return Response(body, status_code=422, media_type="application/json")
+
+
+__all__ = ["CachedValidationErrorHandler", "error_key"]
@@ -0,0 +1,148 @@
+"""Compiled header schemas and a cached User-Agent parser.
+
+FastAPI resolves every ``Header()`` parameter separately: it converts the parameter name
+(``user_agent`` -> ``user-agent``) and looks it up in a freshly built ``Headers`` mapping on
+each request. ``HeaderSchema`` does that work once, at import time, and then extracts all
+declared headers in a single pass over the raw ASGI ``(name, value)`` list.
+
+A schema instance is a regular FastAPI dependency::
+
+    UA = HeaderSchema("user-agent")
+
+    @app.get("/useragent", openapi_extra=UA.openapi_extra())
+    def get_user_agent(headers: Annotated[dict[str, str | None], Depends(UA)]): ...
+
+Missing required headers raise ``RequestValidationError`` with the same error shape as
+``Header()`` so clients see identical 422 responses.
+"""
+
+# No ``from __future__ import annotations``: FastAPI must see ``Request`` on ``__call__`` as
+# a class, not a string, or it treats ``request`` as a required query parameter.
+import re
+from collections.abc import Iterable
+from functools import lru_cache
+from typing import Any, NamedTuple
+
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+
+
+class HeaderSchema:
+    """A precompiled set of headers to extract from a request.
+
+    Parameters
+    ----------
+    *names
+        Header names, case-insensitive (``"User-Agent"`` or ``"user-agent"``).
+    optional
+        Names that may be absent; every other declared header is required.
+    """
+
+    def __init__(self, *names: str, optional: Iterable[str] = ()) -> None:
+        lowered = [name.lower() for name in names]
+        self._lookup: dict[bytes, str] = {
+            name.encode("latin-1"): name.replace("-", "_") for name in lowered
+        }
+        optional_names = {name.lower() for name in optional}
+        self._required: tuple[tuple[str, str], ...] = tuple(
+            (name, name.replace("-", "_")) for name in lowered if name not in optional_names
+        )
+        self._template: dict[str, str | None] = dict.fromkeys(self._lookup.values())
+        self._names = tuple(lowered)
+        self._optional = frozenset(optional_names)
+
+    def extract(self, raw_headers: Iterable[tuple[bytes, bytes]]) -> dict[str, str | None]:
+        """Return ``{python_name: value}`` for the declared headers in one pass.
+
+        ASGI servers already lowercase header names, so matching is a dict lookup per
+        header. The first occurrence of a repeated header wins, like ``Headers.get``.
+        """
+        found = self._template.copy()
+        lookup = self._lookup
+        remaining = len(lookup)
+        for key, value in raw_headers:
+            attr = lookup.get(key)
+            if attr is not None and found[attr] is None:
+                found[attr] = value.decode("latin-1")
+                remaining -= 1
+                if not remaining:
+                    break
+        return found
+
+    async def __call__(self, request: Request) -> dict[str, str | None]:
+        """FastAPI dependency entry point: extract and validate required headers.
+
+        Declared ``async`` so FastAPI calls it inline on the event loop; a sync dependency
+        would be dispatched to the threadpool, costing more than the extraction itself.
+        """
+        found = self.extract(request.scope["headers"])
+        missing = [
+            {"type": "missing", "loc": ("header", name), "msg": "Field required", "input": None}
+            for name, attr in self._required
+            if found[attr] is None
+        ]
+        if missing:
+            raise RequestValidationError(missing)
+        return found
+
+    def openapi_extra(self) -> dict[str, Any]:
+        """Return ``openapi_extra`` documenting the headers, as ``Header()`` would."""
+        return {
+            "parameters": [
+                {
+                    "name": name,
+                    "in": "header",
+                    "required": name not in self._optional,
+                    "schema": {"type": "string", "title": name.replace("-", " ").title()},
+                }
+                for name in self._names
+            ]
+        }
+
+
+class UserAgent(NamedTuple):
+    """Parsed User-Agent fields."""
+
+    family: str
+    version: str | None
+    os: str | None
+
+
+_PRODUCT = re.compile(r"([A-Za-z][\w.\-]*)(?:/([\w.\-]+))?")
+# Ordered by specificity: Edge and Opera also advertise Chrome and Safari.
+_BROWSERS = (
+    ("Edge", re.compile(r"Edg(?:e|A|iOS)?/([\d.]+)")),
+    ("Opera", re.compile(r"OPR/([\d.]+)")),
+    ("Firefox", re.compile(r"Firefox/([\d.]+)")),
+    ("Chrome", re.compile(r"(?:Chrome|CriOS)/([\d.]+)")),
+    ("Safari", re.compile(r"Version/([\d.]+).*Safari/")),
+)
+_OS = (
+    ("Android", re.compile(r"Android")),
+    ("iOS", re.compile(r"iPhone|iPad|iPod")),
+    ("Windows", re.compile(r"Windows")),
+    ("macOS", re.compile(r"Mac OS X|Macintosh")),
+    ("Linux", re.compile(r"Linux|X11")),
+)
+
+
+@lru_cache(maxsize=1024)
+def parse_user_agent(user_agent: str) -> UserAgent:
+    """Parse a User-Agent string into family, version and OS.
+
+    Real traffic has few distinct User-Agents, so results are memoised in an LRU cache and
+    the regexes only run once per distinct string.
+    """
+    os_name = next((name for name, pattern in _OS if pattern.search(user_agent)), None)
+    if user_agent.startswith("Mozilla/"):
+        for family, pattern in _BROWSERS:
+            match = pattern.search(user_agent)
+            if match:
+                return UserAgent(family, match.group(1), os_name)
+    match = _PRODUCT.match(user_agent)
+    if match is None:
+        return UserAgent("Other", None, os_name)
+    return UserAgent(match.group(1), match.group(2), os_name)
+
+
+__all__ = ["HeaderSchema", "UserAgent", "parse_user_agent"]
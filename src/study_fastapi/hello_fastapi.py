@@ -1,9 +1,13 @@
 """hello world for FastAPI."""
 
-from fastapi import Body, FastAPI, Header
+from fastapi import Body, Header
+
+from study_fastapi.app_factory import AppConfig, create_app
+from study_fastapi.raw_routes import raw_route
 
 # app is the top-level FastAPI object that represents the whole web application.
-app = FastAPI()
+config = AppConfig.from_env(openapi_snapshot="hello_fastapi")
+app = create_app(config)
 
 
 def get_greeting_message(name: str | None = None) -> str:
@@ -18,8 +22,10 @@ def get_greeting_message(name: str | None = None) -> str:
     return f"Hello, {name}!" if name else "Hello, World!"
 
 
-# decorator telling request type - GET, and url route to function mapping
-@app.get("/hi", description="Get a static greeting.")
+# decorator telling request type - GET, and url route to function mapping.
+# raw_route instead of app.get: with APP_RAW_ROUTES=1 the response, which never changes, is
+# encoded once and replayed as raw ASGI messages (see study_fastapi.raw_routes).
+@raw_route(app, "/hi", enabled=config.raw_routes, description="Get a static greeting.")
 def greet_static() -> str:
     """Return a static greeting. URL to check - http://127.0.0.1:8000/hi .
 
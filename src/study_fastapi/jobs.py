@@ -0,0 +1,379 @@
+"""In-process background job queue with a worker pool.
+
+Routes push slow work off the request path with ``JobQueue.submit`` and immediately return
+a job id; clients poll ``GET /jobs/{job_id}`` for the status and result.
+
+- ``submit`` provides backpressure: when ``max_size`` jobs are queued it raises
+  ``QueueFullError`` and the router answers ``503`` with ``Retry-After``. Jobs carried
+  over a restart are always requeued, even beyond that bound.
+- Jobs run on a thread pool (I/O or GIL-releasing work) or a process pool (CPU-bound work).
+- Pending jobs are persisted to SQLite, so jobs accepted before a restart run after it.
+  SQLite calls run on the default thread pool, never on the event loop.
+- ``JobQueue.metrics`` reports throughput and queue-wait/run latency.
+
+Configuration (environment variables, read by ``JobQueue.from_env``):
+- ``JOB_QUEUE_SIZE``: maximum queued jobs (default: 100)
+- ``JOB_WORKERS``: concurrent workers (default: 2)
+- ``JOB_EXECUTOR``: ``thread`` (default) or ``process``
+- ``JOB_DB_PATH``: SQLite file for pending jobs (default: unset, no persistence)
+- ``JOB_MAX_RESULTS``: finished jobs kept in memory for polling (default: 1000)
+
+Task payloads must be JSON-serialisable, and with the process executor task functions must
+be importable module-level callables.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from enum import StrEnum
+from typing import Any, Literal, TypeVar
+
+from fastapi import APIRouter, FastAPI, HTTPException
+from pydantic import BaseModel
+
+from utils.logging_utils import get_logger
+
+log = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class JobStatus(StrEnum):
+    """Lifecycle of a job."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class Job(BaseModel):
+    """Public view of a job."""
+
+    id: str
+    task: str
+    status: JobStatus = JobStatus.PENDING
+    result: Any = None
+    error: str | None = None
+    submitted_at: float
+    started_at: float | None = None
+    finished_at: float | None = None
+
+
+class JobMetrics(BaseModel):
+    """Counters and latency aggregates for a ``JobQueue``."""
+
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    rejected: int = 0
+    queue_depth: int = 0
+    mean_wait_ms: float = 0.0
+    mean_run_ms: float = 0.0
+    throughput_per_s: float = 0.0
+
+
+class QueueFullError(RuntimeError):
+    """Raised by ``JobQueue.submit`` when the queue is at capacity."""
+
+
+class UnknownTaskError(KeyError):
+    """Raised when submitting a task name that was never registered."""
+
+
+class _PendingStore:
+    """SQLite-backed set of jobs that have not finished yet."""
+
+    def __init__(self, path: str) -> None:
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pending_jobs ("
+            "id TEXT PRIMARY KEY, task TEXT NOT NULL, payload TEXT NOT NULL, "
+            "submitted_at REAL NOT NULL)"
+        )
+
+    def add(self, job: Job, payload: Any) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pending_jobs VALUES (?, ?, ?, ?)",
+                (job.id, job.task, json.dumps(payload), job.submitted_at),
+            )
+
+    def remove(self, job_id: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM pending_jobs WHERE id = ?", (job_id,))
+
+    def load(self) -> list[tuple[str, str, Any, float]]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, task, payload, submitted_at FROM pending_jobs ORDER BY submitted_at"
+            ).fetchall()
+        return [(job_id, task, json.loads(payload), ts) for job_id, task, payload, ts in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class JobQueue:
+    """Bounded job queue drained by a pool of async workers.
+
+    Parameters
+    ----------
+    max_size
+        Maximum number of queued (not yet running) jobs.
+    workers
+        Number of jobs executed concurrently.
+    executor
+        ``"thread"`` or ``"process"`` pool used to run task functions.
+    db_path
+        Optional SQLite file persisting pending jobs across restarts.
+    max_results
+        Number of finished jobs kept in memory for polling.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_size: int = 100,
+        workers: int = 2,
+        executor: Literal["thread", "process"] = "thread",
+        db_path: str | None = None,
+        max_results: int = 1000,
+    ) -> None:
+        self._tasks: dict[str, Callable[[Any], Any]] = {}
+        # Unbounded: only ``submit`` enforces ``max_size``, so jobs carried over a restart
+        # (including ones that were running) always fit back in.
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._max_size = max_size
+        self._jobs: dict[str, Job] = {}
+        self._finished: deque[str] = deque()  # ids of finished jobs, oldest first
+        self._reserved = 0  # submissions waiting for their row to be written
+        self._payloads: dict[str, Any] = {}
+        self._db_path = db_path
+        self._store = _PendingStore(db_path) if db_path else None
+        self._workers = workers
+        self._executor_kind = executor
+        self._executor: Executor | None = None
+        self._worker_tasks: list[asyncio.Task[None]] = []
+        self._removals: set[asyncio.Future[None]] = set()  # finished rows being deleted
+        self._max_results = max_results
+        self._metrics = JobMetrics()
+        self._wait_total = 0.0
+        self._run_total = 0.0
+        self._started_at = time.monotonic()
+
+    @classmethod
+    def from_env(cls) -> JobQueue:
+        """Build a queue configured from ``JOB_*`` environment variables."""
+        executor = os.getenv("JOB_EXECUTOR", "thread").lower()
+        return cls(
+            max_size=int(os.getenv("JOB_QUEUE_SIZE", "100")),
+            workers=int(os.getenv("JOB_WORKERS", "2")),
+            executor="process" if executor == "process" else "thread",
+            db_path=os.getenv("JOB_DB_PATH") or None,
+            max_results=int(os.getenv("JOB_MAX_RESULTS", "1000")),
+        )
+
+    def register(self, name: str, fn: Callable[[Any], Any]) -> None:
+        """Register ``fn(payload)`` under ``name`` so jobs can refer to it."""
+        self._tasks[name] = fn
+
+    async def submit(self, task: str, payload: Any) -> Job:
+        """Queue ``task`` with ``payload`` and return the pending job.
+
+        With persistence, returns once the job is stored.
+
+        Raises
+        ------
+        UnknownTaskError
+            If ``task`` was not registered.
+        QueueFullError
+            If the queue is at capacity; callers should retry later.
+        """
+        if task not in self._tasks:
+            raise UnknownTaskError(task)
+        if self._queue.qsize() + self._reserved >= self._max_size:
+            self._metrics.rejected += 1
+            raise QueueFullError(f"job queue is full ({self._max_size} pending)")
+        job = Job(id=uuid.uuid4().hex, task=task, submitted_at=time.time())
+        if self._store is not None:
+            self._reserved += 1
+            try:
+                await _in_thread(self._store.add, job, payload)
+            finally:
+                self._reserved -= 1
+        self._enqueue(job, payload)
+        return job
+
+    def _enqueue(self, job: Job, payload: Any) -> None:
+        self._queue.put_nowait(job.id)
+        self._jobs[job.id] = job
+        self._payloads[job.id] = payload
+        self._metrics.submitted += 1
+
+    def get(self, job_id: str) -> Job | None:
+        """Return the job with ``job_id``, or ``None`` if unknown or evicted."""
+        return self._jobs.get(job_id)
+
+    def metrics(self) -> JobMetrics:
+        """Return a snapshot of the queue metrics."""
+        finished = self._metrics.completed + self._metrics.failed
+        uptime = time.monotonic() - self._started_at
+        return self._metrics.model_copy(
+            update={
+                "queue_depth": self._queue.qsize(),
+                "mean_wait_ms": self._wait_total / finished * 1e3 if finished else 0.0,
+                "mean_run_ms": self._run_total / finished * 1e3 if finished else 0.0,
+                "throughput_per_s": finished / uptime if uptime else 0.0,
+            }
+        )
+
+    async def start(self) -> None:
+        """Recover persisted jobs and start the workers."""
+        if self._worker_tasks:
+            return
+        if self._store is None and self._db_path:
+            self._store = await _in_thread(_PendingStore, self._db_path)
+        if self._store is not None:
+            recovered = 0
+            for job_id, task, payload, submitted_at in await _in_thread(self._store.load):
+                if job_id not in self._jobs and task in self._tasks:
+                    job = Job(id=job_id, task=task, submitted_at=submitted_at)
+                    self._enqueue(job, payload)
+                    recovered += 1
+            if recovered:
+                log.info("recovered %d pending jobs", recovered)
+        if self._executor_kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self._workers)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="job")
+        self._started_at = time.monotonic()
+        self._worker_tasks = [asyncio.create_task(self._work()) for _ in range(self._workers)]
+
+    async def stop(self) -> None:
+        """Stop the workers; jobs not yet finished stay persisted for the next start."""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        # A finished job whose row is still being deleted would run again after a restart.
+        await asyncio.gather(*self._removals, return_exceptions=True)
+        # The queue is bound to this event loop; carry unfinished jobs over to a fresh one.
+        queue: asyncio.Queue[str] = asyncio.Queue()
+        for job_id in self._payloads:
+            queue.put_nowait(job_id)
+        self._queue = queue
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._store is not None:
+            store, self._store = self._store, None
+            await _in_thread(store.close)
+
+    @asynccontextmanager
+    async def lifespan(self, app: FastAPI) -> AsyncIterator[None]:
+        """FastAPI lifespan running the workers while the app is up."""
+        await self.start()
+        try:
+            yield
+        finally:
+            await self.stop()
+
+    async def _work(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job_id = await self._queue.get()
+            job = self._jobs[job_id]
+            payload = self._payloads[job_id]
+            job.status = JobStatus.RUNNING
+            job.started_at = time.time()
+            try:
+                assert self._executor is not None
+                job.result = await loop.run_in_executor(
+                    self._executor, self._tasks[job.task], payload
+                )
+            except asyncio.CancelledError:
+                job.status = JobStatus.PENDING
+                raise
+            except Exception as exc:
+                job.status = JobStatus.FAILED
+                job.error = f"{type(exc).__name__}: {exc}"
+                self._metrics.failed += 1
+                log.warning("job %s (%s) failed: %s", job.id, job.task, job.error)
+            else:
+                job.status = JobStatus.DONE
+                self._metrics.completed += 1
+            finally:
+                self._queue.task_done()
+            del self._payloads[job_id]
+            job.finished_at = time.time()
+            self._wait_total += job.started_at - job.submitted_at
+            self._run_total += job.finished_at - job.started_at
+            self._finished.append(job_id)
+            self._evict()
+            if self._store is not None:
+                # Shielded: ``stop`` cancels the workers but waits for pending deletes.
+                removal = asyncio.ensure_future(_in_thread(self._store.remove, job.id))
+                self._removals.add(removal)
+                removal.add_done_callback(self._removals.discard)
+                await asyncio.shield(removal)
+
+    def _evict(self) -> None:
+        # Only finished jobs are evicted; pending and running ones are always kept.
+        while len(self._finished) > self._max_results:
+            self._jobs.pop(self._finished.popleft(), None)
+
+    def router(self) -> APIRouter:
+        """Return routes for polling jobs and reading metrics."""
+        router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+        @router.get("/metrics")
+        def job_metrics() -> JobMetrics:
+            """Queue depth, counters, latency and throughput."""
+            return self.metrics()
+
+        @router.get("/{job_id}")
+        def get_job(job_id: str) -> Job:
+            """Poll a job's status; the result is set once it is done."""
+            job = self.get(job_id)
+            if job is None:
+                raise HTTPException(status_code=404, detail="Job not found")
+            return job
+
+        return router
+
+
+async def _in_thread(fn: Callable[..., T], *args: Any) -> T:
+    return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+
+async def submit_or_503(queue: JobQueue, task: str, payload: Any) -> Job:
+    """Submit a job, translating a full queue into ``503 Service Unavailable``."""
+    try:
+        return await queue.submit(task, payload)
+    except QueueFullError as exc:
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "1"})
+
+
+__all__ = [
+    "Job",
+    "JobMetrics",
+    "JobQueue",
+    "JobStatus",
+    "QueueFullError",
+    "UnknownTaskError",
+    "submit_or_503",
+]
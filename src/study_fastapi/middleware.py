@@ -0,0 +1,269 @@
+"""Pure ASGI middleware shared by the study apps.
+
+They are installed by ``study_fastapi.app_factory.create_app`` according to its
+``AppConfig``; each one can also be added to any ASGI app on its own.
+
+- ``RequestContextMiddleware``: request ids and logging context (below)
+- ``TimingMiddleware``: ``Server-Timing`` header with the time to response start
+- ``ConditionalGetMiddleware``: ``ETag``/``Cache-Control`` and ``304 Not Modified``
+- ``ConcurrencyLimitMiddleware``: caps in-flight requests, shedding load with ``503``
+
+``RequestContextMiddleware`` binds a ``utils.logging_utils.RequestContext`` for every HTTP
+and WebSocket connection. Each log line emitted while serving the request then carries
+``request_id``, ``route`` and ``elapsed_ms``, including lines from sync endpoints run in
+the threadpool, because context variables are copied into worker threads.
+
+The request id comes from a well-formed incoming ``X-Request-ID`` header, so ids can be
+correlated across services. Otherwise a new one is generated. The id is echoed in the
+response's ``X-Request-ID`` header.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import re
+import time
+from collections import deque
+
+from starlette.datastructures import Headers
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.logging_utils import (
+    RequestContext,
+    bind_request_context,
+    get_logger,
+    reset_request_context,
+)
+
+log = get_logger(__name__)
+
+REQUEST_ID_HEADER = b"x-request-id"
+_VALID_REQUEST_ID = re.compile(rb"[A-Za-z0-9._:-]{1,128}")
+
+
+class ScopeRequestContext(RequestContext):
+    """``RequestContext`` whose route is read from the ASGI scope when it is logged.
+
+    FastAPI stores the matched route in the scope only after routing, so resolving it lazily
+    turns ``/hi_name/shweta`` into ``/hi_name/{name}`` for every line logged by the endpoint.
+    """
+
+    __slots__ = ("_scope",)
+
+    def __init__(self, scope: Scope, request_id: str | None = None) -> None:
+        super().__init__(request_id)
+        self._scope = scope
+
+    @property
+    def route(self) -> str:
+        """Matched route template, or the raw path before routing (or on a 404)."""
+        template = getattr(self._scope.get("route"), "path", None)
+        return str(template or self._scope.get("path", ""))
+
+
+def _incoming_request_id(scope: Scope) -> str | None:
+    for key, value in scope["headers"]:
+        if key == REQUEST_ID_HEADER:
+            return value.decode("latin-1") if _VALID_REQUEST_ID.fullmatch(value) else None
+    return None
+
+
+class RequestContextMiddleware:
+    """Bind a request-scoped logging context and echo ``X-Request-ID``.
+
+    Parameters
+    ----------
+    app
+        The wrapped ASGI application.
+    slow_ms
+        If set, requests taking longer than this many milliseconds are logged as warnings,
+        tagged with their request id so the request's other log lines can be found.
+    """
+
+    def __init__(self, app: ASGIApp, *, slow_ms: float | None = None) -> None:
+        self.app = app
+        self.slow_ms = slow_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Serve the request with its ``RequestContext`` bound."""
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        context = ScopeRequestContext(scope, _incoming_request_id(scope))
+        header = (REQUEST_ID_HEADER, context.request_id.encode("latin-1"))
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), header]
+            await send(message)
+
+        token = bind_request_context(context)
+        try:
+            if scope["type"] == "http":
+                await self.app(scope, receive, send_with_request_id)
+            else:
+                await self.app(scope, receive, send)
+        finally:
+            if self.slow_ms is not None and context.elapsed_ms > self.slow_ms:
+                log.warning("slow request: %s %s", scope.get("method", "WS"), scope["path"])
+            reset_request_context(token)
+
+
+class TimingMiddleware:
+    """Add ``Server-Timing: app;dur=<ms>`` with the time until the response started.
+
+    Browsers' devtools and most load-testing tools display the header, so server time can be
+    told apart from network time without extra logging.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Time the request and stamp the header on ``http.response.start``."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                duration = f"app;dur={(time.perf_counter() - start) * 1e3:.2f}"
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"server-timing", duration.encode()),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_timing)
+
+
+class ConditionalGetMiddleware:
+    """Add a weak ``ETag`` and ``Cache-Control`` to ``GET`` 200s and answer revalidations.
+
+    The ETag is a hash of the body, so a client sending a matching ``If-None-Match`` gets an
+    empty ``304`` instead of the payload. Only single-message bodies are buffered. Streaming
+    responses (``more_body``) and responses that already set an ``ETag`` pass through.
+
+    Parameters
+    ----------
+    app
+        The wrapped ASGI application.
+    max_age
+        ``Cache-Control: max-age`` in seconds; ``0`` sends ``no-cache`` (always revalidate).
+    """
+
+    def __init__(self, app: ASGIApp, *, max_age: int = 0) -> None:
+        self.app = app
+        self.cache_control = f"public, max-age={max_age}".encode() if max_age > 0 else b"no-cache"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Buffer the start message until the body shows whether it can be tagged."""
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        matches = (
+            {tag.strip().encode() for tag in if_none_match.split(",")} if if_none_match else set()
+        )
+        start: Message | None = None
+
+        async def send_with_etag(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message.get("headers", []))
+                if message["status"] == 200 and "etag" not in headers:
+                    start = message
+                    return
+            elif start is not None and message["type"] == "http.response.body":
+                pending, start = start, None
+                if message.get("more_body", False):
+                    await send(pending)
+                else:
+                    body = message.get("body", b"")
+                    etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'.encode()
+                    pending["headers"] = [
+                        *pending.get("headers", ()),
+                        (b"etag", etag),
+                        (b"cache-control", self.cache_control),
+                    ]
+                    if etag in matches:
+                        pending["status"] = 304
+                        pending["headers"] = [
+                            (k, v) for k, v in pending["headers"] if k != b"content-length"
+                        ]
+                        message = {"type": "http.response.body", "body": b""}
+                    await send(pending)
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
+
+
+class ConcurrencyLimitMiddleware:
+    """Cap concurrently served HTTP requests; queue a bounded number and shed the rest.
+
+    Requests past ``max_concurrency`` wait in FIFO order. Once ``max_waiting`` are already
+    waiting, new requests are answered at once with ``503`` and ``Retry-After: 1``. Failing
+    fast is better than letting latency grow without bound. WebSockets and lifespan events
+    are not limited.
+    """
+
+    def __init__(
+        self, app: ASGIApp, *, max_concurrency: int, max_waiting: int | None = None
+    ) -> None:
+        self.app = app
+        self.max_concurrency = max_concurrency
+        self.max_waiting = max_waiting
+        self.active = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Serve the request once a slot is free, or reject it when the queue is full."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if self.active < self.max_concurrency:
+            self.active += 1
+        elif self.max_waiting is not None and len(self._waiters) >= self.max_waiting:
+            response = PlainTextResponse("Server busy", 503, headers={"Retry-After": "1"})
+            await response(scope, receive, send)
+            return
+        else:
+            await self._wait_for_slot()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._release()
+
+    async def _wait_for_slot(self) -> None:
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()  # the slot was handed over just as we were cancelled
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def _release(self) -> None:
+        # Hand the slot straight to the next waiter, so ``active`` never dips and a newly
+        # arriving request cannot jump the queue.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+__all__ = [
+    "ConcurrencyLimitMiddleware",
+    "ConditionalGetMiddleware",
+    "RequestContextMiddleware",
+    "ScopeRequestContext",
+    "TimingMiddleware",
+]
@@ -0,0 +1,39 @@
+"""Seller and buyer models, shared by the a5 app and its clients.
+
+Kept apart from :mod:`study_fastapi.a5_pydantic_model`, which builds its app and loads
+its catalogues on import.
+"""
+
+from typing import Annotated
+
+from pydantic import BaseModel, StringConstraints
+
+
+class Buyer(BaseModel):
+    """Data model for enclosing buyer information."""
+
+    name: str
+    country: Annotated[
+        str,
+        StringConstraints(max_length=2, pattern=r"^[A-Z]{2}$"),
+    ]
+    zipcode: str
+
+
+class Seller(BaseModel):
+    """Data model for enclosing seller information."""
+
+    name: str
+
+    # ISO 3166-1 alpha-2 country code
+    country: Annotated[
+        str,
+        StringConstraints(max_length=2, pattern=r"^[A-Z]{2}$"),
+    ]
+
+    shipping_port: str | None
+    shop_description: str
+    aka: str
+
+
+__all__ = ["Buyer", "Seller"]
@@ -0,0 +1,290 @@
+"""Offload CPU-heavy encoding off the event loop.
+
+``json.dumps`` and ``jsonable_encoder`` hold the GIL for the whole encode, so a large payload
+encoded inside an ``async`` route stalls every other request on the loop. ``Offloader``
+keeps small payloads inline (a pool round-trip costs more than encoding them) and sends
+payloads above ``threshold`` items to a worker pool:
+
+- ``interpreter``: ``concurrent.futures.InterpreterPoolExecutor`` (Python 3.14+)
+- ``thread``: a thread pool, chosen automatically on free-threaded builds where threads
+  run encodes in parallel
+- ``process``: a process pool, used everywhere else
+
+For interpreter and process pools the pickled payload is written to a
+``multiprocessing.shared_memory`` block, and the encoded result comes back the same way;
+only the block name and size cross the executor's pipe. Each side still copies once into a
+block, but the reader unpickles or decodes directly from the mapped memory. The loop side
+pickles and copies in the loop's default executor, so only the decode of the result runs
+on the loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import functools
+import multiprocessing
+import os
+import pickle
+import sys
+from collections.abc import Callable, Mapping
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Literal
+
+PoolKind = Literal["auto", "interpreter", "thread", "process"]
+
+# Payloads with a smaller ``estimate_size`` than this are encoded inline.
+OFFLOAD_THRESHOLD = 10_000
+
+# Pool size unless given: encodes are bursts, and every uvicorn worker has its own pool.
+DEFAULT_MAX_WORKERS = min(2, os.cpu_count() or 1)
+
+# Encoding a character costs a small fraction of encoding a value.
+_CHARS_PER_VALUE = 100
+_MAX_DEPTH = 64
+_DONE = object()
+
+
+def default_pool_kind() -> Literal["interpreter", "thread", "process"]:
+    """Pick the cheapest pool that can run encodes in parallel with the event loop."""
+    if hasattr(concurrent.futures, "InterpreterPoolExecutor"):
+        return "interpreter"
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)
+    if not is_gil_enabled():
+        return "thread"
+    return "process"
+
+
+def estimate_size(obj: Any, limit: int | None = None) -> int:
+    """Return a cheap estimate of the work needed to encode ``obj``.
+
+    Counts the values nested in mappings, lists, tuples, sets and objects' ``__dict__``
+    (pydantic models, dataclasses), plus one per ``_CHARS_PER_VALUE`` characters of
+    strings and bytes. Counting stops once it reaches ``limit``, so it costs at most
+    ``limit`` steps however large the payload; nesting below ``_MAX_DEPTH`` is not
+    descended into.
+    """
+    size = 0
+    stack = [iter((obj,))]
+    while stack and (limit is None or size < limit):
+        item = next(stack[-1], _DONE)
+        if item is _DONE:
+            stack.pop()
+        elif isinstance(item, str | bytes | bytearray):
+            size += 1 + len(item) // _CHARS_PER_VALUE
+        elif len(stack) >= _MAX_DEPTH:
+            size += 1
+        elif isinstance(item, Mapping):
+            stack.append(iter(item.values()))
+        elif isinstance(item, list | tuple | set | frozenset):
+            stack.append(iter(item))
+        elif hasattr(item, "__dict__") and not isinstance(item, type):
+            size += 1
+            stack.append(iter(vars(item).values()))
+        else:
+            size += 1
+    return size
+
+
+def _create_shm(size: int) -> shared_memory.SharedMemory:
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    # The creator hands ownership to the other side, which unlinks the block. Stop this
+    # process's resource tracker from unlinking it again (or warning) at exit.
+    resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+    return shm
+
+
+def _buf(shm: shared_memory.SharedMemory) -> memoryview:
+    buf = shm.buf
+    assert buf is not None, "shared memory block is closed"
+    return buf
+
+
+def _write_shm(data: bytes | memoryview) -> tuple[str, int]:
+    shm = _create_shm(len(data))
+    try:
+        _buf(shm)[: len(data)] = data
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+    shm.close()
+    return shm.name, len(data)
+
+
+def _pickle_shm(obj: Any) -> tuple[str, int]:
+    return _write_shm(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _release_staged(staged: asyncio.Future[tuple[str, int]]) -> None:
+    """Unlink the input block of an encode cancelled while the payload was being staged."""
+    if not staged.cancelled() and staged.exception() is None:
+        _unlink_shm(staged.result()[0])
+
+
+def _unlink_shm(name: str) -> None:
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
+
+
+def _release_blocks(name: str, job: concurrent.futures.Future[tuple[str, int]]) -> None:
+    """Unlink what a failed or abandoned encode left behind, once its worker is done."""
+    if job.cancelled() or job.exception() is not None:
+        _unlink_shm(name)  # the worker unlinks the input once it has read it
+    else:
+        _unlink_shm(job.result()[0])
+
+
+def _take_text(name: str, size: int) -> str:
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        with _buf(shm)[:size] as view:
+            return str(view, "utf-8")
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _encode_shared(encoder: Callable[[Any], str], name: str, size: int) -> tuple[str, int]:
+    """Worker side: unpickle the payload from shared memory, encode, write the result back."""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        obj = pickle.loads(_buf(shm)[:size])
+    finally:
+        shm.close()
+        shm.unlink()
+    return _write_shm(encoder(obj).encode())
+
+
+class OffloadPool:
+    """A worker pool, started on first use, that several ``Offloader``s can share.
+
+    Workers start one at a time as encodes need them, up to ``max_workers``. Process and
+    interpreter workers import the encoder's module to unpickle it, so keep encoders in a
+    module without import-time side effects (no app, queue or pool built there).
+
+    Parameters
+    ----------
+    kind
+        Pool kind; ``"auto"`` uses ``default_pool_kind()``.
+    max_workers
+        Pool size (default: ``DEFAULT_MAX_WORKERS``).
+    """
+
+    def __init__(self, kind: PoolKind = "auto", max_workers: int | None = None) -> None:
+        self.kind = default_pool_kind() if kind == "auto" else kind
+        self.max_workers = max_workers or DEFAULT_MAX_WORKERS
+        self._executor: Executor | None = None
+
+    def executor(self) -> Executor:
+        """Return the pool's executor, creating it if needed."""
+        if self._executor is None:
+            if self.kind == "thread":
+                self._executor = ThreadPoolExecutor(self.max_workers, "offload")
+            elif self.kind == "interpreter":  # pragma: no cover - Python 3.14+
+                pool_cls = getattr(concurrent.futures, "InterpreterPoolExecutor")
+                self._executor = pool_cls(self.max_workers)
+            else:
+                # Servers are multi-threaded, where fork() can deadlock the child.
+                context = multiprocessing.get_context("spawn")
+                self._executor = ProcessPoolExecutor(self.max_workers, mp_context=context)
+        return self._executor
+
+    async def warm(self) -> None:
+        """Start one worker, so the first large payload doesn't pay for starting it.
+
+        A spawned process imports the encoder's module, which takes far longer than a
+        typical encode. Further workers start when concurrent encodes need them.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor(), estimate_size, ())
+
+    def close(self) -> None:
+        """Shut the pool down; it is recreated on the next offloaded encode."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class Offloader:
+    """Run an encoder inline or on a worker pool depending on payload size.
+
+    Parameters
+    ----------
+    encoder
+        Module-level function ``obj -> str`` (it must be importable by pool workers).
+    threshold
+        Payloads with ``estimate_size(obj) >= threshold`` are offloaded.
+    pool
+        A shared ``OffloadPool``, or the kind of a pool owned by this offloader; ``"auto"``
+        uses ``default_pool_kind()``.
+    max_workers
+        Size of an owned pool (default: ``DEFAULT_MAX_WORKERS``).
+    """
+
+    def __init__(
+        self,
+        encoder: Callable[[Any], str],
+        *,
+        threshold: int = OFFLOAD_THRESHOLD,
+        pool: PoolKind | OffloadPool = "auto",
+        max_workers: int | None = None,
+    ) -> None:
+        self.encoder = encoder
+        self.threshold = threshold
+        self._owns_pool = not isinstance(pool, OffloadPool)
+        self.pool = pool if isinstance(pool, OffloadPool) else OffloadPool(pool, max_workers)
+
+    async def encode(self, obj: Any) -> str:
+        """Encode ``obj``, offloading to the pool when it is above the threshold."""
+        if estimate_size(obj, self.threshold) < self.threshold:
+            return self.encoder(obj)
+        loop = asyncio.get_running_loop()
+        executor = self.pool.executor()
+        if self.pool.kind == "thread":
+            return await loop.run_in_executor(executor, self.encoder, obj)
+        # Pickling a large payload costs about as much as encoding it: do it, and the copy
+        # into shared memory, off the loop too.
+        staged = loop.run_in_executor(None, _pickle_shm, obj)
+        try:
+            name, size = await asyncio.shield(staged)
+        except asyncio.CancelledError:
+            staged.add_done_callback(_release_staged)
+            raise
+        try:
+            job = executor.submit(_encode_shared, self.encoder, name, size)
+        except BaseException:
+            _unlink_shm(name)
+            raise
+        try:
+            out_name, out_size = await asyncio.wrap_future(job)
+        except BaseException:
+            # Failed, or cancelled while (or after) the worker ran: its output block would
+            # otherwise stay in /dev/shm, since nothing tracks it.
+            job.add_done_callback(functools.partial(_release_blocks, name))
+            raise
+        return _take_text(out_name, out_size)
+
+    async def warm(self) -> None:
+        """Start one worker of the pool; see ``OffloadPool.warm``."""
+        await self.pool.warm()
+
+    def close(self) -> None:
+        """Shut an owned pool down; a shared pool is closed by its owner."""
+        if self._owns_pool:
+            self.pool.close()
+
+
+__all__ = [
+    "DEFAULT_MAX_WORKERS",
+    "OFFLOAD_THRESHOLD",
+    "OffloadPool",
+    "Offloader",
+    "default_pool_kind",
+    "estimate_size",
+]
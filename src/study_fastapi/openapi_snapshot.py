@@ -0,0 +1,328 @@
+"""Ahead-of-time OpenAPI schemas served as precompressed, ETag-tagged bytes.
+
+FastAPI builds an app's OpenAPI schema on the first ``/openapi.json`` request, walking every
+route and generating pydantic JSON schemas, and re-serialises the dict on every request after
+that. Instead, each app's schema is generated by a build step and stored in
+``src/study_fastapi/openapi/<module>.json``::
+
+    PYTHONPATH=src python -m study_fastapi.openapi_snapshot          # regenerate
+    PYTHONPATH=src python -m study_fastapi.openapi_snapshot --check  # fail on drift
+
+``create_app`` (``AppConfig.openapi_snapshot``) loads the file at startup. It then serves
+``/openapi.json`` from bytes encoded once, in identity and gzip form, each with its own
+strong ``ETag`` and ``Vary: Accept-Encoding`` (``304`` on revalidation). ``/docs`` and
+``/redoc`` HTML is rendered once per ``root_path``. The loaded schema is also set as
+``app.openapi_schema``, so ``app.openapi()`` never regenerates it.
+
+``--check`` (and ``tests/study_fastapi/test_openapi_snapshot.py``) regenerates every schema
+from the code and fails when a stored file differs, so the snapshots cannot silently drift
+from the routes. Apps without a snapshot file fall back to FastAPI's lazy generation.
+
+The generated schema also depends on the installed FastAPI and pydantic, so each file
+records their versions (``x-generated-with``, removed before serving). A snapshot made with
+other versions is not served: the app warns and generates its schema lazily, and
+``--check`` and the tests skip it rather than report drift. Regenerate the snapshots as
+part of every FastAPI or pydantic upgrade.
+
+An app can opt out of its snapshot in some configurations (``a5_pydantic_model`` does when
+``CATALOGUE_WRITE_TOKEN`` enables its write routes). Its schema is then generated lazily,
+and ``--check`` and regeneration skip it: snapshots are made in the default configuration.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import importlib
+import json
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import Any
+
+import fastapi
+import pydantic
+from fastapi import FastAPI
+from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import BaseRoute, Route
+
+from utils.logging_utils import get_logger
+
+log = get_logger(__name__)
+
+SNAPSHOT_DIR = Path(__file__).parent / "openapi"
+# Modules (under ``study_fastapi``) whose ``app`` has a stored schema.
+APP_MODULES = (
+    "hello_fastapi",
+    "a2_fastapi_header",
+    "a3_jsonable_encoder",
+    "a4_fastapi_async",
+    "a5_pydantic_model",
+    "a6_dependency_injection",
+    "a8_mvcapp",
+)
+
+
+# Top-level key recording the library versions a snapshot was generated with.
+GENERATED_WITH = "x-generated-with"
+
+
+def snapshot_path(name: str) -> Path:
+    """Return the stored schema file for app module ``name``."""
+    return SNAPSHOT_DIR / f"{name}.json"
+
+
+def generate_schema(app: FastAPI) -> dict[str, Any]:
+    """Generate ``app``'s schema from its routes, ignoring any loaded snapshot."""
+    loaded, app.openapi_schema = app.openapi_schema, None
+    try:
+        return app.openapi()
+    finally:
+        app.openapi_schema = loaded
+
+
+def generator_versions() -> dict[str, str]:
+    """Return the versions of the libraries that shape a generated schema."""
+    return {"fastapi": fastapi.__version__, "pydantic": pydantic.VERSION}
+
+
+def dump_schema(schema: dict[str, Any]) -> str:
+    """Serialise a schema the way it is stored: indented, in FastAPI's key order.
+
+    The current ``generator_versions()`` are appended under ``GENERATED_WITH``.
+    """
+    stored = {**schema, GENERATED_WITH: generator_versions()}
+    return json.dumps(stored, indent=2, ensure_ascii=False) + "\n"
+
+
+def load_snapshot(name: str) -> tuple[dict[str, Any], dict[str, str]]:
+    """Return the stored schema of app module ``name`` and the versions it was made with."""
+    schema = json.loads(snapshot_path(name).read_text())
+    return schema, schema.pop(GENERATED_WITH, {})
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Return whether an ``Accept-Encoding`` value accepts gzip; ``gzip;q=0`` refuses it."""
+    wildcard = False
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        name = name.strip().lower()
+        if name == "gzip":
+            return quality > 0
+        if name == "*":
+            wildcard = quality > 0
+    return wildcard
+
+
+class EncodedBody:
+    """A response body encoded once, in identity and gzip form, with a strong ETag each.
+
+    The two forms are different representations, so they must not share a strong ETag: a
+    cache revalidating one would be told the other is current.
+    """
+
+    def __init__(self, body: bytes, media_type: str) -> None:
+        self.body = body
+        self.gzip_body = gzip.compress(body, compresslevel=9, mtime=0)
+        self.media_type = media_type
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gzip"'
+
+    def response(self, request: Request) -> Response:
+        """Return a 304, gzip or identity response depending on the request headers."""
+        gzipped = accepts_gzip(request.headers.get("accept-encoding", ""))
+        etag = self.gzip_etag if gzipped else self.etag
+        headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+        if_none_match = request.headers.get("if-none-match", "")
+        if etag in {tag.strip() for tag in if_none_match.split(",")}:
+            return Response(status_code=304, headers=headers)
+        if gzipped:
+            headers["Content-Encoding"] = "gzip"
+            return Response(self.gzip_body, media_type=self.media_type, headers=headers)
+        return Response(self.body, media_type=self.media_type, headers=headers)
+
+
+def _replace_route(app: FastAPI, path: str | None, endpoint: Callable[[Request], Any]) -> None:
+    if not path:
+        return
+    routes: list[BaseRoute] = app.router.routes
+    for index, route in enumerate(routes):
+        if isinstance(route, Route) and route.path == path:
+            routes[index] = Route(path, endpoint, include_in_schema=False)
+            return
+
+
+def install_snapshot(app: FastAPI, name: str) -> bool:
+    """Serve ``app``'s stored schema and docs pages from precomputed bytes.
+
+    Returns ``False`` (leaving FastAPI's lazy routes in place) if there is no snapshot file,
+    or if it was generated with other FastAPI or pydantic versions than those installed.
+    """
+    if not snapshot_path(name).exists():
+        log.warning("no OpenAPI snapshot for %s; generating lazily", name)
+        return False
+    schema, versions = load_snapshot(name)
+    if versions != generator_versions():
+        log.warning(
+            "OpenAPI snapshot for %s was generated with %s, not %s; generating lazily",
+            name,
+            versions or "unknown versions",
+            generator_versions(),
+        )
+        return False
+    app.openapi_schema = schema
+    variants: dict[str, EncodedBody] = {}
+    pages: dict[tuple[str, str], EncodedBody] = {}
+
+    def schema_body(root_path: str) -> EncodedBody:
+        if root_path not in variants:
+            served = schema
+            servers = schema.get("servers", [])
+            if root_path and app.root_path_in_servers:
+                if root_path not in {server.get("url") for server in servers}:
+                    served = {**schema, "servers": [{"url": root_path}, *servers]}
+            compact = json.dumps(served, ensure_ascii=False, separators=(",", ":"))
+            variants[root_path] = EncodedBody(compact.encode(), "application/json")
+        return variants[root_path]
+
+    async def openapi(request: Request) -> Response:
+        root_path = request.scope.get("root_path", "").rstrip("/")
+        return schema_body(root_path).response(request)
+
+    def page(kind: str, request: Request) -> Response:
+        root_path = request.scope.get("root_path", "").rstrip("/")
+        if (kind, root_path) not in pages:
+            openapi_url = root_path + (app.openapi_url or "")
+            if kind == "docs":
+                oauth2_redirect_url = app.swagger_ui_oauth2_redirect_url
+                html = get_swagger_ui_html(
+                    openapi_url=openapi_url,
+                    title=f"{app.title} - Swagger UI",
+                    oauth2_redirect_url=oauth2_redirect_url and root_path + oauth2_redirect_url,
+                    init_oauth=app.swagger_ui_init_oauth,
+                    swagger_ui_parameters=app.swagger_ui_parameters,
+                )
+            else:
+                html = get_redoc_html(openapi_url=openapi_url, title=f"{app.title} - ReDoc")
+            pages[kind, root_path] = EncodedBody(bytes(html.body), "text/html")
+        return pages[kind, root_path].response(request)
+
+    async def docs(request: Request) -> Response:
+        return page("docs", request)
+
+    async def redoc(request: Request) -> Response:
+        return page("redoc", request)
+
+    _replace_route(app, app.openapi_url, openapi)
+    _replace_route(app, app.docs_url, docs)
+    _replace_route(app, app.redoc_url, redoc)
+    return True
+
+
+def _module_app(name: str) -> FastAPI:
+    return importlib.import_module(f"study_fastapi.{name}").app
+
+
+def _snapshot_apps(names: Sequence[str]) -> dict[str, FastAPI]:
+    """Return the apps in ``names`` that are configured to serve their snapshot."""
+    apps = {}
+    for name in names:
+        app = _module_app(name)
+        if getattr(app.state, "openapi_snapshot", None) == name:
+            apps[name] = app
+        else:
+            log.warning("%s serves its live schema in this configuration; skipped", name)
+    return apps
+
+
+def stale_versions(name: str) -> dict[str, str] | None:
+    """Return the versions ``name``'s snapshot was made with, if not the installed ones.
+
+    ``None`` when the file is missing or matches ``generator_versions()``.
+    """
+    if not snapshot_path(name).exists():
+        return None
+    versions = load_snapshot(name)[1]
+    return None if versions == generator_versions() else versions
+
+
+def drifted(names: Sequence[str] = APP_MODULES) -> list[str]:
+    """Return the app modules whose stored schema differs from the code (or is missing).
+
+    Snapshots generated with other FastAPI or pydantic versions are skipped with a warning:
+    their schemas differ for reasons unrelated to the app.
+    """
+    stale = []
+    for name, app in _snapshot_apps(names).items():
+        path = snapshot_path(name)
+        versions = stale_versions(name)
+        if versions is not None:
+            log.warning(
+                "OpenAPI snapshot for %s was generated with %s, not %s; not checked",
+                name,
+                versions or "unknown versions",
+                generator_versions(),
+            )
+        elif not path.exists() or path.read_text() != dump_schema(generate_schema(app)):
+            stale.append(name)
+    return stale
+
+
+def write_snapshots(names: Sequence[str] = APP_MODULES) -> list[Path]:
+    """Regenerate and store the schema of every app module in ``names``."""
+    SNAPSHOT_DIR.mkdir(exist_ok=True)
+    paths = []
+    for name, app in _snapshot_apps(names).items():
+        path = snapshot_path(name)
+        path.write_text(dump_schema(generate_schema(app)))
+        paths.append(path)
+    return paths
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Command-line entry point; returns the process exit code."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="fail if any snapshot drifted")
+    args = parser.parse_args(argv)
+    if args.check:
+        stale = drifted()
+        for name in stale:
+            print(f"OpenAPI snapshot out of date: {snapshot_path(name)}")
+        if stale:
+            print("Regenerate with: PYTHONPATH=src python -m study_fastapi.openapi_snapshot")
+        return 1 if stale else 0
+    for path in write_snapshots():
+        print(f"wrote {path}")
+    return 0
+
+
+__all__ = [
+    "APP_MODULES",
+    "GENERATED_WITH",
+    "EncodedBody",
+    "accepts_gzip",
+    "drifted",
+    "dump_schema",
+    "generate_schema",
+    "generator_versions",
+    "install_snapshot",
+    "load_snapshot",
+    "snapshot_path",
+    "stale_versions",
+    "write_snapshots",
+]
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,302 @@
+"""Opt-in per-request profiling that writes flamegraph-ready collapsed stacks.
+
+``ProfilingMiddleware`` wraps selected requests in ``cProfile`` and writes the result as
+collapsed stacks (``frame;frame;frame <microseconds>`` per line). You can feed these files
+directly to ``flamegraph.pl`` or speedscope. A request is profiled when:
+
+- it is sampled: ``PROFILE_SAMPLE_RATE`` (0.0-1.0) of requests, chosen at random, or
+- it carries a valid ``X-Profile`` header: ``<expiry unix ts>.<hex HMAC-SHA256>``, signed
+  with ``PROFILE_SECRET`` over the expiry timestamp (see ``sign_profile_request``). The
+  expiry must be at most ``PROFILE_MAX_TTL`` seconds away (default 900), so a leaked
+  header stops working soon.
+
+Files are written to ``PROFILE_DIR`` (default: ``profiles``) as
+``<route>/<unix ms>-<pid>.collapsed``, or ``unmatched/...`` when no route matched. Log
+lines go through ``utils.logging_utils`` and are throttled to one per route template every
+``PROFILE_LOG_INTERVAL`` seconds (default 10).
+
+Notes
+-----
+cProfile profiles the event-loop thread only, and only one profile can be active at a time.
+Requests arriving while another one is being profiled are served unprofiled, but their
+code still runs on the same loop. A profile therefore also records whatever other requests
+and background tasks run while it is active, not just the request it is named after; profile
+under light load, or read it as a sample of the whole loop. Sync
+endpoints run in the threadpool, so their stacks show the routing, validation and
+serialisation done on the loop, not the handler body itself. Stacks are collapsed and
+written on the loop's default executor, and a failure to write is logged, never raised.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import hashlib
+import hmac
+import logging
+import os
+import pstats
+import random
+import re
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from utils.logging_utils import ThrottleFilter, get_logger
+
+log = get_logger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+
+# Longest time before its expiry that a signed ``X-Profile`` header is accepted.
+MAX_PROFILE_TTL = 900.0
+
+_Func = tuple[str, int, str]
+
+# Bounds on the stacks rebuilt from one profile (see ``collapse_stats``).
+_MAX_DEPTH = 128
+_MAX_FRAMES = 20_000
+_MIN_SECONDS = 1e-6
+
+_EXPIRES = re.compile(r"[0-9]{1,12}")
+# Directory and log key for requests no route matched; their raw paths are client-chosen.
+_UNMATCHED = "unmatched"
+
+
+def sign_profile_request(secret: str, expires: int) -> str:
+    """Return an ``X-Profile`` header value valid until the unix timestamp ``expires``."""
+    digest = hmac.new(secret.encode(), str(expires).encode(), hashlib.sha256).hexdigest()
+    return f"{expires}.{digest}"
+
+
+def verify_profile_header(
+    secret: str, value: str, now: float | None = None, max_ttl: float = MAX_PROFILE_TTL
+) -> bool:
+    """Return whether ``value`` is a valid ``X-Profile`` signature for ``secret``.
+
+    The header must not have expired, and its expiry must be at most ``max_ttl`` seconds
+    away: a header signed to last for years would keep profiling on.
+    """
+    expires = value.partition(".")[0]
+    now = time.time() if now is None else now
+    # ASCII digits only: ``str.isdigit`` accepts e.g. "²", which ``int`` then rejects.
+    if not _EXPIRES.fullmatch(expires) or not now <= int(expires) <= now + max_ttl:
+        return False
+    return hmac.compare_digest(sign_profile_request(secret, int(expires)), value)
+
+
+def _frame_label(func: _Func) -> str:
+    filename, lineno, name = func
+    if filename == "~":  # builtins
+        return name.replace(";", ":")
+    return f"{name} ({os.path.basename(filename)}:{lineno})".replace(";", ":")
+
+
+def collapse_stats(stats: pstats.Stats) -> list[str]:
+    """Convert cProfile stats into collapsed-stack lines with microsecond weights.
+
+    cProfile records caller/callee edges rather than full stacks, so stacks are rebuilt by
+    walking down from the root functions (or, for call cycles without one, from their
+    heaviest function). A callee's time is split across its callers in proportion to each
+    edge's cumulative time. Recursive cycles are cut at the first repeat.
+
+    The number of paths through the edges can grow exponentially with depth, so the walk is
+    bounded. The heaviest edges are followed first. Subtrees under ``_MIN_SECONDS``, and
+    anything beyond ``_MAX_DEPTH`` frames or once ``_MAX_FRAMES`` frames have been visited,
+    are folded into their caller's frame.
+    """
+    raw: dict[_Func, Any] = stats.stats  # type: ignore[attr-defined]
+    callees: dict[_Func, list[tuple[float, _Func]]] = defaultdict(list)
+    for func, (_cc, _nc, _tt, _ct, callers) in raw.items():
+        for caller, edge in callers.items():
+            callees[caller].append((edge[3], func))
+    for children in callees.values():
+        children.sort(key=lambda child: child[0], reverse=True)
+    totals: dict[str, float] = defaultdict(float)
+    budget = _MAX_FRAMES
+
+    def walk(func: _Func, path: tuple[str, ...], seen: frozenset[_Func], scale: float) -> None:
+        nonlocal budget
+        budget -= 1
+        frames = (*path, _frame_label(func))
+        stack = ";".join(frames)
+        if budget <= 0 or len(frames) >= _MAX_DEPTH:
+            totals[stack] += raw[func][3] * scale  # the whole subtree
+            return
+        totals[stack] += raw[func][2] * scale
+        for edge_total, child in callees.get(func, ()):
+            child_total = raw[child][3]
+            if child in seen or child_total <= 0:
+                continue
+            if edge_total * scale < _MIN_SECONDS:
+                totals[stack] += edge_total * scale
+                continue
+            walk(child, frames, seen | {child}, scale * edge_total / child_total)
+
+    for root in _roots(raw, callees):
+        walk(root, (), frozenset({root}), 1.0)
+    return [f"{stack} {round(t * 1e6)}" for stack, t in totals.items() if round(t * 1e6) > 0]
+
+
+def _roots(raw: dict[_Func, Any], callees: dict[_Func, list[tuple[float, _Func]]]) -> list[_Func]:
+    """Return functions nothing calls, then the heaviest function of each unreached cycle."""
+    reached: set[_Func] = set()
+
+    def reach(func: _Func) -> None:
+        todo = [func]
+        while todo:
+            current = todo.pop()
+            if current not in reached:
+                reached.add(current)
+                todo.extend(child for _, child in callees.get(current, ()))
+
+    roots = [func for func, (_cc, _nc, _tt, _ct, callers) in raw.items() if not callers]
+    for root in roots:
+        reach(root)
+    for func in sorted(raw, key=lambda func: raw[func][3], reverse=True):
+        if func not in reached:
+            roots.append(func)
+            reach(func)
+    return sorted(roots, key=lambda func: raw[func][3], reverse=True)
+
+
+def _route_slug(scope: Scope) -> str:
+    template = getattr(scope.get("route"), "path", None)
+    if not template:
+        return _UNMATCHED
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{scope.get('method', '')}{template}").strip("_")
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling sampled or explicitly requested HTTP requests.
+
+    Parameters
+    ----------
+    app
+        The wrapped ASGI application.
+    sample_rate
+        Fraction of requests profiled at random.
+    output_dir
+        Directory receiving collapsed-stack files.
+    secret
+        HMAC secret enabling the ``X-Profile`` header trigger; ``None`` disables it.
+    log_interval
+        Minimum seconds between log lines per route template.
+    max_ttl
+        Longest accepted time to a signed header's expiry, in seconds.
+    rand
+        Random source, injectable for tests.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        sample_rate: float = 0.0,
+        output_dir: str | os.PathLike[str] = "profiles",
+        secret: str | None = None,
+        log_interval: float = 10.0,
+        max_ttl: float = MAX_PROFILE_TTL,
+        rand: Callable[[], float] = random.random,
+    ) -> None:
+        self.app = app
+        self.sample_rate = sample_rate
+        self.output_dir = Path(output_dir)
+        self.secret = secret
+        self.max_ttl = max_ttl
+        self._rand = rand
+        self._active = False
+        self._throttle = ThrottleFilter(log_interval)
+
+    def _requested(self, scope: Scope) -> bool:
+        if self.sample_rate and self._rand() < self.sample_rate:
+            return True
+        if self.secret is None:
+            return False
+        for key, value in scope["headers"]:
+            if key == PROFILE_HEADER:
+                header = value.decode("latin-1")
+                return verify_profile_header(self.secret, header, max_ttl=self.max_ttl)
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Profile the request if it is selected and no other profile is running."""
+        if scope["type"] != "http" or self._active or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+        self._active = True
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.disable()
+            self._active = False
+            await self._save(scope, profiler, time.perf_counter() - start)
+
+    async def _save(self, scope: Scope, profiler: cProfile.Profile, elapsed: float) -> None:
+        # Collapsing and writing run off the event loop. Failures are logged rather than
+        # raised, so they can't replace the response or the app's own exception.
+        slug = _route_slug(scope)
+        loop = asyncio.get_running_loop()
+        try:
+            path = await loop.run_in_executor(None, self._write, slug, profiler)
+        except Exception:
+            log.exception("could not write the profile of %s", slug)
+            return
+        if log.isEnabledFor(logging.INFO):
+            # One message template per route, so a hot route can't starve the others' lines.
+            record = log.makeRecord(
+                log.name,
+                logging.INFO,
+                __file__,
+                0,
+                f"profiled {slug} in %.1fms -> %s",
+                (elapsed * 1e3, path),
+                None,
+            )
+            if self._throttle.filter(record):
+                log.handle(record)
+
+    def _write(self, slug: str, profiler: cProfile.Profile) -> Path:
+        directory = self.output_dir / slug
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{int(time.time() * 1000)}-{os.getpid()}.collapsed"
+        path.write_text("\n".join(collapse_stats(pstats.Stats(profiler))) + "\n")
+        return path
+
+
+def add_profiling(app: FastAPI) -> None:
+    """Install ``ProfilingMiddleware`` on ``app`` if profiling is enabled by env vars.
+
+    Nothing is installed when ``PROFILE_SAMPLE_RATE`` is 0 and ``PROFILE_SECRET`` is unset,
+    so unprofiled deployments pay no per-request cost.
+    """
+    sample_rate = float(os.getenv("PROFILE_SAMPLE_RATE", "0") or 0)
+    secret = os.getenv("PROFILE_SECRET") or None
+    if not sample_rate and secret is None:
+        return
+    app.add_middleware(
+        ProfilingMiddleware,
+        sample_rate=sample_rate,
+        output_dir=os.getenv("PROFILE_DIR", "profiles"),
+        secret=secret,
+        log_interval=float(os.getenv("PROFILE_LOG_INTERVAL", "10")),
+        max_ttl=float(os.getenv("PROFILE_MAX_TTL", str(MAX_PROFILE_TTL))),
+    )
+
+
+__all__ = [
+    "MAX_PROFILE_TTL",
+    "ProfilingMiddleware",
+    "add_profiling",
+    "collapse_stats",
+    "sign_profile_request",
+    "verify_profile_header",
+]
@@ -0,0 +1,294 @@
+"""A radix-tree router for large route tables.
+
+Starlette finds a request's route by trying every route's regex in order, so matching
+costs grow with the size of the route table, and a ``404`` tries them all.
+``RadixRouter`` compiles the routes into a tree of path segments instead:
+
+- static segments (``/hi_name``) are dict lookups
+- whole-segment parameters (``/{name}``, ``/{id:int}``) are checked against their
+  convertor's regex
+- a trailing ``{rest:path}`` parameter takes what is left of the path
+- each leaf maps the HTTP method to its route, so method dispatch is a dict lookup too
+
+A lookup walks one branch per segment, whatever the number of routes. Only the selected
+route's own ``matches`` runs, to build the scope (path params, endpoint) exactly as the
+regular router would.
+
+The tree gives the same answer as Starlette's scan. When a static and a parameter
+branch both match, the route registered first wins. Routes it cannot compile, such as
+mounts, included routers, hosts, or parameters inside a segment (``/{name}.txt``), keep
+their place in the order. A request whose match could be shadowed by one of them, and
+any request the tree cannot answer (a ``404``, a trailing-slash redirect, lifespan,
+websockets), is handed to the app's own router unchanged.
+
+Enable it with ``AppConfig(radix_router=True)`` (``APP_RADIX_ROUTER=1``). The tree is
+built on the first request and rebuilt after any change to the router's route list
+(routes added, removed or replaced in place).
+"""
+
+from __future__ import annotations
+
+import functools
+import re
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from starlette.routing import BaseRoute, Match, Route, Router
+from starlette.types import Receive, Scope, Send
+
+from utils.logging_utils import get_logger
+
+log = get_logger(__name__)
+
+_PARAM = re.compile(r"^\{([a-zA-Z_][a-zA-Z0-9_]*)(?::([a-zA-Z_][a-zA-Z0-9_]*))?\}$")
+_MATCHES = (Route.matches, APIRoute.matches)
+
+# (registration index, route)
+_Entry = tuple[int, BaseRoute]
+
+
+def _route_path(scope: Scope) -> str:
+    """Return the request path relative to ``root_path``, as Starlette's routes see it."""
+    path: str = scope["path"]
+    root_path: str = scope.get("root_path", "")
+    if not root_path or not path.startswith(root_path):
+        return path
+    if path == root_path:
+        return ""
+    if path[len(root_path)] == "/":
+        return path[len(root_path) :]
+    return path
+
+
+class _TrackedRoutes(list[BaseRoute]):
+    """A router's route list that counts its changes, so a stale tree can be detected."""
+
+    version = 0
+
+
+def _tracked(name: str) -> Callable[..., Any]:
+    method = getattr(list, name)
+
+    @functools.wraps(method)
+    def mutate(self: _TrackedRoutes, *args: Any, **kwargs: Any) -> Any:
+        self.version += 1
+        return method(self, *args, **kwargs)
+
+    return mutate
+
+
+for _name in (
+    "__setitem__",
+    "__delitem__",
+    "__iadd__",
+    "append",
+    "extend",
+    "insert",
+    "pop",
+    "remove",
+    "clear",
+    "sort",
+    "reverse",
+):
+    setattr(_TrackedRoutes, _name, _tracked(_name))
+
+
+@dataclass(slots=True)
+class _Leaf:
+    """Routes that end at a node, by method (``None`` for routes accepting any method)."""
+
+    methods: dict[str | None, _Entry] = field(default_factory=dict)
+    first: _Entry | None = None  # earliest route here: answers with 405 on a method miss
+
+    def add(self, index: int, route: BaseRoute) -> None:
+        methods = getattr(route, "methods", None) or (None,)
+        for method in methods:
+            self.methods.setdefault(method, (index, route))
+        if self.first is None:
+            self.first = (index, route)
+
+    def lookup(self, method: str) -> tuple[_Entry | None, _Entry | None]:
+        """Return ``(full, partial)``: the route for ``method``, else the first route here."""
+        full = self.methods.get(method)
+        if full is None:
+            any_method = self.methods.get(None)
+            return any_method, (None if any_method else self.first)
+        any_method = self.methods.get(None)
+        if any_method is not None and any_method[0] < full[0]:
+            full = any_method
+        return full, None
+
+
+@dataclass(slots=True)
+class _Node:
+    static: dict[str, _Node] = field(default_factory=dict)
+    # Whole-segment parameters, keyed by convertor regex (names don't affect matching).
+    params: dict[str, tuple[re.Pattern[str], _Node]] = field(default_factory=dict)
+    rest: _Leaf | None = None  # trailing ``{name:path}`` parameters
+    leaf: _Leaf | None = None
+
+
+def _segments(path: str) -> list[str]:
+    return path[1:].split("/")
+
+
+def _earliest(a: _Entry | None, b: _Entry | None) -> _Entry | None:
+    if a is None:
+        return b
+    if b is None or a[0] < b[0]:
+        return a
+    return b
+
+
+class RadixRouter:
+    """Route lookup over a compiled tree of ``router``'s routes.
+
+    Parameters
+    ----------
+    router
+        The router whose ``routes`` are compiled; it also handles every request the tree
+        does not answer.
+    """
+
+    def __init__(self, router: Router) -> None:
+        self.router = router
+        self._root = _Node()
+        self._routes: _TrackedRoutes | None = None  # the list the tree was compiled from
+        self._version = -1  # its version then
+        self._compiled = 0  # number of routes in the tree
+        self._barrier = 0  # index of the first route the tree could not compile
+
+    # -- compiling -----------------------------------------------------------------------
+
+    def _insert(self, index: int, route: BaseRoute) -> bool:
+        if not isinstance(route, Route) or type(route).matches not in _MATCHES:
+            return False
+        convertors = route.param_convertors
+        node = self._root
+        segments = _segments(route.path)
+        for position, segment in enumerate(segments):
+            if "{" not in segment:
+                node = node.static.setdefault(segment, _Node())
+                continue
+            param = _PARAM.match(segment)
+            if param is None:
+                return False  # a parameter inside a segment
+            regex = convertors[param.group(1)].regex
+            if param.group(2) == "path":
+                if position != len(segments) - 1:
+                    return False
+                node.rest = node.rest or _Leaf()
+                node.rest.add(index, route)
+                return True
+            if regex not in node.params:
+                node.params[regex] = (re.compile(regex), _Node())
+            node = node.params[regex][1]
+        node.leaf = node.leaf or _Leaf()
+        node.leaf.add(index, route)
+        return True
+
+    def compile(self) -> None:
+        """(Re)build the tree from the router's current routes."""
+        tracked = self.router.routes
+        if not isinstance(tracked, _TrackedRoutes):
+            tracked = self.router.routes = _TrackedRoutes(tracked)
+        self._routes, self._version = tracked, tracked.version
+        routes = list(tracked)
+        self._root = _Node()
+        self._barrier = len(routes)
+        compiled = 0
+        for index, route in enumerate(routes):
+            if self._insert(index, route):
+                compiled += 1
+            else:
+                self._barrier = min(self._barrier, index)
+        self._compiled = len(routes)
+        log.info("compiled %d of %d routes into a radix tree", compiled, len(routes))
+
+    # -- matching ------------------------------------------------------------------------
+
+    def _walk(
+        self, node: _Node, segments: list[str], position: int, method: str
+    ) -> tuple[_Entry | None, _Entry | None]:
+        full: _Entry | None = None
+        partial: _Entry | None = None
+        if node.rest is not None and position < len(segments):
+            full, partial = node.rest.lookup(method)
+        if position == len(segments):
+            if node.leaf is not None:
+                leaf_full, leaf_partial = node.leaf.lookup(method)
+                full = _earliest(full, leaf_full)
+                partial = _earliest(partial, leaf_partial)
+            return full, partial
+        segment = segments[position]
+        branches: list[_Node] = []
+        child = node.static.get(segment)
+        if child is not None:
+            branches.append(child)
+        for pattern, param_child in node.params.values():
+            if pattern.fullmatch(segment):
+                branches.append(param_child)
+        for branch in branches:
+            branch_full, branch_partial = self._walk(branch, segments, position + 1, method)
+            full = _earliest(full, branch_full)
+            partial = _earliest(partial, branch_partial)
+        return full, partial
+
+    def match(self, scope: Scope) -> tuple[Match, BaseRoute | None]:
+        """Return the route Starlette would pick for ``scope``, if the tree can tell.
+
+        ``Match.FULL`` and ``Match.PARTIAL`` (a ``405``) carry the route; ``Match.NONE``
+        means the request must go to the router.
+        """
+        tracked = self._routes
+        if tracked is None or tracked is not self.router.routes or tracked.version != self._version:
+            self.compile()
+        path = _route_path(scope)
+        if not path.startswith("/"):
+            return Match.NONE, None
+        full, partial = self._walk(self._root, _segments(path), 0, scope["method"])
+        if full is not None:
+            if full[0] < self._barrier:
+                return Match.FULL, full[1]
+        elif partial is not None and self._barrier == self._compiled:
+            return Match.PARTIAL, partial[1]
+        return Match.NONE, None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """ASGI entry point, used in place of the router's own dispatch."""
+        if scope["type"] == "http":
+            _, route = self.match(scope)
+            if route is not None:
+                # The route builds its own scope (converted path params, endpoint).
+                match, child_scope = route.matches(scope)
+                if match != Match.NONE:
+                    scope.setdefault("router", self.router)
+                    scope.update(child_scope)
+                    await route.handle(scope, receive, send)
+                    return
+        await self.router.app(scope, receive, send)
+
+
+def install_radix_router(app: FastAPI) -> RadixRouter:
+    """Dispatch ``app``'s requests through a ``RadixRouter`` over its routes."""
+    radix = RadixRouter(app.router)
+    app.router.middleware_stack = radix
+    return radix
+
+
+def starlette_match(router: Router, scope: Scope) -> tuple[Match, BaseRoute | None]:
+    """Return the route Starlette's linear scan picks for ``scope`` (for comparison)."""
+    partial: BaseRoute | None = None
+    for route in router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return match, route
+        if match == Match.PARTIAL and partial is None:
+            partial = route
+    return (Match.PARTIAL, partial) if partial is not None else (Match.NONE, None)
+
+
+__all__ = ["RadixRouter", "install_radix_router", "starlette_match"]
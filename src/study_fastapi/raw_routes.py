@@ -0,0 +1,159 @@
+"""Routes answered by a raw ASGI handler, skipping FastAPI's request machinery.
+
+A normal route pays for a ``Request`` object, dependency resolution, the threadpool hop
+of a sync endpoint, response validation and a ``JSONResponse`` on every request. For an
+endpoint that does almost nothing (a constant greeting, echoing one header) that is
+nearly all of its cost. ``raw_route`` registers the endpoint as a regular ``APIRoute``,
+so it keeps its OpenAPI operation, 405 handling and warm-up. Requests are then answered
+by sending precomputed ASGI messages:
+
+- Without ``render``, the endpoint must not take any parameters. The first ``200``
+  response (normally the startup warm-up's request) is recorded, and later requests
+  replay its status, headers and body bytes.
+- With ``render``, ``render(scope)`` returns the response value, which is encoded as
+  ``JSONResponse`` would encode it. Returning ``None`` hands the request to the regular
+  FastAPI path, e.g. so a missing header still gets its usual ``422``.
+
+Middleware still runs for raw routes; only the route's own handling is replaced. Raw
+routes are opt-in: with ``enabled=False`` (the study apps pass ``AppConfig.raw_routes``,
+i.e. ``APP_RAW_ROUTES``) the endpoint is registered as an ordinary route::
+
+    @raw_route(app, "/hi", enabled=config.raw_routes)
+    def greet_static() -> str:
+        return "Hello, World!"
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Callable, Sequence
+from typing import Any, TypeVar
+
+from fastapi import APIRouter, FastAPI
+from fastapi.routing import APIRoute
+from starlette.types import Message, Receive, Scope, Send
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+Render = Callable[[Scope], Any]
+
+_JSON = (b"content-type", b"application/json")
+
+
+def _encode(value: Any) -> bytes:
+    # Byte-for-byte what ``JSONResponse.render`` produces.
+    return json.dumps(
+        value, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class RawRoute(APIRoute):
+    """``APIRoute`` whose requests are answered from precomputed ASGI messages.
+
+    Built by ``raw_route``; ``render`` is set after the route is added to its router.
+    """
+
+    render: Render | None = None
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        super().__init__(path, endpoint, **kwargs)
+        # (status, headers, body) of the recorded response, for routes without ``render``.
+        self._recorded: tuple[int, list[tuple[bytes, bytes]], bytes] | None = None
+
+    def _takes_input(self) -> bool:
+        dependant = self.dependant
+        return bool(
+            dependant.path_params
+            or dependant.query_params
+            or dependant.header_params
+            or dependant.cookie_params
+            or dependant.body_params
+            or dependant.dependencies
+        )
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Send the precomputed response, or fall back to FastAPI's handling."""
+        if self.methods and scope["method"] not in self.methods:
+            await super().handle(scope, receive, send)  # 405
+            return
+        if self.render is not None:
+            value = self.render(scope)
+            if value is None:
+                await super().handle(scope, receive, send)
+                return
+            body = _encode(value)
+            headers = [(b"content-length", str(len(body)).encode("latin-1")), _JSON]
+            await send({"type": "http.response.start", "status": 200, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+        elif self._recorded is not None:
+            status, headers, body = self._recorded
+            # Fresh messages: middleware may add headers to the list it is sent.
+            await send({"type": "http.response.start", "status": status, "headers": [*headers]})
+            await send({"type": "http.response.body", "body": body})
+        else:
+            await self._record(scope, receive, send)
+
+    async def _record(self, scope: Scope, receive: Receive, send: Send) -> None:
+        messages: list[Message] = []
+
+        async def recording_send(message: Message) -> None:
+            # Copied before outer middleware gets to add its headers to the message.
+            messages.append({**message, "headers": [*message.get("headers", ())]})
+            await send(message)
+
+        await super().handle(scope, receive, send=recording_send)
+        if (
+            len(messages) == 2
+            and messages[0]["status"] == 200
+            and not messages[1].get("more_body", False)
+        ):
+            start, body = messages
+            self._recorded = (200, start["headers"], body["body"])
+
+
+def raw_route(
+    router: FastAPI | APIRouter,
+    path: str,
+    *,
+    methods: Sequence[str] = ("GET",),
+    render: Render | None = None,
+    enabled: bool = True,
+    **kwargs: Any,
+) -> Callable[[F], F]:
+    """Register the decorated endpoint on ``router`` as a ``RawRoute``.
+
+    Parameters
+    ----------
+    router
+        App or router to add the route to.
+    path, methods
+        As for ``router.api_route``.
+    render
+        ``render(scope)`` returns the response value, or ``None`` to let FastAPI handle the
+        request. Without it the endpoint must take no parameters, and its first ``200``
+        response is replayed.
+    enabled
+        ``False`` registers an ordinary ``APIRoute`` instead, as ``router.api_route`` would.
+    **kwargs
+        Passed to ``add_api_route``, e.g. ``description`` or ``openapi_extra``.
+    """
+    api_router = router.router if isinstance(router, FastAPI) else router
+
+    def decorator(endpoint: F) -> F:
+        if not enabled:
+            api_router.add_api_route(path, endpoint, methods=list(methods), **kwargs)
+            return endpoint
+        api_router.add_api_route(
+            path, endpoint, methods=list(methods), route_class_override=RawRoute, **kwargs
+        )
+        route = api_router.routes[-1]
+        assert isinstance(route, RawRoute)
+        if render is None and route._takes_input():
+            raise TypeError(f"{path}: an endpoint with parameters needs a render function")
+        route.render = render
+        return endpoint
+
+    return decorator
+
+
+__all__ = ["RawRoute", "raw_route"]
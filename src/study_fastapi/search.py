@@ -0,0 +1,287 @@
+"""In-process full-text search over catalogue text fields, ranked with BM25.
+
+``SearchIndex`` keeps an inverted index of the text fields of a ``VersionedCatalogue``:
+for every term, the ids of the documents containing it (in increasing order) and how
+often it occurs in each. It is built on the first search and then kept up to date
+incrementally. The catalogue reports each write, and only that record is re-indexed. A
+replaced snapshot triggers a full rebuild on the next search.
+
+Queries are tokenised like the documents (lower-cased words). Every term must match, and
+the last one also matches as a prefix so that results can follow what the user types
+(``"hand"`` finds ``"handwoven"``). Results are ranked with Okapi BM25 over the
+concatenated fields.
+
+Memory is kept flat for large catalogues: postings are ``array`` objects (4 bytes per
+document id, 1 byte per term frequency) rather than Python ints in dicts. A re-indexed
+record gets a new document id; its old postings are skipped as tombstones and dropped by
+rebuilding once they outnumber live documents.
+"""
+
+from __future__ import annotations
+
+import bisect
+import heapq
+import math
+import re
+import threading
+from array import array
+from collections import Counter
+from collections.abc import Iterable, Sequence
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel
+
+from study_fastapi.changefeed import VersionedCatalogue
+
+M = TypeVar("M", bound=BaseModel)
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Split ``text`` into lower-cased word terms."""
+    return _WORD.findall(text.casefold())
+
+
+class SearchHit(BaseModel, Generic[M]):
+    """A matching record and its BM25 score."""
+
+    score: float
+    record: M
+
+
+class _Postings:
+    """Documents containing one term, in increasing id order, with term frequencies."""
+
+    __slots__ = ("ids", "counts")
+
+    def __init__(self) -> None:
+        self.ids = array("I")
+        self.counts = array("B")
+
+    def count(self, doc: int) -> int:
+        position = bisect.bisect_left(self.ids, doc)
+        if position < len(self.counts) and self.ids[position] == doc:
+            return self.counts[position]
+        return 0
+
+
+class _Index:
+    """The postings and document statistics of one build of a ``SearchIndex``.
+
+    Only the ``SearchIndex`` writer lock's holder changes it, and only by appending (or by
+    marking a document a tombstone), so searches read it without a lock: a document's key
+    and length are stored before its postings, and a term's ``ids`` before its ``counts``.
+    """
+
+    def __init__(self) -> None:
+        self.postings: dict[str, _Postings] = {}
+        self.keys: list[str | None] = []  # document id -> record key; None = tombstone
+        self.lengths = array("I")
+        self.docs: dict[str, int] = {}  # record key -> live document id
+        self.total_length = 0
+        self.terms: list[str] | None = None  # sorted vocabulary for prefixes, built lazily
+
+    def add(self, key: str, text: str) -> None:
+        doc = len(self.keys)
+        terms = Counter(tokenize(text))
+        length = sum(terms.values())
+        self.keys.append(key)
+        self.lengths.append(length)
+        for term, count in terms.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = _Postings()
+                if self.terms is not None:
+                    bisect.insort(self.terms, term)
+            postings.ids.append(doc)
+            postings.counts.append(min(count, 255))
+        self.docs[key] = doc
+        self.total_length += length
+
+    def remove(self, key: str) -> None:
+        doc = self.docs.pop(key, None)
+        if doc is not None:
+            self.keys[doc] = None
+            self.total_length -= self.lengths[doc]
+
+
+class SearchIndex(Generic[M]):
+    """BM25 inverted index over ``fields`` of the records in ``catalogue``.
+
+    Searches run without a lock. Writes to the index are serialised, and a rebuild scans
+    the catalogue into a new index that is swapped in once complete, replaying any writes
+    made during the scan.
+
+    Parameters
+    ----------
+    catalogue
+        Records to index; the index follows its writes.
+    fields
+        Names of the text fields to search.
+    k1, b
+        BM25 term-frequency saturation and document-length normalisation.
+    max_expansions
+        Most terms (in sorted order) a prefix is expanded to.
+    """
+
+    def __init__(
+        self,
+        catalogue: VersionedCatalogue[M],
+        fields: Sequence[str],
+        *,
+        k1: float = 1.2,
+        b: float = 0.75,
+        max_expansions: int = 50,
+    ) -> None:
+        self.catalogue = catalogue
+        self.fields = tuple(fields)
+        self.k1, self.b = k1, b
+        self.max_expansions = max_expansions
+        self._lock = threading.Lock()  # held to change or swap ``_index``
+        self._rebuilding = threading.Lock()  # one scan of the catalogue at a time
+        self._index = _Index()
+        self._built = False
+        self._pending: list[str | None] | None = None  # writes seen during a rebuild
+        catalogue.subscribe(self._on_write)
+
+    def __len__(self) -> int:
+        """Return the number of indexed records."""
+        return len(self._ensure().docs)
+
+    # -- maintenance ---------------------------------------------------------------------
+
+    def _text(self, record: M) -> str:
+        return " ".join(str(getattr(record, f) or "") for f in self.fields)
+
+    def _reindex(self, index: _Index, key: str) -> None:
+        # Index whatever the catalogue holds now, so concurrent writes to the same key
+        # converge whichever notification arrives last.
+        record = self.catalogue.get(key)
+        index.remove(key)
+        if record is not None:
+            index.add(key, self._text(record))
+
+    def rebuild(self, records: Iterable[M] | None = None) -> None:
+        """Index ``records`` (default: the whole catalogue) from scratch."""
+        with self._rebuilding:
+            self._scan(self.catalogue if records is None else records)
+
+    def _scan(self, records: Iterable[M]) -> None:
+        key = self.catalogue.key
+        with self._lock:
+            self._pending = []
+        index = _Index()
+        try:
+            for record in records:
+                index.add(getattr(record, key), self._text(record))
+        finally:
+            with self._lock:
+                pending, self._pending = self._pending, None
+        with self._lock:
+            for written in pending:
+                if written is not None:
+                    self._reindex(index, written)
+            self._index = index
+            self._built = None not in pending  # a replaced snapshot needs another scan
+
+    def _stale(self) -> bool:
+        index = self._index
+        return not self._built or len(index.keys) > 2 * len(index.docs) + 1024
+
+    def _ensure(self) -> _Index:
+        if self._stale():
+            with self._rebuilding:  # a search arriving mid-rebuild waits for it
+                if self._stale():
+                    self._scan(self.catalogue)
+        return self._index
+
+    def _on_write(self, key: str | None) -> None:
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(key)
+            if key is None:
+                self._built = False
+            elif self._built:
+                self._reindex(self._index, key)
+
+    # -- queries -------------------------------------------------------------------------
+
+    def _expand(self, index: _Index, prefix: str) -> list[str]:
+        terms = index.terms
+        if terms is None:
+            with self._lock:  # writers keep the vocabulary sorted once it exists
+                if index.terms is None:
+                    index.terms = sorted(index.postings)
+                terms = index.terms
+        start = bisect.bisect_left(terms, prefix)
+        expansions = []
+        for term in terms[start : start + self.max_expansions]:
+            if not term.startswith(prefix):
+                break
+            expansions.append(term)
+        return expansions
+
+    def search(self, query: str, *, limit: int = 10, prefix: bool = True) -> list[SearchHit[M]]:
+        """Return the ``limit`` best records containing every term of ``query``.
+
+        With ``prefix``, the last term matches any indexed term that starts with it.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        index = self._ensure()
+        groups = [[term] for term in terms[:-1]]
+        groups.append(self._expand(index, terms[-1]) if prefix else [terms[-1]])
+        postings = [[index.postings[t] for t in group if t in index.postings] for group in groups]
+        if not all(postings):
+            return []
+        return [
+            SearchHit[self.catalogue.model](score=score, record=record)  # type: ignore[name-defined]
+            for score, key in self._score(index, postings, limit)
+            if (record := self.catalogue.get(key)) is not None
+        ]
+
+    def _score(
+        self, index: _Index, groups: list[list[_Postings]], limit: int
+    ) -> list[tuple[float, str]]:
+        live = len(index.docs)
+        k1, lengths = self.k1, index.lengths
+        # BM25 length normalisation: k1 * (1 - b + b * length / average length)
+        base = k1 * (1 - self.b)
+        scale = k1 * self.b / (index.total_length / live if live else 1.0)
+
+        def idf(postings: _Postings) -> float:
+            frequency = len(postings.ids)  # includes tombstones; close enough for ranking
+            return math.log(1 + (live - frequency + 0.5) / (frequency + 0.5))
+
+        # Term-at-a-time, rarest group first so that the candidates only ever shrink. A
+        # group's postings are scanned, unless the few candidates left are cheaper to look
+        # up by binary search. Postings appended during the scan are left for the next one.
+        scores: dict[int, float] | None = None
+        for group in sorted(groups, key=lambda g: sum(len(p.ids) for p in g)):
+            found: dict[int, float] = {}
+            for postings in group:
+                weight = idf(postings) * (k1 + 1)
+                size = len(postings.counts)
+                if scores is not None and 20 * len(scores) < size:
+                    matches: Iterable[tuple[int, int]] = (
+                        (doc, count) for doc in scores if (count := postings.count(doc))
+                    )
+                else:
+                    matches = zip(postings.ids[:size], postings.counts[:size], strict=True)
+                for doc, count in matches:
+                    if scores is None or doc in scores:
+                        part = weight * count / (count + base + scale * lengths[doc])
+                        found[doc] = found.get(doc, 0.0) + part
+            scores = found if scores is None else {d: s + scores[d] for d, s in found.items()}
+            if not scores:
+                return []
+        keys = index.keys
+        hits = (
+            (score, key) for doc, score in (scores or {}).items() if (key := keys[doc]) is not None
+        )
+        return heapq.nsmallest(limit, hits, key=lambda hit: (-hit[0], hit[1]))
+
+
+__all__ = ["SearchHit", "SearchIndex", "tokenize"]
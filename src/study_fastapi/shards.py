@@ -0,0 +1,307 @@
+"""Catalogues partitioned into shards by a field, with parallel fan-out queries.
+
+``ShardedCatalogue`` splits the records of a ``VersionedCatalogue`` by one field (buyers
+by ``country``). Each shard is owned by one worker, and a query runs only on the shards
+it names. A query for one country reads one shard. A query across countries (or all of
+them) is sent to every owner at once, and the owners' matches are merged in shard order.
+
+Owners are ``pool``-dependent:
+
+- ``inline``: every shard is scanned on the calling thread, one after another (baseline)
+- ``thread``: a thread pool; scans overlap only where the GIL is released (or on
+  free-threaded builds)
+- ``process``: one single-process executor per owner. The owner keeps its shards in its
+  own memory, so every core scans its share of the countries in parallel. This is the
+  layout the shards need to move to separate machines or serving workers later.
+
+Workers hold only the key and the filterable text fields of each record. Queries return
+keys, and the records are read back from the catalogue, so keys must be unique: building
+the shards from records that share a key raises ``ValueError``. Writes to the catalogue are
+forwarded to the owning shard. An owner is a single process that runs tasks in
+submission order, so a query always sees the writes made before it.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+import zlib
+from collections.abc import Iterable, Sequence
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Generic, Literal, TypeVar
+
+from pydantic import BaseModel
+
+from study_fastapi.changefeed import VersionedCatalogue
+from utils.logging_utils import get_logger
+
+log = get_logger(__name__)
+
+M = TypeVar("M", bound=BaseModel)
+
+ShardPool = Literal["inline", "thread", "process"]
+
+
+@dataclass(frozen=True)
+class ShardQuery:
+    """Match records whose fields start with the given (case-insensitive) prefixes."""
+
+    prefixes: tuple[tuple[str, str], ...] = ()
+    limit: int = 100
+
+    @classmethod
+    def where(cls, limit: int = 100, **prefixes: str | None) -> ShardQuery:
+        """Build a query from ``field=prefix`` keywords, ignoring ``None`` values."""
+        pairs = tuple((name, value.casefold()) for name, value in prefixes.items() if value)
+        return cls(pairs, limit)
+
+
+@dataclass
+class _Shard:
+    """One partition: filterable values of each record, in insertion order, by key."""
+
+    rows: dict[str, dict[str, str]] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def put(self, key: str, values: dict[str, str] | None) -> None:
+        with self.lock:
+            if values is None:
+                self.rows.pop(key, None)
+            else:
+                self.rows[key] = values
+
+    def scan(self, query: ShardQuery) -> list[str]:
+        matches: list[str] = []
+        prefixes, limit = query.prefixes, query.limit
+        with self.lock:
+            for key, values in self.rows.items():
+                for name, prefix in prefixes:
+                    if not values[name].startswith(prefix):
+                        break
+                else:
+                    matches.append(key)
+                    if len(matches) == limit:
+                        break
+        return matches
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {"rows": self.rows}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.rows = state["rows"]
+        self.lock = threading.Lock()
+
+
+# Shards owned by this process when it runs as a ``process`` owner.
+_owned: dict[str, _Shard] = {}
+
+
+def _load(shards: dict[str, _Shard]) -> None:
+    _owned.clear()
+    _owned.update(shards)
+
+
+def _put(name: str, key: str, values: dict[str, str] | None) -> None:
+    _owned.setdefault(name, _Shard()).put(key, values)
+
+
+def _scan(names: Sequence[str], query: ShardQuery) -> list[list[str]]:
+    return [_owned[name].scan(query) if name in _owned else [] for name in names]
+
+
+class ShardedCatalogue(Generic[M]):
+    """Records of ``catalogue`` partitioned by ``shard_key``, queried shard by shard.
+
+    Parameters
+    ----------
+    catalogue
+        Records to partition; shards follow its writes.
+    shard_key
+        Field whose value names a record's shard, e.g. ``"country"``.
+    pool
+        Where shards are scanned; see the module docstring.
+    max_workers
+        Number of owners (default: ``os.cpu_count()``).
+    """
+
+    def __init__(
+        self,
+        catalogue: VersionedCatalogue[M],
+        shard_key: str,
+        *,
+        pool: ShardPool = "thread",
+        max_workers: int | None = None,
+    ) -> None:
+        self.catalogue = catalogue
+        self.shard_key = shard_key
+        self.pool = pool
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.fields = [
+            name
+            for name, info in catalogue.model.model_fields.items()
+            if info.annotation is str and name != shard_key
+        ]
+        self._lock = threading.RLock()
+        self._built = False  # partitioned on the first query
+        self._local: dict[str, _Shard] = {}  # shards scanned in this process
+        self._shard_of: dict[str, str] = {}  # record key -> shard name
+        self._sizes: dict[str, int] = {}
+        self._owners: list[Executor] = []
+        catalogue.subscribe(self._on_write)
+
+    # -- partitioning --------------------------------------------------------------------
+
+    def _values(self, record: M) -> dict[str, str]:
+        return {name: getattr(record, name).casefold() for name in self.fields}
+
+    def _owner(self, shard: str) -> int:
+        return zlib.crc32(shard.encode()) % self.max_workers
+
+    def _start_owners(self) -> None:
+        if self.pool == "thread":
+            self._owners = [ThreadPoolExecutor(self.max_workers, "shard")]
+        elif self.pool == "process":
+            # Servers are multi-threaded, where fork() can deadlock the child.
+            context = multiprocessing.get_context("spawn")
+            self._owners = [
+                ProcessPoolExecutor(1, mp_context=context) for _ in range(self.max_workers)
+            ]
+
+    def _build(self) -> None:
+        with self._lock:
+            if self._built:
+                return
+            shards: dict[str, _Shard] = {}
+            self._shard_of.clear()
+            key = self.catalogue.key
+            for record in self.catalogue:
+                name = getattr(record, self.shard_key)
+                record_key = getattr(record, key)
+                if record_key in self._shard_of:
+                    raise ValueError(f"records share the {key} {record_key!r}")
+                shards.setdefault(name, _Shard()).rows[record_key] = self._values(record)
+                self._shard_of[record_key] = name
+            self._sizes = {name: len(shard.rows) for name, shard in shards.items()}
+            if not self._owners:
+                self._start_owners()
+            if self.pool == "process":
+                # Each owner keeps its shards; this process only remembers their sizes.
+                for index, owner in enumerate(self._owners):
+                    owned = {n: s for n, s in shards.items() if self._owner(n) == index}
+                    owner.submit(_load, owned).result()
+                self._local = {}
+            else:
+                self._local = shards
+            self._built = True
+            log.info("partitioned %d records into %d shards", len(self._shard_of), len(shards))
+
+    def _on_write(self, key: str | None) -> None:
+        with self._lock:
+            if key is None:
+                self._built = False
+                return
+            if not self._built:
+                return  # partitioned from the catalogue on the next query
+            record = self.catalogue.get(key)
+            old = self._shard_of.pop(key, None)
+            new = None if record is None else getattr(record, self.shard_key)
+            if old is not None and old != new:
+                self._send(old, key, None)
+                self._sizes[old] -= 1
+            if record is not None and new is not None:
+                self._send(new, key, self._values(record))
+                self._shard_of[key] = new
+                if old != new:
+                    self._sizes[new] = self._sizes.get(new, 0) + 1
+
+    def _send(self, shard: str, key: str, values: dict[str, str] | None) -> None:
+        if self.pool == "process":
+            future = self._owners[self._owner(shard)].submit(_put, shard, key, values)
+            future.add_done_callback(_log_failure)
+        else:
+            self._local.setdefault(shard, _Shard()).put(key, values)
+
+    # -- queries -------------------------------------------------------------------------
+
+    def sizes(self) -> dict[str, int]:
+        """Return the number of records per shard, by shard name."""
+        self._build()
+        with self._lock:
+            return {name: size for name, size in sorted(self._sizes.items()) if size}
+
+    def keys(self, shards: Iterable[str] | None, query: ShardQuery) -> list[str]:
+        """Return the keys matching ``query`` in ``shards`` (default: all), in shard order.
+
+        Raises ``ValueError`` if ``query`` filters on a field that is not a string field of
+        the model (or is the shard key, which selects shards instead).
+        """
+        unknown = [name for name, _ in query.prefixes if name not in self.fields]
+        if unknown:
+            raise ValueError(
+                f"cannot filter {self.catalogue.model.__name__} by {', '.join(unknown)};"
+                f" prefix fields are {', '.join(self.fields)}"
+            )
+        self._build()
+        with self._lock:  # writes add shards and rebuilds replace them
+            names = sorted(self._sizes if shards is None else set(shards) & self._sizes.keys())
+            local = {name: self._local[name] for name in names if name in self._local}
+        if self.pool == "process":
+            results = self._fan_out(names, query)
+        elif len(names) == 1 or self.pool == "inline":
+            results = [local[name].scan(query) for name in names]
+        else:
+            results = list(self._owners[0].map(lambda name: local[name].scan(query), names))
+        keys: list[str] = []
+        for matches in results:
+            keys.extend(matches[: query.limit - len(keys)])
+            if len(keys) == query.limit:
+                break
+        return keys
+
+    def _fan_out(self, names: list[str], query: ShardQuery) -> list[list[str]]:
+        by_owner: dict[int, list[str]] = {}
+        for name in names:
+            by_owner.setdefault(self._owner(name), []).append(name)
+        futures: dict[int, Future[list[list[str]]]] = {
+            index: self._owners[index].submit(_scan, owned, query)
+            for index, owned in by_owner.items()
+        }
+        found = {
+            name: matches
+            for index, owned in by_owner.items()
+            for name, matches in zip(owned, futures[index].result(), strict=True)
+        }
+        return [found[name] for name in names]
+
+    def query(
+        self,
+        shards: Iterable[str] | None = None,
+        *,
+        limit: int = 100,
+        **prefixes: str | None,
+    ) -> list[M]:
+        """Return up to ``limit`` records in ``shards`` whose fields start with ``prefixes``.
+
+        For example ``query(["IN", "US"], zipcode="56")``; prefixes ignore case.
+        """
+        query = ShardQuery.where(limit, **prefixes)
+        records = (self.catalogue.get(key) for key in self.keys(shards, query))
+        return [record for record in records if record is not None]
+
+    def close(self) -> None:
+        """Shut the owners down; they are started again by the next query."""
+        with self._lock:
+            for owner in self._owners:
+                owner.shutdown()
+            self._owners = []
+            self._built = False
+
+
+def _log_failure(future: Future[Any]) -> None:
+    if future.exception() is not None:
+        log.error("shard write failed: %r", future.exception())
+
+
+__all__ = ["ShardPool", "ShardQuery", "ShardedCatalogue"]
@@ -0,0 +1,174 @@
+"""Route warm-up: exercise every route once before the server takes traffic.
+
+The first request to a route pays one-off costs that later requests don't:
+
+- Starlette builds the middleware stack
+- FastAPI classifies endpoint and dependency callables (sync/async/generator)
+- anyio starts the threadpool worker used by sync endpoints
+- pydantic's lazily initialised serialisers and the dependency graph (``Depends``) are
+  exercised for the first time
+
+``warm_routes`` sends one in-process request per route through the full ASGI app, with
+synthetic values for the required path, query, header and cookie parameters. Nothing
+touches the network. ``create_app`` runs it at startup (see ``AppConfig.warm_routes``).
+
+Only requests that cannot have side effects are sent:
+
+- ``GET`` routes are called normally, so the endpoint runs.
+- Other methods are warmed only when they require a body that rejects ``null``. They are
+  sent ``null``, which fails validation, so the endpoint itself never runs. Bodies that
+  accept ``null`` (``Any``, ``X | None``) are not warmed: the endpoint would run.
+- Routes listed in ``skip`` are left out. Apps list their streaming endpoints there (an
+  SSE route would never finish) and GET routes too expensive to run at startup, e.g. full
+  scans of a large catalogue. The per-request timeout abandons a slow route but cannot
+  stop a sync endpoint already running in the threadpool.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import enum
+import time
+import typing
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+from fastapi import FastAPI
+from fastapi.dependencies.models import Dependant
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter, ValidationError
+from pydantic.errors import PydanticSchemaGenerationError
+
+from utils.logging_utils import get_logger
+
+log = get_logger(__name__)
+
+_SAMPLES: dict[Any, str] = {int: "1", float: "1.0", bool: "true", str: "warmup"}
+
+
+@dataclass(frozen=True)
+class WarmedRoute:
+    """Outcome of warming one route."""
+
+    method: str
+    path: str
+    status: int | None
+    ms: float
+
+
+@dataclass
+class WarmupReport:
+    """Per-route results and total duration of ``warm_routes``."""
+
+    routes: list[WarmedRoute] = field(default_factory=list)
+    total_ms: float = 0.0
+
+
+def _sample(annotation: Any) -> str:
+    """Return a string that plausibly validates as ``annotation``."""
+    for candidate in (annotation, *typing.get_args(annotation)):
+        if isinstance(candidate, type) and issubclass(candidate, enum.Enum):
+            return str(next(iter(candidate)).value)
+        if candidate in _SAMPLES:
+            return _SAMPLES[candidate]
+    return "1"
+
+
+def _accepts_null(annotation: Any) -> bool:
+    try:
+        TypeAdapter(annotation).validate_python(None)
+    except (ValidationError, PydanticSchemaGenerationError):
+        return False
+    return True
+
+
+def _dependants(dependant: Dependant) -> Iterator[Dependant]:
+    yield dependant
+    for sub in dependant.dependencies:
+        yield from _dependants(sub)
+
+
+def synthetic_request(route: APIRoute) -> dict[str, Any] | None:
+    """Build ``httpx`` request arguments for ``route``, or ``None`` if it isn't warmed."""
+    methods = route.methods or {"GET"}
+    path_values: dict[str, str] = {}
+    request: dict[str, Any] = {"params": {}, "headers": {}, "cookies": {}}
+    has_required_body = False
+    accepts_null = False
+    for dependant in _dependants(route.dependant):
+        for param in dependant.path_params:
+            path_values[param.alias] = _sample(param.field_info.annotation)
+        for params, key in (
+            (dependant.query_params, "params"),
+            (dependant.header_params, "headers"),
+            (dependant.cookie_params, "cookies"),
+        ):
+            for param in params:
+                if param.field_info.is_required():
+                    request[key][param.alias] = _sample(param.field_info.annotation)
+        for param in dependant.body_params:
+            if param.field_info.is_required():
+                has_required_body = True
+                accepts_null |= _accepts_null(param.field_info.annotation)
+    if "GET" in methods:
+        request["method"] = "GET"
+    elif has_required_body and not accepts_null:
+        request["method"] = sorted(methods)[0]
+        request["content"] = b"null"
+        request["headers"]["content-type"] = "application/json"
+    else:
+        return None
+    if cookies := request.pop("cookies"):
+        # httpx deprecates per-request cookies; send them as a plain header instead.
+        request["headers"]["cookie"] = "; ".join(f"{k}={v}" for k, v in cookies.items())
+    request["url"] = route.path_format.format(**path_values)
+    return request
+
+
+async def warm_routes(
+    app: FastAPI, *, skip: Iterable[str] = (), timeout: float = 2.0
+) -> WarmupReport:
+    """Send one synthetic request per route of ``app`` and report how long each took.
+
+    Parameters
+    ----------
+    app
+        The app to warm; requests go through its full middleware stack.
+    skip
+        Route paths (templates, e.g. ``"/sse/hi"``) to leave out.
+    timeout
+        Seconds allowed per request; slower routes are abandoned and reported with
+        ``status=None``. Routes that raise are logged and reported the same way.
+    """
+    skipped = set(skip)
+    report = WarmupReport()
+    started = time.perf_counter()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://warmup") as client:
+        for route in app.routes:
+            if not isinstance(route, APIRoute) or route.path in skipped:
+                continue
+            request = synthetic_request(route)
+            if request is None:
+                continue
+            start = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(client.request(**request), timeout)
+                status: int | None = response.status_code
+            except TimeoutError:
+                status = None
+            except Exception:
+                # ASGITransport re-raises the app's exceptions; one failing route must not
+                # stop the server from starting.
+                log.exception("warm-up request %s %s failed", request["method"], route.path)
+                status = None
+            elapsed = (time.perf_counter() - start) * 1e3
+            report.routes.append(WarmedRoute(request["method"], route.path, status, elapsed))
+    report.total_ms = (time.perf_counter() - started) * 1e3
+    log.info("warmed %d routes in %.1fms", len(report.routes), report.total_ms)
+    return report
+
+
+__all__ = ["WarmedRoute", "WarmupReport", "synthetic_request", "warm_routes"]
@@ -0,0 +1,110 @@
+"""Serve an ASGI app with uvicorn in a subprocess on an ephemeral port.
+
+Shared by the live-server tests (``tests/conftest.py``) and the benchmarks that need a
+real socket (``benchmarks/_common.py``). ``--port 0`` lets the OS pick a free port while
+uvicorn binds it, so concurrent servers (xdist workers, parallel benchmark runs) never
+race for a port. The port is read from uvicorn's "Uvicorn running on ..." line, which it
+logs once the socket is listening and the app's startup has completed.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import subprocess
+import sys
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1]
+
+_RUNNING = re.compile(r"Uvicorn running on (http://\S+)")
+
+
+@dataclass
+class LiveServer:
+    """A uvicorn subprocess serving ``app_path`` (``"module:attribute"``).
+
+    Parameters
+    ----------
+    app_path
+        Import path of the ASGI app, e.g. ``"study_fastapi.hello_fastapi:app"``.
+    args
+        Extra uvicorn command-line arguments, e.g. ``("--backlog", "4096")``.
+    env
+        Environment variables added for the server process.
+    """
+
+    app_path: str
+    args: tuple[str, ...] = ()
+    env: dict[str, str] | None = None
+    url: str = ""
+    proc: subprocess.Popen[str] | None = None
+    output: list[str] = field(default_factory=list)
+    ready: threading.Event = field(default_factory=threading.Event)
+
+    def start(self, timeout: float = 10.0) -> LiveServer:
+        """Start the server and block until uvicorn reports it is accepting requests.
+
+        A thread keeps draining uvicorn's output, so a chatty server never blocks on a
+        full pipe, and sets ``ready`` on the startup line: no polling. Raises
+        ``RuntimeError`` with the server's output if it exits or times out first.
+        """
+        self.proc = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                self.app_path,
+                "--host",
+                "127.0.0.1",
+                "--port",
+                "0",
+                "--no-access-log",
+                *self.args,
+            ],
+            env={**os.environ, **(self.env or {}), "PYTHONPATH": str(SRC)},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        threading.Thread(target=self._read_output, daemon=True).start()
+        if not self.ready.wait(timeout) or not self.url:
+            self.stop()
+            output = "".join(self.output)
+            raise RuntimeError(f"{self.app_path} did not start in {timeout}s:\n{output}")
+        return self
+
+    def _read_output(self) -> None:
+        assert self.proc is not None and self.proc.stderr is not None
+        for line in self.proc.stderr:
+            self.output.append(line)
+            running = _RUNNING.search(line)
+            if running and not self.ready.is_set():
+                self.url = running.group(1)
+                self.ready.set()
+        self.ready.set()  # exited: wake the waiter, which sees no url
+
+    @property
+    def pid(self) -> int:
+        """Process id of the server."""
+        assert self.proc is not None, "server not started"
+        return self.proc.pid
+
+    def rss_bytes(self) -> int:
+        """Return the server's resident set size (Linux only)."""
+        with open(f"/proc/{self.pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+        raise RuntimeError("VmRSS not reported")
+
+    def stop(self) -> None:
+        """Terminate the server and wait for it to exit."""
+        if self.proc is not None and self.proc.poll() is None:
+            self.proc.terminate()
+            self.proc.wait(timeout=10)
+
+
+__all__ = ["LiveServer"]
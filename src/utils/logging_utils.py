@@ -3,13 +3,42 @@
 This module provides a single entrypoint, ``get_logger``, which returns a configured
 ``logging.Logger`` with a robust formatter:
 
-- Plain format: ``YYYY-MM-DDTHH:MM:SS.mmmZ | LEVEL | name:lineno - message``
+- Plain format: ``YYYY-MM-DDTHH:MM:SS.mmmZ | LEVEL | name:lineno - message``, followed by
+  ``[request_id route +elapsed_ms]`` inside a request
 - JSON format: ``{"time": ..., "level": ..., "logger": ..., "line": ..., "message": ...}``
 
 Configuration (environment variables):
 - ``LOG_LEVEL``: DEBUG, INFO, WARNING, ERROR, CRITICAL (default: INFO)
 - ``LOG_FORMAT``: ``plain`` (default) or ``json``
-- ``LOG_COLOR``: ``1`` to enable ANSI color in plain mode (default: off)
+- ``LOG_COLOR``: ``1`` to enable ANSI color in plain mode on a terminal; never applied to
+  ``LOG_FILE`` (default: off)
+- ``LOG_FILE``: write to this file through a background thread instead of stdout
+- ``LOG_FILE_MAX_BYTES``: rotate the file at this size (default: 50 MiB, ``0`` disables)
+- ``LOG_FILE_ROTATE_SECONDS``: rotate the file at this age (default: ``0``, disabled)
+- ``LOG_FILE_BACKUPS``: rotated files kept (default: 5)
+- ``LOG_FILE_COMPRESS``: ``0`` to keep rotated files uncompressed (default: gzip)
+- ``LOG_SAMPLE_RATE``: fraction of records kept per message template (default: 1)
+- ``LOG_RATE_LIMIT``: records per second allowed per message template (default: unlimited)
+- ``LOG_SUMMARY_INTERVAL``: seconds between "suppressed N records" lines (default: 60)
+- ``LOG_FILTER_MAX_LEVEL``: highest level sampled or rate limited (default: INFO), so
+  warnings and errors are always kept
+
+Sampling and rate limiting run on the logger, after the level check and before any handler
+formats the record, so dropped records never have their arguments interpolated. Hot paths
+should still use ``%``-style arguments rather than f-strings for the same reason.
+
+Filters:
+- ``ThrottleFilter``: pass at most one record per message template every N seconds
+- ``SamplingFilter``: keep a fraction of records per logger or message template
+- ``RateLimitFilter``: token-bucket limit per message template
+- ``RequestContextFilter``: stamp ``request_id``, ``route`` and ``elapsed_ms`` from the
+  current ``RequestContext`` onto each record; installed on every ``get_logger`` handler
+
+Request context:
+``bind_request_context`` stores a ``RequestContext`` in a ``ContextVar``, so it follows the
+request across ``await``s and into ``run_in_threadpool`` calls without being passed around.
+Web apps set it from middleware (see ``study_fastapi.middleware``); scripts and workers can
+use ``request_context`` as a context manager.
 
 Notes
 -----
@@ -19,17 +48,31 @@ duplicating handlers.
 
 from __future__ import annotations
 
+import abc
+import atexit
+import gzip
 import json
 import logging
 import os
+import queue
+import re
+import shutil
 import sys
-from typing import Any, Dict
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Callable, Dict, Iterator, Mapping
 
 ISO_FMT = "%Y-%m-%dT%H:%M:%S.%fZ"
 
 
-def _level_from_env(default: str = "INFO") -> int:
-    level_name = os.getenv("LOG_LEVEL", default).upper()
+def _level_from_env(default: str = "INFO", variable: str = "LOG_LEVEL") -> int:
+    level_name = os.getenv(variable, default).upper()
     return getattr(logging, level_name, logging.INFO)
 
 
@@ -71,6 +114,15 @@ class PlainFormatter(logging.Formatter):
                     record.levelname = level  # restore
         return super().format(record)
 
+    def formatMessage(self, record: logging.LogRecord) -> str:  # noqa: D401, N802
+        """Append ``[request_id route +elapsed]`` when the record carries request context."""
+        line = super().formatMessage(record)
+        request_id = getattr(record, "request_id", None)
+        if request_id is not None:
+            route, elapsed_ms = getattr(record, "route", ""), getattr(record, "elapsed_ms", 0)
+            line += f" [{request_id} {route} +{elapsed_ms}ms]"
+        return line
+
 
 class JsonFormatter(logging.Formatter):
     """Minimal JSON formatter for structured logging."""
@@ -119,8 +171,585 @@ class JsonFormatter(logging.Formatter):
         return json.dumps(data, separators=(",", ":"))
 
 
+# Message templates tracked per filter. Records with further templates (typically
+# f-strings, which make every message unique) share one key per logger.
+_MAX_KEYS = 1024
+_OTHER_MESSAGES = "<other messages>"
+
+
+class ThrottleFilter(logging.Filter):
+    """Pass at most one record per ``(logger, message template)`` every ``interval`` seconds.
+
+    Dropped records are counted; the next record let through for the same template carries
+    the count as a ``suppressed`` attribute (emitted as a field by ``JsonFormatter``). State
+    is kept for at most ``max_keys`` keys; further templates share one
+    ``"<other messages>"`` key per logger. The filter is thread-safe.
+    """
+
+    def __init__(
+        self,
+        interval: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+        *,
+        max_keys: int = _MAX_KEYS,
+    ):
+        super().__init__()
+        self.interval = interval
+        self.max_keys = max_keys
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._last: Dict[tuple[str, Any], float] = {}
+        self._suppressed: Dict[tuple[str, Any], int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:  # noqa: D401
+        """Return ``False`` for records inside the throttle window of their template."""
+        msg = record.msg if isinstance(record.msg, str) else type(record.msg).__name__
+        key = (record.name, msg)
+        with self._lock:
+            if key not in self._last and len(self._last) >= self.max_keys:
+                key = (record.name, _OTHER_MESSAGES)
+            now = self._clock()
+            last = self._last.get(key)
+            if last is not None and now - last < self.interval:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+            self._last[key] = now
+            suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class _SummarizingFilter(logging.Filter, abc.ABC):
+    """Base for logger filters that drop records and periodically report how many.
+
+    ``summary_interval`` seconds after a logger's first dropped record, one summary record
+    is emitted straight to the logger's handlers (bypassing logger filters), e.g.
+    ``suppressed 1234 log records in the last 60s; top: 'cache miss %s' x1200``. The next
+    record on that logger emits it, or a background timer if the logger has gone quiet.
+    Install subclasses on loggers (``logger.addFilter``) rather than handlers: they key on
+    the unformatted ``record.msg`` and run before any handler formats the record.
+
+    Only records up to ``max_level`` (default ``INFO``) can be dropped; warnings and
+    errors always pass. State is kept for at most ``max_keys`` ``(logger, template)`` keys;
+    records with further templates share one ``"<other messages>"`` key per logger. Filters
+    are thread-safe: sync endpoints log from threadpool threads.
+    """
+
+    def __init__(
+        self,
+        summary_interval: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        *,
+        max_keys: int = _MAX_KEYS,
+        max_level: int = logging.INFO,
+    ) -> None:
+        super().__init__()
+        self.summary_interval = summary_interval
+        self.max_keys = max_keys
+        self.max_level = max_level
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._keys: set[tuple[str, Any]] = set()
+        self._dropped: Dict[tuple[str, Any], int] = {}
+        # Logger name -> time of its first dropped record not yet summarised.
+        self._windows: Dict[str, float] = {}
+        self._timer: threading.Timer | None = None
+
+    @abc.abstractmethod
+    def _allow(self, key: tuple[str, Any], record: logging.LogRecord) -> bool:
+        """Return whether ``record`` passes; called with the lock held."""
+
+    def _key(self, record: logging.LogRecord) -> tuple[str, Any]:
+        msg = record.msg if isinstance(record.msg, str) else type(record.msg).__name__
+        key = (record.name, msg)
+        if key not in self._keys:
+            if len(self._keys) >= self.max_keys:
+                return record.name, _OTHER_MESSAGES
+            self._keys.add(key)
+        return key
+
+    def filter(self, record: logging.LogRecord) -> bool:  # noqa: D401
+        """Return whether ``record`` passes; emit a summary when one is due."""
+        if record.levelno > self.max_level:
+            return True
+        with self._lock:
+            key = self._key(record)
+            allowed = self._allow(key, record)
+            now = self._clock()
+            if not allowed:
+                self._dropped[key] = self._dropped.get(key, 0) + 1
+                if record.name not in self._windows:
+                    self._windows[record.name] = now
+                    self._schedule(self.summary_interval)
+            start = self._windows.get(record.name)
+            due = start is not None and now - start >= self.summary_interval
+        if due:
+            self.flush_summary(logging.getLogger(record.name))
+        return allowed
+
+    def _schedule(self, delay: float) -> None:
+        # Called with the lock held.
+        if self._timer is None:
+            self._timer = threading.Timer(delay, self._flush_due)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_due(self) -> None:
+        """Timer callback: emit the summaries of loggers that went quiet."""
+        with self._lock:
+            self._timer = None
+            now = self._clock()
+            due = [n for n, start in self._windows.items() if now - start >= self.summary_interval]
+            pending = [start for n, start in self._windows.items() if n not in due]
+            if pending:
+                self._schedule(max(min(pending) + self.summary_interval - now, 0.01))
+        for name in due:
+            self.flush_summary(logging.getLogger(name))
+
+    def flush_summary(self, logger: logging.Logger) -> None:
+        """Emit the pending summary for ``logger`` now (e.g. at shutdown) and reset counts."""
+        with self._lock:
+            now = self._clock()
+            start = self._windows.pop(logger.name, now)
+            dropped = {key: n for key, n in self._dropped.items() if key[0] == logger.name}
+            for key in dropped:
+                del self._dropped[key]
+        if not dropped:
+            return
+        top = sorted(dropped.items(), key=lambda item: item[1], reverse=True)[:3]
+        summary = logger.makeRecord(
+            logger.name,
+            logging.INFO,
+            __file__,
+            0,
+            "suppressed %d log records in the last %.0fs; top: %s",
+            (
+                sum(dropped.values()),
+                now - start,
+                ", ".join(f"{str(msg)!r} x{n}" for (_, msg), n in top),
+            ),
+            None,
+        )
+        summary.suppressed = sum(dropped.values())
+        logger.callHandlers(summary)
+
+
+class SamplingFilter(_SummarizingFilter):
+    """Keep a fixed fraction of records, per logger or per message template.
+
+    Sampling is deterministic: a rate of ``0.1`` keeps exactly one record in ten for each
+    ``(logger, template)`` key, with no random number drawn per record.
+
+    Parameters
+    ----------
+    rate
+        Default fraction of records kept (0.0-1.0).
+    rates
+        Overrides keyed by message template (``record.msg``) or logger name. A logger name
+        also covers its children: ``"study_fastapi"`` applies to ``"study_fastapi.jobs"``.
+        Template keys win over logger keys.
+    max_keys
+        Templates sampled separately; the rest are sampled together per logger.
+    max_level
+        Highest level sampled; records above it always pass.
+    """
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        rates: Mapping[str, float] | None = None,
+        *,
+        summary_interval: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        max_keys: int = _MAX_KEYS,
+        max_level: int = logging.INFO,
+    ) -> None:
+        super().__init__(summary_interval, clock, max_keys=max_keys, max_level=max_level)
+        self.rate = rate
+        self.rates = dict(rates or {})
+        self._credit: Dict[tuple[str, Any], float] = {}
+        self._resolved: Dict[tuple[str, Any], float] = {}
+
+    def rate_for(self, name: str, msg: Any) -> float:
+        """Return the sampling rate applied to records of template ``msg`` on ``name``."""
+        if isinstance(msg, str) and msg in self.rates:
+            return self.rates[msg]
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return self.rate
+
+    def _allow(self, key: tuple[str, Any], record: logging.LogRecord) -> bool:
+        rate = self._resolved.get(key)
+        if rate is None:
+            rate = self._resolved[key] = self.rate_for(*key)
+        if rate >= 1.0:
+            return True
+        if rate <= 0.0:
+            return False
+        # The first record of a key always passes, then one in every 1/rate.
+        credit = self._credit.get(key, 1.0 - rate) + rate
+        if credit >= 1.0 - 1e-9:  # tolerate float drift, e.g. ten additions of 0.1
+            self._credit[key] = credit - 1.0
+            return True
+        self._credit[key] = credit
+        return False
+
+
+class RateLimitFilter(_SummarizingFilter):
+    """Token-bucket rate limit per ``(logger, message template)``.
+
+    Each template may burst up to ``burst`` records and then emit ``per_second`` records per
+    second on average; the rest are dropped and counted in the summary line. Templates
+    beyond ``max_keys`` share one bucket per logger. Records above ``max_level`` (default
+    ``INFO``) are never limited.
+    """
+
+    def __init__(
+        self,
+        per_second: float,
+        burst: float | None = None,
+        *,
+        summary_interval: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        max_keys: int = _MAX_KEYS,
+        max_level: int = logging.INFO,
+    ) -> None:
+        super().__init__(summary_interval, clock, max_keys=max_keys, max_level=max_level)
+        self.per_second = per_second
+        self.burst = max(burst if burst is not None else per_second, 1.0)
+        self._buckets: Dict[tuple[str, Any], list[float]] = {}
+
+    def _allow(self, key: tuple[str, Any], record: logging.LogRecord) -> bool:
+        now = self._clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.burst, now]
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.per_second)
+            bucket[1] = now
+        if bucket[0] >= 1.0:
+            bucket[0] -= 1.0
+            return True
+        return False
+
+
+class RequestContext:
+    """Per-request logging context: a request id, the route and the start time.
+
+    ``route`` is a property so subclasses can resolve it lazily, e.g. from an ASGI scope
+    that only learns the matched route template after routing.
+    """
+
+    __slots__ = ("request_id", "start", "_route")
+
+    def __init__(self, request_id: str | None = None, route: str = "") -> None:
+        self.request_id = request_id or uuid.uuid4().hex
+        self.start = time.perf_counter()
+        self._route = route
+
+    @property
+    def route(self) -> str:
+        """Route (template) being served."""
+        return self._route
+
+    @property
+    def elapsed_ms(self) -> float:
+        """Milliseconds since the context was created."""
+        return (time.perf_counter() - self.start) * 1e3
+
+
+_request_context: ContextVar[RequestContext | None] = ContextVar("request_context", default=None)
+
+
+def get_request_context() -> RequestContext | None:
+    """Return the ``RequestContext`` bound in the current context, if any."""
+    return _request_context.get()
+
+
+def bind_request_context(context: RequestContext) -> Token[RequestContext | None]:
+    """Bind ``context`` for the current task; pass the token to ``reset_request_context``."""
+    return _request_context.set(context)
+
+
+def reset_request_context(token: Token[RequestContext | None]) -> None:
+    """Restore the context that was bound before ``bind_request_context``."""
+    _request_context.reset(token)
+
+
+@contextmanager
+def request_context(request_id: str | None = None, route: str = "") -> Iterator[RequestContext]:
+    """Bind a fresh ``RequestContext`` for the duration of the ``with`` block."""
+    context = RequestContext(request_id, route)
+    token = _request_context.set(context)
+    try:
+        yield context
+    finally:
+        _request_context.reset(token)
+
+
+class RequestContextFilter(logging.Filter):
+    """Copy the current ``RequestContext`` onto each record as ``extra``-style fields.
+
+    Costs one ``ContextVar.get`` per emitted record and nothing per logging call, unlike a
+    ``LoggerAdapter`` built per request. Installed on handlers, it runs only for records
+    that already passed the level check. Records outside a request are left untouched.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:  # noqa: D401
+        """Attach ``request_id``, ``route`` and ``elapsed_ms``; never drops records."""
+        context = _request_context.get()
+        if context is not None:
+            record.request_id = context.request_id
+            record.route = context.route
+            record.elapsed_ms = round(context.elapsed_ms, 3)
+        return True
+
+
+_REQUEST_CONTEXT_FILTER = RequestContextFilter()
+
+
+class CompressingRotatingFileHandler(logging.Handler):
+    """Buffered file handler rotating on size and age and gzipping rotated files.
+
+    Records are written into a ``buffer_size`` userspace buffer and flushed only when it
+    fills, on ``flush()`` (called by the ``file_sink`` listener whenever its queue drains) and
+    on close, instead of once per record as ``FileHandler`` does. A file is rotated when the
+    next record would take it past ``max_bytes`` or once it is ``rotate_seconds`` old (a file
+    left by a previous run is as old as its last modification). It is renamed to
+    ``<path>.<YYYYmmdd-HHMMSS>[.N]`` and then gzipped by a background thread. Only the newest
+    ``backup_count`` rotated files are kept; other files next to the log are never touched.
+
+    Parameters
+    ----------
+    path
+        Log file path; parent directories are created.
+    max_bytes
+        Size threshold for rotation; ``0`` disables size-based rotation.
+    rotate_seconds
+        Age threshold for rotation; ``0`` disables time-based rotation.
+    backup_count
+        Rotated files to keep (compressed or not).
+    compress
+        Gzip rotated files in a background thread.
+    buffer_size
+        Write buffer size in bytes.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        *,
+        max_bytes: int = 50 * 1024 * 1024,
+        rotate_seconds: float = 0,
+        backup_count: int = 5,
+        compress: bool = True,
+        buffer_size: int = 256 * 1024,
+    ) -> None:
+        super().__init__()
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backup_count = backup_count
+        self.compress = compress
+        self.buffer_size = buffer_size
+        self._compressor = ThreadPoolExecutor(1, "log-compress") if compress else None
+        self._rotated = re.compile(
+            re.escape(os.path.basename(self.path)) + r"\.\d{8}-\d{6}(\.\d+)?(\.gz)?"
+        )
+        self._open()
+
+    def _open(self) -> None:
+        self._stream = open(self.path, "ab", buffering=self.buffer_size)
+        self._size = self._stream.tell()
+        # After a restart the existing file keeps aging from its last write.
+        self._opened_at = os.fstat(self._stream.fileno()).st_mtime if self._size else time.time()
+
+    def emit(self, record: logging.LogRecord) -> None:  # noqa: D401
+        """Append the formatted record, rotating first if it is due."""
+        try:
+            data = (self.format(record) + "\n").encode("utf-8")
+            if self._should_rotate(len(data)):
+                self.rotate()
+            self._stream.write(data)
+            self._size += len(data)
+        except Exception:
+            self.handleError(record)
+
+    def _should_rotate(self, incoming: int) -> bool:
+        if self.max_bytes and self._size and self._size + incoming > self.max_bytes:
+            return True
+        return bool(self.rotate_seconds) and time.time() - self._opened_at >= self.rotate_seconds
+
+    def rotate(self) -> None:
+        """Close the current file, rename it with a timestamp and start a new one."""
+        self._stream.close()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+        target, n = f"{self.path}.{stamp}", 1
+        while os.path.exists(target) or os.path.exists(target + ".gz"):
+            target, n = f"{self.path}.{stamp}.{n}", n + 1
+        os.replace(self.path, target)
+        self._open()
+        if self._compressor is not None:
+            job = self._compressor.submit(self._compress_and_prune, target)
+            job.add_done_callback(lambda job: self._report_compress_error(target, job))
+        else:
+            self._prune()
+
+    def _report_compress_error(self, target: str, job: Future[None]) -> None:
+        # Like ``handleError``: a handler cannot safely log its own failure.
+        if job.cancelled() or (exc := job.exception()) is None:
+            return
+        if logging.raiseExceptions and sys.stderr:
+            sys.stderr.write(f"--- Logging error ---\nCould not compress or prune {target}\n")
+            traceback.print_exception(exc, file=sys.stderr)
+
+    def _compress_and_prune(self, target: str) -> None:
+        with open(target, "rb") as src, gzip.open(target + ".gz", "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.remove(target)
+        self._prune()
+
+    def rotated_files(self) -> list[str]:
+        """Return rotated files for this log, oldest first."""
+        directory, base = os.path.split(self.path)
+        names = [name for name in os.listdir(directory) if self._rotated.fullmatch(name)]
+        paths = [os.path.join(directory, name) for name in names]
+        return sorted(paths, key=lambda path: (os.path.getmtime(path), path))
+
+    def _prune(self) -> None:
+        rotated = self.rotated_files()
+        for path in rotated[: max(len(rotated) - self.backup_count, 0)]:
+            os.remove(path)
+
+    def flush(self) -> None:  # noqa: D401
+        """Flush the write buffer to the OS."""
+        with self.lock:  # type: ignore[union-attr]
+            if not self._stream.closed:
+                self._stream.flush()
+
+    def close(self) -> None:  # noqa: D401
+        """Flush and close the file and wait for pending compressions."""
+        with self.lock:  # type: ignore[union-attr]
+            self._stream.close()
+        if self._compressor is not None:
+            self._compressor.shutdown(wait=True)
+        super().close()
+
+
+class _DrainFlushingListener(QueueListener):
+    """``QueueListener`` that flushes its handlers whenever the queue runs empty.
+
+    Writes are batched while records keep arriving, and nothing stays buffered once the
+    application goes quiet.
+    """
+
+    def dequeue(self, block: bool) -> logging.LogRecord:  # noqa: D401
+        """Flush the handlers before blocking on an empty queue."""
+        if block and self.queue.empty():  # type: ignore[attr-defined]
+            for handler in self.handlers:
+                handler.flush()
+        return super().dequeue(block)
+
+
+class _SinkQueueHandler(QueueHandler):
+    """``QueueHandler`` with a cheaper ``prepare`` for records without tracebacks.
+
+    The stdlib ``prepare`` runs a ``Formatter`` and ``copy.copy`` in the calling thread,
+    which costs about as much as writing the record. Here the message is interpolated (args
+    may be mutated once the call returns) and the record's ``__dict__`` is cloned directly.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:  # noqa: D401
+        """Return a queue-safe copy of ``record`` with its message interpolated."""
+        if record.exc_info or record.stack_info:
+            return super().prepare(record)
+        clone = logging.LogRecord.__new__(logging.LogRecord)
+        clone.__dict__.update(record.__dict__)
+        clone.msg = clone.message = record.getMessage()
+        clone.args = None
+        return clone
+
+
+_file_sinks: Dict[str, tuple[QueueHandler, QueueListener]] = {}
+
+
+def file_sink(
+    path: str | os.PathLike[str], formatter: logging.Formatter, **options: Any
+) -> QueueHandler:
+    """Return a ``QueueHandler`` writing to ``path`` through a background thread.
+
+    The calling thread only interpolates the message and enqueues the record. Formatting,
+    file writes, rotation and compression run on a ``QueueListener`` thread. One sink (queue,
+    thread and file) is shared per path; ``options`` go to ``CompressingRotatingFileHandler``
+    when the sink is created. Sinks are stopped and flushed at interpreter exit, or
+    explicitly with ``close_file_sinks``.
+    """
+    key = os.path.abspath(path)
+    if key not in _file_sinks:
+        handler = CompressingRotatingFileHandler(key, **options)
+        handler.setFormatter(formatter)
+        records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        listener = _DrainFlushingListener(records, handler)
+        listener.start()
+        sink = _SinkQueueHandler(records)
+        if not _file_sinks:
+            atexit.register(close_file_sinks)
+        _file_sinks[key] = (sink, listener)
+    return _file_sinks[key][0]
+
+
+def close_file_sinks() -> None:
+    """Drain, flush and close every sink created by ``file_sink``."""
+    while _file_sinks:
+        _, (_, listener) = _file_sinks.popitem()
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+def _handler_from_env() -> logging.Handler:
+    path = os.getenv("LOG_FILE")
+    formatter: logging.Formatter
+    if _use_json():
+        formatter = JsonFormatter()
+    else:
+        # LOG_COLOR is for terminals: ANSI codes would end up in the (rotated) log files.
+        formatter = PlainFormatter(color=_use_color() and not path)
+    if not path:
+        handler: logging.Handler = logging.StreamHandler(stream=sys.stdout)
+        handler.setFormatter(formatter)
+        return handler
+    return file_sink(
+        path,
+        formatter,
+        max_bytes=int(os.getenv("LOG_FILE_MAX_BYTES", str(50 * 1024 * 1024))),
+        rotate_seconds=float(os.getenv("LOG_FILE_ROTATE_SECONDS", "0")),
+        backup_count=int(os.getenv("LOG_FILE_BACKUPS", "5")),
+        compress=os.getenv("LOG_FILE_COMPRESS", "1") in {"1", "true", "yes", "on"},
+    )
+
+
+def _filters_from_env() -> list[logging.Filter]:
+    options: dict[str, Any] = {
+        "summary_interval": float(os.getenv("LOG_SUMMARY_INTERVAL", "60")),
+        "max_level": _level_from_env("INFO", "LOG_FILTER_MAX_LEVEL"),
+    }
+    filters: list[logging.Filter] = []
+    sample_rate = float(os.getenv("LOG_SAMPLE_RATE", "1") or 1)
+    if sample_rate < 1.0:
+        filters.append(SamplingFilter(sample_rate, **options))
+    rate_limit = os.getenv("LOG_RATE_LIMIT")
+    if rate_limit:
+        filters.append(RateLimitFilter(float(rate_limit), **options))
+    return filters
+
+
 def get_logger(name: str | None = None) -> logging.Logger:
-    """Return a configured logger with a single StreamHandler.
+    """Return a configured logger with a single stdout or file-sink handler.
 
     Parameters
     ----------
@@ -137,19 +766,38 @@ def get_logger(name: str | None = None) -> logging.Logger:
         return logger
 
     logger.setLevel(_level_from_env())
-    handler = logging.StreamHandler(stream=sys.stdout)
-    if _use_json():
-        handler.setFormatter(JsonFormatter())
-    else:
-        handler.setFormatter(PlainFormatter(color=_use_color()))
+    handler = _handler_from_env()
+    # Handler filters run in the calling thread, even for a file sink, so the context is seen.
+    if _REQUEST_CONTEXT_FILTER not in handler.filters:
+        handler.addFilter(_REQUEST_CONTEXT_FILTER)
 
     # Avoid duplicate handlers if called multiple times.
-    logger.handlers = [h for h in logger.handlers if not isinstance(h, logging.StreamHandler)]
+    logger.handlers = [
+        h for h in logger.handlers if not isinstance(h, (logging.StreamHandler, QueueHandler))
+    ]
     logger.addHandler(handler)
+    for log_filter in _filters_from_env():
+        logger.addFilter(log_filter)
     logger.propagate = False
 
     setattr(logger, "_configured_by_template", True)
     return logger
 
 
-__all__ = ["get_logger", "PlainFormatter", "JsonFormatter"]
+__all__ = [
+    "get_logger",
+    "PlainFormatter",
+    "JsonFormatter",
+    "CompressingRotatingFileHandler",
+    "close_file_sinks",
+    "file_sink",
+    "ThrottleFilter",
+    "SamplingFilter",
+    "RateLimitFilter",
+    "RequestContext",
+    "RequestContextFilter",
+    "bind_request_context",
+    "get_request_context",
+    "request_context",
+    "reset_request_context",
+]
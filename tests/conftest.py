@@ -1,11 +1,13 @@
 # Ensure src/ is importable for tests when running from repo root
-import os
-import socket
-import subprocess
+import statistics
 import sys
 import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 
@@ -14,46 +16,78 @@ SRC = ROOT / "src"
 if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
 
+from utils.live_server import LiveServer  # noqa: E402
 
-def wait_for_port(host, port, timeout=10.0):
-    start = time.time()
-    while time.time() - start < timeout:
-        try:
-            with socket.create_connection((host, port), timeout=1):
-                return True
-        except OSError:
-            time.sleep(0.1)
-    raise RuntimeError(f"Server {host}:{port} not available after {timeout} seconds")
 
+@pytest.fixture(scope="session")
+def live_server():
+    """Return ``start(app_module, env=None) -> LiveServer``.
 
-@pytest.fixture(scope="module")
-def uvicorn_server_factory():
-    procs = []
-
-    def _start(app_module, host="127.0.0.1", port=8000):
-        proc = subprocess.Popen(
-            [
-                "uvicorn",
-                f"{app_module}:app",
-                "--host",
-                host,
-                "--port",
-                str(port),
-            ],
-            env={**os.environ, "PYTHONPATH": "src"},
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
-        procs.append(proc)
-        wait_for_port(host, port, timeout=10)
-        return proc
+    Each app (and environment) is served once per session, i.e. once per xdist worker,
+    and shared by every test on that worker.
+    """
+    servers = {}
+
+    def _start(app_module, env=None):
+        key = (app_module, tuple(sorted((env or {}).items())))
+        if key not in servers:
+            servers[key] = LiveServer(f"{app_module}:app", env=env).start()
+        return servers[key]
 
     yield _start
 
-    # Teardown: terminate all started servers
-    for proc in procs:
-        proc.terminate()
-        proc.wait(timeout=5)
+    for server in servers.values():
+        server.stop()
+
+
+@dataclass
+class LoadResult:
+    """Statuses and latencies (seconds) of the requests sent by ``load_test``."""
+
+    statuses: Counter
+    latencies: list[float]
+    seconds: float
+
+    @property
+    def rate(self):
+        return len(self.latencies) / self.seconds
+
+    def percentile(self, q):
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+    def __str__(self):
+        return (
+            f"{len(self.latencies)} requests, {self.rate:.0f}/s, "
+            f"p50={statistics.median(self.latencies) * 1e3:.1f}ms "
+            f"p99={self.percentile(99) * 1e3:.1f}ms, statuses={dict(self.statuses)}"
+        )
+
+
+@pytest.fixture(scope="session")
+def load_test():
+    """Return ``run(server, path, requests=200, concurrency=20, method="GET", **kwargs)``.
+
+    Sends ``requests`` requests to a ``LiveServer`` from ``concurrency`` threads over one
+    pooled ``httpx.Client``; ``kwargs`` go to ``client.request``.
+    """
+
+    def _run(server, path, requests=200, concurrency=20, method="GET", **kwargs):
+        limits = httpx.Limits(max_connections=concurrency)
+        with httpx.Client(base_url=server.url, limits=limits) as client:
+
+            def _one(_):
+                start = time.perf_counter()
+                response = client.request(method, path, **kwargs)
+                return response.status_code, time.perf_counter() - start
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(concurrency) as pool:
+                results = list(pool.map(_one, range(requests)))
+            seconds = time.perf_counter() - start
+        return LoadResult(Counter(s for s, _ in results), [t for _, t in results], seconds)
+
+    return _run
 
 
 @pytest.fixture(scope="module")
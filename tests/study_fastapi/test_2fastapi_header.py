@@ -52,3 +52,28 @@ class TestFastAPIHeader(BaseTestFastAPI):
         """Test POST request with query parameters."""
         response = app_client.post("/hi_post?name=shweta")
         self._validate_response(response, self.SUCCESS_STATUS, self._SUCCESS_RESPONSE)
+
+    def test_agent_missing_header(self, app_client):
+        """Missing User-Agent keeps the Header() 422 shape."""
+        response = app_client.get("/useragent", headers={"User-Agent": ""})
+        assert response.status_code == self.SUCCESS_STATUS
+        app_client.headers.pop("User-Agent")
+        try:
+            response = app_client.get("/useragent")
+        finally:
+            app_client.headers["User-Agent"] = self._DEFAULT_USER_AGENT
+        expected = self._get_err_422("header")
+        expected["detail"][0]["loc"][1] = "user-agent"
+        self._validate_response(response, 422, expected)
+
+    def test_agent_parsed(self, app_client):
+        response = app_client.get(
+            "/useragent/parsed",
+            headers={"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) Firefox/128.0"},
+        )
+        self._validate_response(response, self.SUCCESS_STATUS, ["Firefox", "128.0", "Linux"])
+
+    def test_agent_openapi_documents_header(self, app_client):
+        params = app_client.get("/openapi.json").json()["paths"]["/useragent"]["get"]
+        assert params["parameters"][0]["name"] == "user-agent"
+        assert params["parameters"][0]["in"] == "header"
@@ -161,3 +161,49 @@ def test_json_dumps_failure(complex_case: TestCase):
     """Test fastapi json encoding behavior for the complex objects"""
     with pytest.raises(TypeError):
         _ = get_json_dumps(complex_case.test_obj)
+
+
+def test_bulk_encode_job():
+    """Bulk encoding runs as a background job and is polled by id."""
+    import time
+
+    from fastapi.testclient import TestClient
+
+    from study_fastapi.a3_jsonable_encoder import app
+
+    payload = [{"a": 1}, [1, 2], "x", None]
+    with TestClient(app) as client:
+        response = client.post("/encode/bulk", json=payload)
+        assert response.status_code == 202
+        job_id = response.json()["id"]
+        deadline = time.monotonic() + 5
+        while (job := client.get(f"/jobs/{job_id}").json())["status"] != "done":
+            assert time.monotonic() < deadline, job
+            time.sleep(0.01)
+    assert job["result"] == ['{"a": 1}', "[1, 2]", '"x"', "null"]
+
+
+@pytest.mark.asyncio
+async def test_async_encoders_match_sync(simple_case: TestCase):
+    """The offload-aware async encoders return the same strings."""
+    from study_fastapi.a3_jsonable_encoder import (
+        get_fastapi_encoded_string_async,
+        get_json_dumps_async,
+    )
+
+    assert await get_fastapi_encoded_string_async(simple_case.test_obj) == simple_case.expected_str
+    assert await get_json_dumps_async(simple_case.test_obj) == simple_case.expected_str
+
+
+def test_encode_route_offloads_large_payloads(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from study_fastapi.a3_jsonable_encoder import app, encode_pool, fastapi_offloader
+
+    monkeypatch.setattr(fastapi_offloader, "threshold", 3)
+    monkeypatch.setattr(encode_pool, "kind", "thread")
+    with TestClient(app) as client:
+        assert client.post("/encode", json=[1, 2]).json() == "[1, 2]"
+        assert client.post("/encode", json=[1, 2, 3]).json() == "[1, 2, 3]"
+        assert encode_pool._executor is not None
+    assert encode_pool._executor is None
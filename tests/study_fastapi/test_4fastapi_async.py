@@ -4,11 +4,18 @@ import re
 
 import pytest
 from BaseTestFastAPI import BaseTestFastAPI
+from fastapi.testclient import TestClient
 from httpx import ASGITransport, AsyncClient
 
+from study_fastapi import a4_fastapi_async
 from study_fastapi.a4_fastapi_async import app
 
 
+@pytest.fixture
+def fast_ticks(monkeypatch):
+    monkeypatch.setattr(a4_fastapi_async, "TICK_INTERVAL", 0.01)
+
+
 class TestAsyncEndpoints(BaseTestFastAPI):
     @pytest.mark.asyncio
     async def test_greet(self):
@@ -19,3 +26,28 @@ class TestAsyncEndpoints(BaseTestFastAPI):
             assert response.status_code == self.SUCCESS_STATUS
             body = response.json()
             assert re.fullmatch(r"Hello, World! \(waited 1\.\d{2} seconds\)", body), body
+
+    def test_websocket_ticks(self, fast_ticks):
+        with TestClient(app) as client:
+            with client.websocket_connect("/ws/hi?count=3") as ws:
+                messages = [ws.receive_text() for _ in range(3)]
+        assert all(m.startswith("Hello, World! (tick ") for m in messages)
+        assert a4_fastapi_async.greetings.subscribers == 0
+
+    def test_websocket_client_disconnect(self, fast_ticks):
+        with TestClient(app) as client:
+            with client.websocket_connect("/ws/hi") as ws:
+                assert ws.receive_text().startswith("Hello, World!")
+
+    def test_sse_ticks(self, fast_ticks):
+        with TestClient(app) as client:
+            response = client.get("/sse/hi?count=2")
+        assert response.status_code == self.SUCCESS_STATUS
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [e for e in response.text.split("\n\n") if e]
+        assert len(events) == 2
+        assert all(e.startswith("data: Hello, World! (tick ") for e in events)
+
+    def test_stream_count_validation(self):
+        with TestClient(app) as client:
+            assert client.get("/sse/hi?count=0").status_code == 422
@@ -0,0 +1,12 @@
+"""Test the a8 placeholder app."""
+
+from fastapi.testclient import TestClient
+
+from study_fastapi.a8_mvcapp import app
+
+
+def test_app_is_built_by_factory():
+    response = TestClient(app).get("/openapi.json")
+    assert response.status_code == 200
+    assert response.json()["paths"] == {}
+    assert response.headers["x-request-id"]
@@ -0,0 +1,189 @@
+"""Tests for the shared app factory."""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from study_fastapi import app_factory
+from study_fastapi.app_factory import AppConfig, FastJSONRoute, create_app
+from study_fastapi.middleware import (
+    ConcurrencyLimitMiddleware,
+    ConditionalGetMiddleware,
+    RequestContextMiddleware,
+    TimingMiddleware,
+)
+
+BIG = "x" * 2000
+
+
+def _routes(app):
+    @app.get("/big")
+    def big():
+        return {"payload": BIG}
+
+    @app.get("/typed")
+    def typed() -> dict[str, int]:
+        return {"a": 1}
+
+
+def _middleware(app):
+    return [m.cls for m in app.user_middleware]
+
+
+def test_from_env_and_overrides(monkeypatch):
+    monkeypatch.setenv("APP_TIMING", "1")
+    monkeypatch.setenv("APP_GZIP_MIN_SIZE", "500")
+    monkeypatch.setenv("APP_CACHE_MAX_AGE", "0")
+    monkeypatch.setenv("APP_MAX_CONCURRENCY", "8")
+    monkeypatch.setenv("APP_WARM", "0")
+    config = AppConfig.from_env(title="t", max_waiting=3)
+    assert (config.timing, config.gzip_min_size, config.cache_max_age) == (True, 500, 0)
+    assert (config.max_concurrency, config.max_waiting, config.warm) == (8, 3, False)
+    assert config.title == "t" and not config.fast_json
+    monkeypatch.setenv("APP_MAX_WAITING", "0")
+    assert AppConfig.from_env().max_waiting == 0
+    monkeypatch.delenv("APP_MAX_WAITING")
+    assert AppConfig.from_env().max_waiting == 100
+
+
+def test_default_app_only_has_request_context(monkeypatch):
+    monkeypatch.delenv("PROFILE_SAMPLE_RATE", raising=False)
+    monkeypatch.delenv("PROFILE_SECRET", raising=False)
+    assert _middleware(create_app(AppConfig())) == [RequestContextMiddleware]
+
+
+def test_full_stack_order_and_behaviour():
+    app = create_app(AppConfig(timing=True, gzip_min_size=500, cache_max_age=60, max_concurrency=4))
+    _routes(app)
+    assert _middleware(app)[0] is RequestContextMiddleware
+    assert _middleware(app)[1:] == [
+        TimingMiddleware,
+        ConcurrencyLimitMiddleware,
+        app_factory.GZipMiddleware,
+        ConditionalGetMiddleware,
+    ]
+    client = TestClient(app)
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["server-timing"].startswith("app;dur=")
+    assert response.headers["cache-control"] == "public, max-age=60"
+    assert response.json() == {"payload": BIG}
+    etag = response.headers["etag"]
+    cached = client.get("/big", headers={"If-None-Match": etag, "Accept-Encoding": "gzip"})
+    assert cached.status_code == 304 and cached.content == b""
+    assert client.get("/typed", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_conditional_get_skips_non_get_and_streams(monkeypatch):
+    from fastapi.responses import StreamingResponse
+
+    app = create_app(AppConfig(cache_max_age=0))
+    _routes(app)
+
+    @app.post("/post")
+    def post():
+        return 1
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([b"a", b"b"]))
+
+    client = TestClient(app)
+    assert client.get("/typed").headers["cache-control"] == "no-cache"
+    assert "etag" not in client.post("/post").headers
+    response = client.get("/stream")
+    assert response.content == b"ab" and "etag" not in response.headers
+    assert client.get("/missing").status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_queues_then_sheds():
+    release = asyncio.Event()
+    started = []
+
+    async def app(scope, receive, send):
+        started.append(scope["path"])
+        await release.wait()
+        await JSONResponse(scope["path"])(scope, receive, send)
+
+    limited = ConcurrencyLimitMiddleware(app, max_concurrency=1, max_waiting=1)
+    transport = httpx.ASGITransport(app=limited)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        first = asyncio.create_task(client.get("/1"))
+        second = asyncio.create_task(client.get("/2"))
+        await asyncio.sleep(0.05)
+        shed = await client.get("/3")
+        assert shed.status_code == 503 and shed.headers["retry-after"] == "1"
+        assert started == ["/1"] and limited.active == 1
+        release.set()
+        assert [(await t).json() for t in (first, second)] == ["/1", "/2"]
+    assert limited.active == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_cancelled_waiter():
+    release = asyncio.Event()
+
+    async def app(scope, receive, send):
+        await release.wait()
+
+    limited = ConcurrencyLimitMiddleware(app, max_concurrency=1)
+    scope = {"type": "http"}
+    holder = asyncio.create_task(limited(scope, None, None))
+    waiter = asyncio.create_task(limited(scope, None, None))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    release.set()
+    await holder
+    assert limited.active == 0 and not limited._waiters
+    await limited({"type": "lifespan"}, None, None)  # non-HTTP scopes pass straight through
+
+
+def test_warmers_run_after_app_lifespan(monkeypatch):
+    calls = []
+
+    from contextlib import asynccontextmanager
+
+    @asynccontextmanager
+    async def lifespan(app):
+        calls.append("lifespan")
+        yield
+        calls.append("shutdown")
+
+    async def warm_async():
+        calls.append("async")
+
+    config = AppConfig(lifespan=lifespan, warmers=(lambda: calls.append("sync"), warm_async))
+    with TestClient(create_app(config)):
+        assert calls == ["lifespan", "sync", "async"]
+    assert calls[-1] == "shutdown"
+    calls.clear()
+    with TestClient(create_app(AppConfig(warm=False, warmers=(warm_async,)))):
+        pass
+    assert calls == []
+
+
+def test_fast_json_route_only_for_untyped_routes(monkeypatch):
+    class Marked(JSONResponse):
+        def render(self, content):
+            return b'{"fast":' + super().render(content) + b"}"
+
+    monkeypatch.setattr(app_factory, "orjson_available", lambda: True)
+    monkeypatch.setattr(app_factory, "FastJSONResponse", Marked)
+    app = create_app(AppConfig(fast_json=True))
+    assert app.router.route_class is FastJSONRoute
+    _routes(app)
+    client = TestClient(app)
+    assert client.get("/big").json() == {"fast": {"payload": BIG}}
+    assert client.get("/typed").json() == {"a": 1}
+
+
+def test_fast_json_needs_orjson(monkeypatch):
+    monkeypatch.setattr(app_factory, "orjson_available", lambda: False)
+    app = create_app(AppConfig(fast_json=True))
+    assert app.router.route_class is not FastJSONRoute
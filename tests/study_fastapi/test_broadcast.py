@@ -0,0 +1,106 @@
+"""Tests for the single-producer Broadcaster."""
+
+import asyncio
+import logging
+
+import pytest
+
+from study_fastapi.broadcast import Broadcaster
+
+
+def _counter(limit=None, delay=0.001):
+    starts = []
+
+    async def source():
+        starts.append(1)
+        n = 0
+        while limit is None or n < limit:
+            await asyncio.sleep(delay)
+            n += 1
+            yield str(n)
+
+    return source, starts
+
+
+@pytest.mark.asyncio
+async def test_all_subscribers_share_one_producer():
+    source, starts = _counter()
+    broadcaster = Broadcaster(source)
+
+    async def take(count):
+        async with broadcaster.subscribe() as messages:
+            out = []
+            async for message in messages:
+                out.append(int(message))
+                if len(out) == count:
+                    return out
+
+    results = await asyncio.gather(*(take(3) for _ in range(50)))
+    assert starts == [1]
+    assert all(r == sorted(r) and len(r) == 3 for r in results)
+    assert broadcaster.subscribers == 0
+
+
+@pytest.mark.asyncio
+async def test_exhausted_source_ends_iteration_and_restarts():
+    source, starts = _counter(limit=2)
+    broadcaster = Broadcaster(source)
+    async with broadcaster.subscribe() as messages:
+        assert [m async for m in messages] == ["1", "2"]
+    async with broadcaster.subscribe() as messages:
+        assert [m async for m in messages] == ["1", "2"]
+    assert len(starts) == 2
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_gets_latest_value():
+    source, _ = _counter(delay=0.001)
+    broadcaster = Broadcaster(source)
+    async with broadcaster.subscribe() as messages:
+        first = int(await anext(messages))
+        await asyncio.sleep(0.05)
+        second = int(await anext(messages))
+    assert second > first + 1
+
+
+@pytest.mark.asyncio
+async def test_resubscribing_while_the_old_producer_is_cancelled():
+    source, starts = _counter(limit=3)
+    broadcaster = Broadcaster(source)
+    async with broadcaster.subscribe() as messages:
+        await anext(messages)
+    # The old producer has been cancelled but has not finished yet.
+    async with broadcaster.subscribe() as messages:
+        assert [m async for m in messages] == ["1", "2", "3"]
+    assert len(starts) == 2
+
+
+@pytest.mark.asyncio
+async def test_failing_source_is_logged_and_closes_subscribers():
+    async def source():
+        await asyncio.sleep(0.01)
+        yield "1"
+        await asyncio.sleep(0.01)
+        raise RuntimeError("feed down")
+
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger = logging.getLogger("study_fastapi.broadcast")
+    logger.addHandler(handler)
+    try:
+        broadcaster = Broadcaster(source)
+        async with broadcaster.subscribe() as first, broadcaster.subscribe() as second:
+            results = await asyncio.gather(
+                asyncio.wait_for(_collect(first), 1), asyncio.wait_for(_collect(second), 1)
+            )
+    finally:
+        logger.removeHandler(handler)
+    assert results == [["1"], ["1"]]
+    (record,) = records
+    assert record.getMessage() == "broadcast source failed; closing 2 subscribers"
+    assert record.exc_info[0] is RuntimeError
+
+
+async def _collect(messages):
+    return [message async for message in messages]
@@ -0,0 +1,168 @@
+"""Tests for memory-mapped catalogue snapshots."""
+
+import json
+import logging
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, PrivateAttr
+
+from study_fastapi import a5_pydantic_model
+from study_fastapi.a5_pydantic_model import Buyer, Seller
+from study_fastapi.catalogue import SnapshotCatalogue, load_catalogue, main, write_snapshot
+from study_fastapi.changefeed import VersionedCatalogue
+
+
+class Listing(BaseModel):
+    title: str
+    price: float
+    tags: list[str] = []
+    note: str | None = None
+
+
+def _buyers(count, prefix="b"):
+    return [Buyer(name=f"{prefix}{i}", country="IN", zipcode=str(i)) for i in range(count)]
+
+
+def _replace(path, model, rows):
+    # Guarantee a visible change even on filesystems with coarse timestamps.
+    before = os.stat(path).st_mtime_ns if path.exists() else 0
+    write_snapshot(path, model, rows)
+    os.utime(path, ns=(before + 10**9, before + 10**9))
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "buyers.snap"
+    assert write_snapshot(path, Buyer, _buyers(5)) == 5
+    catalogue = SnapshotCatalogue(path, Buyer)
+    assert len(catalogue) == 5
+    assert list(catalogue) == _buyers(5)
+    assert catalogue[-1] == _buyers(5)[4]
+    assert catalogue[1:3] == _buyers(5)[1:3]
+    with pytest.raises(IndexError):
+        catalogue[5]
+    assert [p.name for p in tmp_path.iterdir()] == ["buyers.snap"]  # no temp file left
+
+
+def test_nulls_unicode_and_json_fields(tmp_path):
+    rows = [
+        Listing(title="Çay ☕", price=2.5, tags=["tea", "hot"]),
+        Listing(title="", price=0, note="n"),
+    ]
+    write_snapshot(tmp_path / "l.snap", Listing, rows)
+    assert list(SnapshotCatalogue(tmp_path / "l.snap", Listing)) == rows
+
+    seller = Seller(name="S", country="IN", shipping_port=None, shop_description="", aka="a")
+    write_snapshot(tmp_path / "s.snap", Seller, [seller])
+    assert SnapshotCatalogue(tmp_path / "s.snap", Seller)[0] == seller
+
+
+def test_empty_snapshot(tmp_path):
+    write_snapshot(tmp_path / "e.snap", Buyer, [])
+    assert list(SnapshotCatalogue(tmp_path / "e.snap", Buyer)) == []
+
+
+def test_rejects_other_models_and_files(tmp_path):
+    write_snapshot(tmp_path / "b.snap", Buyer, _buyers(1))
+    with pytest.raises(ValueError, match="holds Buyer records, not Seller"):
+        SnapshotCatalogue(tmp_path / "b.snap", Seller)
+    (tmp_path / "junk.snap").write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError, match="not a version 1"):
+        SnapshotCatalogue(tmp_path / "junk.snap", Buyer)
+
+
+def test_hot_reload_is_atomic_for_readers(tmp_path):
+    path = tmp_path / "buyers.snap"
+    write_snapshot(path, Buyer, _buyers(3, "old"))
+    catalogue = SnapshotCatalogue(path, Buyer, check_interval=None)
+    reader = iter(catalogue)
+    assert next(reader).name == "old0"
+
+    _replace(path, Buyer, _buyers(4, "new"))
+    assert len(catalogue) == 3  # no automatic checks
+    assert catalogue.reload() is True
+    assert catalogue.reload() is False
+    assert [b.name for b in catalogue] == ["new0", "new1", "new2", "new3"]
+    # The iterator started before the swap finishes on the old snapshot.
+    assert [b.name for b in reader] == ["old1", "old2"]
+
+
+def test_reload_checks_on_access(tmp_path):
+    path = tmp_path / "buyers.snap"
+    write_snapshot(path, Buyer, _buyers(1))
+    catalogue = SnapshotCatalogue(path, Buyer, check_interval=0)
+    _replace(path, Buyer, _buyers(2))
+    assert len(catalogue) == 2
+    path.unlink()
+    assert catalogue.reload() is False
+    assert len(catalogue) == 2  # keeps serving the last good snapshot
+
+
+def test_invalid_replacement_keeps_the_old_snapshot(tmp_path):
+    path = tmp_path / "buyers.snap"
+    write_snapshot(path, Buyer, _buyers(2))
+    catalogue = SnapshotCatalogue(path, Buyer, check_interval=0)
+    write_snapshot(tmp_path / "full.snap", Buyer, _buyers(50))
+    truncated = (tmp_path / "full.snap").read_bytes()[:-40]
+    (tmp_path / "next.snap").write_bytes(truncated)
+    os.replace(tmp_path / "next.snap", path)
+    logger = logging.getLogger("study_fastapi.catalogue")
+    records = []
+    handler = logging.Handler(logging.ERROR)
+    handler.emit = records.append
+    logger.addHandler(handler)
+    try:
+        assert len(catalogue) == 2
+        assert [b.name for b in catalogue] == ["b0", "b1"]
+        assert catalogue[1].name == "b1"
+    finally:
+        logger.removeHandler(handler)
+    assert [r.getMessage().count("truncated or corrupt") for r in records] == [1]
+    with pytest.raises(ValueError, match="truncated or corrupt"):
+        SnapshotCatalogue(path, Buyer)
+    _replace(path, Buyer, _buyers(3))
+    assert len(catalogue) == 3  # a valid file is picked up again
+
+
+def test_load_catalogue(tmp_path, monkeypatch):
+    default = _buyers(1)
+    assert load_catalogue(Buyer, "buyers", default) is default
+    monkeypatch.setenv("CATALOGUE_DIR", str(tmp_path))
+    assert load_catalogue(Buyer, "buyers", default) is default  # no file yet
+    write_snapshot(tmp_path / "buyers.snap", Buyer, _buyers(3))
+    loaded = load_catalogue(Buyer, "buyers", default)
+    assert isinstance(loaded, SnapshotCatalogue)
+    assert len(loaded) == 3
+
+
+def test_cli_builds_from_ndjson(tmp_path, capsys):
+    source = tmp_path / "buyers.ndjson"
+    source.write_text("".join(b.model_dump_json() + "\n" for b in _buyers(3)) + "\n")
+    target = tmp_path / "buyers.snap"
+    assert main(["study_fastapi.a5_pydantic_model:Buyer", str(source), str(target)]) == 0
+    assert "wrote 3 records" in capsys.readouterr().out
+    assert list(SnapshotCatalogue(target, Buyer)) == _buyers(3)
+
+
+def test_endpoints_serve_snapshot(tmp_path, monkeypatch):
+    write_snapshot(tmp_path / "buyers.snap", Buyer, _buyers(3))
+    snapshot = SnapshotCatalogue(tmp_path / "buyers.snap", Buyer)
+    monkeypatch.setattr(a5_pydantic_model, "_buyers", VersionedCatalogue(Buyer, "name", snapshot))
+    client = TestClient(a5_pydantic_model.app)
+    assert [b["name"] for b in client.get("/buyers").json()] == ["b0", "b1", "b2"]
+    assert client.get("/buyers", params={"fields": "zipcode"}).json()[2] == {"zipcode": "2"}
+    lines = client.get("/buyers/export").text.splitlines()
+    assert json.loads(lines[1]) == {"name": "b1", "country": "IN", "zipcode": "1"}
+
+
+class Tagged(BaseModel):
+    name: str
+    _cache: dict = PrivateAttr(default_factory=dict)
+
+
+def test_models_with_private_attributes_are_constructed_normally(tmp_path):
+    write_snapshot(tmp_path / "t.snap", Tagged, [Tagged(name="x")])
+    record = SnapshotCatalogue(tmp_path / "t.snap", Tagged)[0]
+    assert record.name == "x"
+    assert record._cache == {}
@@ -0,0 +1,260 @@
+"""Tests for versioned catalogues and the change-feed routes."""
+
+import asyncio
+import json
+import os
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from study_fastapi import a5_pydantic_model
+from study_fastapi.a5_pydantic_model import Buyer
+from study_fastapi.catalogue import SnapshotCatalogue, write_snapshot
+from study_fastapi.changefeed import VERSION_HEADER, ChangeOp, VersionedCatalogue, single_writer
+
+
+def _buyer(name, zipcode="1"):
+    return Buyer(name=name, country="IN", zipcode=zipcode)
+
+
+def _catalogue(*names, history=10_000):
+    return VersionedCatalogue(Buyer, "name", [_buyer(n) for n in names], history=history)
+
+
+def _ops(change_set):
+    return [(c.op, c.key) for c in change_set.changes]
+
+
+def test_overlay_reads():
+    catalogue = _catalogue("a", "b", "c")
+    assert [b.name for b in catalogue] == ["a", "b", "c"]
+    catalogue.upsert(_buyer("b", "2"))
+    catalogue.upsert(_buyer("d"))
+    catalogue.delete("a")
+    assert [(b.name, b.zipcode) for b in catalogue] == [("b", "2"), ("c", "1"), ("d", "1")]
+    assert len(catalogue) == 3
+    assert "a" not in catalogue and "d" in catalogue
+    assert catalogue.get("b") == _buyer("b", "2")
+    assert catalogue.delete("a") is None
+    assert catalogue.version == 3
+
+
+def test_duplicate_base_keys_are_rejected():
+    catalogue = _catalogue("a", "b", "a")
+    assert [b.name for b in catalogue] == ["a", "b", "a"]  # reads need no index
+    with pytest.raises(ValueError, match="records 0 and 2 share the name 'a'"):
+        catalogue.upsert(_buyer("a", "2"))
+    with pytest.raises(ValueError):
+        catalogue.get("b")
+    assert catalogue.version == 0
+    assert [b.zipcode for b in catalogue] == ["1", "1", "1"]
+
+
+def test_changes_since_collapses_per_key():
+    catalogue = _catalogue("a", "b")
+    assert catalogue.upsert(_buyer("a", "2")).op is ChangeOp.UPDATE
+    assert catalogue.upsert(_buyer("x")).op is ChangeOp.INSERT
+    catalogue.upsert(_buyer("x", "2"))  # insert + update -> insert
+    catalogue.upsert(_buyer("y"))
+    catalogue.delete("y")  # insert + delete -> nothing
+    catalogue.delete("b")
+
+    full = catalogue.changes_since(0)
+    assert (full.since, full.version, full.reset) == (0, 6, False)
+    assert _ops(full) == [(ChangeOp.UPDATE, "a"), (ChangeOp.INSERT, "x"), (ChangeOp.DELETE, "b")]
+    assert full.changes[1].record == _buyer("x", "2")
+    assert _ops(catalogue.changes_since(2)) == [(ChangeOp.UPDATE, "x"), (ChangeOp.DELETE, "b")]
+    assert catalogue.changes_since(6).changes == []
+
+
+def test_clients_outside_the_history_are_reset():
+    catalogue = _catalogue(history=2)
+    for name in "abc":
+        catalogue.upsert(_buyer(name))
+    assert catalogue.changes_since(0).reset is True
+    assert _ops(catalogue.changes_since(1)) == [(ChangeOp.INSERT, "b"), (ChangeOp.INSERT, "c")]
+    assert catalogue.changes_since(4).reset is True  # from the future
+
+
+def test_replaced_snapshot_resets_clients(tmp_path):
+    path = tmp_path / "buyers.snap"
+    write_snapshot(path, Buyer, [_buyer("a")])
+    catalogue = VersionedCatalogue(
+        Buyer, "name", SnapshotCatalogue(path, Buyer, check_interval=None)
+    )
+    catalogue.upsert(_buyer("b"))
+    before = os.stat(path).st_mtime_ns
+    write_snapshot(path, Buyer, [_buyer("a"), _buyer("c")])
+    os.utime(path, ns=(before + 10**9, before + 10**9))
+    catalogue._base.reload()
+    assert catalogue.changes_since(1).reset is True
+    assert catalogue.version == 2
+    assert [b.name for b in catalogue] == ["a", "c", "b"]
+
+
+@pytest.mark.asyncio
+async def test_wait_returns_on_write_from_another_thread():
+    catalogue = _catalogue("a")
+    assert (await catalogue.wait(0, 0.01)).changes == []
+    threading.Timer(0.05, catalogue.upsert, [_buyer("b")]).start()
+    change_set = await asyncio.wait_for(catalogue.wait(0, 5), 2)
+    assert _ops(change_set) == [(ChangeOp.INSERT, "b")]
+    assert not catalogue._waiters
+
+
+@pytest.mark.asyncio
+async def test_stream_sends_keep_alives_and_events():
+    catalogue = _catalogue()
+    events = catalogue.stream(0, heartbeat=0.01, count=1)
+    assert await anext(events) == ": keep-alive\n\n"
+    catalogue.upsert(_buyer("a"))
+    event = await anext(events)
+    assert event.startswith("id: 1\nevent: changes\ndata: ")
+    assert json.loads(event.splitlines()[2][6:])["changes"][0]["key"] == "a"
+    with pytest.raises(StopAsyncIteration):
+        await anext(events)
+
+
+@pytest.fixture
+def client():
+    catalogue = _catalogue("a")
+    app = FastAPI()
+    app.include_router(catalogue.router("/buyers", write_token="secret"))
+    return TestClient(app, headers={"Authorization": "Bearer secret"})
+
+
+def test_routes_write_and_sync(client):
+    assert client.put("/buyers/b", json=_buyer("b").model_dump()).json()["op"] == "insert"
+    assert client.put("/buyers/c", json=_buyer("b").model_dump()).status_code == 422
+    assert client.delete("/buyers/a").json() == {
+        "version": 2,
+        "op": "delete",
+        "key": "a",
+        "record": None,
+    }
+    assert client.delete("/buyers/a").status_code == 404
+    body = client.get("/buyers/changes", params={"since": 1}).json()
+    assert body == {
+        "since": 1,
+        "version": 2,
+        "reset": False,
+        "changes": [{"version": 2, "op": "delete", "key": "a", "record": None}],
+    }
+    assert client.get("/buyers/changes", params={"since": 2, "wait": 0.01}).json()["changes"] == []
+    assert client.get("/buyers/changes", params={"wait": 31}).status_code == 422
+
+
+def test_write_routes_need_the_token(client):
+    body = _buyer("b").model_dump()
+    for headers in ({"Authorization": ""}, {"Authorization": "Bearer wrong"}):
+        response = client.put("/buyers/b", json=body, headers=headers)
+        assert response.status_code == 401
+        assert response.headers["www-authenticate"] == "Bearer"
+        assert client.delete("/buyers/a", headers=headers).status_code == 401
+    assert client.get("/buyers/changes").json()["version"] == 0
+
+
+def test_write_routes_are_opt_in():
+    app = FastAPI()
+    app.include_router(_catalogue("a").router("/buyers"))
+    client = TestClient(app)
+    assert client.put("/buyers/b", json=_buyer("b").model_dump()).status_code == 404
+    assert client.delete("/buyers/a").status_code == 404
+    assert "/buyers/{key}" not in app.openapi()["paths"]
+
+
+def test_single_writer_refuses_a_second_holder(tmp_path):
+    lock = tmp_path / "writer.lock"
+    with single_writer(lock):
+        with pytest.raises(RuntimeError, match="single worker"):
+            with single_writer(lock):
+                pass
+    with single_writer(lock):
+        pass
+
+
+def test_stream_route_resumes_from_last_event_id(client):
+    client.put("/buyers/b", json=_buyer("b").model_dump())
+    client.put("/buyers/c", json=_buyer("c").model_dump())
+    response = client.get(
+        "/buyers/changes/stream", params={"count": 1}, headers={"Last-Event-ID": "1"}
+    )
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.startswith("id: 2\n")
+    assert '"key":"c"' in response.text and '"key":"b"' not in response.text
+
+
+def test_a5_full_listing_reports_the_version(monkeypatch):
+    catalogue = _catalogue("a")
+    monkeypatch.setattr(a5_pydantic_model, "_buyers", catalogue)
+    catalogue.upsert(_buyer("b"))
+    client = TestClient(a5_pydantic_model.app)
+    response = client.get("/buyers")
+    assert response.headers[VERSION_HEADER] == "1"
+    assert [b["name"] for b in response.json()] == ["a", "b"]
+    assert client.get("/buyers", params={"fields": "name"}).headers[VERSION_HEADER] == "1"
+    assert "/sellers/changes" in a5_pydantic_model.app.openapi()["paths"]
+    assert "/sellers/{key}" not in a5_pydantic_model.app.openapi()["paths"]
+
+
+def test_a5_writable_worker_holds_the_writer_lock(monkeypatch, tmp_path):
+    lock = tmp_path / "writer.lock"
+    monkeypatch.setattr(a5_pydantic_model, "_write_token", "secret")
+    monkeypatch.setattr(a5_pydantic_model, "_writer_lock", str(lock))
+    with TestClient(a5_pydantic_model.app):
+        with pytest.raises(RuntimeError, match="single worker"):
+            with single_writer(lock):
+                pass
+    with single_writer(lock):
+        pass
+
+
+@pytest.mark.parametrize("stripes", [1, 16])
+def test_concurrent_writers_and_readers(stripes):
+    catalogue = VersionedCatalogue(
+        Buyer, "name", [_buyer(f"b{i}") for i in range(50)], stripes=stripes
+    )
+    errors = []
+
+    def write(worker):
+        try:
+            for i in range(300):
+                name = f"b{(worker * 7 + i) % 80}"
+                if i % 5 == 4:
+                    catalogue.delete(name)
+                else:
+                    catalogue.upsert(_buyer(name, f"{worker}-{i}"))
+        except Exception as error:  # pragma: no cover - reported below
+            errors.append(error)
+
+    def read():
+        try:
+            for _ in range(100):
+                rows = list(catalogue)
+                assert len({b.name for b in rows}) == len(rows)
+                catalogue.changes_since(0)
+        except Exception as error:  # pragma: no cover - reported below
+            errors.append(error)
+
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(6)]
+    threads += [threading.Thread(target=read) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+    log = list(catalogue._log)
+    assert [c.version for c in log] == list(range(1, catalogue.version + 1))
+    latest = {}
+    for change in log:
+        latest[change.key] = change.record
+    for name, record in latest.items():
+        assert catalogue.get(name) == record
+    assert (
+        len(catalogue)
+        == len(list(catalogue))
+        == sum(catalogue.get(f"b{i}") is not None for i in range(80))
+    )
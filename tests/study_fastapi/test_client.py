@@ -0,0 +1,221 @@
+"""Tests for the typed study_fastapi HTTP client.
+
+### Proposed Test Cases
+- `test_backoff_delay_full_jitter`: delay is rand() * min(cap, base * 2**attempt).
+- `test_service_urls_single`: one base URL fans out to every service.
+- `test_config_limits_and_http2`: pool limits are forwarded; http2 needs h2 installed.
+- `test_sync_endpoints`: sync client hits the right service URL, method and payload.
+- `test_sync_retries_on_503_for_get`: idempotent requests retry on retryable statuses.
+- `test_sync_no_retry_for_post_status`: POST is not retried on 503 and raises.
+- `test_sync_retries_connect_error_for_post`: connect errors are retried for any method.
+- `test_sync_gives_up_after_retries`: the last transport error is re-raised.
+- `test_sync_fan_out_preserves_order`: fan_out returns results in input order.
+- `test_client_does_not_import_the_server_app`: the models come from a side-effect-free module.
+- `test_async_endpoints_against_apps`: async client against the real ASGI apps.
+- `test_async_retry_and_fan_out`: async retries and bounded concurrent fan-out.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+from httpx import ASGITransport
+
+import study_fastapi
+from study_fastapi import (
+    a2_fastapi_header,
+    a5_pydantic_model,
+    a6_dependency_injection,
+    hello_fastapi,
+)
+from study_fastapi.client import (
+    AsyncStudyClient,
+    ClientConfig,
+    ServiceURLs,
+    StudyClient,
+    backoff_delay,
+)
+from study_fastapi.models import Buyer, Seller
+
+URLS = ServiceURLs(
+    hello="http://hello", header="http://header", models="http://models", di="http://di"
+)
+NO_WAIT = ClientConfig(urls=URLS, backoff_base=0.0)
+
+
+class _HostDispatch:
+    """ASGI app routing requests to the study apps by Host header."""
+
+    apps = {
+        "hello": hello_fastapi.app,
+        "header": a2_fastapi_header.app,
+        "models": a5_pydantic_model.app,
+        "di": a6_dependency_injection.app,
+    }
+
+    async def __call__(self, scope, receive, send):
+        host = dict(scope["headers"])[b"host"].decode()
+        await self.apps[host](scope, receive, send)
+
+
+def test_backoff_delay_full_jitter():
+    assert backoff_delay(0, 0.1, 1.0, rand=lambda: 1.0) == pytest.approx(0.1)
+    assert backoff_delay(3, 0.1, 1.0, rand=lambda: 0.5) == pytest.approx(0.4)
+    assert backoff_delay(10, 0.1, 1.0, rand=lambda: 1.0) == pytest.approx(1.0)
+
+
+def test_service_urls_single():
+    urls = ServiceURLs.single("http://gateway")
+    assert {urls.hello, urls.header, urls.models, urls.di} == {"http://gateway"}
+
+
+def test_config_limits_and_http2(monkeypatch):
+    config = ClientConfig(max_connections=7, max_keepalive_connections=3, http2=True)
+    limits = config.limits()
+    assert limits.max_connections == 7
+    assert limits.max_keepalive_connections == 3
+    monkeypatch.setattr("study_fastapi.client.http2_available", lambda: False)
+    assert config.use_http2() is False
+    assert ClientConfig().use_http2() is False
+
+
+def test_sync_endpoints():
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append((request.method, str(request.url)))
+        path = request.url.path
+        if path == "/sellers":
+            return httpx.Response(200, content=b"[]")
+        if path == "/buyers":
+            return httpx.Response(200, json=[{"name": "Bob", "country": "US", "zipcode": "1"}])
+        if path == "/useragent":
+            return httpx.Response(200, json=request.headers["user-agent"])
+        if path == "/di/secure":
+            return httpx.Response(200, json={"ok": request.headers["x-token"] == "t"})
+        if path == "/di/items":
+            return httpx.Response(200, json=dict(request.url.params))
+        if path == "/hello_header":
+            return httpx.Response(200, json=request.headers["name"])
+        return httpx.Response(200, json=request.content.decode() or path)
+
+    with StudyClient(NO_WAIT, transport=httpx.MockTransport(handler)) as client:
+        assert client.greet() == "/hi"
+        assert client.greet_name("shweta") == "/hi_name/shweta"
+        assert client.greet_name("a/b?c") == "/hi_name/a/b?c"
+        assert client.hello("shweta") == "/hello"
+        assert client.hello_body("shweta") == '{"name":"shweta"}'
+        assert client.hello_header("shweta") == "shweta"
+        assert client.user_agent("ua/1") == "ua/1"
+        assert client.sellers() == []
+        assert client.buyers() == [Buyer(name="Bob", country="US", zipcode="1")]
+        assert client.di_hello() == "/di/hello"
+        assert client.di_hello("x") == "/di/hello"
+        assert client.di_secure("t") == {"ok": True}
+        assert client.di_items(2, 4) == {"limit": "2", "offset": "4"}
+    assert ("GET", "http://hello/hello?name=shweta") in seen
+    assert ("GET", "http://di/di/items?limit=2&offset=4") in seen
+    assert ("GET", "http://hello/hi_name/a%2Fb%3Fc") in seen
+
+
+def test_client_does_not_import_the_server_app():
+    code = (
+        "import sys, study_fastapi.client; print('study_fastapi.a5_pydantic_model' in sys.modules)"
+    )
+    env = {**os.environ, "PYTHONPATH": str(Path(study_fastapi.__file__).parents[1])}
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env)
+    assert result.stdout.strip() == "False", result.stderr
+
+
+def _flaky(statuses):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.method)
+        status = statuses[min(len(calls) - 1, len(statuses) - 1)]
+        if isinstance(status, Exception):
+            raise status
+        return httpx.Response(status, json="ok")
+
+    return handler, calls
+
+
+def test_sync_retries_on_503_for_get():
+    handler, calls = _flaky([503, 502, 200])
+    with StudyClient(NO_WAIT, transport=httpx.MockTransport(handler)) as client:
+        assert client.greet() == "ok"
+    assert len(calls) == 3
+
+
+def test_sync_no_retry_for_post_status():
+    handler, calls = _flaky([503, 200])
+    with StudyClient(NO_WAIT, transport=httpx.MockTransport(handler)) as client:
+        with pytest.raises(httpx.HTTPStatusError):
+            client.hello_body("shweta")
+    assert calls == ["POST"]
+
+
+def test_sync_retries_connect_error_for_post():
+    handler, calls = _flaky([httpx.ConnectError("refused"), 200])
+    with StudyClient(NO_WAIT, transport=httpx.MockTransport(handler)) as client:
+        assert client.hello_body("shweta") == "ok"
+    assert len(calls) == 2
+
+
+def test_sync_gives_up_after_retries():
+    handler, calls = _flaky([httpx.ReadTimeout("slow")])
+    config = ClientConfig(urls=URLS, retries=1, backoff_base=0.0)
+    with StudyClient(config, transport=httpx.MockTransport(handler)) as client:
+        with pytest.raises(httpx.ReadTimeout):
+            client.greet()
+    assert len(calls) == 2
+
+
+def test_sync_fan_out_preserves_order():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=request.url.path.rsplit("/", 1)[-1])
+
+    with StudyClient(NO_WAIT, transport=httpx.MockTransport(handler)) as client:
+        names = [f"n{i}" for i in range(20)]
+        assert client.fan_out(StudyClient.greet_name, names, concurrency=4) == names
+
+
+@pytest.mark.asyncio
+async def test_async_endpoints_against_apps():
+    transport = ASGITransport(app=_HostDispatch())
+    async with AsyncStudyClient(NO_WAIT, transport=transport) as client:
+        assert await client.greet() == "Hello, World!"
+        assert await client.greet_name("shweta") == "Hello, shweta!"
+        assert await client.greet_name("a?b#c") == "Hello, a?b#c!"
+        assert await client.hello("shweta") == "Hello, shweta!"
+        assert await client.hello_body("shweta") == "Hello, shweta!"
+        assert await client.hello_header("shweta") == "Hello, shweta!"
+        assert await client.user_agent("ua/2") == "ua/2"
+        sellers = await client.sellers()
+        assert all(isinstance(s, Seller) for s in sellers) and sellers
+        assert [b.name for b in await client.buyers()] == ["Shweta", "Bob"]
+        assert await client.di_hello() == "Hello, World!"
+        assert await client.di_hello("shweta") == "Hello, shweta!"
+        assert await client.di_secure("token") == {"ok": True}
+        assert (await client.di_items(3, 1))["items"] == [1, 2, 3]
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.di_items(0)
+
+
+@pytest.mark.asyncio
+async def test_async_retry_and_fan_out():
+    handler, calls = _flaky([httpx.ConnectError("refused"), 504, 200])
+    async with AsyncStudyClient(NO_WAIT, transport=httpx.MockTransport(handler)) as client:
+        assert await client.greet() == "ok"
+        assert len(calls) == 3
+        results = await client.fan_out(AsyncStudyClient.greet_name, ["a", "b", "c"], 2)
+        assert results == ["ok", "ok", "ok"]
+
+    handler, calls = _flaky([httpx.ReadTimeout("slow")])
+    config = ClientConfig(urls=URLS, retries=0)
+    async with AsyncStudyClient(config, transport=httpx.MockTransport(handler)) as client:
+        with pytest.raises(httpx.ReadTimeout):
+            await client.greet()
@@ -0,0 +1,85 @@
+"""Tests for the cached validation-error handler."""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.exceptions import RequestValidationError
+from fastapi.testclient import TestClient
+
+from study_fastapi import a2_fastapi_header, a6_dependency_injection, hello_fastapi
+from study_fastapi.errors import CachedValidationErrorHandler, error_key
+
+MISSING = {"type": "missing", "loc": ("query", "name"), "msg": "Field required", "input": None}
+
+
+def _handler(app):
+    return next(
+        h for h in app.exception_handlers.values() if isinstance(h, CachedValidationErrorHandler)
+    )
+
+
+def _default_app(app):
+    # Same routes, FastAPI's own validation-error handler.
+    plain = FastAPI()
+    plain.router.routes.extend(app.router.routes)
+    return plain
+
+
+@pytest.mark.parametrize(
+    "module, method, path, kwargs",
+    [
+        (hello_fastapi, "get", "/hello", {}),
+        (hello_fastapi, "post", "/hello", {"json": {}}),
+        (hello_fastapi, "post", "/hello_header", {}),
+        (a6_dependency_injection, "get", "/di/secure", {}),
+        (a2_fastapi_header, "get", "/hi", {}),
+    ],
+)
+def test_missing_parameters_are_served_from_cache(module, method, path, kwargs):
+    handler = _handler(module.app)
+    expected = getattr(TestClient(_default_app(module.app)), method)(path, **kwargs)
+    client = TestClient(module.app)
+    hits = handler.hits
+    for _ in range(2):
+        response = getattr(client, method)(path, **kwargs)
+        assert response.status_code == 422
+        assert response.content == expected.content
+        assert response.headers["content-type"] == expected.headers["content-type"]
+    assert handler.hits >= hits + 1
+
+
+def test_errors_echoing_input_are_not_cached():
+    handler = _handler(a6_dependency_injection.app)
+    client = TestClient(a6_dependency_injection.app)
+    expected = TestClient(_default_app(a6_dependency_injection.app)).get(
+        "/di/items", params={"limit": "many"}
+    )
+    before = len(handler._bodies)
+    response = client.get("/di/items", params={"limit": "many"})
+    assert response.status_code == 422
+    assert response.content == expected.content
+    assert response.json()["detail"][0]["input"] == "many"
+    assert len(handler._bodies) == before
+
+
+def test_error_key():
+    assert error_key([MISSING]) == (("missing", ("query", "name"), "Field required"),)
+    assert error_key([MISSING, {**MISSING, "loc": ("header", "x")}])[1][1] == ("header", "x")
+    assert error_key([{**MISSING, "input": "x"}]) is None
+    assert error_key([{**MISSING, "ctx": {"limit": 1}}]) is None
+    assert error_key([{**MISSING, "url": "https://errors.pydantic.dev"}]) is None
+
+
+def test_least_recently_used_bodies_are_dropped():
+    app = FastAPI()
+    handler = CachedValidationErrorHandler(maxsize=2)
+    app.add_exception_handler(RequestValidationError, handler)
+
+    @app.get("/a")
+    def a(x: int, y: int, z: int):
+        return x + y + z
+
+    client = TestClient(app)
+    for params in ({"y": 1, "z": 1}, {"x": 1, "z": 1}, {"y": 1, "z": 1}, {"x": 1, "y": 1}):
+        assert client.get("/a", params=params).status_code == 422
+    assert (handler.hits, handler.misses) == (1, 3)
+    assert [key[0][1] for key in handler._bodies] == [("query", "x"), ("query", "z")]
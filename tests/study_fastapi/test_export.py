@@ -0,0 +1,131 @@
+"""Tests for streaming columnar exports."""
+
+import csv
+import io
+import json
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from study_fastapi import export
+from study_fastapi.a5_pydantic_model import Buyer, Seller, app
+from study_fastapi.export import iter_csv, iter_ndjson
+
+
+def _buyers(count):
+    for index in range(count):
+        yield Buyer(name=f"b{index}", country="IN", zipcode=str(index))
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+def test_ndjson_export_projects_fields(client):
+    response = client.get("/sellers/export", params={"fields": "name,country"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"] == 'attachment; filename="sellers.ndjson"'
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows == [
+        {"name": "Share Exports", "country": "CN"},
+        {"name": "Tirupati Mills", "country": "IN"},
+    ]
+
+
+def test_csv_export(client):
+    response = client.get("/buyers/export", params={"format": "csv", "fields": "zipcode,name"})
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    assert list(csv.reader(io.StringIO(response.text))) == [
+        ["zipcode", "name"],
+        ["560035", "Shweta"],
+        ["99001", "Bob"],
+    ]
+
+
+def test_csv_quotes_and_nulls():
+    seller = Seller(
+        name='Quote "Co", Ltd', country="US", shipping_port=None, shop_description="", aka=""
+    )
+    body = b"".join(iter_csv([seller], ("name", "shipping_port")))
+    assert list(csv.reader(io.StringIO(body.decode()))) == [
+        ["name", "shipping_port"],
+        ['Quote "Co", Ltd', ""],
+    ]
+
+
+class Nested(BaseModel):
+    name: str
+    tags: list[str]
+    meta: dict[str, Any] | None
+    owner: Buyer | None = None
+
+
+def test_csv_writes_containers_as_json():
+    rows = [
+        Nested(
+            name="a",
+            tags=["x", "y"],
+            meta={"k": None},
+            owner=Buyer(name="b", country="IN", zipcode="1"),
+        ),
+        Nested(name="b", tags=[], meta=None),
+    ]
+    body = b"".join(iter_csv(rows, ("name", "tags", "meta", "owner")))
+    assert list(csv.reader(io.StringIO(body.decode()))) == [
+        ["name", "tags", "meta", "owner"],
+        ["a", '["x","y"]', '{"k":null}', '{"name":"b","country":"IN","zipcode":"1"}'],
+        ["b", "[]", "", ""],
+    ]
+
+
+def test_unknown_field_is_422(client):
+    response = client.get("/buyers/export", params={"fields": "name,secret"})
+    assert response.status_code == 422
+    error = response.json()["detail"][0]
+    assert error["loc"] == ["query", "fields"]
+    assert "secret" in error["msg"]
+    assert client.get("/buyers/export", params={"fields": ", ,"}).status_code == 422
+
+
+def test_export_is_chunked_and_lazy():
+    consumed = 0
+
+    def rows():
+        nonlocal consumed
+        for buyer in _buyers(25):
+            consumed += 1
+            yield buyer
+
+    chunks = iter_ndjson(rows(), Buyer, ("name",), chunk_size=10)
+    first = next(chunks)
+    assert first.count(b"\n") == 10
+    assert consumed == 10  # nothing past the first chunk was read
+    assert [chunk.count(b"\n") for chunk in chunks] == [10, 5]
+
+    csv_chunks = list(iter_csv(_buyers(25), ("name",), chunk_size=10))
+    assert [chunk.count(b"\n") for chunk in csv_chunks] == [11, 10, 5]
+    assert list(iter_csv([], ("name",))) == [b"name\n"]
+
+
+def test_arrow_without_pyarrow_is_406(client, monkeypatch):
+    monkeypatch.setattr(export, "pyarrow_available", lambda: False)
+    response = client.get("/sellers/export", params={"format": "arrow"})
+    assert response.status_code == 406
+
+
+def test_arrow_export(client):
+    pa = pytest.importorskip("pyarrow")
+    response = client.get(
+        "/sellers/export", params={"format": "arrow", "fields": "name,shipping_port"}
+    )
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column_names == ["name", "shipping_port"]
+    assert table.schema.field("shipping_port").nullable
+    assert table.to_pylist()[1] == {"name": "Tirupati Mills", "shipping_port": "Chennai"}
+
+    chunks = list(export.iter_arrow(_buyers(25), Buyer, ("name",), chunk_size=10))
+    assert pa.ipc.open_stream(b"".join(chunks)).read_all().num_rows == 25
@@ -0,0 +1,75 @@
+"""Tests for compiled header schemas and the cached User-Agent parser."""
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from study_fastapi.header_schema import HeaderSchema, UserAgent, parse_user_agent
+
+
+def test_extract_one_pass_first_wins():
+    schema = HeaderSchema("X-Token", "User-Agent", optional=["x-token"])
+    raw = [(b"user-agent", b"a"), (b"user-agent", b"b"), (b"host", b"h")]
+    assert schema.extract(raw) == {"x_token": None, "user_agent": "a"}
+
+
+def test_extract_does_not_share_state():
+    schema = HeaderSchema("x-a")
+    assert schema.extract([(b"x-a", b"1")]) == {"x_a": "1"}
+    assert schema.extract([]) == {"x_a": None}
+
+
+def test_dependency_required_and_optional():
+    schema = HeaderSchema("x-token", "x-trace", optional=["x-trace"])
+    app = FastAPI()
+
+    @app.get("/", openapi_extra=schema.openapi_extra())
+    def route(headers: dict = Depends(schema)):
+        return headers
+
+    client = TestClient(app)
+    assert client.get("/", headers={"X-Token": "t"}).json() == {"x_token": "t", "x_trace": None}
+    response = client.get("/")
+    assert response.status_code == 422
+    assert response.json()["detail"] == [
+        {"type": "missing", "loc": ["header", "x-token"], "msg": "Field required", "input": None}
+    ]
+    parameters = client.get("/openapi.json").json()["paths"]["/"]["get"]["parameters"]
+    assert [(p["name"], p["required"]) for p in parameters] == [
+        ("x-token", True),
+        ("x-trace", False),
+    ]
+
+
+@pytest.mark.parametrize(
+    "user_agent, expected",
+    [
+        ("curl/8.4.0", UserAgent("curl", "8.4.0", None)),
+        ("testclient", UserAgent("testclient", None, None)),
+        (
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+            "Chrome/126.0.0.0 Safari/537.36 Edg/126.0.2592.87",
+            UserAgent("Edge", "126.0.2592.87", "Windows"),
+        ),
+        (
+            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 "
+            "(KHTML, like Gecko) Version/17.5 Safari/605.1.15",
+            UserAgent("Safari", "17.5", "macOS"),
+        ),
+        (
+            "Mozilla/5.0 (Linux; Android 14) AppleWebKit/537.36 Chrome/126.0 Mobile",
+            UserAgent("Chrome", "126.0", "Android"),
+        ),
+        ("Mozilla/5.0 (iPhone; CPU iPhone OS 17_5)", UserAgent("Mozilla", "5.0", "iOS")),
+        ("!!", UserAgent("Other", None, None)),
+    ],
+)
+def test_parse_user_agent(user_agent, expected):
+    assert parse_user_agent(user_agent) == expected
+
+
+def test_parse_user_agent_is_cached():
+    parse_user_agent.cache_clear()
+    parse_user_agent("curl/1.0")
+    parse_user_agent("curl/1.0")
+    assert parse_user_agent.cache_info().hits == 1
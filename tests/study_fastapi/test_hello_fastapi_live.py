@@ -5,11 +5,13 @@ import pytest
 
 
 @pytest.fixture(scope="module")
-def httpx_client(uvicorn_server_factory):
-    host, port = "127.0.0.1", "8001"
-    app_module = "study_fastapi.hello_fastapi"
-    uvicorn_server_factory(app_module, host=host, port=port)
-    with httpx.Client(base_url=f"http://{host}:{port}") as client:
+def server(live_server):
+    return live_server("study_fastapi.hello_fastapi")
+
+
+@pytest.fixture(scope="module")
+def httpx_client(server):
+    with httpx.Client(base_url=server.url) as client:
         yield client
 
 
@@ -108,3 +110,16 @@ def test_hello_post_header_error(httpx_client):
             }
         ]
     }
+
+
+def test_hi_under_load(server, load_test):
+    """Concurrent clients all get the greeting."""
+    result = load_test(server, "/hi", requests=200, concurrency=20)
+    assert result.statuses == {200: 200}, str(result)
+
+
+def test_servers_are_shared_and_failures_reported(server, live_server):
+    """One server per app on each worker; a broken app fails fast with its output."""
+    assert live_server("study_fastapi.hello_fastapi") is server
+    with pytest.raises(RuntimeError, match="did not start"):
+        live_server("study_fastapi.no_such_module")
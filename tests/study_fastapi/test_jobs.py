@@ -0,0 +1,234 @@
+"""Tests for the in-process background job queue."""
+
+import asyncio
+import json
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from study_fastapi.jobs import (
+    JobQueue,
+    JobStatus,
+    QueueFullError,
+    UnknownTaskError,
+    _PendingStore,
+    submit_or_503,
+)
+
+
+def _fail(payload):
+    raise ValueError(f"bad {payload}")
+
+
+async def _wait_for(queue, job_id, timeout=5.0):
+    async def poll():
+        while queue.get(job_id).status in (JobStatus.PENDING, JobStatus.RUNNING):
+            await asyncio.sleep(0.005)
+        return queue.get(job_id)
+
+    return await asyncio.wait_for(poll(), timeout)
+
+
+@pytest.mark.asyncio
+async def test_submit_runs_and_reports_metrics():
+    queue = JobQueue(workers=2)
+    queue.register("double", lambda x: x * 2)
+    queue.register("fail", _fail)
+    await queue.start()
+    await queue.start()  # idempotent
+    try:
+        ok = await queue.submit("double", 21)
+        bad = await queue.submit("fail", 1)
+        assert (await _wait_for(queue, ok.id)).result == 42
+        failed = await _wait_for(queue, bad.id)
+        assert failed.status is JobStatus.FAILED
+        assert failed.error == "ValueError: bad 1"
+    finally:
+        await queue.stop()
+    metrics = queue.metrics()
+    assert (metrics.submitted, metrics.completed, metrics.failed) == (2, 1, 1)
+    assert metrics.mean_run_ms >= 0 and metrics.throughput_per_s > 0
+
+
+@pytest.mark.asyncio
+async def test_unknown_task_and_backpressure():
+    queue = JobQueue(max_size=2)
+    queue.register("noop", lambda x: x)
+    with pytest.raises(UnknownTaskError):
+        await queue.submit("missing", None)
+    await queue.submit("noop", 1)
+    await queue.submit("noop", 2)
+    with pytest.raises(QueueFullError):
+        await queue.submit("noop", 3)
+    assert queue.metrics().rejected == 1
+    assert queue.metrics().queue_depth == 2
+    assert queue.get("nope") is None
+
+
+@pytest.mark.asyncio
+async def test_pending_jobs_survive_restart(tmp_path):
+    db = str(tmp_path / "jobs.sqlite")
+    first = JobQueue(db_path=db)
+    first.register("echo", lambda x: x)
+    job = await first.submit("echo", {"a": [1, 2]})
+    await first.stop()  # never started: the job is still pending on disk
+
+    second = JobQueue(db_path=db)
+    second.register("echo", lambda x: x)
+    await second.start()
+    try:
+        done = await _wait_for(second, job.id)
+        assert done.result == {"a": [1, 2]}
+    finally:
+        await second.stop()
+
+    third = JobQueue(db_path=db)
+    third.register("echo", lambda x: x)
+    await third.start()
+    assert third.get(job.id) is None  # finished jobs are removed from the store
+    await third.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_waits_for_finished_jobs_to_leave_the_store(tmp_path, monkeypatch):
+    remove = _PendingStore.remove
+
+    def slow_remove(self, job_id):
+        threading.Event().wait(0.2)
+        remove(self, job_id)
+
+    monkeypatch.setattr(_PendingStore, "remove", slow_remove)
+    db = str(tmp_path / "jobs.sqlite")
+    queue = JobQueue(db_path=db)
+    queue.register("echo", lambda x: x)
+    await queue.start()
+    job = await queue.submit("echo", 1)
+    await _wait_for(queue, job.id)
+    await queue.stop()  # while the finished job's row is still being deleted
+
+    store = _PendingStore(db)
+    try:
+        assert store.load() == []
+    finally:
+        store.close()
+
+
+@pytest.mark.asyncio
+async def test_restart_requeues_beyond_max_size(tmp_path):
+    db = str(tmp_path / "jobs.sqlite")
+    release = threading.Event()
+    first = JobQueue(max_size=2, workers=1, db_path=db)
+    first.register("wait", lambda x: release.wait(5))
+    await first.start()
+    jobs = [await first.submit("wait", n) for n in range(2)]
+    await asyncio.sleep(0.05)  # the worker takes the first job
+    jobs.append(await first.submit("wait", 2))
+    await first.stop()  # one running and two queued jobs are carried over
+
+    second = JobQueue(max_size=2, workers=1, db_path=db)
+    second.register("wait", lambda x: x)
+    await second.start()
+    try:
+        results = [(await _wait_for(second, job.id)).result for job in jobs]
+        assert sorted(results) == [0, 1, 2]
+    finally:
+        release.set()
+        await second.stop()
+
+
+@pytest.mark.asyncio
+async def test_process_executor():
+    queue = JobQueue(executor="process", workers=1)
+    queue.register("dumps", json.dumps)
+    await queue.start()
+    try:
+        job = await queue.submit("dumps", [1, "a"])
+        assert (await _wait_for(queue, job.id, timeout=30)).result == '[1, "a"]'
+    finally:
+        await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_finished_jobs_are_evicted():
+    queue = JobQueue(max_results=2)
+    queue.register("noop", lambda x: x)
+    await queue.start()
+    try:
+        ids = [(await queue.submit("noop", i)).id for i in range(4)]
+        await queue._queue.join()
+    finally:
+        await queue.stop()
+    assert [queue.get(job_id) is not None for job_id in ids] == [False, False, True, True]
+
+
+@pytest.mark.asyncio
+async def test_only_finished_jobs_are_evicted():
+    release = threading.Event()
+    queue = JobQueue(max_results=1, workers=2)
+    queue.register("wait", lambda x: release.wait(5))
+    queue.register("noop", lambda x: x)
+    await queue.start()
+    try:
+        slow = await queue.submit("wait", None)
+        ids = [(await queue.submit("noop", i)).id for i in range(3)]
+        await _wait_for(queue, ids[-1])
+        assert queue.get(slow.id).status is JobStatus.RUNNING
+        assert [queue.get(job_id) is not None for job_id in ids] == [False, False, True]
+        release.set()
+        await _wait_for(queue, slow.id)
+        assert queue.get(ids[-1]) is None
+    finally:
+        release.set()
+        await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_store_is_used_off_the_event_loop(tmp_path, monkeypatch):
+    threads = []
+    add = _PendingStore.add
+
+    def recording_add(self, job, payload):
+        threads.append(threading.current_thread())
+        add(self, job, payload)
+
+    monkeypatch.setattr(_PendingStore, "add", recording_add)
+    queue = JobQueue(db_path=str(tmp_path / "jobs.sqlite"))
+    queue.register("noop", lambda x: x)
+    await queue.submit("noop", 1)
+    await queue.stop()
+    assert threads and threading.main_thread() not in threads
+
+
+def test_from_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("JOB_QUEUE_SIZE", "3")
+    monkeypatch.setenv("JOB_WORKERS", "1")
+    monkeypatch.setenv("JOB_EXECUTOR", "process")
+    monkeypatch.setenv("JOB_DB_PATH", str(tmp_path / "env.sqlite"))
+    monkeypatch.setenv("JOB_MAX_RESULTS", "5")
+    queue = JobQueue.from_env()
+    assert queue._max_size == 3
+    assert queue._max_results == 5
+    assert queue._executor_kind == "process"
+    assert queue._store is not None
+
+
+def test_router_and_503():
+    queue = JobQueue(max_size=1)
+    queue.register("noop", lambda x: x)
+    app = FastAPI()
+    app.include_router(queue.router())
+
+    @app.post("/submit")
+    async def submit():
+        return await submit_or_503(queue, "noop", None)
+
+    client = TestClient(app)
+    job_id = client.post("/submit").json()["id"]
+    response = client.post("/submit")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert client.get(f"/jobs/{job_id}").json()["status"] == "pending"
+    assert client.get("/jobs/unknown").status_code == 404
+    assert client.get("/jobs/metrics").json()["rejected"] == 1
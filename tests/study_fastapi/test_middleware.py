@@ -0,0 +1,94 @@
+"""Tests for the request-context middleware."""
+
+import json
+import logging
+
+import pytest
+from fastapi import FastAPI, WebSocket
+from fastapi.testclient import TestClient
+
+from study_fastapi.middleware import RequestContextMiddleware
+from utils.logging_utils import JsonFormatter, RequestContextFilter, get_request_context
+
+log = logging.getLogger("test.middleware")
+
+
+def _capture(logger: logging.Logger):
+    captured: list[logging.LogRecord] = []
+    handler = logging.Handler()
+    handler.addFilter(RequestContextFilter())
+    handler.emit = captured.append
+    logger.addHandler(handler)
+    return captured, handler
+
+
+@pytest.fixture
+def records():
+    log.setLevel(logging.INFO)
+    captured, handler = _capture(log)
+    yield captured
+    log.removeHandler(handler)
+
+
+def _app(**kwargs) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/sync/{name}")
+    def sync_route(name: str):
+        log.info("sync %s", name)
+        return name
+
+    @app.get("/async/{name}")
+    async def async_route(name: str):
+        log.info("async %s", name)
+        return get_request_context().request_id
+
+    @app.websocket("/ws")
+    async def ws(websocket: WebSocket):
+        await websocket.accept()
+        await websocket.send_text(get_request_context().route)
+        await websocket.close()
+
+    app.add_middleware(RequestContextMiddleware, **kwargs)
+    return app
+
+
+def test_records_carry_request_id_and_route_template(records):
+    client = TestClient(_app())
+    sync = client.get("/sync/ann")
+    asynchronous = client.get("/async/bob")
+    assert [r.getMessage() for r in records] == ["sync ann", "async bob"]
+    assert records[0].request_id == sync.headers["x-request-id"]
+    assert records[1].request_id == asynchronous.headers["x-request-id"] == asynchronous.json()
+    assert [r.route for r in records] == ["/sync/{name}", "/async/{name}"]
+    assert json.loads(JsonFormatter().format(records[0]))["route"] == "/sync/{name}"
+    assert sync.headers["x-request-id"] != asynchronous.headers["x-request-id"]
+
+
+def test_incoming_request_id_is_reused_when_valid():
+    client = TestClient(_app())
+    response = client.get("/async/x", headers={"X-Request-ID": "upstream-42"})
+    assert response.headers["x-request-id"] == "upstream-42" == response.json()
+    response = client.get("/async/x", headers={"X-Request-ID": "bad id\t!"})
+    assert response.headers["x-request-id"] != "bad id\t!"
+    assert len(response.json()) == 32
+
+
+def test_websocket_context_and_unmatched_path():
+    client = TestClient(_app())
+    with client.websocket_connect("/ws") as websocket:
+        assert websocket.receive_text() == "/ws"
+    assert client.get("/missing").headers["x-request-id"]
+
+
+def test_slow_requests_are_logged():
+    logger = logging.getLogger("study_fastapi.middleware")
+    captured, handler = _capture(logger)
+    try:
+        response = TestClient(_app(slow_ms=-1)).get("/async/x")
+        TestClient(_app(slow_ms=60_000)).get("/async/x")
+    finally:
+        logger.removeHandler(handler)
+    (record,) = captured
+    assert record.getMessage() == "slow request: GET /async/x"
+    assert record.request_id == response.headers["x-request-id"]
@@ -0,0 +1,192 @@
+"""Tests for offloading CPU-heavy encodes to worker pools."""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from study_fastapi import offload
+from study_fastapi.encoders import get_fastapi_encoded_string
+from study_fastapi.offload import Offloader, OffloadPool, default_pool_kind, estimate_size
+
+
+class Unencodable:
+    pass
+
+
+def _slow_dumps(obj):
+    time.sleep(0.3)
+    return json.dumps(obj)
+
+
+def test_estimate_size():
+    assert estimate_size([1, 2, 3]) == 3
+    assert estimate_size(5) == 1
+    assert estimate_size("abcd") == 1
+    assert estimate_size("x" * 10_000) == 101
+    assert estimate_size({"data": list(range(100_000))}) == 100_000
+    assert estimate_size({"data": list(range(100_000))}, limit=500) == 500
+    assert estimate_size(Unencodable()) == 1
+    nested: list = []
+    for _ in range(100):
+        nested = [nested, 1]
+    assert estimate_size(nested) > 1
+
+
+def test_default_pool_kind(monkeypatch):
+    monkeypatch.delattr(offload.concurrent.futures, "InterpreterPoolExecutor", raising=False)
+    monkeypatch.setattr(sys, "_is_gil_enabled", lambda: False, raising=False)
+    assert default_pool_kind() == "thread"
+    monkeypatch.setattr(sys, "_is_gil_enabled", lambda: True, raising=False)
+    assert default_pool_kind() == "process"
+    monkeypatch.setattr(
+        offload.concurrent.futures, "InterpreterPoolExecutor", object, raising=False
+    )
+    assert default_pool_kind() == "interpreter"
+
+
+@pytest.mark.asyncio
+async def test_below_threshold_runs_inline():
+    offloader = Offloader(json.dumps, threshold=10, pool="process")
+    assert await offloader.encode([1, 2]) == "[1, 2]"
+    assert offloader.pool._executor is None
+
+
+@pytest.mark.asyncio
+async def test_process_pool_round_trips_through_shared_memory():
+    offloader = Offloader(get_fastapi_encoded_string, threshold=2, pool="process", max_workers=1)
+    payload = [{"name": "é", "n": i} for i in range(1000)]
+    try:
+        assert await offloader.encode(payload) == get_fastapi_encoded_string(payload)
+        with pytest.raises(TypeError):
+            await Offloader(json.dumps, threshold=1, pool="process", max_workers=1).encode(
+                [Unencodable()]
+            )
+    finally:
+        offloader.close()
+    offloader.close()  # idempotent
+
+
+@pytest.mark.asyncio
+async def test_input_block_released_when_worker_never_runs():
+    offloader = Offloader(json.dumps, threshold=1, pool="process", max_workers=1)
+    offloader.pool.executor().shutdown()
+    with pytest.raises(RuntimeError):
+        await offloader.encode([1, 2, 3])
+
+
+def _exists(name):
+    return os.path.exists(os.path.join("/dev/shm", name.lstrip("/")))
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason="needs /dev/shm")
+async def test_output_block_released_when_cancelled(monkeypatch):
+    # Track this offloader's own blocks: other xdist workers use /dev/shm concurrently.
+    blocks: list[str] = []
+    released = threading.Event()
+    write_shm, release_blocks = offload._write_shm, offload._release_blocks
+
+    def recording_write_shm(data):
+        name, size = write_shm(data)
+        blocks.append(name)
+        return name, size
+
+    def recording_release_blocks(name, job):
+        if not job.cancelled() and job.exception() is None:
+            blocks.append(job.result()[0])  # the worker's output block
+        release_blocks(name, job)
+        released.set()
+
+    monkeypatch.setattr(offload, "_write_shm", recording_write_shm)
+    monkeypatch.setattr(offload, "_release_blocks", recording_release_blocks)
+    offloader = Offloader(_slow_dumps, threshold=1, pool="process", max_workers=1)
+    try:
+        await offloader.warm()
+        task = asyncio.create_task(offloader.encode([1, 2, 3]))
+        # Wait until the worker has read (and unlinked) the input: generous deadlines, as
+        # xdist workers may share a single CPU.
+        deadline = time.monotonic() + 10
+        while not (blocks and not _exists(blocks[0])) and time.monotonic() < deadline:
+            await asyncio.sleep(0.005)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # The worker finishes and writes its output block.
+        assert await asyncio.to_thread(released.wait, 10)
+        assert len(blocks) == 2
+        assert not any(_exists(name) for name in blocks)
+    finally:
+        offloader.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason="needs /dev/shm")
+async def test_payload_is_staged_off_the_loop(monkeypatch):
+    staged: list[tuple[int, str]] = []
+    pickle_shm = offload._pickle_shm
+
+    def slow_pickle_shm(obj):
+        time.sleep(0.2)
+        name, size = pickle_shm(obj)
+        staged.append((threading.get_ident(), name))
+        return name, size
+
+    monkeypatch.setattr(offload, "_pickle_shm", slow_pickle_shm)
+    offloader = Offloader(json.dumps, threshold=1, pool="process", max_workers=1)
+    try:
+        await offloader.warm()
+        assert await offloader.encode([1, 2, 3]) == "[1, 2, 3]"
+        assert staged[0][0] != threading.get_ident()
+
+        task = asyncio.create_task(offloader.encode([4, 5, 6]))
+        await asyncio.sleep(0.05)  # cancelled while the payload is still being pickled
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        deadline = time.monotonic() + 10
+        while len(staged) < 2 and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)  # the done-callback runs on the next loop iteration
+        assert len(staged) == 2
+        assert not _exists(staged[1][1])
+    finally:
+        offloader.close()
+
+
+@pytest.mark.asyncio
+async def test_thread_pool_passes_objects_directly():
+    offloader = Offloader(json.dumps, threshold=1, pool="thread", max_workers=2)
+    try:
+        assert await offloader.encode({"a": 1}) == '{"a": 1}'
+    finally:
+        offloader.close()
+
+
+def _imported(name):
+    return name in sys.modules
+
+
+@pytest.mark.asyncio
+async def test_offloaders_share_a_pool_that_starts_one_worker():
+    pool = OffloadPool("process", max_workers=3)
+    first = Offloader(get_fastapi_encoded_string, threshold=1, pool=pool)
+    second = Offloader(json.dumps, threshold=1, pool=pool)
+    try:
+        await first.warm()
+        assert len(pool.executor()._processes) == 1
+        assert await first.encode([1]) == await second.encode([1]) == "[1]"
+        # Workers unpickle the encoder from a module that builds no app.
+        loop = asyncio.get_running_loop()
+        app_module = "study_fastapi.a3_jsonable_encoder"
+        assert not await loop.run_in_executor(pool.executor(), _imported, app_module)
+        first.close()
+        second.close()
+        assert pool._executor is not None  # shared pools are closed by their owner
+    finally:
+        pool.close()
+    assert pool._executor is None
@@ -0,0 +1,190 @@
+"""Tests for ahead-of-time OpenAPI snapshots."""
+
+import gzip
+import importlib
+import json
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from study_fastapi import a5_pydantic_model, openapi_snapshot
+from study_fastapi.app_factory import AppConfig, create_app
+from study_fastapi.openapi_snapshot import (
+    APP_MODULES,
+    GENERATED_WITH,
+    _module_app,
+    accepts_gzip,
+    drifted,
+    dump_schema,
+    generate_schema,
+    generator_versions,
+    install_snapshot,
+    load_snapshot,
+    main,
+    snapshot_path,
+    stale_versions,
+    write_snapshots,
+)
+
+
+@pytest.mark.parametrize("name", APP_MODULES)
+def test_snapshot_matches_code(name):
+    # Fails when routes change without regenerating the snapshots:
+    #   PYTHONPATH=src python -m study_fastapi.openapi_snapshot
+    if (versions := stale_versions(name)) is not None:
+        pytest.skip(f"snapshot generated with {versions}, not {generator_versions()}")
+    stored = snapshot_path(name).read_text()
+    assert stored == dump_schema(generate_schema(_module_app(name)))
+
+
+@pytest.fixture
+def writable_catalogue(monkeypatch, tmp_path):
+    # Rebuild the a5 app with catalogue writes enabled, then as it was.
+    monkeypatch.setenv("CATALOGUE_WRITE_TOKEN", "secret")
+    monkeypatch.setenv("CATALOGUE_WRITER_LOCK", str(tmp_path / "writer.lock"))
+    yield importlib.reload(a5_pydantic_model).app
+    monkeypatch.delenv("CATALOGUE_WRITE_TOKEN")
+    monkeypatch.delenv("CATALOGUE_WRITER_LOCK")
+    importlib.reload(a5_pydantic_model)
+
+
+def test_write_routes_are_documented_when_enabled(writable_catalogue):
+    client = TestClient(writable_catalogue)
+    schema = client.get("/openapi.json").json()
+    for path in ("/sellers/{key}", "/buyers/{key}"):
+        assert set(schema["paths"][path]) == {"put", "delete"}
+        assert schema["paths"][path]["put"]["security"] == [{"HTTPBearer": []}]
+    assert schema["components"]["securitySchemes"]["HTTPBearer"]["scheme"] == "bearer"
+    seller = {"name": "Ana", "country": "PT", "shipping_port": None}
+    seller |= {"shop_description": "Cork", "aka": "Ana's"}
+    put = client.put("/sellers/Ana", json=seller, headers={"Authorization": "Bearer secret"})
+    assert put.status_code == 200
+    # The stored (read-only) schema is not checked against this configuration.
+    assert drifted(["a5_pydantic_model"]) == []
+
+
+@pytest.fixture
+def header_app(tmp_path, monkeypatch):
+    # An app serving a2's schema from a snapshot made with the installed libraries, so the
+    # serving tests do not depend on the stored files being current.
+    monkeypatch.setattr(openapi_snapshot, "SNAPSHOT_DIR", tmp_path)
+    write_snapshots(["a2_fastapi_header"])
+    app = FastAPI()
+    assert install_snapshot(app, "a2_fastapi_header")
+    return app
+
+
+def test_loaded_schema_is_not_regenerated(header_app):
+    stored, versions = load_snapshot("a2_fastapi_header")
+    assert versions == generator_versions()
+    assert stored["paths"]  # the app itself has no routes to generate them from
+    assert header_app.openapi() == stored
+    assert GENERATED_WITH not in TestClient(header_app).get("/openapi.json").json()
+
+
+def test_served_identity_gzip_and_304(header_app):
+    client = TestClient(header_app)
+    plain = client.get("/openapi.json", headers={"Accept-Encoding": "identity"})
+    assert plain.status_code == 200
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["vary"] == "Accept-Encoding"
+    assert plain.json() == header_app.openapi()
+
+    raw = client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+    assert raw.headers["content-encoding"] == "gzip"
+    assert raw.json() == plain.json()  # httpx decodes the gzip body
+    assert raw.headers["vary"] == "Accept-Encoding"
+    assert raw.headers["etag"] != plain.headers["etag"]  # different representations
+
+    revalidated = client.get("/openapi.json", headers={"If-None-Match": raw.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == raw.headers["etag"]
+    identity = {"If-None-Match": plain.headers["etag"], "Accept-Encoding": "identity"}
+    assert client.get("/openapi.json", headers=identity).status_code == 304
+    # A cached identity body is not current for a client that would get gzip.
+    stale = client.get("/openapi.json", headers={"If-None-Match": plain.headers["etag"]})
+    assert stale.status_code == 200
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("gzip, deflate", True),
+        ("br;q=1.0, GZIP;q=0.5", True),
+        ("gzip;q=0", False),
+        ("gzip; q=0.000", False),
+        ("*", True),
+        ("*;q=0", False),
+        ("identity", False),
+        ("", False),
+        ("gzip;q=bogus", False),
+    ],
+)
+def test_accepts_gzip_honours_q_values(header, expected):
+    assert accepts_gzip(header) is expected
+
+
+def test_gzip_bytes_are_deterministic():
+    first = openapi_snapshot.EncodedBody(b"{}" * 100, "application/json")
+    second = openapi_snapshot.EncodedBody(b"{}" * 100, "application/json")
+    assert first.gzip_body == second.gzip_body
+    assert gzip.decompress(first.gzip_body) == b"{}" * 100
+
+
+def test_docs_pages_cached_per_root_path(header_app):
+    client = TestClient(header_app, root_path="/api")
+    docs = client.get("/docs")
+    assert docs.status_code == 200
+    assert "/api/openapi.json" in docs.text
+    assert client.get("/redoc").status_code == 200
+    schema = client.get("/openapi.json").json()
+    assert schema["servers"] == [{"url": "/api"}]
+    assert client.get("/docs", headers={"If-None-Match": docs.headers["etag"]}).status_code == 304
+
+
+def test_missing_snapshot_falls_back_to_lazy_generation():
+    app = create_app(AppConfig(openapi_snapshot="no_such_app", warm=False))
+
+    @app.get("/x")
+    def x() -> int:
+        return 1
+
+    assert install_snapshot(FastAPI(), "no_such_app") is False
+    assert "/x" in TestClient(app).get("/openapi.json").json()["paths"]
+
+
+def test_check_reports_drift(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(openapi_snapshot, "SNAPSHOT_DIR", tmp_path)
+    (tmp_path / "a8_mvcapp.json").write_text(json.dumps({GENERATED_WITH: generator_versions()}))
+    assert drifted(["a8_mvcapp", "hello_fastapi"]) == ["a8_mvcapp", "hello_fastapi"]
+    assert main(["--check"]) == 1
+    assert "out of date" in capsys.readouterr().out
+
+    assert main([]) == 0
+    assert main(["--check"]) == 0
+    assert sorted(p.stem for p in tmp_path.iterdir()) == sorted(APP_MODULES)
+
+
+def test_snapshots_from_other_library_versions_are_not_served_or_checked(tmp_path, monkeypatch):
+    monkeypatch.setattr(openapi_snapshot, "SNAPSHOT_DIR", tmp_path)
+    schema = generate_schema(_module_app("a8_mvcapp"))
+    old = {**schema, "paths": {"/gone": {}}, GENERATED_WITH: {"fastapi": "0.1", "pydantic": "1.0"}}
+    (tmp_path / "a8_mvcapp.json").write_text(json.dumps(old))
+    records: list[logging.LogRecord] = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    openapi_snapshot.log.addHandler(handler)
+    try:
+        assert stale_versions("a8_mvcapp") == {"fastapi": "0.1", "pydantic": "1.0"}
+        assert drifted(["a8_mvcapp"]) == []
+        app = FastAPI()
+        assert install_snapshot(app, "a8_mvcapp") is False
+        assert "/gone" not in TestClient(app).get("/openapi.json").json()["paths"]
+    finally:
+        openapi_snapshot.log.removeHandler(handler)
+    messages = [record.getMessage() for record in records]
+    assert messages[0].endswith("not checked")
+    assert messages[1].endswith("generating lazily")
@@ -0,0 +1,203 @@
+"""Tests for the opt-in profiling middleware."""
+
+import cProfile
+import logging
+import pstats
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from study_fastapi.profiling import (
+    MAX_PROFILE_TTL,
+    ProfilingMiddleware,
+    add_profiling,
+    collapse_stats,
+    sign_profile_request,
+    verify_profile_header,
+)
+
+
+def _app(**kwargs):
+    app = FastAPI()
+
+    @app.get("/work/{n}")
+    async def work(n: int):
+        return sum(i * i for i in range(n))
+
+    app.add_middleware(ProfilingMiddleware, **kwargs)
+    return app
+
+
+def _profiles(tmp_path):
+    return sorted(tmp_path.rglob("*.collapsed"))
+
+
+def test_sign_and_verify():
+    value = sign_profile_request("s3cret", 2_000)
+    assert verify_profile_header("s3cret", value, now=1_500)
+    assert not verify_profile_header("s3cret", value, now=3_000)  # expired
+    assert not verify_profile_header("other", value, now=1_500)
+    assert not verify_profile_header("s3cret", "garbage", now=1_000)
+    # Valid for longer than the maximum TTL: rejected, however well signed.
+    assert not verify_profile_header("s3cret", value, now=2_000 - MAX_PROFILE_TTL - 1)
+    assert verify_profile_header("s3cret", value, now=0, max_ttl=2_000)
+    # Non-ASCII digits and overlong numbers are rejected rather than raising in int().
+    assert not verify_profile_header("s3cret", "\u00b2.abc", now=0)
+    assert not verify_profile_header("s3cret", "9" * 5_000 + ".abc", now=0)
+
+
+def test_collapse_stats_builds_stacks():
+    def leaf():
+        return sum(range(20_000))
+
+    def parent():
+        return [leaf() for _ in range(5)]
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    parent()
+    profiler.disable()
+    lines = collapse_stats(pstats.Stats(profiler))
+    assert any("parent (" in line and ";leaf (" in line for line in lines)
+    for line in lines:
+        stack, weight = line.rsplit(" ", 1)
+        assert int(weight) > 0 and stack
+
+
+def _stats(edges, self_time=1e-3):
+    """Fake ``pstats.Stats`` for the call graph ``{caller: [callees]}``.
+
+    Each function takes ``self_time``, and its cumulative time is split evenly between its
+    callers.
+    """
+    names = {*edges, *(child for children in edges.values() for child in children)}
+    funcs = {name: ("mod.py", 1, name) for name in names}
+    callers: dict = {name: [] for name in names}
+    for caller, children in edges.items():
+        for child in children:
+            callers[child].append(caller)
+    cumulative: dict = {}
+
+    def total(name):
+        if name not in cumulative:
+            cumulative[name] = 0.0  # cuts cycles
+            cumulative[name] = self_time + sum(total(child) for child in edges.get(name, ()))
+        return cumulative[name]
+
+    raw = {}
+    for name, func in funcs.items():
+        share = total(name) / max(1, len(callers[name]))
+        edge_stats = {funcs[caller]: (1, 1, self_time, share) for caller in callers[name]}
+        raw[func] = (1, 1, self_time, total(name), edge_stats)
+    return SimpleNamespace(stats=raw)
+
+
+def test_collapse_stats_is_bounded_on_many_paths():
+    # 40 layers of two functions, each calling both functions of the next: 2**40 paths.
+    edges = {
+        f"{layer}{side}": [f"{layer + 1}a", f"{layer + 1}b"] for layer in range(40) for side in "ab"
+    }
+    edges["main"] = ["0a", "0b"]
+    start = time.perf_counter()
+    lines = collapse_stats(_stats(edges))
+    assert time.perf_counter() - start < 10
+    assert lines and all(line.startswith("main (mod.py:1)") for line in lines)
+
+
+def test_collapse_stats_starts_rootless_cycles_at_their_heaviest_function():
+    # TestClient's get() and request() call each other, so nothing is a root.
+    lines = collapse_stats(_stats({"get": ["request"], "request": ["get", "send"]}))
+    stacks = {line.rsplit(" ", 1)[0].replace(" (mod.py:1)", "") for line in lines}
+    assert stacks in (
+        {"get", "get;request", "get;request;send"},
+        {"request", "request;get", "request;send"},
+    )
+
+
+def test_write_failures_are_logged_not_raised(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    client = TestClient(_app(sample_rate=1.0, output_dir=blocker, rand=lambda: 0.0))
+    logger = logging.getLogger("study_fastapi.profiling")
+    records = []
+    handler = logging.Handler(logging.ERROR)
+    handler.emit = records.append
+    logger.addHandler(handler)
+    try:
+        assert client.get("/work/10").json() == 285
+    finally:
+        logger.removeHandler(handler)
+    assert [r.getMessage() for r in records] == ["could not write the profile of GET_work_n"]
+
+
+def test_sampled_requests_write_collapsed_stacks(tmp_path, caplog):
+    client = TestClient(_app(sample_rate=1.0, output_dir=tmp_path, rand=lambda: 0.0))
+    assert client.get("/work/1000").status_code == 200
+    files = _profiles(tmp_path)
+    assert [f.parent.name for f in files] == ["GET_work_n"]
+    assert files[0].read_text().strip()
+
+
+def test_unmatched_paths_share_one_directory(tmp_path):
+    client = TestClient(_app(sample_rate=1.0, output_dir=tmp_path, rand=lambda: 0.0))
+    assert client.get("/nope/a").status_code == 404
+    assert client.get("/nope/b").status_code == 404
+    assert {f.parent.name for f in _profiles(tmp_path)} == {"unmatched"}
+
+
+def test_unsampled_and_unsigned_requests_are_not_profiled(tmp_path):
+    client = TestClient(_app(sample_rate=0.5, output_dir=tmp_path, rand=lambda: 0.9))
+    client.get("/work/10")
+    client = TestClient(_app(secret="s", output_dir=tmp_path))
+    client.get("/work/10")
+    client.get("/work/10", headers={"X-Profile": sign_profile_request("wrong", 2**40)})
+    client.get("/work/10", headers={"X-Profile": sign_profile_request("s", 2**40)})
+    assert _profiles(tmp_path) == []
+
+
+def test_signed_header_triggers_profile(tmp_path):
+    client = TestClient(_app(secret="s", output_dir=tmp_path))
+    header = sign_profile_request("s", int(time.time()) + 60)
+    assert client.get("/work/10", headers={"X-Profile": header}).json() == 285
+    assert len(_profiles(tmp_path)) == 1
+
+
+@pytest.mark.asyncio
+async def test_log_lines_are_throttled(tmp_path):
+    middleware = ProfilingMiddleware(FastAPI(), output_dir=tmp_path, log_interval=60)
+    logger = logging.getLogger("study_fastapi.profiling")
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger.addHandler(handler)
+    try:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        profiler.disable()
+        scope = {"type": "http", "method": "GET", "route": SimpleNamespace(path="/x")}
+        for _ in range(3):
+            await middleware._save(scope, profiler, 0.001)
+        await middleware._save({**scope, "route": SimpleNamespace(path="/y")}, profiler, 0.001)
+    finally:
+        logger.removeHandler(handler)
+    assert [r.getMessage().split(" in ")[0] for r in records] == [
+        "profiled GET_x",
+        "profiled GET_y",
+    ]
+
+
+def test_add_profiling_reads_env(monkeypatch, tmp_path):
+    app = FastAPI()
+    monkeypatch.delenv("PROFILE_SAMPLE_RATE", raising=False)
+    monkeypatch.delenv("PROFILE_SECRET", raising=False)
+    add_profiling(app)
+    assert app.user_middleware == []
+    monkeypatch.setenv("PROFILE_SAMPLE_RATE", "0.25")
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    add_profiling(app)
+    (middleware,) = app.user_middleware
+    assert middleware.cls is ProfilingMiddleware
+    assert middleware.kwargs["sample_rate"] == 0.25
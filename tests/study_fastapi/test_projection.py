@@ -0,0 +1,100 @@
+"""Tests for sparse fieldsets on list endpoints."""
+
+import pytest
+from fastapi.exceptions import RequestValidationError
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, Field, computed_field
+
+from study_fastapi.a5_pydantic_model import Buyer, Seller, app
+from study_fastapi.projection import projection, resolve_fields
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+def test_resolve_fields():
+    assert resolve_fields(Buyer, None) == ("name", "country", "zipcode")
+    assert resolve_fields(Buyer, "") == ("name", "country", "zipcode")
+    assert resolve_fields(Buyer, "country, name,country") == ("country", "name")
+    with pytest.raises(RequestValidationError):
+        resolve_fields(Buyer, "name,secret")
+
+
+def test_projection_is_cached_per_field_set():
+    first = projection(Seller, "name,country")
+    assert projection(Seller, "name, country") is first
+    assert projection(Seller, "country,name") is not first
+    assert projection(Buyer, "name,country") is not first
+
+
+def test_projection_serialises_only_requested_fields():
+    sellers = [
+        Seller(name="A", country="IN", shipping_port=None, shop_description="long", aka="also long")
+    ]
+    assert projection(Seller, "country,name").dump_json(sellers) == (
+        b'[{"name":"A","country":"IN"}]'
+    )
+    assert projection(Seller, "shipping_port").dump_python(sellers) == [{"shipping_port": None}]
+    full = projection(Seller, None).dump_python(sellers)
+    assert full == [sellers[0].model_dump(mode="json")]
+
+
+def test_sellers_sparse_fieldset(client):
+    response = client.get("/sellers", params={"fields": "name,country"})
+    assert response.status_code == 200
+    assert response.json() == [
+        {"name": "Share Exports", "country": "CN"},
+        {"name": "Tirupati Mills", "country": "IN"},
+    ]
+
+
+def test_buyers_sparse_fieldset(client):
+    response = client.get("/buyers", params={"fields": "zipcode"})
+    assert response.json() == [{"zipcode": "560035"}, {"zipcode": "99001"}]
+
+
+def test_unknown_field_is_422(client):
+    response = client.get("/sellers", params={"fields": "name,password"})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["query", "fields"]
+
+
+class Port(BaseModel):
+    code: str
+
+
+class Shop(BaseModel):
+    name: str = Field(serialization_alias="shopName")
+    port: Port
+    ports: list[Port] = []
+    secret: str = Field("s", exclude=True)
+
+
+class Priced(BaseModel):
+    price: float
+
+    @computed_field
+    def label(self) -> str:
+        return f"${self.price}"
+
+
+def test_projection_keeps_aliases_nested_models_and_exclusions():
+    shop = Shop(name="A", port=Port(code="INMAA"), ports=[Port(code="CNSZX")])
+    assert projection(Shop, "name,port,ports").dump_python([shop]) == [
+        {"shopName": "A", "port": {"code": "INMAA"}, "ports": [{"code": "CNSZX"}]}
+    ]
+    assert projection(Shop, "secret").dump_json([shop]) == b"[{}]"
+
+
+def test_projection_falls_back_for_custom_serialisation():
+    rows = [Priced(price=2.5)]
+    assert projection(Priced, "price").dump_json(rows) == b'[{"price":2.5}]'
+    assert projection(Priced, None).dump_python(rows) == [{"price": 2.5, "label": "$2.5"}]
+
+
+def test_dump_ndjson_both_paths():
+    shop = Shop(name="A", port=Port(code="INMAA"))
+    assert projection(Shop, "name").dump_ndjson([shop, shop]) == b'{"shopName":"A"}\n' * 2
+    assert projection(Priced, "label").dump_ndjson([Priced(price=1)]) == b'{"label":"$1.0"}\n'
@@ -0,0 +1,140 @@
+"""Tests for the radix-tree router."""
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from starlette.responses import PlainTextResponse
+from starlette.routing import Match, Mount, Route
+
+from study_fastapi import a8_mvcapp, hello_fastapi
+from study_fastapi.app_factory import AppConfig, create_app
+from study_fastapi.radix import RadixRouter, install_radix_router, starlette_match
+
+
+def _endpoint(label):
+    def endpoint():
+        return {"route": label}
+
+    return endpoint
+
+
+def _app(uncompiled=True):
+    app = FastAPI()
+    app.get("/")(_endpoint("root"))
+    app.get("/users/{user_id}")(lambda user_id: {"route": "user", "id": user_id})
+    app.get("/users/me")(_endpoint("me"))  # shadowed by /users/{user_id}
+    app.get("/items/{item_id:int}")(lambda item_id: {"route": "item", "id": item_id})
+    app.get("/items/new")(_endpoint("new item"))  # not an int: reachable
+    app.post("/items/{item_id:int}")(lambda item_id: {"route": "post item", "id": item_id})
+    app.get("/static/{rest:path}")(lambda rest: {"route": "static", "rest": rest})
+    app.get("/a/{x}/b/{y}")(lambda x, y: {"route": "ab", "x": x, "y": y})
+    app.router.routes.append(Route("/any", _plain, methods=None))
+    if uncompiled:
+        app.get("/files/{name}.txt")(lambda name: {"route": "txt", "name": name})
+    return app
+
+
+async def _plain(request):
+    return PlainTextResponse("plain")
+
+
+REQUESTS = [
+    ("GET", "/"),
+    ("GET", "/users/7"),
+    ("GET", "/users/me"),
+    ("GET", "/users/"),
+    ("GET", "/users"),
+    ("GET", "/users/7/x"),
+    ("GET", "/items/3"),
+    ("POST", "/items/3"),
+    ("DELETE", "/items/3"),
+    ("GET", "/items/new"),
+    ("POST", "/items/new"),
+    ("GET", "/files/a.txt"),
+    ("GET", "/static"),
+    ("GET", "/static/"),
+    ("GET", "/static/css/site.css"),
+    ("HEAD", "/static/x"),
+    ("GET", "/a/1/b/2"),
+    ("GET", "/a/1/b"),
+    ("PATCH", "/any"),
+    ("GET", "/missing"),
+]
+
+
+def _scope(method, path):
+    return {"type": "http", "method": method, "path": path, "root_path": "", "headers": []}
+
+
+@pytest.mark.parametrize("method, path", REQUESTS)
+def test_agrees_with_starlette(method, path):
+    app = _app(uncompiled=False)
+    scope = _scope(method, path)
+    assert RadixRouter(app.router).match(scope) == starlette_match(app.router, scope)
+
+
+def test_uncompiled_routes_keep_their_place():
+    app = _app()  # ends with /files/{name}.txt, a parameter inside a segment
+    radix = RadixRouter(app.router)
+    assert radix.match(_scope("GET", "/items/3"))[0] == Match.FULL
+    assert radix.match(_scope("GET", "/files/a.txt")) == (Match.NONE, None)
+    # A 405 is only certain when no route could match fully.
+    assert radix.match(_scope("DELETE", "/items/3")) == (Match.NONE, None)
+    app.router.routes.insert(0, Mount("/users/special", app=_plain))
+    assert radix.match(_scope("GET", "/")) == (Match.NONE, None)
+    assert radix.match(_scope("GET", "")) == (Match.NONE, None)
+
+
+def test_requests_are_served():
+    app = _app()
+    router = APIRouter(prefix="/api")
+    router.get("/ping")(_endpoint("ping"))
+    app.include_router(router)
+    install_radix_router(app)
+    client = TestClient(app)
+    assert client.get("/items/3").json() == {"route": "item", "id": 3}
+    assert client.get("/items/new").json() == {"route": "new item"}
+    assert client.get("/users/me").json() == {"route": "user", "id": "me"}
+    assert client.get("/static/css/site.css").json() == {"route": "static", "rest": "css/site.css"}
+    assert client.get("/files/a.txt").json() == {"route": "txt", "name": "a"}
+    assert client.get("/api/ping").json() == {"route": "ping"}
+    assert client.get("/any").text == "plain"
+    response = client.delete("/items/3")
+    assert response.status_code == 405
+    assert "GET" in response.headers["allow"]  # the first route matching the path
+    assert client.get("/missing").status_code == 404
+    assert client.get("/a/1/b/2/", follow_redirects=False).status_code == 307
+
+    app.get("/late")(_endpoint("late"))
+    assert client.get("/late").json() == {"route": "late"}
+
+
+def test_routes_replaced_in_place_are_recompiled():
+    app = FastAPI()
+    app.get("/ping")(_endpoint("old"))
+    install_radix_router(app)
+    client = TestClient(app)
+    assert client.get("/ping").json() == {"route": "old"}
+    index = next(i for i, r in enumerate(app.router.routes) if getattr(r, "path", "") == "/ping")
+    app.router.routes[index] = Route("/ping", lambda request: PlainTextResponse("new"))
+    assert client.get("/ping").text == "new"
+    app.router.routes = [Route("/ping", lambda request: PlainTextResponse("reassigned"))]
+    assert client.get("/ping").text == "reassigned"
+
+
+def test_root_path_is_stripped_like_starlette():
+    app = _app(uncompiled=False)
+    radix = RadixRouter(app.router)
+    for path in ("/api/items/3", "/api", "/apix/items/3", "/items/3"):
+        scope = {**_scope("GET", path), "root_path": "/api"}
+        assert radix.match(scope) == starlette_match(app.router, scope)
+
+
+def test_app_config_installs_it():
+    app = create_app(AppConfig(radix_router=True, warm=False))
+    app.get("/hi_name/{name}")(hello_fastapi.greet_personalized_path)
+    assert isinstance(app.router.middleware_stack, RadixRouter)
+    with TestClient(app) as client:
+        assert client.get("/hi_name/shweta").json() == "Hello, shweta!"
+        assert client.get("/openapi.json").status_code == 200
+    assert isinstance(a8_mvcapp.app.router.middleware_stack, RadixRouter)
@@ -0,0 +1,136 @@
+"""Tests for raw ASGI routes."""
+
+import importlib
+
+import pytest
+from fastapi import APIRouter, FastAPI, HTTPException
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+
+from study_fastapi import a2_fastapi_header, hello_fastapi
+from study_fastapi.app_factory import AppConfig, create_app
+from study_fastapi.raw_routes import RawRoute, raw_route
+
+
+@pytest.fixture
+def raw_apps(monkeypatch):
+    # Rebuild the study apps with raw routes switched on, then as they were.
+    monkeypatch.setenv("APP_RAW_ROUTES", "1")
+    importlib.reload(hello_fastapi)
+    importlib.reload(a2_fastapi_header)
+    yield
+    monkeypatch.delenv("APP_RAW_ROUTES")
+    importlib.reload(hello_fastapi)
+    importlib.reload(a2_fastapi_header)
+
+
+def _route(app, path):
+    return next(route for route in app.routes if getattr(route, "path", None) == path)
+
+
+def _normal_app(app, path):
+    # The same endpoint registered with ``app.get``.
+    route = _route(app, path)
+    normal = create_app(AppConfig(timing=True))
+    normal.get(path, openapi_extra=route.openapi_extra)(route.endpoint)
+    return normal
+
+
+@pytest.mark.parametrize(
+    "module, path, headers",
+    [
+        (hello_fastapi, "/hi", {}),
+        (a2_fastapi_header, "/useragent", {}),
+        (a2_fastapi_header, "/useragent", {"user-agent": "curl/8.5 ünïcode".encode("latin-1")}),
+    ],
+)
+@pytest.mark.usefixtures("raw_apps")
+def test_responses_match_the_normal_route(module, path, headers):
+    assert isinstance(_route(module.app, path), RawRoute)
+    expected = TestClient(_normal_app(module.app, path)).get(path, headers=headers)
+    client = TestClient(module.app)
+    for _ in range(3):
+        response = client.get(path, headers=headers)
+        assert response.status_code == 200
+        assert response.content == expected.content
+        for name in ("content-type", "content-length"):
+            assert response.headers[name] == expected.headers[name]
+
+
+def test_static_response_is_replayed():
+    app = create_app(AppConfig(timing=True, warm=False))
+    calls = []
+
+    @raw_route(app, "/static", description="A constant.")
+    def static() -> dict[str, int]:
+        calls.append(1)
+        return {"answer": 42}
+
+    client = TestClient(app)
+    responses = [client.get("/static") for _ in range(3)]
+    assert len(calls) == 1
+    assert {r.content for r in responses} == {b'{"answer":42}'}
+    # Middleware still runs, and adds its headers once per response.
+    assert [len(r.headers.get_list("server-timing")) for r in responses] == [1, 1, 1]
+    assert len({r.headers["x-request-id"] for r in responses}) == 3
+    assert client.post("/static").status_code == 405
+    assert app.openapi()["paths"]["/static"]["get"]["description"] == "A constant."
+
+
+def test_errors_are_not_recorded():
+    router = APIRouter(prefix="/api")
+    outcomes = [HTTPException(503), "ok"]
+
+    @raw_route(router, "/flaky")
+    def flaky() -> str:
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+    assert client.get("/api/flaky").status_code == 503
+    assert client.get("/api/flaky").json() == "ok"
+    assert client.get("/api/flaky").json() == "ok"
+    assert outcomes == []
+
+
+@pytest.mark.parametrize(
+    "module, path", [(hello_fastapi, "/hi"), (a2_fastapi_header, "/useragent")]
+)
+def test_study_apps_use_raw_routes_only_when_enabled(module, path):
+    route = _route(module.app, path)
+    assert isinstance(route, APIRoute) and not isinstance(route, RawRoute)
+
+
+def test_disabled_raw_route_is_an_ordinary_route():
+    app = FastAPI()
+
+    @raw_route(app, "/hello", enabled=False)
+    def hello(name: str) -> str:
+        return name
+
+    assert type(_route(app, "/hello")) is APIRoute
+    assert TestClient(app).get("/hello", params={"name": "x"}).json() == "x"
+
+
+@pytest.mark.usefixtures("raw_apps")
+def test_render_falls_back_when_it_returns_none():
+    client = TestClient(a2_fastapi_header.app)
+    response = client.get("/useragent", headers={"user-agent": ""})
+    assert response.json() == ""  # present, if empty
+    client.headers.pop("user-agent")
+    response = client.get("/useragent")
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["header", "user-agent"]
+
+
+def test_endpoints_with_parameters_need_render():
+    app = FastAPI()
+    with pytest.raises(TypeError, match="needs a render function"):
+
+        @raw_route(app, "/hello")
+        def hello(name: str) -> str:
+            return name
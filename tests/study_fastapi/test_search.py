@@ -0,0 +1,162 @@
+"""Tests for the BM25 search index and ``/sellers/search``."""
+
+import os
+import threading
+
+from fastapi.testclient import TestClient
+
+from study_fastapi import a5_pydantic_model
+from study_fastapi.a5_pydantic_model import Seller
+from study_fastapi.catalogue import SnapshotCatalogue, write_snapshot
+from study_fastapi.changefeed import VersionedCatalogue
+from study_fastapi.search import SearchIndex, tokenize
+
+
+def _seller(name, description, aka=""):
+    return Seller(
+        name=name, country="IN", shipping_port=None, shop_description=description, aka=aka
+    )
+
+
+SELLERS = [
+    _seller("a", "Handwoven cotton sarees", "Weavers of Kanchipuram"),
+    _seller("b", "Cotton shirts and cotton trousers", "Cotton House"),
+    _seller("c", "Electronics and mobile phones", "Phone Hub"),
+    _seller("d", "Handmade leather bags", ""),
+]
+
+
+def _index(rows=SELLERS, **options):
+    catalogue = VersionedCatalogue(Seller, "name", rows)
+    return catalogue, SearchIndex(catalogue, ["shop_description", "aka"], **options)
+
+
+def _names(hits):
+    return [hit.record.name for hit in hits]
+
+
+def test_tokenize():
+    assert tokenize("Çay, TEA & coffee-beans 42") == ["çay", "tea", "coffee", "beans", "42"]
+
+
+def test_ranks_by_bm25():
+    _, index = _index()
+    hits = index.search("cotton")
+    # Four occurrences in "b" outrank one in "a".
+    assert _names(hits) == ["b", "a"]
+    assert hits[0].score > hits[1].score > 0
+    assert index.search("phones")[0].record == SELLERS[2]
+    assert len(index) == 4
+
+
+def test_every_term_must_match_and_last_is_a_prefix():
+    _, index = _index()
+    assert _names(index.search("hand")) == ["d", "a"]  # the shorter document ranks first
+    assert _names(index.search("hand cot")) == []  # "hand" is not a prefix when not last
+    assert _names(index.search("cotton hand")) == ["a"]
+    assert _names(index.search("hand", prefix=False)) == []
+    assert index.search("zzz") == [] and index.search("  ,") == []
+    assert _names(index.search("cotton", limit=1)) == ["b"]
+
+
+def test_rare_and_common_terms_intersect():
+    rows = [_seller(str(i), "common words" + (" rare" if i == 40 else "")) for i in range(50)]
+    _, index = _index([*rows, _seller("x", "rare words")])
+    # The two candidates from "rare" are looked up in the 50 postings of "common".
+    assert _names(index.search("common rare")) == ["40"]
+    assert _names(index.search("rare wor")) == ["x", "40"]
+    assert index.search("rare sarees") == []
+    _, index = _index()
+    assert index.search("sarees phones") == []
+
+
+def test_prefix_expansion_is_bounded():
+    rows = [_seller(str(i), f"term{i:03}") for i in range(20)]
+    _, index = _index(rows, max_expansions=5)
+    assert _names(index.search("term")) == ["0", "1", "2", "3", "4"]
+
+
+def test_follows_catalogue_writes():
+    catalogue, index = _index()
+    assert _names(index.search("leather")) == ["d"]
+    catalogue.upsert(_seller("d", "Leather shoes"))
+    catalogue.upsert(_seller("e", "Leather belts"))
+    catalogue.delete("b")
+    assert _names(index.search("leather")) == ["d", "e"]
+    assert index.search("bags") == []
+    assert _names(index.search("cotton")) == ["a"]
+    assert len(index) == 4
+
+
+def test_tombstones_are_compacted():
+    catalogue, index = _index([_seller("a", "one")])
+    index.search("one")
+    for revision in range(1100):
+        catalogue.upsert(_seller("a", f"one v{revision}"))
+    assert len(index._index.keys) == 1101  # each rewrite leaves a tombstone until the next search
+    assert index.search("one")[0].record.shop_description == "one v1099"
+    assert len(index._index.keys) == 1
+
+
+def test_empty_keys_are_found():
+    _, index = _index([_seller("", "nameless cotton"), *SELLERS[:1]])
+    assert _names(index.search("nameless")) == [""]
+
+
+def test_writes_during_a_rebuild_are_replayed():
+    catalogue, index = _index()
+
+    def records():
+        yield from SELLERS
+        catalogue.upsert(_seller("e", "Leather belts"))
+        catalogue.delete("a")
+
+    index.rebuild(records())
+    assert _names(index.search("leather")) == ["e", "d"]  # the shorter description first
+    assert index.search("sarees") == []
+
+
+def test_searches_do_not_wait_for_a_rebuild():
+    catalogue, index = _index()
+    assert _names(index.search("phones")) == ["c"]
+    scanning, release = threading.Event(), threading.Event()
+
+    def records():
+        scanning.set()
+        release.wait(5)
+        yield _seller("x", "phones only")
+
+    rebuild = threading.Thread(target=index.rebuild, args=(records(),))
+    rebuild.start()
+    try:
+        assert scanning.wait(5)
+        assert _names(index.search("phones")) == ["c"]  # the old index, not blocked
+    finally:
+        release.set()
+        rebuild.join()
+    assert _names(index.search("phones")) == []  # "x" is not in the catalogue
+
+
+def test_replaced_snapshot_rebuilds(tmp_path):
+    path = tmp_path / "sellers.snap"
+    write_snapshot(path, Seller, SELLERS[:1])
+    snapshot = SnapshotCatalogue(path, Seller, check_interval=None)
+    _, index = _index(snapshot)
+    assert _names(index.search("sarees")) == ["a"]
+    before = os.stat(path).st_mtime_ns
+    write_snapshot(path, Seller, SELLERS[2:3])
+    os.utime(path, ns=(before + 10**9, before + 10**9))
+    snapshot.reload()
+    assert index.search("sarees") == []
+    assert _names(index.search("phones")) == ["c"]
+
+
+def test_search_route():
+    client = TestClient(a5_pydantic_model.app)
+    response = client.get("/sellers/search", params={"q": "handwo"})
+    assert response.status_code == 200
+    [hit] = response.json()
+    assert hit["record"]["name"] == "Tirupati Mills"
+    assert hit["score"] > 0
+    assert client.get("/sellers/search", params={"q": ""}).status_code == 422
+    assert client.get("/sellers/search", params={"q": "x", "limit": 0}).status_code == 422
@@ -0,0 +1,154 @@
+"""Tests for country-sharded catalogues and ``/buyers/query``."""
+
+import logging
+import pickle
+import threading
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from fastapi.testclient import TestClient
+
+from study_fastapi import a5_pydantic_model
+from study_fastapi import shards as shards_module
+from study_fastapi.a5_pydantic_model import Buyer
+from study_fastapi.changefeed import VersionedCatalogue
+from study_fastapi.shards import ShardedCatalogue, ShardQuery
+
+BUYERS = [
+    Buyer(name="Asha", country="IN", zipcode="560035"),
+    Buyer(name="Bob", country="US", zipcode="99001"),
+    Buyer(name="Chen", country="CN", zipcode="510000"),
+    Buyer(name="Arun", country="IN", zipcode="600001"),
+    Buyer(name="Ann", country="US", zipcode="56001"),
+]
+
+
+@pytest.fixture(params=["inline", "thread", "process"])
+def sharded(request):
+    catalogue = VersionedCatalogue(Buyer, "name", BUYERS)
+    shards = ShardedCatalogue(catalogue, "country", pool=request.param, max_workers=2)
+    yield catalogue, shards
+    shards.close()
+
+
+def _names(buyers):
+    return [buyer.name for buyer in buyers]
+
+
+def test_query_where_ignores_empty_prefixes():
+    assert ShardQuery.where(5, zipcode="56", name=None, aka="") == ShardQuery(
+        (("zipcode", "56"),), 5
+    )
+
+
+def test_routes_queries_to_shards(sharded):
+    _, shards = sharded
+    assert shards.sizes() == {"CN": 1, "IN": 2, "US": 2}
+    assert _names(shards.query(["IN"])) == ["Asha", "Arun"]
+    # Cross-country results are merged in shard order.
+    assert _names(shards.query(["US", "IN"])) == ["Asha", "Arun", "Bob", "Ann"]
+    assert _names(shards.query(zipcode="56")) == ["Asha", "Ann"]
+    assert _names(shards.query(name="a")) == ["Asha", "Arun", "Ann"]
+    assert _names(shards.query(name="a", limit=2)) == ["Asha", "Arun"]
+    assert shards.query(["FR"]) == []
+
+
+def test_follows_catalogue_writes(sharded):
+    catalogue, shards = sharded
+    shards.query()
+    catalogue.upsert(Buyer(name="Bob", country="IN", zipcode="560001"))  # moves shard
+    catalogue.upsert(Buyer(name="Dora", country="FR", zipcode="75001"))
+    catalogue.delete("Chen")
+    assert shards.sizes() == {"FR": 1, "IN": 3, "US": 1}
+    assert _names(shards.query(zipcode="5")) == ["Asha", "Bob", "Ann"]
+    assert _names(shards.query(["US"])) == ["Ann"]
+    assert _names(shards.query(["FR", "CN"])) == ["Dora"]
+
+
+def test_writes_before_first_query_are_partitioned():
+    catalogue = VersionedCatalogue(Buyer, "name", BUYERS)
+    shards = ShardedCatalogue(catalogue, "country", pool="inline")
+    catalogue.upsert(Buyer(name="Eve", country="CN", zipcode="1"))
+    assert _names(shards.query(["CN"])) == ["Chen", "Eve"]
+    catalogue._notify(None)  # as when the base snapshot is replaced
+    assert shards._built is False
+    assert shards.sizes()["CN"] == 2
+
+
+@pytest.mark.parametrize("pool", ["inline", "thread"])
+def test_queries_during_writes_and_rebuilds(pool):
+    catalogue = VersionedCatalogue(Buyer, "name", BUYERS)
+    shards = ShardedCatalogue(catalogue, "country", pool=pool, max_workers=2)
+    done = threading.Event()
+
+    def write():
+        try:
+            for index in range(300):
+                country = f"Z{chr(ord('A') + index % 26)}"
+                catalogue.upsert(Buyer(name=f"w{index}", country=country, zipcode="1"))
+                if index % 20 == 0:
+                    catalogue._notify(None)
+                    shards.sizes()  # rebuilds here replace every shard under the reader
+                catalogue.delete(f"w{index}")
+        finally:
+            done.set()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        while not done.is_set():
+            assert {"Asha", "Bob"} <= set(_names(shards.query(limit=100)))
+    finally:
+        writer.join()
+        shards.close()
+    assert shards.sizes() == {"CN": 1, "IN": 2, "US": 2}
+
+
+def test_records_sharing_a_key_are_rejected():
+    # Another "Asha" in US: resolving the key would return the IN record from the US shard.
+    buyers = [*BUYERS, Buyer(name="Asha", country="US", zipcode="10001")]
+    shards = ShardedCatalogue(VersionedCatalogue(Buyer, "name", buyers), "country", pool="inline")
+    with pytest.raises(ValueError, match="share the name 'Asha'"):
+        shards.query(["US"])
+
+
+def test_owner_side_functions(monkeypatch):
+    # What a ``process`` owner runs, called in this process.
+    monkeypatch.setattr(shards_module, "_owned", {})
+    shard = shards_module._Shard()
+    shard.put("Asha", {"zipcode": "560035"})
+    shards_module._load({"IN": pickle.loads(pickle.dumps(shard))})
+    shards_module._put("US", "Bob", {"zipcode": "99001"})
+    shards_module._put("IN", "Asha", None)
+    assert shards_module._scan(["IN", "US", "FR"], ShardQuery()) == [[], ["Bob"], []]
+
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    shards_module.log.addHandler(handler)
+    try:
+        failed = Future()
+        failed.set_exception(BrokenProcessPool("owner died"))
+        shards_module._log_failure(failed)
+    finally:
+        shards_module.log.removeHandler(handler)
+    assert [r.getMessage() for r in records] == [
+        "shard write failed: BrokenProcessPool('owner died')"
+    ]
+
+
+def test_filtering_on_a_field_that_is_not_a_prefix_field(sharded):
+    _, shards = sharded
+    with pytest.raises(ValueError, match="by country; prefix fields are name, zipcode"):
+        shards.query(country="IN")
+    with pytest.raises(ValueError, match="by missing"):
+        shards.keys(None, ShardQuery((("missing", "x"),)))
+
+
+def test_query_route():
+    client = TestClient(a5_pydantic_model.app)
+    response = client.get("/buyers/query", params={"country": ["US", "IN"], "zipcode": "5600"})
+    assert [b["name"] for b in response.json()] == ["Shweta"]
+    assert client.get("/buyers/query", params={"limit": 0}).status_code == 422
+    assert client.get("/buyers/shards").json() == {"IN": 1, "US": 1}
@@ -0,0 +1,139 @@
+"""Tests for startup route warm-up."""
+
+import asyncio
+import enum
+import importlib.util
+from typing import Annotated, Any
+
+import pytest
+from fastapi import Body, Cookie, Depends, FastAPI, Header, Query
+from fastapi.testclient import TestClient
+
+from study_fastapi.a5_pydantic_model import Buyer
+from study_fastapi.a5_pydantic_model import app as models_app
+from study_fastapi.a6_dependency_injection import app as di_app
+from study_fastapi.catalogue import write_snapshot
+from study_fastapi.warmup import _sample, synthetic_request, warm_routes
+
+
+class Color(enum.Enum):
+    RED = "red"
+
+
+def test_sample_values():
+    assert _sample(int) == "1"
+    assert _sample(int | None) == "1"
+    assert _sample(bool) == "true"
+    assert _sample(Color) == "red"
+    assert _sample(list[str]) == "warmup"
+    assert _sample(bytes) == "1"
+
+
+def _app():
+    app = FastAPI()
+    calls = []
+
+    def token(x_token: Annotated[str, Header()]):
+        return x_token
+
+    @app.get("/items/{item_id}")
+    def item(
+        item_id: int,
+        color: Color,
+        session: Annotated[str, Cookie()],
+        _: Annotated[str, Depends(token)],
+        page: Annotated[int, Query(gt=0)] = 1,
+    ):
+        return {"item": item_id, "color": color, "session": session}
+
+    @app.post("/orders")
+    def order(qty: Annotated[int, Body(embed=True)]):
+        calls.append(qty)
+
+    @app.post("/anything")
+    def anything(obj: Any = Body()):
+        calls.append(obj)
+
+    @app.post("/maybe")
+    def maybe(qty: Annotated[int | None, Body()]):
+        calls.append(qty)
+
+    @app.post("/batch")
+    def batch(items: list[Any]):
+        calls.append(items)
+
+    @app.delete("/orders")
+    def clear():
+        calls.append("cleared")
+
+    @app.get("/broken")
+    def broken():
+        raise RuntimeError("not ready")
+
+    @app.get("/slow")
+    async def slow():
+        await asyncio.sleep(10)
+
+    app.state.calls = calls
+    return app
+
+
+def _route(app, path, method):
+    return next(r for r in app.routes if r.path == path and method in r.methods)
+
+
+def test_synthetic_request_fills_required_params():
+    app = _app()
+    request = synthetic_request(_route(app, "/items/{item_id}", "GET"))
+    assert request == {
+        "method": "GET",
+        "url": "/items/1",
+        "params": {"color": "red"},
+        "headers": {"x-token": "warmup", "cookie": "session=warmup"},
+    }
+    post = synthetic_request(_route(app, "/orders", "POST"))
+    assert (post["method"], post["content"]) == ("POST", b"null")
+    assert synthetic_request(_route(app, "/orders", "DELETE")) is None
+
+
+def test_bodies_accepting_null_are_not_warmed():
+    app = _app()
+    assert synthetic_request(_route(app, "/anything", "POST")) is None
+    assert synthetic_request(_route(app, "/maybe", "POST")) is None
+    assert synthetic_request(_route(app, "/batch", "POST"))["content"] == b"null"
+
+
+@pytest.mark.asyncio
+async def test_warm_routes_reports_and_never_runs_mutations():
+    app = _app()
+    report = await warm_routes(app, skip=["/docs"], timeout=0.5)
+    statuses = {(r.method, r.path): r.status for r in report.routes}
+    assert statuses[("GET", "/items/{item_id}")] == 200
+    assert statuses[("POST", "/orders")] == 422
+    assert statuses[("POST", "/batch")] == 422
+    assert ("POST", "/anything") not in statuses
+    assert statuses[("GET", "/broken")] is None  # logged; later routes are still warmed
+    assert statuses[("GET", "/slow")] is None
+    assert ("DELETE", "/orders") not in statuses
+    assert app.state.calls == []
+    assert report.total_ms >= sum(r.ms for r in report.routes) * 0.99
+
+
+@pytest.mark.parametrize(
+    "app, path", [(models_app, "/sellers"), (di_app, "/di/items"), (di_app, "/di/secure")]
+)
+def test_study_apps_are_warmed_at_startup(app, path):
+    with TestClient(app):
+        statuses = {r.path: r.status for r in app.state.warmup.routes}
+    assert statuses[path] == 200
+
+
+def test_full_scans_of_a_snapshot_are_not_warmed(tmp_path, monkeypatch):
+    write_snapshot(tmp_path / "buyers.snap", Buyer, [Buyer(name="b", country="IN", zipcode="1")])
+    monkeypatch.setenv("CATALOGUE_DIR", str(tmp_path))
+    spec = importlib.util.find_spec("study_fastapi.a5_pydantic_model")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    with TestClient(module.app):
+        paths = {r.path for r in module.app.state.warmup.routes}
+    assert paths.isdisjoint(module._FULL_SCANS)
@@ -1,10 +1,30 @@
 from __future__ import annotations
 
+import gzip
 import json
 import logging
+import os
+import re
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from utils.logging_utils import get_logger
+import pytest
+
+from utils.logging_utils import (
+    CompressingRotatingFileHandler,
+    RateLimitFilter,
+    RequestContext,
+    SamplingFilter,
+    ThrottleFilter,
+    _SummarizingFilter,
+    bind_request_context,
+    close_file_sinks,
+    get_logger,
+    get_request_context,
+    request_context,
+    reset_request_context,
+)
 
 
 def test_get_logger_plain(tmp_path, monkeypatch):
@@ -54,3 +74,342 @@ def test_root_logger(monkeypatch):
     root2 = get_logger(None)
     assert root_logger.handlers and root2.handlers
     assert root_logger.handlers[0] is root2.handlers[0]
+
+
+def test_throttle_filter_counts_suppressed():
+    now = [0.0]
+    throttle = ThrottleFilter(interval=10.0, clock=lambda: now[0])
+
+    def record(msg):
+        return logging.LogRecord("t", logging.INFO, __file__, 1, msg, None, None)
+
+    assert throttle.filter(record("a %s"))
+    assert not throttle.filter(record("a %s"))
+    assert not throttle.filter(record("a %s"))
+    assert throttle.filter(record("b"))  # other templates are independent
+    now[0] = 10.0
+    passed = record("a %s")
+    assert throttle.filter(passed)
+    assert passed.suppressed == 2
+    assert not hasattr(record("b"), "suppressed")
+
+
+def test_throttle_filter_bounds_its_keys():
+    throttle = ThrottleFilter(interval=10.0, clock=lambda: 0.0, max_keys=2)
+
+    def record(msg):
+        return logging.LogRecord("t", logging.INFO, __file__, 1, msg, None, None)
+
+    assert throttle.filter(record("a"))
+    assert throttle.filter(record("b"))
+    assert throttle.filter(record("c"))  # first of the shared overflow key
+    assert not throttle.filter(record("d"))
+    assert len(throttle._last) == 3
+
+
+def test_request_context_fields_on_records(monkeypatch, capsys):
+    monkeypatch.setenv("LOG_FORMAT", "json")
+    monkeypatch.setenv("LOG_LEVEL", "INFO")
+    logger = get_logger("ctx.json.logger")
+    logger.info("outside")
+    with request_context("req-1", "/items/{id}") as context:
+        assert get_request_context() is context
+        logger.info("inside")
+    assert get_request_context() is None
+    outside, inside = (json.loads(line) for line in capsys.readouterr().out.splitlines())
+    assert "request_id" not in outside
+    assert inside["request_id"] == "req-1"
+    assert inside["route"] == "/items/{id}"
+    assert inside["elapsed_ms"] >= 0
+
+
+def test_request_context_plain_suffix(monkeypatch, capsys):
+    monkeypatch.setenv("LOG_FORMAT", "plain")
+    monkeypatch.setenv("LOG_COLOR", "0")
+    logger = get_logger("ctx.plain.logger")
+    token = bind_request_context(RequestContext("abc", "/hi"))
+    try:
+        logger.warning("slow")
+    finally:
+        reset_request_context(token)
+    out = capsys.readouterr().out
+    assert " - slow [abc /hi +" in out and out.rstrip().endswith("ms]")
+
+
+def test_request_context_generates_ids():
+    first, second = RequestContext(), RequestContext()
+    assert first.request_id != second.request_id and len(first.request_id) == 32
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _capturing_logger(name, *filters):
+    logger = logging.getLogger(name)
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger.handlers = [handler]
+    logger.filters = list(filters)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger, records
+
+
+def test_sampling_filter_rates_and_summary():
+    clock = _Clock()
+    sampler = SamplingFilter(
+        0.5, {"sample.noisy": 0.1, "hot %s": 0.0}, summary_interval=10, clock=clock
+    )
+    logger, records = _capturing_logger("sample.noisy.child", sampler)
+    for i in range(20):
+        logger.info("tick %d", i)
+    assert len(records) == 2  # logger override covers children
+    for i in range(5):
+        logger.info("hot %s", i)  # template override wins
+    assert len(records) == 2
+    assert sampler.rate_for("other", "x") == 0.5
+    clock.now = 10.0
+    logger.info("tick %d", 99)
+    (summary,) = [r for r in records if hasattr(r, "suppressed")]
+    assert summary.suppressed == 18 + 5
+    assert summary.getMessage() == (
+        "suppressed 23 log records in the last 10s; top: 'tick %d' x18, 'hot %s' x5"
+    )
+    assert records[-1].getMessage() == "tick 99"  # the 21st tick is sampled in
+
+
+def test_sampled_out_records_are_never_formatted():
+    class Expensive:
+        calls = 0
+
+        def __str__(self):
+            Expensive.calls += 1
+            return "x"
+
+    logger, records = _capturing_logger("sample.lazy", SamplingFilter(0.0))
+    logger.info("value %s", Expensive())
+    logger.debug("value %s", Expensive())
+    assert records == [] and Expensive.calls == 0
+
+
+def test_rate_limit_filter_token_bucket():
+    clock = _Clock()
+    limiter = RateLimitFilter(2.0, burst=3, summary_interval=60, clock=clock)
+    logger, records = _capturing_logger("rate.limited", limiter)
+    for _ in range(10):
+        logger.info("burst")
+    assert len(records) == 3
+    clock.now = 1.0  # refills two tokens
+    for _ in range(10):
+        logger.info("burst")
+    logger.info("other template")
+    assert len(records) == 6
+    limiter.flush_summary(logger)
+    assert records[-1].suppressed == 15
+    limiter.flush_summary(logger)  # nothing pending
+    assert len(records) == 7
+
+
+def test_warnings_and_errors_are_never_dropped():
+    sampler = SamplingFilter(0.0, summary_interval=60, clock=_Clock())
+    limiter = RateLimitFilter(0.001, burst=1, summary_interval=60, clock=_Clock())
+    logger, records = _capturing_logger("never.dropped", sampler, limiter)
+    for _ in range(3):
+        logger.info("noise")
+        logger.warning("careful")
+        logger.error("broken")
+    assert [r.levelno for r in records] == [logging.WARNING, logging.ERROR] * 3
+    strict = SamplingFilter(0.0, max_level=logging.WARNING)
+    logger, records = _capturing_logger("warnings.sampled", strict)
+    logger.warning("careful")
+    logger.error("broken")
+    assert [r.levelno for r in records] == [logging.ERROR]
+
+
+def test_summarizing_filter_is_abstract():
+    with pytest.raises(TypeError):
+        _SummarizingFilter()
+
+
+def test_summary_window_starts_at_first_drop():
+    clock = _Clock()
+    limiter = RateLimitFilter(1.0, summary_interval=10, clock=clock)
+    logger, records = _capturing_logger("rate.window", limiter)
+    clock.now = 100.0  # idle since the filter was created
+    logger.info("tick")
+    logger.info("tick")  # dropped: the window opens now
+    clock.now = 105.0
+    logger.info("tick")
+    assert not any(hasattr(r, "suppressed") for r in records)
+    clock.now = 110.0
+    logger.info("tick")
+    (summary,) = [r for r in records if hasattr(r, "suppressed")]
+    assert summary.getMessage().startswith("suppressed 1 log records in the last 10s")
+
+
+def test_summary_is_emitted_when_the_logger_goes_quiet():
+    limiter = RateLimitFilter(1.0, burst=1, summary_interval=0.05)
+    logger, records = _capturing_logger("rate.quiet", limiter)
+    for _ in range(5):
+        logger.info("burst")
+    deadline = time.monotonic() + 5
+    while not any(hasattr(r, "suppressed") for r in records) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [r.suppressed for r in records if hasattr(r, "suppressed")] == [4]
+
+
+def test_unique_messages_share_one_key():
+    limiter = RateLimitFilter(1.0, burst=2, max_keys=4, summary_interval=60)
+    logger, records = _capturing_logger("rate.fstrings", limiter)
+    for i in range(1000):
+        logger.info(f"user {i} logged in")
+    assert len(records) == 4 + 2  # four tracked templates, then one shared bucket
+    assert len(limiter._buckets) == 5 and len(limiter._keys) == 4
+    limiter.flush_summary(logger)
+    assert records[-1].suppressed == 994
+    assert "'<other messages>' x994" in records[-1].getMessage()
+
+
+def test_filters_count_every_record_across_threads():
+    sampler = SamplingFilter(0.5, summary_interval=60)
+    logger, records = _capturing_logger("sample.threads", sampler)
+
+    def log_many():
+        for i in range(2000):
+            logger.info("tick %d", i)
+            if i % 100 == 0:
+                sampler.flush_summary(logger)
+
+    with ThreadPoolExecutor(8) as pool:
+        for future in [pool.submit(log_many) for _ in range(8)]:
+            future.result()
+    sampler.flush_summary(logger)
+    kept = [r for r in records if not hasattr(r, "suppressed")]
+    suppressed = sum(r.suppressed for r in records if hasattr(r, "suppressed"))
+    assert len(kept) + suppressed == 8 * 2000
+    assert len(kept) == 8000
+
+
+def test_get_logger_installs_env_filters(monkeypatch):
+    monkeypatch.setenv("LOG_SAMPLE_RATE", "0.25")
+    monkeypatch.setenv("LOG_RATE_LIMIT", "100")
+    monkeypatch.setenv("LOG_FILTER_MAX_LEVEL", "warning")
+    logger = get_logger("env.sampled.logger")
+    assert [type(f) for f in logger.filters] == [SamplingFilter, RateLimitFilter]
+    assert logger.filters[0].rate == 0.25
+    assert [f.max_level for f in logger.filters] == [logging.WARNING] * 2
+
+
+def _record(msg):
+    return logging.LogRecord("file", logging.INFO, __file__, 1, msg, None, None)
+
+
+def test_file_handler_rotates_by_size_and_compresses(tmp_path):
+    path = tmp_path / "logs" / "app.log"
+    handler = CompressingRotatingFileHandler(path, max_bytes=100, backup_count=2)
+    for i in range(12):
+        handler.emit(_record(f"line {i:02d} " + "x" * 30))  # 39 bytes each: 2 per file
+    handler.close()
+    rotated = handler.rotated_files()
+    assert len(rotated) == 2 and all(p.endswith(".gz") for p in rotated)
+    assert gzip.open(rotated[-1]).read().decode().splitlines()[0].startswith("line 08")
+    assert path.read_text().startswith("line 10")
+
+
+def test_file_handler_rotates_by_age_without_compression(tmp_path):
+    path = tmp_path / "app.log"
+    handler = CompressingRotatingFileHandler(path, max_bytes=0, rotate_seconds=0.01, compress=False)
+    handler.emit(_record("old"))
+    time.sleep(0.02)
+    handler.emit(_record("new"))
+    handler.close()
+    (rotated,) = handler.rotated_files()
+    assert open(rotated).read() == "old\n"
+    assert path.read_text() == "new\n"
+
+
+def test_file_handler_only_prunes_its_own_rotations(tmp_path):
+    path = tmp_path / "app.log"
+    others = [
+        "app.log.lock",
+        "app.log.old",
+        "app.log.20240101-000000.bak",
+        "other.log.20240101-000000",
+    ]
+    for name in others:
+        (tmp_path / name).write_text("keep")
+    handler = CompressingRotatingFileHandler(path, max_bytes=10, backup_count=1, compress=False)
+    for i in range(4):
+        handler.emit(_record(f"line {i} xxxxxxxx"))
+    handler.close()
+    (rotated,) = handler.rotated_files()
+    assert re.fullmatch(r"app\.log\.\d{8}-\d{6}(\.\d+)?", os.path.basename(rotated))
+    assert all((tmp_path / name).read_text() == "keep" for name in others)
+
+
+def test_file_handler_ages_existing_file_from_its_mtime(tmp_path):
+    path = tmp_path / "app.log"
+    path.write_text("before restart\n")
+    os.utime(path, (time.time() - 120, time.time() - 120))
+    handler = CompressingRotatingFileHandler(path, max_bytes=0, rotate_seconds=60, compress=False)
+    handler.emit(_record("after restart"))
+    handler.close()
+    (rotated,) = handler.rotated_files()
+    assert open(rotated).read() == "before restart\n"
+    assert path.read_text() == "after restart\n"
+
+
+def test_get_logger_file_sink(monkeypatch, tmp_path):
+    path = tmp_path / "sink.log"
+    monkeypatch.setenv("LOG_FILE", str(path))
+    monkeypatch.setenv("LOG_FORMAT", "json")
+    monkeypatch.setenv("LOG_LEVEL", "INFO")
+    logger = get_logger("file.sink.logger")
+    other = get_logger("file.sink.other")
+    assert logger.handlers[0] is other.handlers[0]  # one queue and file per path
+    with request_context("req-9", "/files"):
+        logger.info("hello %s", "file")
+    deadline = time.monotonic() + 5
+    while not path.exists() or not path.read_text():  # flushed once the queue drains
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    other.warning("bye", exc_info=ZeroDivisionError("boom"))
+    close_file_sinks()
+    first, second = (json.loads(line) for line in path.read_text().splitlines())
+    assert first["message"] == "hello file" and first["request_id"] == "req-9"
+    assert second["logger"] == "file.sink.other"
+    assert second["message"].startswith("bye\nZeroDivisionError: boom")
+
+
+def test_file_handler_reports_failed_compression(tmp_path, capsys):
+    handler = CompressingRotatingFileHandler(tmp_path / "app.log", max_bytes=10)
+
+    def disk_full(target):
+        raise OSError("No space left on device")
+
+    handler._compress_and_prune = disk_full
+    handler.emit(_record("line 0 xxxxxxxx"))
+    handler.emit(_record("line 1 xxxxxxxx"))
+    handler.close()
+    err = capsys.readouterr().err
+    assert "Could not compress or prune" in err
+    assert "OSError: No space left on device" in err
+
+
+def test_get_logger_file_sink_is_never_colored(monkeypatch, tmp_path):
+    path = tmp_path / "plain.log"
+    monkeypatch.setenv("LOG_FILE", str(path))
+    monkeypatch.setenv("LOG_COLOR", "1")
+    monkeypatch.delenv("LOG_FORMAT", raising=False)
+    monkeypatch.setattr(sys.stdout, "isatty", lambda: True)  # started from a terminal
+    get_logger("file.sink.plain").warning("no escapes")
+    close_file_sinks()
+    text = path.read_text()
+    assert "WARNING" in text and "no escapes" in text
+    assert "\x1b[" not in text